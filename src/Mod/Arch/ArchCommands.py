@@ -729,6 +729,9 @@ def pruneIncluded(objectslist,strict=False):
     is removed only if the parent is also part of the selection."""
     import Draft
     newlist = []
+    # names of the given and kept objects, to avoid searching the lists
+    given = set([obj.Name for obj in objectslist])
+    kept = set()
     for obj in objectslist:
         toplevel = True
         if obj.isDerivedFrom("Part::Feature"):
@@ -746,10 +749,11 @@ def pruneIncluded(objectslist,strict=False):
                             else:
                                 toplevel = False
                     if (toplevel == False) and strict:
-                        if not(parent in objectslist) and not(parent in newlist):
+                        if not(parent.Name in given) and not(parent.Name in kept):
                             toplevel = True
         if toplevel:
             newlist.append(obj)
+            kept.add(obj.Name)
     return newlist
 
 def getAllChildren(objectlist):
@@ -25,7 +25,7 @@
 
 from __future__ import print_function
 
-import FreeCAD, Part, DraftGeomUtils, WorkingPlane, DraftVecUtils, math, Draft
+import FreeCAD, Part, DraftGeomUtils, WorkingPlane, DraftVecUtils, math, Draft, numpy, ForkProcesses
 from datetime import datetime
 
 # This is roughly based on the no-fit polygon algorithm, used in
@@ -35,6 +35,8 @@ from datetime import datetime
 TOLERANCE = 0.0001 # smaller than this, two points are considered equal
 DISCRETIZE = 4 # the number of segments in which arcs must be subdivided
 ROTATIONS = [0,90,180,270] # the possible rotations to try
+VECTORIZED = True # use the numpy engine instead of the OCC-based one
+PROCESSES = 0 # forked worker processes evaluating the rotations, 0 for none
 
 class Nester:
 
@@ -59,6 +61,8 @@ class Nester:
            Nester.TOLERANCE = 0.0001
            Nester.DISCRETIZE = 4
            Nester.ROTATIONS = [0,90,180,270]
+           Nester.VECTORIZED = True
+           Nester.PROCESSES = 0
            """
 
         self.objects = None
@@ -212,11 +216,19 @@ class Nester:
             nfaces.append([face[0],f])
         faces = nfaces
 
+        print("Everything OK (",datetime.now()-starttime,")")
+
+        if VECTORIZED:
+            sheets = self.nest(faces,normal)
+            if not sheets:
+                return
+            print("Run time:",datetime.now()-starttime)
+            self.results.append(sheets)
+            return sheets
+
         # container for sheets with a first, empty sheet
         sheets = [[]]
 
-        print("Everything OK (",datetime.now()-starttime,")")
-
         # main loop
 
         facenumber = 1
@@ -572,6 +584,89 @@ class Nester:
         return sheets
 
 
+    def nest(self,faces,normal):
+
+        """nest(faces,normal): internal function, places the discretized
+        faces, a list of [hashcode,face] pairs ordered by area, with the
+        vectorized engine. Returns a list of sheets like run(), or None
+        if the operation failed"""
+
+        # flatten the faces on the plane of the container
+
+        wp = WorkingPlane.plane()
+        wp.alignToPointAndAxis(self.container.CenterOfMass,FreeCAD.Vector(normal))
+        axis = wp.u.cross(wp.v)
+        origin = numpy.array([wp.position.x,wp.position.y,wp.position.z])
+        axes = numpy.array([[wp.u.x,wp.v.x],[wp.u.y,wp.v.y],[wp.u.z,wp.v.z]])
+
+        def flatten(points):
+            return (numpy.array([[p.x,p.y,p.z] for p in points])-origin).dot(axes)
+
+        box = flatten([v.Point for v in self.container.Vertexes])
+        container = (box[:,0].min(),box[:,1].min(),box[:,0].max(),box[:,1].max())
+
+        # biggest faces first
+
+        faces = list(reversed(faces))
+        pieces = []
+        for face in faces:
+            if not self.update():
+                return
+            polygon = cleanPolygon(flatten([v.Point for v in face[1].OuterWire.OrderedVertexes]),TOLERANCE)
+            parts = None
+            if polygon is not None:
+                parts = convexParts(polygon,TOLERANCE)
+            if not parts:
+                print("Unable to split a face into convex parts. Aborting")
+                return
+            pieces.append(parts)
+
+        engine = NestingEngine(container,pieces,ROTATIONS,TOLERANCE)
+        pool = NestingPool(engine,PROCESSES)
+        step = 100.0/len(faces)
+        placements = []
+        try:
+            for i in range(len(faces)):
+                print("Placing piece",i+1,"/",len(faces),": ",end="")
+                fitting = [r for r in range(len(ROTATIONS)) if engine.fits(i,r)]
+                if not fitting:
+                    print("One face doesn't fit in the container. Aborting")
+                    return
+                results = pool.evaluate(i,self.update)
+                if results is None:
+                    return
+                self.progress += step
+                available = [[res[0],r]+list(res[1:]) for r,res in enumerate(results) if res]
+                if available:
+                    # smallest X size, the first rotation if several are equal
+                    xmax,rotation,sheet,x,y = min(available,key=lambda sol: sol[0])
+                    print("Adding piece to sheet",sheet+1)
+                else:
+                    # smallest X size in the lower left corner of a new sheet
+                    rotation = min(fitting,key=lambda r: engine.variants[i][r][1])
+                    sheet = len(engine.sheets)
+                    x,y = container[0],container[1]
+                    print("Creating new sheet, adding piece to sheet",sheet+1)
+                pool.place(sheet,i,rotation,x,y)
+                placements.append([sheet,i,rotation,x,y])
+        finally:
+            pool.close()
+
+        # apply the placements to the faces
+
+        sheets = [[] for sheet in engine.sheets]
+        for sheet,i,rotation,x,y in placements:
+            hashcode = faces[i][0]
+            face = faces[i][1].copy()
+            offset = engine.variants[i][rotation][3]
+            face.translate(DraftVecUtils.scale(axis,wp.position.sub(face.CenterOfMass).dot(axis)))
+            if ROTATIONS[rotation]:
+                face.rotate(wp.position,axis,ROTATIONS[rotation])
+            face.translate(DraftVecUtils.scale(wp.u,x-offset[0]).add(DraftVecUtils.scale(wp.v,y-offset[1])))
+            sheets[sheet].append([hashcode,face])
+        return sheets
+
+
     def order(self,face,right=False):
 
         """order(face,[right]): returns a list of vertices
@@ -692,6 +787,519 @@ class Nester:
                 else:
                     print("error: hashCode mismatch with original object")
 
+# The vectorized engine. The pieces are flat polygons stored as numpy arrays
+# of counterclockwise 2D points, split into convex parts. The no-fit polygon
+# of two convex parts is their Minkowski difference, which is convex too, so
+# no OCC boolean operation is needed.
+
+
+def cross(a,b):
+
+    "cross(a,b): the z component of the cross products of arrays of 2D vectors"
+
+    return a[...,0]*b[...,1]-a[...,1]*b[...,0]
+
+
+def polygonArea(points):
+
+    """polygonArea(points): the signed area of a polygon, positive if its
+    points are counterclockwise"""
+
+    x = points[:,0]
+    y = points[:,1]
+    return 0.5*(numpy.dot(x,numpy.roll(y,-1))-numpy.dot(y,numpy.roll(x,-1)))
+
+
+def cleanPolygon(points,tolerance):
+
+    """cleanPolygon(points,tolerance): returns the polygon without duplicate
+    and aligned points, as an array of counterclockwise points, or None if
+    less than 3 points remain"""
+
+    points = [tuple(p) for p in points]
+    changed = True
+    while changed and len(points) > 2:
+        changed = False
+        for i in range(len(points)):
+            a = points[i-1]
+            b = points[i]
+            c = points[(i+1)%len(points)]
+            ab = (b[0]-a[0],b[1]-a[1])
+            bc = (c[0]-b[0],c[1]-b[1])
+            lab = math.hypot(ab[0],ab[1])
+            lbc = math.hypot(bc[0],bc[1])
+            aligned = (abs(ab[0]*bc[1]-ab[1]*bc[0]) <= tolerance*(lab+lbc)) and (ab[0]*bc[0]+ab[1]*bc[1] > 0)
+            if (lab <= tolerance) or aligned:
+                del points[i]
+                changed = True
+                break
+    if len(points) < 3:
+        return None
+    points = numpy.array(points,dtype=float)
+    if polygonArea(points) < 0:
+        points = points[::-1].copy()
+    return points
+
+
+def isConvex(points,tolerance):
+
+    "isConvex(points,tolerance): True if the counterclockwise polygon is convex"
+
+    d = numpy.roll(points,-1,axis=0)-points
+    dn = numpy.roll(d,-1,axis=0)
+    l = numpy.hypot(d[:,0],d[:,1])
+    return bool((cross(d,dn) >= -tolerance*(l+numpy.roll(l,-1))).all())
+
+
+def triangulate(points,tolerance):
+
+    """triangulate(points,tolerance): splits a counterclockwise polygon into
+    triangles by ear clipping. Returns a list of index triples, or None if
+    the polygon is self-intersecting"""
+
+    idx = list(range(len(points)))
+    triangles = []
+    while len(idx) > 3:
+        n = len(idx)
+        for k in range(n):
+            a,b,c = idx[k-1],idx[k],idx[(k+1)%n]
+            pa,pb,pc = points[a],points[b],points[c]
+            turn = cross(pb-pa,pc-pb)
+            if abs(turn) <= tolerance*(numpy.hypot(*(pb-pa))+numpy.hypot(*(pc-pb))):
+                if numpy.dot(pb-pa,pc-pb) > 0:
+                    # aligned vertex left by a former ear
+                    del idx[k]
+                    break
+                continue
+            if turn < 0:
+                continue
+            others = points[[i for i in idx if not i in (a,b,c)]]
+            inside = (cross(pb-pa,others-pa) >= -tolerance) \
+                   & (cross(pc-pb,others-pb) >= -tolerance) \
+                   & (cross(pa-pc,others-pc) >= -tolerance)
+            if not inside.any():
+                triangles.append((a,b,c))
+                del idx[k]
+                break
+        else:
+            return None
+    if len(idx) == 3:
+        triangles.append(tuple(idx))
+    return triangles
+
+
+def mergeParts(a,b):
+
+    """mergeParts(a,b): joins two counterclockwise polygons given as lists of
+    point indices along a shared edge, or returns None if they share no edge"""
+
+    for k in range(len(a)):
+        u,v = a[k],a[(k+1)%len(a)]
+        for l in range(len(b)):
+            if (b[l] == v) and (b[(l+1)%len(b)] == u):
+                # a from v to u, followed by b between u and v
+                return a[k+1:]+a[:k+1]+(b[l+1:]+b[:l+1])[1:-1]
+    return None
+
+
+def convexParts(points,tolerance):
+
+    """convexParts(points,tolerance): splits a counterclockwise polygon into
+    convex polygons, by merging the triangles of the polygon as long as they
+    stay convex. Returns a list of arrays of points, or None if the polygon
+    couldn't be split"""
+
+    if isConvex(points,tolerance):
+        return [points]
+    triangles = triangulate(points,tolerance)
+    if not triangles:
+        return None
+    parts = [list(t) for t in triangles]
+    merged = True
+    while merged:
+        merged = False
+        for i in range(len(parts)):
+            for j in range(i+1,len(parts)):
+                m = mergeParts(parts[i],parts[j])
+                if m and isConvex(points[m],tolerance):
+                    parts[i] = m
+                    del parts[j]
+                    merged = True
+                    break
+            if merged:
+                break
+    return [points[p] for p in parts]
+
+
+def minkowskiDifference(a,b):
+
+    """minkowskiDifference(a,b): the counterclockwise polygon a-b of two
+    convex counterclockwise polygons, given as lists of (x,y) tuples, made
+    by merging their edges by angle"""
+
+    def lowest(points):
+        i = min(range(len(points)),key=lambda i: (points[i][1],points[i][0]))
+        return points[i:]+points[:i]
+
+    p = lowest(a)
+    q = lowest([(-x,-y) for x,y in b])
+    p = p+p[:2]
+    q = q+q[:2]
+    np = len(p)-2
+    nq = len(q)-2
+    i = j = 0
+    result = []
+    while (i < np) or (j < nq):
+        result.append((p[i][0]+q[j][0],p[i][1]+q[j][1]))
+        c = (p[i+1][0]-p[i][0])*(q[j+1][1]-q[j][1])-(p[i+1][1]-p[i][1])*(q[j+1][0]-q[j][0])
+        if (c >= 0) and (i < np):
+            i += 1
+        if (c <= 0) and (j < nq):
+            j += 1
+    return numpy.array(result)
+
+
+class NestingEngine:
+
+
+    """NestingEngine(container,pieces,rotations,tolerance): places pieces in
+    rectangular sheets. container is (xmin,ymin,xmax,ymax), pieces a list of
+    pieces, each one being a list of convex counterclockwise polygons, and
+    rotations a list of angles in degrees. Each rotation of a piece is a
+    variant, placed by the lower left corner of its bounding box.
+
+    The no-fit polygons of two variants are cached by the shapes of both, so
+    identical pieces share them. The candidate positions of a variant on a sheet
+    are the corners of the inner fit rectangle (the positions that keep the
+    variant inside the container), and the vertices and edge intersections of
+    the no-fit polygons of the pieces already on the sheet. The free candidate
+    giving the smallest X size of the sheet is kept, like in the OCC engine.
+
+    evaluate(piece,rotation) returns the best position of a variant on the
+    existing sheets, place(sheet,piece,rotation,x,y) adds a variant to a sheet."""
+
+    chunk = 256 # number of candidates or no-fit polygon pairs processed at once
+
+    def __init__(self,container,pieces,rotations,tolerance):
+
+        self.container = container
+        self.rotations = list(rotations)
+        self.tolerance = tolerance
+        self.keys = {} # { rounded points:shape key }
+        self.parts = [] # the convex parts of each shape key
+        self.variants = [] # [ [ (key,width,height,offset), ... per rotation ], ... per piece ]
+        self.nfps = {} # { (placed key,moving key):[convex no-fit polygon,...] }
+        self.sheets = [] # [ [ (key,x,y), ... ], ... ]
+        self.boxes = [] # the bounding boxes of the placed variants of each sheet
+        self.extents = [] # the maximum X of the placed variants of each sheet
+        self.areas = [] # the free area of each sheet
+        self.full = set() # (sheet,key) of the shapes not fitting on a sheet, pieces are only added to sheets
+        self.pieceareas = [sum(polygonArea(p) for p in parts) for parts in pieces]
+        self.size = 2*max(len(p) for parts in pieces for p in parts) # points of the no-fit polygons
+        for parts in pieces:
+            variants = []
+            for rotation in self.rotations:
+                a = math.radians(rotation)
+                m = numpy.array([[math.cos(a),math.sin(a)],[-math.sin(a),math.cos(a)]])
+                rotparts = [p.dot(m) for p in parts]
+                allpoints = numpy.concatenate(rotparts)
+                offset = allpoints.min(axis=0)
+                size = allpoints.max(axis=0)-offset
+                key = self.getKey([p-offset for p in rotparts])
+                variants.append((key,size[0],size[1],offset))
+            self.variants.append(variants)
+
+    def getKey(self,parts):
+
+        "getKey(parts): returns the shape key of a list of convex parts"
+
+        rounded = numpy.round(numpy.concatenate(parts)/self.tolerance).astype(numpy.int64)
+        h = (tuple(len(p) for p in parts),tuple(rounded.ravel().tolist()))
+        key = self.keys.get(h)
+        if key is None:
+            key = len(self.parts)
+            self.keys[h] = key
+            self.parts.append(parts)
+        return key
+
+    def fits(self,piece,rotation):
+
+        "fits(piece,rotation): True if the variant fits in the container"
+
+        key,w,h,offset = self.variants[piece][rotation]
+        x0,y0,x1,y1 = self.container
+        return (w <= x1-x0+self.tolerance) and (h <= y1-y0+self.tolerance)
+
+    def place(self,sheet,piece,rotation,x,y):
+
+        """place(sheet,piece,rotation,x,y): places a variant on a sheet,
+        sheet being the number of the existing sheets to start a new one"""
+
+        key,w,h,offset = self.variants[piece][rotation]
+        if sheet == len(self.sheets):
+            self.sheets.append([])
+            self.boxes.append(numpy.zeros((0,4)))
+            self.extents.append(self.container[0])
+            self.areas.append((self.container[2]-self.container[0])*(self.container[3]-self.container[1]))
+        self.sheets[sheet].append((key,x,y))
+        self.areas[sheet] -= self.pieceareas[piece]
+        self.boxes[sheet] = numpy.vstack([self.boxes[sheet],[[x,y,x+w,y+h]]])
+        self.extents[sheet] = max(self.extents[sheet],x+w)
+
+    def nfp(self,placed,moving):
+
+        """nfp(placed,moving): the convex no-fit polygons of two shape keys, the
+        positions of moving overlapping placed placed at the origin. Returns
+        the arrays of their points, of their edges and of their edge lengths"""
+
+        n = self.nfps.get((placed,moving))
+        if n is None:
+            # the polygons are padded to the same number of points by
+            # repeating the last one, which gives edges of length 0
+            H = numpy.empty((len(self.parts[placed])*len(self.parts[moving]),self.size,2))
+            i = 0
+            for a in self.parts[placed]:
+                for b in self.parts[moving]:
+                    hull = minkowskiDifference(a.tolist(),b.tolist())
+                    H[i,:len(hull)] = hull
+                    H[i,len(hull):] = hull[-1]
+                    i += 1
+            D = numpy.roll(H,-1,axis=1)-H
+            n = (H,D,numpy.hypot(D[...,0],D[...,1]))
+            self.nfps[(placed,moving)] = n
+        return n
+
+    def evaluate(self,piece,rotation):
+
+        """evaluate(piece,rotation): returns (xsize,sheet,x,y), the best position
+        of a variant on the existing sheets, or None if there is no space left"""
+
+        key,w,h,offset = self.variants[piece][rotation]
+        if not self.fits(piece,rotation):
+            return None
+        x0,y0,x1,y1 = self.container
+        fit = (x0,y0,max(x0,x1-w),max(y0,y1-h))
+        best = None
+        for sheet in range(len(self.sheets)):
+            if (self.areas[sheet] < self.pieceareas[piece]-self.tolerance) or ((sheet,key) in self.full):
+                continue
+            position = self.findPosition(sheet,key,w,h,fit)
+            if not position:
+                self.full.add((sheet,key))
+            if position and ((best is None) or (position[0] < best[0]-self.tolerance)):
+                best = (position[0],sheet,position[1],position[2])
+        return best
+
+    def findPosition(self,sheet,key,w,h,fit):
+
+        """findPosition(sheet,key,w,h,fit): returns (xsize,x,y), the best free
+        position of a shape on a sheet inside the inner fit rectangle, or None"""
+
+        tol = self.tolerance
+        boxes = self.boxes[sheet]
+
+        # the no-fit polygons of the placed pieces whose bounding box
+        # doesn't overlap the inner fit rectangle can't forbid any position
+
+        near = numpy.nonzero((boxes[:,0]-w < fit[2]-tol) & (boxes[:,2] > fit[0]+tol) \
+                           & (boxes[:,1]-h < fit[3]-tol) & (boxes[:,3] > fit[1]+tol))[0]
+        hulls = []
+        edges = []
+        lengths = []
+        for n in near:
+            placed,px,py = self.sheets[sheet][n]
+            H,D,L = self.nfp(placed,key)
+            hulls.append(H+(px,py))
+            edges.append(D)
+            lengths.append(L)
+
+        candidates = [numpy.array([[fit[0],fit[1]],[fit[2],fit[1]],[fit[0],fit[3]],[fit[2],fit[3]]])]
+        if hulls:
+            H = numpy.concatenate(hulls)
+            D = numpy.concatenate(edges)
+            L = numpy.concatenate(lengths)
+            lo = H.min(axis=1)
+            hi = H.max(axis=1)
+            candidates.append(H.reshape(-1,2))
+            candidates.extend(self.fitIntersections(H,D,fit))
+            candidates.extend(self.hullIntersections(H,D,lo,hi))
+        c = numpy.concatenate(candidates)
+        c = c[(c[:,0] >= fit[0]-tol) & (c[:,0] <= fit[2]+tol) & (c[:,1] >= fit[1]-tol) & (c[:,1] <= fit[3]+tol)]
+        c[:,0] = numpy.clip(c[:,0],fit[0],fit[2])
+        c[:,1] = numpy.clip(c[:,1],fit[1],fit[3])
+
+        # order by the X size of the sheet, then by X and Y
+
+        xsize = numpy.maximum(self.extents[sheet],c[:,0]+w)
+        order = numpy.lexsort((c[:,1],numpy.round(c[:,0]/tol),numpy.round(xsize/tol)))
+        c = c[order]
+        xsize = xsize[order]
+        if not hulls:
+            return (xsize[0],c[0,0],c[0,1])
+        for start in range(0,len(c),self.chunk):
+            free = numpy.nonzero(~self.blocked(c[start:start+self.chunk],H,D,L,lo,hi))[0]
+            if len(free):
+                i = start+free[0]
+                return (xsize[i],c[i,0],c[i,1])
+        return None
+
+    def blocked(self,points,H,D,L,lo,hi):
+
+        """blocked(points,H,D,L,lo,hi): for each point, True if it is strictly
+        inside one of the hulls H, of edges D of lengths L and bounding
+        boxes lo,hi"""
+
+        tol = self.tolerance
+        p = points[:,None,:]
+        inbox = (p[...,0] > lo[:,0]+tol) & (p[...,0] < hi[:,0]-tol) \
+              & (p[...,1] > lo[:,1]+tol) & (p[...,1] < hi[:,1]-tol)
+        pindex,hindex = numpy.nonzero(inbox)
+        result = numpy.zeros(len(points),dtype=bool)
+        if len(pindex):
+            # inside if at more than tol on the left of every edge
+            d = cross(D[hindex],points[pindex][:,None,:]-H[hindex])
+            inside = ((d > tol*L[hindex]) | (L[hindex] <= tol)).all(axis=1)
+            result[pindex[inside]] = True
+        return result
+
+    def fitIntersections(self,H,D,fit):
+
+        """fitIntersections(H,D,fit): the intersections of the edges of the
+        hulls with the sides of the inner fit rectangle"""
+
+        points = []
+        P = H.reshape(-1,2)
+        D = D.reshape(-1,2)
+        for axis,values in ((0,(fit[0],fit[2])),(1,(fit[1],fit[3]))):
+            other = 1-axis
+            for value in values:
+                with numpy.errstate(divide="ignore",invalid="ignore"):
+                    t = (value-P[:,axis])/D[:,axis]
+                ok = (D[:,axis] != 0) & (t >= 0) & (t <= 1)
+                p = numpy.empty((int(ok.sum()),2))
+                p[:,axis] = value
+                p[:,other] = P[ok,other]+t[ok]*D[ok,other]
+                points.append(p)
+        return points
+
+    def hullIntersections(self,H,D,lo,hi):
+
+        """hullIntersections(H,D,lo,hi): the intersections of the edges of
+        the pairs of hulls whose bounding boxes overlap"""
+
+        tol = self.tolerance
+        overlap = (lo[:,None,0] <= hi[None,:,0]+tol) & (hi[:,None,0] >= lo[None,:,0]-tol) \
+                & (lo[:,None,1] <= hi[None,:,1]+tol) & (hi[:,None,1] >= lo[None,:,1]-tol)
+        first,second = numpy.nonzero(numpy.triu(overlap,1))
+        points = []
+        for start in range(0,len(first),self.chunk):
+            i = first[start:start+self.chunk]
+            j = second[start:start+self.chunk]
+            p0 = H[i][:,:,None,:]
+            d0 = D[i][:,:,None,:]
+            p1 = H[j][:,None,:,:]
+            d1 = D[j][:,None,:,:]
+            den = cross(d0,d1)
+            r = p1-p0
+            with numpy.errstate(divide="ignore",invalid="ignore"):
+                t = cross(r,d1)/den
+                u = cross(r,d0)/den
+                ok = (den != 0) & (t >= 0) & (t <= 1) & (u >= 0) & (u <= 1)
+                points.append((p0+t[...,None]*d0)[ok])
+        return points
+
+
+_engine = None # the NestingEngine of the worker processes, inherited from the parent
+
+
+def _nestingWorker(tasks,results):
+
+    """the loop of a nesting process: evaluates (piece,rotation) tasks, and
+    applies the placements to its own copy of the engine"""
+
+    while True:
+        task = tasks.get()
+        if task is None:
+            break
+        if task[0] == "place":
+            _engine.place(*task[1:])
+        else:
+            results.put((task[2],_engine.evaluate(task[1],task[2])))
+
+
+class NestingPool:
+
+
+    """NestingPool(engine,processes): evaluates the rotations of a piece in
+    forked worker processes (see ForkProcesses). Each worker has a copy of
+    the engine, forked from this one, and receives all placements. If
+    processes can't be forked, or if a worker stops, the rotations are
+    evaluated in this process."""
+
+    def __init__(self,engine,processes=0):
+
+        global _engine
+        self.engine = engine
+        self.pool = None
+        if (processes > 1) and (len(engine.rotations) > 1):
+            _engine = engine
+            self.pool = ForkProcesses.Pool(_nestingWorker,min(processes,len(engine.rotations)),private=True)
+            if not self.pool.workers:
+                self.close()
+
+    def evaluate(self,piece,update=None):
+
+        """evaluate(piece,[update]): returns the results of evaluate() for each
+        rotation of the piece. update() is called while waiting, if it returns
+        False the evaluation stops and None is returned"""
+
+        count = len(self.engine.rotations)
+        if not self.pool:
+            results = []
+            for rotation in range(count):
+                if update and not update():
+                    return None
+                results.append(self.engine.evaluate(piece,rotation))
+            return results
+        try:
+            import Queue as queue
+        except ImportError:
+            import queue
+        for rotation in range(count):
+            self.pool.put(("evaluate",piece,rotation),rotation%len(self.pool.workers))
+        results = {}
+        while len(results) < count:
+            if update and not update():
+                return None
+            try:
+                rotation,result = self.pool.get(0.1)
+            except queue.Empty:
+                continue
+            except ForkProcesses.WorkerError:
+                print("Nesting processes stopped, continuing in this process")
+                self.close()
+                return self.evaluate(piece,update)
+            results[rotation] = result
+        return [results[rotation] for rotation in range(count)]
+
+    def place(self,sheet,piece,rotation,x,y):
+
+        "place(sheet,piece,rotation,x,y): places a variant in all the engines"
+
+        self.engine.place(sheet,piece,rotation,x,y)
+        if self.pool:
+            self.pool.putAll(("place",sheet,piece,rotation,x,y))
+
+    def close(self):
+
+        "close(): stops the worker processes"
+
+        global _engine
+        if self.pool:
+            self.pool.close()
+            self.pool = None
+        _engine = None
+
 
 def test():
 
@@ -706,3 +1314,49 @@ def test():
         result = n.run()
         if result:
             n.show()
+
+
+def benchmark(count=12,processes=0,seed=1):
+
+    """benchmark([count,processes,seed]): nests count random rectangular and
+    L-shaped panels in 2440x1220 sheets, with the OCC engine and with the
+    vectorized engine. Prints and returns the run time, the number of sheets
+    and the used length of the last sheet of both. The OCC engine takes long,
+    keep count small"""
+
+    import random, time
+    global VECTORIZED, PROCESSES
+    rnd = random.Random(seed)
+    V = FreeCAD.Vector
+    container = Part.Face(Part.makePolygon([V(0,0,0),V(2440,0,0),V(2440,1220,0),V(0,1220,0),V(0,0,0)]))
+    shapes = []
+    for i in range(count):
+        w = rnd.uniform(200,900)
+        h = rnd.uniform(100,500)
+        if i%3:
+            pts = [V(0,0,0),V(w,0,0),V(w,h,0),V(0,h,0)]
+        else:
+            pts = [V(0,0,0),V(w,0,0),V(w,h/2,0),V(w/2,h/2,0),V(w/2,h,0),V(0,h,0)]
+        f = Part.Face(Part.makePolygon(pts+[pts[0]]))
+        f.translate(V(3000,i*600,0))
+        shapes.append(f)
+    settings = (VECTORIZED,PROCESSES)
+    report = {}
+    try:
+        for name,vectorized in (("OCC",False),("numpy",True)):
+            VECTORIZED = vectorized
+            PROCESSES = processes
+            n = Nester(container,shapes)
+            t = time.time()
+            sheets = n.run()
+            t = time.time()-t
+            if sheets:
+                length = max(f[1].BoundBox.XMax for f in sheets[-1])-container.BoundBox.XMin
+                report[name] = (t,len(sheets),length)
+            else:
+                report[name] = (t,None,None)
+    finally:
+        VECTORIZED,PROCESSES = settings
+    for name in ("OCC","numpy"):
+        print(name,"engine: time",report[name][0],"s, sheets",report[name][1],", length of the last sheet",report[name][2])
+    return report
@@ -52,6 +52,224 @@ __url__ = "http://www.freecadweb.org"
 
 verbose = True # change this for silent recomputes
 
+# the ScheduleIndex of each open document, by document name
+_indexes = {}
+
+# the compiled filters, by filter string
+_filters = {}
+
+# the document observer updating the indexes, registered on first use
+_observer = None
+
+
+def getIndex(doc):
+
+    """getIndex(doc): returns the ScheduleIndex of the given document, shared
+    by all the schedules of this document"""
+
+    global _observer
+    if _observer is None:
+        _observer = _ScheduleObserver()
+        FreeCAD.addDocumentObserver(_observer)
+    index = _indexes.get(doc.Name)
+    if index is None:
+        index = ScheduleIndex(doc)
+        _indexes[doc.Name] = index
+    return index
+
+
+def compileFilter(filt):
+
+    """compileFilter(filt): returns a function telling if an object passes the
+    given schedule filter, a list of key:value pairs separated by ; where the
+    keys are Name, Label, Type or Role, optionally preceded by ! to negate them"""
+
+    if filt in _filters:
+        return _filters[filt]
+    import Draft
+    def getRole(o):
+        if hasattr(o,"IfcRole"):
+            return o.IfcRole.upper()
+        elif hasattr(o,"Role"):
+            return o.Role.upper()
+        return None
+    getters = {
+        "NAME": (lambda o: o.Name.upper(), False),
+        "LABEL": (lambda o: o.Label.upper(), False),
+        "TYPE": (lambda o: Draft.getType(o).upper(), True),
+        "ROLE": (getRole, True),
+    }
+    tests = []
+    for f in filt.split(";"):
+        args = [a.strip() for a in f.strip().split(":")]
+        k = args[0].upper()
+        negate = k.startswith("!")
+        if negate:
+            k = k[1:]
+        if (k in getters) and (len(args) > 1):
+            getter,exact = getters[k]
+            tests.append((getter,exact,negate,args[1].upper()))
+    def accept(o):
+        for getter,exact,negate,value in tests:
+            v = getter(o)
+            if v is None:
+                # objects without role never match
+                ok = False
+            elif exact:
+                ok = (v == value)
+            else:
+                ok = (value in v)
+            if ok == negate:
+                return False
+        return True
+    _filters[filt] = accept
+    return accept
+
+
+class ScheduleIndex:
+
+    """ScheduleIndex(doc): the objects of a document as seen by schedules.
+    It is kept up to date by a document observer: structure is increased when
+    objects are added or removed or when their links, labels or roles change,
+    which invalidates the cached object lists of the rows, and the names of
+    all changed objects are logged, so a row can tell if any of its objects
+    has changed since it was computed."""
+
+    # properties that change the object lists or the filters
+    structureprops = ["Label","IfcRole","Role","Proxy"]
+
+    # maximum length of the change log
+    maxlog = 100000
+
+    def __init__(self,doc):
+        self.doc = doc
+        self.structure = 0
+        self.tick = 0
+        self.logstart = 0
+        self.log = []
+        self.built = None
+        self.contents = {}
+        self.groups = {}
+
+    def addedOrRemoved(self):
+        self.structure += 1
+
+    def changed(self,obj,prop):
+        if prop in self.structureprops:
+            self.structure += 1
+        else:
+            try:
+                if obj.getTypeIdOfProperty(prop).startswith("App::PropertyLink"):
+                    self.structure += 1
+            except Exception:
+                pass
+        if len(self.log) >= self.maxlog:
+            self.logstart = self.tick
+            self.log = []
+        self.log.append(obj.Name)
+        self.tick += 1
+
+    def reset(self):
+        # undo, redo: everything must be computed again
+        self.structure += 1
+        self.logstart = self.tick
+        self.log = []
+
+    def isValid(self,tick,names,extra):
+        """isValid(tick,names,extra): tells if a row computed at the given tick
+        from the objects of the given sets of names is still up to date"""
+        if tick == self.tick:
+            return True
+        if tick < self.logstart:
+            return False
+        for n in self.log[tick-self.logstart:]:
+            if (n in names) or (n in extra):
+                return False
+        return True
+
+    def getObjects(self,objects,filt,schedule):
+        """getObjects(objects,filt,schedule): the objects of a schedule row, from
+        the semicolon-separated names in objects, or the whole document if empty,
+        with their group contents, pruned and filtered. Returns the list of
+        objects and the set of their names"""
+        if self.built != self.structure:
+            self.contents = {}
+            self.groups = {}
+            self.built = self.structure
+        key = (objects,filt,schedule.Name)
+        if key in self.contents:
+            return self.contents[key]
+        objs = self.getContents(objects)
+        # remove the schedule object and its result from the list
+        skip = [schedule.Name]
+        if schedule.Result:
+            skip.append(schedule.Result.Name)
+        objs = [o for o in objs if not o.Name in skip]
+        if filt:
+            accept = compileFilter(filt)
+            objs = [o for o in objs if accept(o)]
+        self.contents[key] = (objs,frozenset([o.Name for o in objs]))
+        return self.contents[key]
+
+    def getContents(self,objects):
+        """getContents(objects): the unfiltered objects of a schedule row"""
+        if objects in self.groups:
+            return self.groups[objects]
+        import Draft,Arch
+        if objects:
+            objs = objects.split(";")
+            objs = [self.doc.getObject(o) for o in objs]
+            objs = [o for o in objs if o != None]
+        else:
+            objs = self.doc.Objects
+        if len(objs) == 1:
+            # remove object itself if the object is a group
+            if objs[0].isDerivedFrom("App::DocumentObjectGroup"):
+                objs = objs[0].Group
+        objs = Draft.getGroupContents(objs,walls=True,addgroups=True)
+        objs = Arch.pruneIncluded(objs,strict=True)
+        self.groups[objects] = objs
+        return objs
+
+
+class _ScheduleObserver:
+
+    "the document observer keeping the schedule indexes up to date"
+
+    def getIndex(self,obj):
+        try:
+            return _indexes.get(obj.Document.Name)
+        except Exception:
+            return None
+
+    def slotCreatedObject(self,obj):
+        index = self.getIndex(obj)
+        if index:
+            index.addedOrRemoved()
+
+    def slotDeletedObject(self,obj):
+        index = self.getIndex(obj)
+        if index:
+            index.addedOrRemoved()
+
+    def slotChangedObject(self,obj,prop):
+        index = self.getIndex(obj)
+        if index:
+            index.changed(obj,prop)
+
+    def slotUndoDocument(self,doc):
+        if doc.Name in _indexes:
+            _indexes[doc.Name].reset()
+
+    def slotRedoDocument(self,doc):
+        if doc.Name in _indexes:
+            _indexes[doc.Name].reset()
+
+    def slotDeletedDocument(self,doc):
+        if doc.Name in _indexes:
+            del _indexes[doc.Name]
+
+
 
 class _CommandArchSchedule:
 
@@ -105,6 +323,10 @@ class _ArchSchedule:
         obj.Result.set("B1","Value")
         obj.Result.set("C1","Unit")
         obj.Result.setStyle('A1:C1', 'bold', 'add')
+        index = getIndex(obj.Document)
+        if not hasattr(self,"rows"):
+            self.rows = {}
+        rows = {}
         for i in range(len(obj.Description)):
             if not obj.Description[i]:
                 # blank line
@@ -119,123 +341,82 @@ class _ArchSchedule:
                 l= "OPERATION: "+obj.Description[i]
                 print (l)
                 print (len(l)*"=")
-            # get list of objects
-            objs = obj.Objects[i]
             val = obj.Value[i]
             if val:
-                import Draft,Arch
-                if objs:
-                    objs = objs.split(";")
-                    objs = [FreeCAD.ActiveDocument.getObject(o) for o in objs]
-                    objs = [o for o in objs if o != None]
-                else:
-                    objs = FreeCAD.ActiveDocument.Objects
-                if len(objs) == 1:
-                    # remove object itself if the object is a group
-                    if objs[0].isDerivedFrom("App::DocumentObjectGroup"):
-                        objs = objs[0].Group
-                objs = Draft.getGroupContents(objs,walls=True,addgroups=True)
-                objs = Arch.pruneIncluded(objs,strict=True)
-                # remove the schedule object and its result from the list
-                objs = [o for o in objs if not o == obj]
-                objs = [o for o in objs if not o == obj.Result]
-                if obj.Filter[i]:
-                    # apply filters
-                    nobjs = []
-                    for o in objs:
-                        ok = True
-                        for f in obj.Filter[i].split(";"):
-                            args = [a.strip() for a in f.strip().split(":")]
-                            if args[0].upper() == "NAME":
-                                if not(args[1].upper() in o.Name.upper()):
-                                    ok = False
-                            elif args[0].upper() == "!NAME":
-                                if (args[1].upper() in o.Name.upper()):
-                                    ok = False
-                            elif args[0].upper() == "LABEL":
-                                if not(args[1].upper() in o.Label.upper()):
-                                    ok = False
-                            elif args[0].upper() == "!LABEL":
-                                if args[1].upper() in o.Label.upper():
-                                    ok = False
-                            elif args[0].upper() == "TYPE":
-                                if Draft.getType(o).upper() != args[1].upper():
-                                    ok = False
-                            elif args[0].upper() == "!TYPE":
-                                if Draft.getType(o).upper() == args[1].upper():
-                                    ok = False
-                            elif args[0].upper() == "ROLE":
-                                if hasattr(o,"IfcRole"):
-                                    if o.IfcRole.upper() != args[1].upper():
-                                        ok = False
-                                elif hasattr(o,"Role"):
-                                    if o.Role.upper() != args[1].upper():
-                                        ok = False
-                                else:
-                                    ok = False
-                            elif args[0].upper() == "!ROLE":
-                                if hasattr(o,"Role"):
-                                    if o.IfcRole.upper() == args[1].upper():
-                                        ok = False
-                                elif hasattr(o,"Role"):
-                                    if o.Role.upper() == args[1].upper():
-                                        ok = False
-                        if ok:
-                            nobjs.append(o)
-                    objs = nobjs
-                # perform operation
-                if val.upper() == "COUNT":
-                    val = len(objs)
+                key = (obj.Objects[i],obj.Filter[i],val,obj.Unit[i])
+                objs,names = index.getObjects(obj.Objects[i],obj.Filter[i],obj)
+                row = self.rows.get(key)
+                # counts only depend on the list of objects
+                if row and (row[1] == names) and ((val.upper() == "COUNT") or index.isValid(row[0],row[1],row[2])):
                     if verbose:
-                        print (val, ",".join([o.Label for o in objs]))
-                    obj.Result.set("B"+str(i+2),str(val))
+                        print ("unchanged: "+row[3])
                 else:
-                    vals = val.split(".")
-                    sumval = 0
-                    for o in objs:
-                        if verbose:
-                            l = o.Name+" ("+o.Label+"):"
-                            print (l+(40-len(l))*" ",)
-                        try:
-                            d = o
-                            for v in vals[1:]:
-                                d = getattr(d,v)
-                            if verbose:
-                                print (d)
-                            if hasattr(d,"Value"):
-                                d = d.Value
-                        except:
-                            FreeCAD.Console.PrintWarning(translate("Arch","Unable to retrieve value from object")+": "+o.Name+"."+".".join(vals)+"\n")
-                        else:
-                            if not sumval:
-                                sumval = d
-                            else:
-                                sumval += d
-                    val = sumval
-                    # get unit
-                    if obj.Unit[i]:
-                        ustr = obj.Unit[i]
-                        if sys.version_info.major < 3:
-                            ustr = ustr.encode("utf8")
-                        unit = ustr.replace("²","^2")
-                        unit = unit.replace("³","^3")
-                        if "2" in unit:
-                            tp = FreeCAD.Units.Area
-                        elif "3" in unit:
-                            tp = FreeCAD.Units.Volume
-                        elif "deg" in unit:
-                            tp = FreeCAD.Units.Angle
-                        else:
-                            tp = FreeCAD.Units.Length
-                        q = FreeCAD.Units.Quantity(val,tp)
-                        obj.Result.set("B"+str(i+2),str(q.getValueAs(unit).Value))
-                        obj.Result.set("C"+str(i+2),ustr)
-                    else:
-                        obj.Result.set("B"+str(i+2),str(val))
-                    if verbose:
-                        print ("TOTAL:"+34*" "+str(val))
+                    row = self.computeRow(index.tick,objs,names,val,obj.Unit[i])
+                rows[key] = row
+                obj.Result.set("B"+str(i+2),row[3])
+                if row[4]:
+                    obj.Result.set("C"+str(i+2),row[4])
+        # only keep the results of the current rows
+        self.rows = rows
         obj.Result.recompute()
 
+    def computeRow(self,tick,objs,names,val,ustr):
+        """computeRow(tick,objs,names,val,ustr): computes the value and unit cells
+        of a row from its objects. Returns (tick,names,extra,value,unit), where
+        extra are the names of other objects the values were taken from"""
+        # perform operation
+        if val.upper() == "COUNT":
+            val = len(objs)
+            if verbose:
+                print (val, ",".join([o.Label for o in objs]))
+            return (tick,names,frozenset(),str(val),None)
+        vals = val.split(".")
+        sumval = 0
+        # other objects the values are taken from
+        extra = set()
+        for o in objs:
+            if verbose:
+                l = o.Name+" ("+o.Label+"):"
+                print (l+(40-len(l))*" ",)
+            try:
+                d = o
+                for v in vals[1:]:
+                    d = getattr(d,v)
+                    if hasattr(d,"InList") and hasattr(d,"Name"):
+                        extra.add(d.Name)
+                if verbose:
+                    print (d)
+                if hasattr(d,"Value"):
+                    d = d.Value
+            except:
+                FreeCAD.Console.PrintWarning(translate("Arch","Unable to retrieve value from object")+": "+o.Name+"."+".".join(vals)+"\n")
+            else:
+                if not sumval:
+                    sumval = d
+                else:
+                    sumval += d
+        val = sumval
+        extra = frozenset(extra)
+        if verbose:
+            print ("TOTAL:"+34*" "+str(val))
+        # get unit
+        if ustr:
+            if sys.version_info.major < 3:
+                ustr = ustr.encode("utf8")
+            unit = ustr.replace("²","^2")
+            unit = unit.replace("³","^3")
+            if "2" in unit:
+                tp = FreeCAD.Units.Area
+            elif "3" in unit:
+                tp = FreeCAD.Units.Volume
+            elif "deg" in unit:
+                tp = FreeCAD.Units.Angle
+            else:
+                tp = FreeCAD.Units.Length
+            q = FreeCAD.Units.Quantity(val,tp)
+            return (tick,names,extra,str(q.getValueAs(unit).Value),ustr)
+        return (tick,names,extra,str(val),None)
+
     def __getstate__(self):
         return self.Type
 
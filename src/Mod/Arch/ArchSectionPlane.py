@@ -21,7 +21,7 @@
 #*                                                                         *
 #***************************************************************************
 
-import FreeCAD,WorkingPlane,math,Draft,ArchCommands,DraftVecUtils,ArchComponent
+import FreeCAD,WorkingPlane,math,Draft,ArchCommands,DraftVecUtils,ArchComponent,ForkProcesses
 from FreeCAD import Vector
 if FreeCAD.GuiUp:
     import FreeCADGui
@@ -96,9 +96,87 @@ def makeSectionView(section,name="View"):
     return view
 
 
-def getCutShapes(objs,section,showHidden):
+def cutSolid(sol,cutface,cutvolume,invcutvolume,showHidden):
+
+    """cutSolid(solid,cutface,cutvolume,invcutvolume,showHidden): cuts a solid,
+    returns the list of remaining solids, the list of section faces and the
+    hidden part (None if showHidden is False)"""
 
     import Part,DraftGeomUtils
+    c = sol.cut(cutvolume)
+    s = sol.section(cutface)
+    sshapes = []
+    try:
+        wires = DraftGeomUtils.findWires(s.Edges)
+        for w in wires:
+            f = Part.Face(w)
+            sshapes.append(f)
+    except Part.OCCError:
+        #print "ArchDrawingView: unable to get a face"
+        sshapes.append(s)
+    hidden = None
+    if showHidden:
+        hidden = sol.cut(invcutvolume)
+    return c.Solids,sshapes,hidden
+
+
+_cutdata = None # the solids and cut volumes of the cut processes, inherited from the parent
+
+
+def _cutBreps(i):
+
+    "cuts a solid in a cut process, the results are returned as BRep strings"
+
+    import Part
+    solids,cutface,cutvolume,invcutvolume,showHidden = _cutdata
+    c,s,h = cutSolid(solids[i],cutface,cutvolume,invcutvolume,showHidden)
+    if h:
+        h = h.exportBrepToString()
+    return (Part.makeCompound(c).exportBrepToString(),Part.makeCompound(s).exportBrepToString(),h)
+
+
+def cutSolids(solids,cutface,cutvolume,invcutvolume,showHidden,processes=0):
+
+    """cutSolids(solids,cutface,cutvolume,invcutvolume,showHidden,[processes]):
+    returns the results of cutSolid() for a list of solids. With more than one
+    process, the solids are cut by that many forked worker processes (see
+    ForkProcesses). If processes can't be forked the solids are cut in this
+    process, as are the solids a worker fails on"""
+
+    import Part
+    global _cutdata
+    results = [None]*len(solids)
+    if processes > 1:
+        _cutdata = (solids,cutface,cutvolume,invcutvolume,showHidden)
+        try:
+            # the solids not cut by the workers are cut below
+            breps = ForkProcesses.map(_cutBreps,range(len(solids)),processes,fallback=lambda i: None)
+        finally:
+            _cutdata = None
+        for i,r in enumerate(breps):
+            if r:
+                shapes = []
+                for brep in r:
+                    sh = None
+                    if brep:
+                        sh = Part.Shape()
+                        sh.importBrepFromString(brep)
+                    shapes.append(sh)
+                results[i] = (shapes[0].childShapes(),shapes[1].childShapes(),shapes[2])
+    for i,sol in enumerate(solids):
+        if results[i] is None:
+            results[i] = cutSolid(sol,cutface,cutvolume,invcutvolume,showHidden)
+    return results
+
+
+def getCutShapes(objs,section,showHidden):
+
+    """getCutShapes(objs,section,showHidden): returns the cut solids, the
+    hidden shapes and the section shapes of the given objects, and the cut
+    face and volumes. Solids whose bounding box is entirely on one side of the
+    plane are not cut. The cut results are kept by the section plane, keyed
+    by the solid and the plane, so only changed solids are cut again"""
+
     shapes = []
     hshapes = []
     sshapes = []
@@ -115,28 +193,57 @@ def getCutShapes(objs,section,showHidden):
                 shapes.append(o.Shape)
     cutface,cutvolume,invcutvolume = ArchCommands.getCutVolume(section.Shape.copy(),shapes)
     if cutvolume:
-        nsh = []
+        ce = cutface.CenterOfMass
+        ax = cutface.normalAt(0,0)
+        if cutvolume.CenterOfMass.sub(ce).dot(ax) < 0:
+            # ax must point into the cut volume
+            ax = ax.negative()
+        prec = Draft.precision()
+        tol = 10**(-prec)
+        plane = (round(ax.x,prec),round(ax.y,prec),round(ax.z,prec),round(ce.dot(ax),prec))
+        oldcache = {}
+        if hasattr(section,"Proxy") and getattr(section.Proxy,"cutcache",None):
+            oldcache = section.Proxy.cutcache
+        cache = {} # { (solid hashCode,plane) : [ [solid,result], ... ] }
+        results = []
+        tocut = []
         for sh in shapes:
             for sol in sh.Solids:
                 if sol.Volume < 0:
                     sol.reverse()
-                c = sol.cut(cutvolume)
-                s = sol.section(cutface)
-                try:
-                    wires = DraftGeomUtils.findWires(s.Edges)
-                    for w in wires:
-                        f = Part.Face(w)
-                        sshapes.append(f)
-                    #s = Part.Wire(s.Edges)
-                    #s = Part.Face(s)
-                except Part.OCCError:
-                    #print "ArchDrawingView: unable to get a face"
-                    sshapes.append(s)
-                nsh.extend(c.Solids)
-                #sshapes.append(s)
-                if showHidden:
-                    c = sol.cut(invcutvolume)
-                    hshapes.append(c)
+                bb = sol.BoundBox
+                dist = [FreeCAD.Vector(x,y,z).sub(ce).dot(ax) for x in (bb.XMin,bb.XMax) for y in (bb.YMin,bb.YMax) for z in (bb.ZMin,bb.ZMax)]
+                if min(dist) > tol:
+                    # entirely in the cut volume
+                    results.append([sol,([],[],sol if showHidden else None)])
+                    continue
+                if max(dist) < -tol:
+                    # not cut at all
+                    results.append([sol,([sol],[],None)])
+                    continue
+                key = (sol.hashCode(),plane)
+                entry = [sol,None]
+                for old in oldcache.get(key,[]):
+                    if old[0].isSame(sol) and ((old[1][2] is not None) or (not showHidden)):
+                        entry[1] = old[1]
+                        break
+                else:
+                    tocut.append(entry)
+                cache.setdefault(key,[]).append(entry)
+                results.append(entry)
+        if tocut:
+            processes = FreeCAD.ParamGet("User parameter:BaseApp/Preferences/Mod/Arch").GetInt("SectionProcesses",0)
+            cuts = cutSolids([e[0] for e in tocut],cutface,cutvolume,invcutvolume,showHidden,processes)
+            for entry,r in zip(tocut,cuts):
+                entry[1] = r
+        if hasattr(section,"Proxy"):
+            section.Proxy.cutcache = cache
+        nsh = []
+        for sol,r in results:
+            nsh.extend(r[0])
+            sshapes.extend(r[1])
+            if showHidden and r[2]:
+                hshapes.append(r[2])
         shapes = nsh
     return shapes,hshapes,sshapes,cutface,cutvolume,invcutvolume
 
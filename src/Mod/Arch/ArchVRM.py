@@ -34,7 +34,7 @@ import FreeCAD,math,Part,ArchCommands,DraftVecUtils,DraftGeomUtils
 #  It is used by the "Solid" mode of Arch views in TechDraw and Drawing,
 #  and is called from ArchSectionPlane code.
 
-MAXLOOP = 10 # the max number of loop before abort
+GRIDSPAN = 16 # faces spanning more grid cells than this are compared with all faces when sorting
 
 # WARNING: in this module, faces are lists whose first item is the actual OCC face, the
 # other items being additional information such as color, etc.
@@ -473,8 +473,101 @@ class Renderer:
         else:
             return None
 
+    def sortData(self,face):
+        "returns the bounding box, normal and vertices of a face as plain floats, for sorting"
+        f = face[0]
+        b = f.BoundBox
+        n = f.normalAt(0,0)
+        verts = [(v.Point.x,v.Point.y,v.Point.z) for v in f.Vertexes]
+        return (b.XMin,b.YMin,b.ZMin,b.XMax,b.YMax,b.ZMax),(n.x,n.y,n.z),verts
+
+    def overlappingPairs(self,boxes):
+        "returns the pairs (i,j), i < j, of the given bounding boxes overlapping in X and Y"
+        n = len(boxes)
+        if n < 2:
+            return []
+        xmin = min(b[0] for b in boxes)
+        ymin = min(b[1] for b in boxes)
+        xmax = max(b[3] for b in boxes)
+        ymax = max(b[4] for b in boxes)
+        # grid cells of the average face size, faces spanning more than
+        # GRIDSPAN cells are compared with all others instead
+        size = sum(max(b[3]-b[0],b[4]-b[1]) for b in boxes)/n
+        size = max(size,(xmax-xmin)/1000.0,(ymax-ymin)/1000.0,1e-9)
+        grid = {}
+        big = []
+        for i,b in enumerate(boxes):
+            x1 = int((b[0]-xmin)/size)
+            x2 = int((b[3]-xmin)/size)
+            y1 = int((b[1]-ymin)/size)
+            y2 = int((b[4]-ymin)/size)
+            if (x2-x1 >= GRIDSPAN) or (y2-y1 >= GRIDSPAN):
+                big.append(i)
+                continue
+            for x in range(x1,x2+1):
+                for y in range(y1,y2+1):
+                    grid.setdefault((x,y),[]).append(i)
+        candidates = set()
+        for cell in grid.values():
+            for k,i in enumerate(cell):
+                for j in cell[k+1:]:
+                    candidates.add((i,j))
+        bigset = set(big)
+        for i in big:
+            for j in range(n):
+                if (j != i) and ((not j in bigset) or (j > i)):
+                    candidates.add((min(i,j),max(i,j)))
+        pairs = []
+        for i,j in candidates:
+            b1 = boxes[i]
+            b2 = boxes[j]
+            if (b1[3] < b2[0]) or (b1[0] > b2[3]) or (b1[4] < b2[1]) or (b1[1] > b2[4]):
+                continue
+            pairs.append((i,j))
+        pairs.sort()
+        return pairs
+
+    def side(self,verts,origin,normal,tol):
+        "returns 2 if all verts are behind the plane given by origin and normal, 1 if all are in front, 0 otherwise"
+        behind = True
+        front = True
+        for v in verts:
+            d = (v[0]-origin[0])*normal[0]+(v[1]-origin[1])*normal[1]+(v[2]-origin[2])*normal[2]
+            if d > tol:
+                behind = False
+            elif d < -tol:
+                front = False
+            if not (front or behind):
+                return 0
+        if behind:
+            return 2
+        return 1
+
+    def compareData(self,d1,d2,tol):
+        "zsorts two faces from their sortData, like compare(), without its test 1 and 5"
+        b1 = d1[0]
+        b2 = d2[0]
+        # test 2: Z bounds don't overlap
+        if b1[5] < b2[2]:
+            return 2
+        if b2[5] < b1[2]:
+            return 1
+        # test 3: all verts of face1 are in front or behind the plane of face2
+        r = self.side(d1[2],d2[2][0],d2[1],tol)
+        if r:
+            return r
+        # test 4: all verts of face2 are in front or behind the plane of face1
+        r = self.side(d2[2],d1[2][0],d1[1],tol)
+        if r:
+            return 3-r
+        return 0
+
     def sort(self):
-        "projects a shape on the WP"
+        """sorts the faces from the farthest to the closest. Only faces whose
+        projected bounding boxes overlap are compared, found with a grid,
+        and the order is a topological sort of the results of the comparisons.
+        When faces can't be ordered because they overlap each other cyclically,
+        the cycle is split by placing the farthest of them first"""
         if DEBUG: print("\n\n======> Starting sort\n\n")
         if len(self.faces) <= 1:
             return
@@ -486,66 +579,51 @@ class Renderer:
         if not self.oriented:
             self.reorient()
             if DEBUG: print("Done reorientation")
-        faces = self.faces[:]
-        if DEBUG: print("sorting ",len(self.faces)," faces")
+        faces = [f for f in self.faces if f]
+        if DEBUG: print("sorting ",len(faces)," faces")
+        data = [self.sortData(f) for f in faces]
+        tol = 10**(-DraftVecUtils.precision())
+
+        # build the graph, an edge goes from a face to a face in front of it
+        after = [[] for f in faces]
+        incoming = [0]*len(faces)
+        pairs = self.overlappingPairs([d[0] for d in data])
+        for i,j in pairs:
+            r = self.compareData(data[i],data[j],tol)
+            if r == 1:
+                after[j].append(i)
+                incoming[i] += 1
+            elif r == 2:
+                after[i].append(j)
+                incoming[j] += 1
+        if DEBUG: print("compared ",len(pairs)," pairs of overlapping faces")
+
+        # topological sort, the farthest available face first
+        import heapq
+        heap = [(data[i][0][2],i) for i in range(len(faces)) if not incoming[i]]
+        heapq.heapify(heap)
+        done = [False]*len(faces)
         sfaces = []
-        loopcount = 0
-        notfoundstack = 0
-        while faces:
-            if DEBUG: print("loop ", loopcount)
-            f1 = faces[0]
-            if sfaces and (notfoundstack < len(faces)):
-                if DEBUG: print("using ordered stack, notfound = ",notfoundstack)
-                p = self.findPosition(f1,sfaces)
-                if p == None:
-                    # no position found, we move the face to the end of the pile
-                    faces.remove(f1)
-                    faces.append(f1)
-                    notfoundstack += 1
-                else:
-                    # position found, we insert it
-                    faces.remove(f1)
-                    sfaces.insert(p,f1)
-                    notfoundstack = 0
-            else:
-                # either there is no stack, or no more face can be compared
-                # find a root, 2 faces that can be compared
-                if DEBUG: print("using unordered stack, notfound = ",notfoundstack)
-                for f2 in faces[1:]:
-                    if DEBUG: print("comparing face",str(self.faces.index(f1))," with face",str(self.faces.index(f2)))
-                    r = self.compare(f1,f2)
-                    print("comparison result:",r)
-                    if r == 1:
-                        faces.remove(f2)
-                        sfaces.append(f2)
-                        faces.remove(f1)
-                        sfaces.append(f1)
-                        notfoundstack = 0
-                        break
-                    elif r == 2:
-                        faces.remove(f1)
-                        sfaces.append(f1)
-                        faces.remove(f2)
-                        sfaces.append(f2)
-                        notfoundstack = 0
-                        break
-                    elif r == 31:
-                        if f1 in faces:
-                            faces.remove(f1)
-                    elif r == 32:
-                        if f2 in faces:
-                            faces.remove(f2)
-                else:
-                    # nothing found, move the face to the end of the pile
-                    if f1 in faces:
-                        faces.remove(f1)
-                        faces.append(f1)
-            loopcount += 1
-            if loopcount == MAXLOOP * len(self.faces):
-                if DEBUG: print("Too many loops, aborting.")
-                break
-
-        if DEBUG: print("done Z sorting. ", len(sfaces), " faces retained, ", len(self.faces)-len(sfaces), " faces lost.")
+        cycles = 0
+        while len(sfaces) < len(faces):
+            if not heap:
+                # all remaining faces are in cycles
+                i = min((i for i in range(len(faces)) if not done[i]),key=lambda i: (data[i][0][2],i))
+                incoming[i] = 0
+                heap.append((data[i][0][2],i))
+                cycles += 1
+            z,i = heapq.heappop(heap)
+            if done[i]:
+                continue
+            done[i] = True
+            sfaces.append(faces[i])
+            for j in after[i]:
+                if not done[j]:
+                    incoming[j] -= 1
+                    if incoming[j] == 0:
+                        heapq.heappush(heap,(data[j][0][2],j))
+
+        if DEBUG: print("done Z sorting. ", len(sfaces), " faces retained, ", cycles, " cycles split")
         self.faces = sfaces
         self.sorted = True
         if DEBUG: print("\n\n======> Finished sort\n\n")
@@ -119,6 +119,51 @@ class ArchTest(unittest.TestCase):
         v = Arch.makeSectionView(s)
         self.failUnless(v,"Arch Section failed")
 
+    def testSectionCut(self):
+        FreeCAD.Console.PrintLog ('Checking Arch Section cut...\n')
+        import ArchSectionPlane
+        objs = []
+        for box in [Part.makeBox(1,1,2),Part.makeBox(1,1,0.5,FreeCAD.Vector(5,0,0)),Part.makeBox(1,1,1,FreeCAD.Vector(10,0,3))]:
+            o = FreeCAD.ActiveDocument.addObject("Part::Feature","Box")
+            o.Shape = box
+            objs.append(o)
+        s = Arch.makeSectionPlane([])
+        s.Placement = FreeCAD.Placement(FreeCAD.Vector(0,0,1),FreeCAD.Rotation())
+        FreeCAD.ActiveDocument.recompute()
+        for i in range(2):
+            # the second time the cut is taken from the cache
+            shapes,hshapes,sshapes,cutface,cutvolume,invcutvolume = ArchSectionPlane.getCutShapes(objs,s,True)
+            self.assertAlmostEqual(sum(sh.Volume for sh in shapes),1.5,6)
+            self.assertAlmostEqual(sum(sh.Volume for sh in hshapes),2,6)
+            self.assertAlmostEqual(sum(sh.Area for sh in sshapes),1,6)
+            self.assertEqual(len(s.Proxy.cutcache),1)
+
+    def testSchedule(self):
+        FreeCAD.Console.PrintLog ('Checking Arch Schedule...\n')
+        import ArchSchedule
+        objs = []
+        for i in range(3):
+            o = FreeCAD.ActiveDocument.addObject("Part::Feature","Box")
+            o.Shape = Part.makeBox(1,1,i+1)
+            objs.append(o)
+        obj = FreeCAD.ActiveDocument.addObject("App::FeaturePython","Schedule")
+        ArchSchedule._ArchSchedule(obj)
+        obj.Result = FreeCAD.ActiveDocument.addObject("Spreadsheet::Sheet","Result")
+        obj.Description = ["Boxes","Volume"]
+        obj.Value = ["Count","object.Shape.Volume"]
+        obj.Unit = ["",""]
+        obj.Objects = [";".join([o.Name for o in objs])]*2
+        obj.Filter = ["Name:Box",""]
+        FreeCAD.ActiveDocument.recompute()
+        self.assertEqual(obj.Result.get("B2"),3)
+        self.assertAlmostEqual(obj.Result.get("B3"),6,6)
+        # only the volume row is computed again
+        objs[0].Shape = Part.makeBox(1,1,4)
+        obj.touch()
+        FreeCAD.ActiveDocument.recompute()
+        self.assertAlmostEqual(obj.Result.get("B3"),9,6)
+        self.assertEqual(len(obj.Proxy.rows),2)
+
     def testSpace(self):
         FreeCAD.Console.PrintLog ('Checking Arch Space...\n')
         sb = Part.makeBox(1,1,1)
@@ -165,6 +210,42 @@ class ArchTest(unittest.TestCase):
         r = (w.Shape.Volume < 0.75)
         self.failUnless(r,"Arch Remove failed")
 
+    def testNesting(self):
+        FreeCAD.Console.PrintLog ('Checking Arch Nesting...\n')
+        import ArchNesting
+        V = FreeCAD.Vector
+        container = Part.Face(Part.makePolygon([V(0,0,0),V(1000,0,0),V(1000,500,0),V(0,500,0),V(0,0,0)]))
+        shapes = []
+        for i in range(9):
+            if i%3:
+                pts = [V(0,0,0),V(300,0,0),V(300,200,0),V(0,200,0)]
+            else:
+                pts = [V(0,0,0),V(400,0,0),V(400,100,0),V(100,100,0),V(100,300,0),V(0,300,0)]
+            f = Part.Face(Part.makePolygon(pts+[pts[0]]))
+            f.translate(V(2000,i*500,0))
+            shapes.append(f)
+        n = ArchNesting.Nester(container,shapes)
+        sheets = n.run()
+        self.failUnless(sheets,"Arch Nesting failed")
+        self.assertEqual(sum(len(sheet) for sheet in sheets),len(shapes))
+        for sheet in sheets:
+            for i,face in enumerate(sheet):
+                self.assertAlmostEqual(face[1].common(container).Area,face[1].Area,3)
+                for other in sheet[i+1:]:
+                    self.failUnless(face[1].common(other[1]).Area < 0.001,"Arch Nesting overlap")
+
+    def testRendererSort(self):
+        FreeCAD.Console.PrintLog ('Checking Arch Renderer sorting...\n')
+        import ArchVRM, WorkingPlane
+        shapes = [Part.makeBox(10,10,1),Part.makeBox(10,10,1,FreeCAD.Vector(5,5,3)),Part.makeBox(2,2,1,FreeCAD.Vector(30,0,5))]
+        r = ArchVRM.Renderer(WorkingPlane.plane())
+        r.addShapes(shapes)
+        r.sort()
+        # only the top faces are visible, the lower box is drawn first
+        self.assertEqual(len(r.faces),3)
+        z = [f[0].BoundBox.ZMin for f in r.faces]
+        self.failUnless(z.index(1) < z.index(4),"Arch Renderer sorting failed")
+
     def tearDown(self):
         FreeCAD.closeDocument("ArchTest")
         pass
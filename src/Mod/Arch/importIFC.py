@@ -28,6 +28,7 @@ __author__ = "Yorik van Havre","Jonathan Wiedemann"
 __url__ =    "http://www.freecadweb.org"
 
 import os,time,tempfile,uuid,FreeCAD,Part,Draft,Arch,math,DraftVecUtils,sys
+import importIFCHelper
 from DraftGeomUtils import vec
 
 ## @package importIFC
@@ -173,6 +174,7 @@ def getPreferences():
     global MERGE_MODE_ARCH, MERGE_MODE_STRUCT, CREATE_CLONES
     global FORCE_BREP, IMPORT_PROPERTIES, STORE_UID, SERIALIZE
     global SPLIT_LAYERS, EXPORT_2D, FULL_PARAMETRIC, FITVIEW_ONIMPORT
+    global MULTICORE, CACHE_SIZE
     p = FreeCAD.ParamGet("User parameter:BaseApp/Preferences/Mod/Arch")
     if FreeCAD.GuiUp and p.GetBool("ifcShowDialog",False):
         import FreeCADGui
@@ -200,6 +202,8 @@ def getPreferences():
     EXPORT_2D = p.GetBool("ifcExport2D",True)
     FULL_PARAMETRIC = p.GetBool("IfcExportFreeCADProperties",False)
     FITVIEW_ONIMPORT = p.GetBool("ifcFitViewOnImport",False)
+    MULTICORE = p.GetInt("ifcMulticore",0)
+    CACHE_SIZE = p.GetInt("ifcCacheSize",0)
 
 
 def explore(filename=None):
@@ -258,13 +262,14 @@ def explore(filename=None):
     entities += ifc.by_type("IfcProductRepresentation")
     entities = sorted(entities, key=lambda eid: eid.id())
 
-    done = []
+    relationships = importIFCHelper.IfcRelationships(ifc)
+    done = set()
 
     for entity in entities:
         if hasattr(entity,"id"):
             if entity.id() in done:
                 continue
-            done.append(entity.id())
+            done.add(entity.id())
             item = QtGui.QTreeWidgetItem(tree)
             item.setText(0,str(entity.id()))
             if entity.is_a() in ["IfcWall","IfcWallStandardCase"]:
@@ -348,6 +353,13 @@ def explore(filename=None):
                                         item.setForeground(2,QtGui.QBrush(QtGui.QColor("#005AFF")))
                     i += 1
 
+            # the hosts of the entity, from the relationship tables
+
+            for host in relationships.parents.get(entity.id(),[]):
+                item = QtGui.QTreeWidgetItem(tree)
+                item.setText(2,"    Host : Entity #" + str(host) + ": " + str(ifc[host].is_a()))
+                item.setForeground(2,QtGui.QBrush(QtGui.QColor("#005AFF")))
+
     d = QtGui.QDialog()
     d.setObjectName("IfcExplorer")
     d.setWindowTitle("Ifc Explorer")
@@ -362,6 +374,19 @@ def explore(filename=None):
     return
 
 
+def isSkipped(product,skip=[]):
+
+    """isSkipped(product,[skip]): True if the product is not imported, because of the
+    merge mode of its kind, or because it is in the skip list of ids or in the
+    preferences-set list of types to skip"""
+
+    ptype = product.is_a()
+    archobj = not (ptype in structuralifcobjects)
+    if (MERGE_MODE_ARCH == 4 and archobj) or (MERGE_MODE_STRUCT == 3 and not archobj):
+        return True
+    return (product.id() in skip) or (ptype in SKIP)
+
+
 def open(filename,skip=[],only=[],root=None):
 
     "opens an IFC file in a new document"
@@ -433,84 +458,46 @@ def insert(filename,docname,skip=[],only=[],root=None):
     # building relations tables
 
     objects = {} # { id:object, ... }
-    prodrepr = {} # product/representations table
-    additions = {} # { host:[child,...], ... }
-    groups = {} # { host:[child,...], ... }     # used in structural IFC
-    subtractions = [] # [ [opening,host], ... ]
-    properties = {} # { objid : { psetid : [propertyid, ... ], ... }, ... }
-    colors = {} # { id:(r,g,b) }
     shapes = {} # { id:shaoe } only used for merge mode
     structshapes = {} # { id:shaoe } only used for merge mode
-    mattable = {} # { objid:matid }
     sharedobjects = {} # { representationmapid:object }
     parametrics = [] # a list of imported objects whose parametric relationships need processing after all objects have been created
     profiles = {} # to store reused extrusion profiles {ifcid:fcobj,...}
 
-    for r in ifcfile.by_type("IfcRelContainedInSpatialStructure"):
-        additions.setdefault(r.RelatingStructure.id(),[]).extend([e.id() for e in r.RelatedElements])
-    for r in ifcfile.by_type("IfcRelAggregates"):
-        additions.setdefault(r.RelatingObject.id(),[]).extend([e.id() for e in r.RelatedObjects])
-    for r in ifcfile.by_type("IfcRelAssignsToGroup"):
-        groups.setdefault(r.RelatingGroup.id(),[]).extend([e.id() for e in r.RelatedObjects])
-    for r in ifcfile.by_type("IfcRelVoidsElement"):
-        subtractions.append([r.RelatedOpeningElement.id(), r.RelatingBuildingElement.id()])
-    for r in ifcfile.by_type("IfcRelDefinesByProperties"):
-        for obj in r.RelatedObjects:
-            if not obj.id() in properties:
-                properties[obj.id()] = {}
-            psets = {}
-            props = []
-            if r.RelatingPropertyDefinition.is_a("IfcPropertySet"):
-                props.extend([prop.id() for prop in r.RelatingPropertyDefinition.HasProperties])
-                psets[r.RelatingPropertyDefinition.id()] = props
-                properties[obj.id()].update(psets)
-    for r in ifcfile.by_type("IfcRelAssociatesMaterial"):
-        for o in r.RelatedObjects:
-            if r.RelatingMaterial.is_a("IfcMaterial"):
-                mattable[o.id()] = r.RelatingMaterial.id()
-            elif r.RelatingMaterial.is_a("IfcMaterialLayer"):
-                mattable[o.id()] = r.RelatingMaterial.Material.id()
-            elif r.RelatingMaterial.is_a("IfcMaterialLayerSet"):
-                mattable[o.id()] = r.RelatingMaterial.MaterialLayers[0].Material.id()
-            elif r.RelatingMaterial.is_a("IfcMaterialLayerSetUsage"):
-                mattable[o.id()] = r.RelatingMaterial.ForLayerSet.MaterialLayers[0].Material.id()
-    for p in ifcfile.by_type("IfcProduct"):
-        if hasattr(p,"Representation"):
-            if p.Representation:
-                for it in p.Representation.Representations:
-                    for it1 in it.Items:
-                        prodrepr.setdefault(p.id(),[]).append(it1.id())
-                        if it1.is_a("IfcBooleanResult"):
-                            prodrepr.setdefault(p.id(),[]).append(it1.FirstOperand.id())
-                        elif it.Items[0].is_a("IfcMappedItem"):
-                            prodrepr.setdefault(p.id(),[]).append(it1.MappingSource.MappedRepresentation.id())
-                            if it1.MappingSource.MappedRepresentation.is_a("IfcShapeRepresentation"):
-                                for it2 in it1.MappingSource.MappedRepresentation.Items:
-                                    prodrepr.setdefault(p.id(),[]).append(it2.id())
-    for r in ifcfile.by_type("IfcStyledItem"):
-        if r.Styles:
-            if r.Styles[0].is_a("IfcPresentationStyleAssignment"):
-                if r.Styles[0].Styles[0].is_a("IfcSurfaceStyle"):
-                    if r.Styles[0].Styles[0].Styles[0].is_a("IfcSurfaceStyleRendering"):
-                        if r.Styles[0].Styles[0].Styles[0].SurfaceColour:
-                            c = r.Styles[0].Styles[0].Styles[0].SurfaceColour
-                            if r.Item:
-                                for p in prodrepr.keys():
-                                    if r.Item.id() in prodrepr[p]:
-                                        colors[p] = (c.Red,c.Green,c.Blue)
-                        else:
-                            for m in ifcfile.by_type("IfcMaterialDefinitionRepresentation"):
-                                for it in m.Representations:
-                                    if it.Items:
-                                        if it.Items[0].id() == r.id():
-                                            colors[m.RepresentedMaterial.id()] = (c.Red,c.Green,c.Blue)
+    relationships = importIFCHelper.IfcRelationships(ifcfile)
+    additions = relationships.additions # { host:[child,...], ... }
+    groups = relationships.groups # { host:[child,...], ... }     # used in structural IFC
+    subtractions = relationships.subtractions # [ [opening,host], ... ]
+    properties = relationships.properties # { objid : { psetid : [propertyid, ... ], ... }, ... }
+    mattable = relationships.mattable # { objid:matid }
+
+    # the cache of previously imported geometry, the colors are taken from it if the file didn't change
+
+    cache = None
+    colors = None # { id:(r,g,b) }
+    if CACHE_SIZE > 0:
+        settingskey = ";".join([str(getattr(ifcopenshell,"version","")),str(SEPARATE_OPENINGS),str(SPLIT_LAYERS)])
+        try:
+            cache = importIFCHelper.IfcCache(os.path.join(FreeCAD.ConfigGet("UserAppData"),"IfcCache"),CACHE_SIZE*1024*1024)
+            cache.open(filename,ifcfile,settingskey,relationships)
+        except (IOError,OSError):
+            print("Unable to use the IFC cache")
+            cache = None
+        else:
+            colors = cache.getColors()
+    if colors is None:
+        colors = relationships.colors
 
     # remove any leftover annotations from products
+    annotationids = set(a.id() for a in annotations)
     tp = []
     for product in products:
-        if product.is_a("IfcGrid") and not (product in annotations):
+        if product.id() in annotationids:
+            continue
+        if product.is_a("IfcGrid"):
             annotations.append(product)
-        elif not (product in annotations):
+            annotationids.add(product.id())
+        else:
             tp.append(product)
     products = sorted(tp,key=lambda prod: prod.id())
 
@@ -518,10 +505,7 @@ def insert(filename,docname,skip=[],only=[],root=None):
     if only:
         ids = []
         while only:
-            currentid = only.pop()
-            ids.append(currentid)
-            if currentid in additions.keys():
-                only.extend(additions[currentid])
+            ids.extend(relationships.getChildren(only.pop()))
         products = [ifcfile[currentid] for currentid in ids]
 
     if DEBUG: print("done.")
@@ -537,487 +521,480 @@ def insert(filename,docname,skip=[],only=[],root=None):
         import FreeCADGui
         FreeCADGui.ActiveDocument.activeView().viewAxonometric()
 
-    # handle IFC products
+    # start computing the geometry of the products that are not skipped
 
-    for product in products:
-
-        count += 1
+    geomtasks = [(product.id(),product.is_a() in structuralifcobjects) for product in products if not isSkipped(product,skip)]
+    if DEBUG and MULTICORE: print("Computing geometry with",MULTICORE,"processes")
+    pipeline = importIFCHelper.GeometryPipeline(ifcfile,settings,geomtasks,MULTICORE,cache)
 
-        pid = product.id()
-        guid = product.GlobalId
-        ptype = product.is_a()
-        if DEBUG: print(count,"/",len(products),"object #"+str(pid),":",ptype,end="")
+    # handle IFC products
 
-        # checking for full FreeCAD parametric definition, overriding everything else
+    try:
+        for product in products:
 
-        if pid in properties.keys():
-            if "FreeCADPropertySet" in [ifcfile[pset].Name for pset in properties[pid].keys()]:
-                if DEBUG: print(" restoring from parametric definition...",end="")
-                obj = createFromProperties(properties[pid],ifcfile)
-                if obj:
-                    objects[pid] = obj
-                    if DEBUG: print("done")
-                    continue
-                else:
-                    print("failed.",end="")
+            count += 1
 
-        # no parametric data, we go the good old way
+            pid = product.id()
+            guid = product.GlobalId
+            ptype = product.is_a()
+            if DEBUG: print(count,"/",len(products),"object #"+str(pid),":",ptype,end="")
 
-        name = str(ptype[3:])
-        if product.Name:
-            name = product.Name
-            if sys.version_info.major < 3:
-                name = name.encode("utf8")
-        if PREFIX_NUMBERS: name = "ID" + str(pid) + " " + name
-        obj = None
-        baseobj = None
-        brep = None
-        shape = None
-
-        archobj = True  # assume all objects not in structuralifcobjects are architecture
-        structobj = False
-        if ptype in structuralifcobjects:
-            archobj = False
-            structobj = True
-            if DEBUG: print(" (struct)",end="")
-        else:
-            if DEBUG: print(" (arch)",end="")
-        if MERGE_MODE_ARCH == 4 and archobj:
-            if DEBUG: print(" skipped.")
-            continue
-        if MERGE_MODE_STRUCT == 3 and not archobj:
-            if DEBUG: print(" skipped.")
-            continue
-        if pid in skip: # user given id skip list
-            if DEBUG: print(" skipped.")
-            continue
-        if ptype in SKIP: # preferences-set type skip list
-            if DEBUG: print(" skipped.")
-            continue
+            # checking for full FreeCAD parametric definition, overriding everything else
 
-        # detect if this object is sharing its shape
+            if pid in properties.keys():
+                if "FreeCADPropertySet" in [ifcfile[pset].Name for pset in properties[pid].keys()]:
+                    if DEBUG: print(" restoring from parametric definition...",end="")
+                    obj = createFromProperties(properties[pid],ifcfile)
+                    if obj:
+                        objects[pid] = obj
+                        if DEBUG: print("done")
+                        continue
+                    else:
+                        print("failed.",end="")
 
-        clone = None
-        store = None
-        prepr = None
-        try:
-            prepr = product.Representation
-        except:
-            if DEBUG: print(" ERROR unable to get object representation",end="")
-        if prepr and (MERGE_MODE_ARCH == 0) and archobj and CREATE_CLONES:
-
-            for s in prepr.Representations:
-                if s.RepresentationIdentifier.upper() == "BODY":
-                    if s.Items[0].is_a("IfcMappedItem"):
-                        bid = s.Items[0].MappingSource.id()
-                        if bid in sharedobjects:
-                            clone = sharedobjects[bid]
-                        else:
-                            sharedobjects[bid] = None
-                            store = bid
+            # no parametric data, we go the good old way
 
-        # additional setting for structural entities
-        if hasattr(settings,"INCLUDE_CURVES"):
-            if structobj:
-                settings.set(settings.INCLUDE_CURVES,True)
+            name = str(ptype[3:])
+            if product.Name:
+                name = product.Name
+                if sys.version_info.major < 3:
+                    name = name.encode("utf8")
+            if PREFIX_NUMBERS: name = "ID" + str(pid) + " " + name
+            obj = None
+            baseobj = None
+            brep = None
+            shape = None
+
+            archobj = True  # assume all objects not in structuralifcobjects are architecture
+            structobj = False
+            if ptype in structuralifcobjects:
+                archobj = False
+                structobj = True
+                if DEBUG: print(" (struct)",end="")
             else:
-                settings.set(settings.INCLUDE_CURVES,False)
-        try:
-            cr = ifcopenshell.geom.create_shape(settings,product)
-            brep = cr.geometry.brep_data
-        except:
-            pass # IfcOpenShell will yield an error if a given product has no shape, but we don't care, we're brave enough
+                if DEBUG: print(" (arch)",end="")
+            if isSkipped(product,skip):
+                if DEBUG: print(" skipped.")
+                continue
 
-        if brep:
-            if DEBUG: print(" "+str(int(len(brep)/1000))+"k ",end="")
+            # detect if this object is sharing its shape
+
+            clone = None
+            store = None
+            prepr = None
+            try:
+                prepr = product.Representation
+            except:
+                if DEBUG: print(" ERROR unable to get object representation",end="")
+            if prepr and (MERGE_MODE_ARCH == 0) and archobj and CREATE_CLONES:
+
+                for s in prepr.Representations:
+                    if s.RepresentationIdentifier.upper() == "BODY":
+                        if s.Items[0].is_a("IfcMappedItem"):
+                            bid = s.Items[0].MappingSource.id()
+                            if bid in sharedobjects:
+                                clone = sharedobjects[bid]
+                            else:
+                                sharedobjects[bid] = None
+                                store = bid
 
-            shape = Part.Shape()
-            shape.importBrepFromString(brep,False)
+            # the geometry, structural entities include curves
+            brep = pipeline.getBrep(pid)
 
-            shape.scale(1000.0) # IfcOpenShell always outputs in meters, we convert to mm, the freecad internal unit
+            if brep:
+                if DEBUG: print(" "+str(int(len(brep)/1000))+"k ",end="")
 
-            if not shape.isNull():
-                if FITVIEW_ONIMPORT and FreeCAD.GuiUp:
-                    # add to the global boundbox
-                    try:
-                        bb = shape.BoundBox
-                        # if DEBUG: print(' ' + str(bb),end="")
-                    except:
-                        bb = None
-                        if DEBUG: print(' BB could not be computed',end="")
-                    if bb and bb.isValid():
-                        if not overallboundbox:
-                            overallboundbox = bb
-                        if not overallboundbox.isInside(bb):
-                            FreeCADGui.SendMsgToActiveView("ViewFit")
-                        overallboundbox.add(bb)
-
-                if (MERGE_MODE_ARCH > 0 and archobj) or structobj:
-
-                    # additional tweaks when not using Arch objects
-                    if ptype == "IfcSpace": # do not add spaces to compounds
-                        if DEBUG: print("skipping space ",pid,end="")
-                    elif structobj:
-                        structshapes[pid] = shape
-                        if DEBUG: print(shape.Solids," ",end="")
-                        baseobj = shape
-                    else:
-                        shapes[pid] = shape
-                        if DEBUG: print(shape.Solids," ",end="")
-                        baseobj = shape
-                else:
+                shape = Part.Shape()
+                shape.importBrepFromString(brep,False)
+
+                shape.scale(1000.0) # IfcOpenShell always outputs in meters, we convert to mm, the freecad internal unit
 
-                    # create base shape object
-                    if clone:
-                        if DEBUG: print("clone ",end="")
+                if not shape.isNull():
+                    if FITVIEW_ONIMPORT and FreeCAD.GuiUp:
+                        # add to the global boundbox
+                        try:
+                            bb = shape.BoundBox
+                            # if DEBUG: print(' ' + str(bb),end="")
+                        except:
+                            bb = None
+                            if DEBUG: print(' BB could not be computed',end="")
+                        if bb and bb.isValid():
+                            if not overallboundbox:
+                                overallboundbox = bb
+                            if not overallboundbox.isInside(bb):
+                                FreeCADGui.SendMsgToActiveView("ViewFit")
+                            overallboundbox.add(bb)
+
+                    if (MERGE_MODE_ARCH > 0 and archobj) or structobj:
+
+                        # additional tweaks when not using Arch objects
+                        if ptype == "IfcSpace": # do not add spaces to compounds
+                            if DEBUG: print("skipping space ",pid,end="")
+                        elif structobj:
+                            structshapes[pid] = shape
+                            if DEBUG: print(shape.Solids," ",end="")
+                            baseobj = shape
+                        else:
+                            shapes[pid] = shape
+                            if DEBUG: print(shape.Solids," ",end="")
+                            baseobj = shape
                     else:
-                        if GET_EXTRUSIONS:
-                            if ptype in ["IfcWall","IfcWallStandardCase"]:
-                                sortmethod = "z"
-                            else:
-                                sortmethod = "area"
-                            ex = Arch.getExtrusionData(shape,sortmethod) # is this an extrusion?
-                            if ex:
-                                # check for extrusion profile
-                                baseface = None
-                                profileid = None
-                                addplacement = None
-                                if product.Representation:
-                                    if product.Representation.Representations:
-                                        if product.Representation.Representations[0].is_a("IfcShapeRepresentation"):
-                                            if product.Representation.Representations[0].Items:
-                                                if product.Representation.Representations[0].Items[0].is_a("IfcExtrudedAreaSolid"):
-                                                    profileid = product.Representation.Representations[0].Items[0].SweptArea.id()
-                                if profileid and profileid in profiles:
-                                    # reuse existing profile
-                                    print("shared extrusion ",end="")
-                                    baseface = profiles[profileid]
-                                    # calculate delta placement between stored profile and this one
-                                    addplacement = FreeCAD.Placement()
-                                    r = FreeCAD.Rotation(baseface.Shape.Faces[0].normalAt(0,0),ex[0].Faces[0].normalAt(0,0))
-                                    if r.Angle > 0.000001:
-                                        # use shape methods to easily obtain a correct placement
-                                        ts = Part.Shape()
-                                        ts.rotate(DraftVecUtils.tup(baseface.Shape.CenterOfMass), DraftVecUtils.tup(r.Axis), math.degrees(r.Angle))
-                                        addplacement = ts.Placement
-                                    d = ex[0].CenterOfMass.sub(baseface.Shape.CenterOfMass)
-                                    if d.Length > 0.000001:
-                                        addplacement.move(d)
-                                if not baseface:
-                                    print("extrusion ",end="")
-                                    import DraftGeomUtils
-                                    if DraftGeomUtils.hasCurves(ex[0]) or len(ex[0].Wires) != 1:
-                                        # curves or holes? We just make a Part face
-                                        baseface = FreeCAD.ActiveDocument.addObject("Part::Feature",name+"_footprint")
-                                        # bug/feature in ifcopenshell? Some faces of a shell may have non-null placement
-                                        # workaround to remove the bad placement: exporting/reimporting as step
-                                        if not ex[0].Placement.isNull():
-                                            import tempfile
-                                            fd, tf = tempfile.mkstemp(suffix=".stp")
-                                            ex[0].exportStep(tf)
-                                            f = Part.read(tf)
-                                            os.close(fd)
-                                            os.remove(tf)
+
+                        # create base shape object
+                        if clone:
+                            if DEBUG: print("clone ",end="")
+                        else:
+                            if GET_EXTRUSIONS:
+                                if ptype in ["IfcWall","IfcWallStandardCase"]:
+                                    sortmethod = "z"
+                                else:
+                                    sortmethod = "area"
+                                ex = Arch.getExtrusionData(shape,sortmethod) # is this an extrusion?
+                                if ex:
+                                    # check for extrusion profile
+                                    baseface = None
+                                    profileid = None
+                                    addplacement = None
+                                    if product.Representation:
+                                        if product.Representation.Representations:
+                                            if product.Representation.Representations[0].is_a("IfcShapeRepresentation"):
+                                                if product.Representation.Representations[0].Items:
+                                                    if product.Representation.Representations[0].Items[0].is_a("IfcExtrudedAreaSolid"):
+                                                        profileid = product.Representation.Representations[0].Items[0].SweptArea.id()
+                                    if profileid and profileid in profiles:
+                                        # reuse existing profile
+                                        print("shared extrusion ",end="")
+                                        baseface = profiles[profileid]
+                                        # calculate delta placement between stored profile and this one
+                                        addplacement = FreeCAD.Placement()
+                                        r = FreeCAD.Rotation(baseface.Shape.Faces[0].normalAt(0,0),ex[0].Faces[0].normalAt(0,0))
+                                        if r.Angle > 0.000001:
+                                            # use shape methods to easily obtain a correct placement
+                                            ts = Part.Shape()
+                                            ts.rotate(DraftVecUtils.tup(baseface.Shape.CenterOfMass), DraftVecUtils.tup(r.Axis), math.degrees(r.Angle))
+                                            addplacement = ts.Placement
+                                        d = ex[0].CenterOfMass.sub(baseface.Shape.CenterOfMass)
+                                        if d.Length > 0.000001:
+                                            addplacement.move(d)
+                                    if not baseface:
+                                        print("extrusion ",end="")
+                                        import DraftGeomUtils
+                                        if DraftGeomUtils.hasCurves(ex[0]) or len(ex[0].Wires) != 1:
+                                            # curves or holes? We just make a Part face
+                                            baseface = FreeCAD.ActiveDocument.addObject("Part::Feature",name+"_footprint")
+                                            # bug/feature in ifcopenshell? Some faces of a shell may have non-null placement
+                                            # workaround to remove the bad placement: exporting/reimporting as step
+                                            if not ex[0].Placement.isNull():
+                                                import tempfile
+                                                fd, tf = tempfile.mkstemp(suffix=".stp")
+                                                ex[0].exportStep(tf)
+                                                f = Part.read(tf)
+                                                os.close(fd)
+                                                os.remove(tf)
+                                            else:
+                                                f = ex[0]
+                                            baseface.Shape = f
                                         else:
-                                            f = ex[0]
-                                        baseface.Shape = f
+                                            # no hole and no curves, we make a Draft Wire instead
+                                            baseface = Draft.makeWire([v.Point for v in ex[0].Wires[0].OrderedVertexes],closed=True)
+                                        if profileid:
+                                            profiles[profileid] = baseface
+                                    baseobj = FreeCAD.ActiveDocument.addObject("Part::Extrusion",name+"_body")
+                                    baseobj.Base = baseface
+                                    if addplacement:
+                                        # apply delta placement (stored profile)
+                                        baseobj.Placement = addplacement
+                                        baseobj.Dir = addplacement.Rotation.inverted().multVec(ex[1])
                                     else:
-                                        # no hole and no curves, we make a Draft Wire instead
-                                        baseface = Draft.makeWire([v.Point for v in ex[0].Wires[0].OrderedVertexes],closed=True)
-                                    if profileid:
-                                        profiles[profileid] = baseface
-                                baseobj = FreeCAD.ActiveDocument.addObject("Part::Extrusion",name+"_body")
-                                baseobj.Base = baseface
-                                if addplacement:
-                                    # apply delta placement (stored profile)
-                                    baseobj.Placement = addplacement
-                                    baseobj.Dir = addplacement.Rotation.inverted().multVec(ex[1])
-                                else:
-                                    baseobj.Dir = ex[1]
-                                if FreeCAD.GuiUp:
-                                    baseface.ViewObject.hide()
-                        if (not baseobj):
-                            baseobj = FreeCAD.ActiveDocument.addObject("Part::Feature",name+"_body")
-                            baseobj.Shape = shape
-            else:
-                if DEBUG: print("null shape ",end="")
-            if not shape.isValid():
-                if DEBUG: print("invalid shape ",end="")
-                #continue
-
-        else:
-            if DEBUG: print(" no brep ",end="")
-
-        if MERGE_MODE_ARCH == 0 and archobj:
-
-            # full Arch objects
+                                        baseobj.Dir = ex[1]
+                                    if FreeCAD.GuiUp:
+                                        baseface.ViewObject.hide()
+                            if (not baseobj):
+                                baseobj = FreeCAD.ActiveDocument.addObject("Part::Feature",name+"_body")
+                                baseobj.Shape = shape
+                else:
+                    if DEBUG: print("null shape ",end="")
+                if not shape.isValid():
+                    if DEBUG: print("invalid shape ",end="")
+                    #continue
 
-            for freecadtype,ifctypes in typesmap.items():
-                if ptype in ifctypes:
-                    if clone:
-                        obj = getattr(Arch,"make"+freecadtype)(name=name)
-                        obj.CloneOf = clone
-                        if shape:
-                            if shape.Solids:
-                                s1 = shape.Solids[0]
-                            else:
-                                s1 = shape
-                            if clone.Shape.Solids:
-                                s2 = clone.Shape.Solids[0]
-                            else:
-                                s1 = clone.Shape
-                            if hasattr(s1,"CenterOfMass") and hasattr(s2,"CenterOfMass"):
-                                v = s1.CenterOfMass.sub(s2.CenterOfMass)
-                                if product.Representation:
-                                    r = getRotation(product.Representation.Representations[0].Items[0].MappingTarget)
-                                    if not r.isNull():
-                                        v = v.add(s2.CenterOfMass)
-                                        v = v.add(r.multVec(s2.CenterOfMass.negative()))
-                                    obj.Placement.Rotation = r
-                                    obj.Placement.move(v)
-                            else:
-                                print("failed to compute placement ",)
-                    else:
-                        obj = getattr(Arch,"make"+freecadtype)(baseobj=baseobj,name=name)
-                        if freecadtype in ["Wall","Structure"] and baseobj and baseobj.isDerivedFrom("Part::Extrusion"):
-                            # remove intermediary extrusion for types that can extrude themselves
-                            obj.Base = baseobj.Base
-                            obj.Placement = obj.Placement.multiply(baseobj.Placement)
-                            obj.Height = baseobj.Dir.Length
-                            obj.Normal = FreeCAD.Vector(baseobj.Dir).normalize()
-                            bn = baseobj.Name
-                            FreeCAD.ActiveDocument.removeObject(bn)
-                        if (freecadtype in ["Structure","Wall"]) and not baseobj:
-                            # remove sizes to prevent auto shape creation for types that don't require a base object
-                            obj.Height = 0
-                            obj.Width = 0
-                            obj.Length = 0
-                        if store:
-                            sharedobjects[store] = obj
+            else:
+                if DEBUG: print(" no brep ",end="")
 
-                    obj.Label = name
-                    if DEBUG: print(": "+obj.Label+" ",end="")
-                    if hasattr(obj,"Description") and hasattr(product,"Description"):
-                        if product.Description:
-                            obj.Description = product.Description
-                    if FreeCAD.GuiUp and baseobj:
-                        try:
-                            if hasattr(baseobj,"ViewObject"):
-                                baseobj.ViewObject.hide()
-                        except ReferenceError:
-                            pass
-                    if ptype == "IfcBuildingStorey":
-                        if product.Elevation:
-                            obj.Placement.Base.z = product.Elevation * getScaling(ifcfile)
+            if MERGE_MODE_ARCH == 0 and archobj:
 
-                    # setting IFC role
+                # full Arch objects
 
-                    try:
-                        if hasattr(obj,"IfcRole"):
-                            obj.IfcRole = ''.join(map(lambda x: x if x.islower() else " "+x, ptype[3:]))[1:]
+                for freecadtype,ifctypes in typesmap.items():
+                    if ptype in ifctypes:
+                        if clone:
+                            obj = getattr(Arch,"make"+freecadtype)(name=name)
+                            obj.CloneOf = clone
+                            if shape:
+                                if shape.Solids:
+                                    s1 = shape.Solids[0]
+                                else:
+                                    s1 = shape
+                                if clone.Shape.Solids:
+                                    s2 = clone.Shape.Solids[0]
+                                else:
+                                    s1 = clone.Shape
+                                if hasattr(s1,"CenterOfMass") and hasattr(s2,"CenterOfMass"):
+                                    v = s1.CenterOfMass.sub(s2.CenterOfMass)
+                                    if product.Representation:
+                                        r = getRotation(product.Representation.Representations[0].Items[0].MappingTarget)
+                                        if not r.isNull():
+                                            v = v.add(s2.CenterOfMass)
+                                            v = v.add(r.multVec(s2.CenterOfMass.negative()))
+                                        obj.Placement.Rotation = r
+                                        obj.Placement.move(v)
+                                else:
+                                    print("failed to compute placement ",)
                         else:
-                            # pre-0.18 objects, only support a small subset of types
-                            r = ptype[3:]
-                            tr = dict((v,k) for k, v in translationtable.items())
-                            if r in tr.keys():
-                                r = tr[r]
-                            # remove the "StandardCase"
-                            if "StandardCase" in r:
-                                r = r[:-12]
-                            obj.Role = r
-                    except:
-                        print("Unable to give IFC role ",ptype," to object ",obj.Label)
+                            obj = getattr(Arch,"make"+freecadtype)(baseobj=baseobj,name=name)
+                            if freecadtype in ["Wall","Structure"] and baseobj and baseobj.isDerivedFrom("Part::Extrusion"):
+                                # remove intermediary extrusion for types that can extrude themselves
+                                obj.Base = baseobj.Base
+                                obj.Placement = obj.Placement.multiply(baseobj.Placement)
+                                obj.Height = baseobj.Dir.Length
+                                obj.Normal = FreeCAD.Vector(baseobj.Dir).normalize()
+                                bn = baseobj.Name
+                                FreeCAD.ActiveDocument.removeObject(bn)
+                            if (freecadtype in ["Structure","Wall"]) and not baseobj:
+                                # remove sizes to prevent auto shape creation for types that don't require a base object
+                                obj.Height = 0
+                                obj.Width = 0
+                                obj.Length = 0
+                            if store:
+                                sharedobjects[store] = obj
+
+                        obj.Label = name
+                        if DEBUG: print(": "+obj.Label+" ",end="")
+                        if hasattr(obj,"Description") and hasattr(product,"Description"):
+                            if product.Description:
+                                obj.Description = product.Description
+                        if FreeCAD.GuiUp and baseobj:
+                            try:
+                                if hasattr(baseobj,"ViewObject"):
+                                    baseobj.ViewObject.hide()
+                            except ReferenceError:
+                                pass
+                        if ptype == "IfcBuildingStorey":
+                            if product.Elevation:
+                                obj.Placement.Base.z = product.Elevation * getScaling(ifcfile)
 
-                    # setting uid
+                        # setting IFC role
 
-                    if hasattr(obj,"IfcAttributes"):
-                        a = obj.IfcAttributes
-                        a["IfcUID"] = str(guid)
-                        obj.IfcAttributes = a
-                    break
+                        try:
+                            if hasattr(obj,"IfcRole"):
+                                obj.IfcRole = ''.join(map(lambda x: x if x.islower() else " "+x, ptype[3:]))[1:]
+                            else:
+                                # pre-0.18 objects, only support a small subset of types
+                                r = ptype[3:]
+                                tr = dict((v,k) for k, v in translationtable.items())
+                                if r in tr.keys():
+                                    r = tr[r]
+                                # remove the "StandardCase"
+                                if "StandardCase" in r:
+                                    r = r[:-12]
+                                obj.Role = r
+                        except:
+                            print("Unable to give IFC role ",ptype," to object ",obj.Label)
+
+                        # setting uid
+
+                        if hasattr(obj,"IfcAttributes"):
+                            a = obj.IfcAttributes
+                            a["IfcUID"] = str(guid)
+                            obj.IfcAttributes = a
+                        break
 
-            if not obj:
-                obj = Arch.makeComponent(baseobj,name=name)
+                if not obj:
+                    obj = Arch.makeComponent(baseobj,name=name)
 
-            if obj:
-                s = ""
-                if hasattr(obj,"Shape"):
-                    if obj.Shape.Solids:
-                        s = str(len(obj.Shape.Solids))+" solids"
-                if DEBUG: print(s,end="")
-                objects[pid] = obj
+                if obj:
+                    s = ""
+                    if hasattr(obj,"Shape"):
+                        if obj.Shape.Solids:
+                            s = str(len(obj.Shape.Solids))+" solids"
+                    if DEBUG: print(s,end="")
+                    objects[pid] = obj
 
-        elif (MERGE_MODE_ARCH == 1 and archobj) or (MERGE_MODE_STRUCT == 0 and not archobj):
+            elif (MERGE_MODE_ARCH == 1 and archobj) or (MERGE_MODE_STRUCT == 0 and not archobj):
 
-            # non-parametric Arch objects (just Arch components with a shape)
+                # non-parametric Arch objects (just Arch components with a shape)
 
-            if ptype in ["IfcSite","IfcBuilding","IfcBuildingStorey"]:
-                for freecadtype,ifctypes in typesmap.items():
-                    if ptype in ifctypes:
-                        obj = getattr(Arch,"make"+freecadtype)(baseobj=baseobj,name=name)
-                        if ptype == "IfcBuildingStorey":
-                            if product.Elevation:
-                                obj.Placement.Base.z = product.Elevation * getScaling(ifcfile)
-            elif baseobj:
-                obj = Arch.makeComponent(baseobj,name=name,delete=True)
+                if ptype in ["IfcSite","IfcBuilding","IfcBuildingStorey"]:
+                    for freecadtype,ifctypes in typesmap.items():
+                        if ptype in ifctypes:
+                            obj = getattr(Arch,"make"+freecadtype)(baseobj=baseobj,name=name)
+                            if ptype == "IfcBuildingStorey":
+                                if product.Elevation:
+                                    obj.Placement.Base.z = product.Elevation * getScaling(ifcfile)
+                elif baseobj:
+                    obj = Arch.makeComponent(baseobj,name=name,delete=True)
 
-        elif (MERGE_MODE_ARCH == 2 and archobj) or (MERGE_MODE_STRUCT == 1 and not archobj):
+            elif (MERGE_MODE_ARCH == 2 and archobj) or (MERGE_MODE_STRUCT == 1 and not archobj):
 
-            # Part shapes
+                # Part shapes
 
-            if ptype in ["IfcSite","IfcBuilding","IfcBuildingStorey"]:
-                for freecadtype,ifctypes in typesmap.items():
-                    if ptype in ifctypes:
-                        obj = getattr(Arch,"make"+freecadtype)(baseobj=baseobj,name=name)
-                        if ptype == "IfcBuildingStorey":
-                            if product.Elevation:
-                                obj.Placement.Base.z = product.Elevation * getScaling(ifcfile)
-            elif baseobj:
-                obj = FreeCAD.ActiveDocument.addObject("Part::Feature",name)
-                obj.Shape = shape
+                if ptype in ["IfcSite","IfcBuilding","IfcBuildingStorey"]:
+                    for freecadtype,ifctypes in typesmap.items():
+                        if ptype in ifctypes:
+                            obj = getattr(Arch,"make"+freecadtype)(baseobj=baseobj,name=name)
+                            if ptype == "IfcBuildingStorey":
+                                if product.Elevation:
+                                    obj.Placement.Base.z = product.Elevation * getScaling(ifcfile)
+                elif baseobj:
+                    obj = FreeCAD.ActiveDocument.addObject("Part::Feature",name)
+                    obj.Shape = shape
 
-        if DEBUG: print("")  # newline for debug prints, print for a new object should be on a new line
+            if DEBUG: print("")  # newline for debug prints, print for a new object should be on a new line
 
-        if obj:
+            if obj:
 
-            obj.Label = name
-            objects[pid] = obj
+                obj.Label = name
+                objects[pid] = obj
 
-            # handle properties
+                # handle properties
 
-            if pid in properties:
-                if IMPORT_PROPERTIES and hasattr(obj,"IfcProperties"):
+                if pid in properties:
+                    if IMPORT_PROPERTIES and hasattr(obj,"IfcProperties"):
 
-                    # treat as spreadsheet (pref option)
+                        # treat as spreadsheet (pref option)
 
-                    if isinstance(obj.IfcProperties,dict):
+                        if isinstance(obj.IfcProperties,dict):
 
-                        # fix property type if needed
+                            # fix property type if needed
 
-                        obj.removeProperty("IfcProperties")
-                        obj.addProperty("App::PropertyLink","IfcProperties","Component","Stores IFC properties as a spreadsheet")
+                            obj.removeProperty("IfcProperties")
+                            obj.addProperty("App::PropertyLink","IfcProperties","Component","Stores IFC properties as a spreadsheet")
 
-                    ifc_spreadsheet = Arch.makeIfcSpreadsheet()
-                    n=2
-                    for c in properties[pid].keys():
-                        o = ifcfile[c]
-                        if DEBUG: print("propertyset Name",o.Name,type(o.Name))
-                        catname = o.Name
-                        for p in properties[pid][c]:
-                            l = ifcfile[p]
-                            lname = l.Name
-                            if l.is_a("IfcPropertySingleValue"):
-                                if DEBUG:
-                                    print("property name",l.Name,type(l.Name))
-                                if sys.version_info.major < 3:
-                                    catname = catname.encode("utf8")
-                                    lname = lname.encode("utf8")
-                                ifc_spreadsheet.set(str('A'+str(n)), catname)
-                                ifc_spreadsheet.set(str('B'+str(n)), lname)
-                                if l.NominalValue:
+                        ifc_spreadsheet = Arch.makeIfcSpreadsheet()
+                        n=2
+                        for c in properties[pid].keys():
+                            o = ifcfile[c]
+                            if DEBUG: print("propertyset Name",o.Name,type(o.Name))
+                            catname = o.Name
+                            for p in properties[pid][c]:
+                                l = ifcfile[p]
+                                lname = l.Name
+                                if l.is_a("IfcPropertySingleValue"):
                                     if DEBUG:
-                                        print("property NominalValue",l.NominalValue.is_a(),type(l.NominalValue.is_a()))
-                                        print("property NominalValue.wrappedValue",l.NominalValue.wrappedValue,type(l.NominalValue.wrappedValue))
-                                        #print("l.NominalValue.Unit",l.NominalValue.Unit,type(l.NominalValue.Unit))
-                                    ifc_spreadsheet.set(str('C'+str(n)), l.NominalValue.is_a())
-                                    if l.NominalValue.is_a() in ['IfcLabel','IfcText','IfcIdentifier','IfcDescriptiveMeasure']:
-                                        if sys.version_info.major < 3:
-                                            ifc_spreadsheet.set(str('D'+str(n)), "'" + str(l.NominalValue.wrappedValue.encode("utf8")))
+                                        print("property name",l.Name,type(l.Name))
+                                    if sys.version_info.major < 3:
+                                        catname = catname.encode("utf8")
+                                        lname = lname.encode("utf8")
+                                    ifc_spreadsheet.set(str('A'+str(n)), catname)
+                                    ifc_spreadsheet.set(str('B'+str(n)), lname)
+                                    if l.NominalValue:
+                                        if DEBUG:
+                                            print("property NominalValue",l.NominalValue.is_a(),type(l.NominalValue.is_a()))
+                                            print("property NominalValue.wrappedValue",l.NominalValue.wrappedValue,type(l.NominalValue.wrappedValue))
+                                            #print("l.NominalValue.Unit",l.NominalValue.Unit,type(l.NominalValue.Unit))
+                                        ifc_spreadsheet.set(str('C'+str(n)), l.NominalValue.is_a())
+                                        if l.NominalValue.is_a() in ['IfcLabel','IfcText','IfcIdentifier','IfcDescriptiveMeasure']:
+                                            if sys.version_info.major < 3:
+                                                ifc_spreadsheet.set(str('D'+str(n)), "'" + str(l.NominalValue.wrappedValue.encode("utf8")))
+                                            else:
+                                                ifc_spreadsheet.set(str('D'+str(n)), "'" + str(l.NominalValue.wrappedValue))
                                         else:
-                                            ifc_spreadsheet.set(str('D'+str(n)), "'" + str(l.NominalValue.wrappedValue))
-                                    else:
-                                        ifc_spreadsheet.set(str('D'+str(n)), str(l.NominalValue.wrappedValue))
-                                    if hasattr(l.NominalValue,'Unit'):
-                                        ifc_spreadsheet.set(str('E'+str(n)), str(l.NominalValue.Unit))
-                                n += 1
-                        obj.IfcProperties = ifc_spreadsheet
+                                            ifc_spreadsheet.set(str('D'+str(n)), str(l.NominalValue.wrappedValue))
+                                        if hasattr(l.NominalValue,'Unit'):
+                                            ifc_spreadsheet.set(str('E'+str(n)), str(l.NominalValue.Unit))
+                                    n += 1
+                            obj.IfcProperties = ifc_spreadsheet
 
-                elif hasattr(obj,"IfcProperties") and isinstance(obj.IfcProperties,dict):
+                    elif hasattr(obj,"IfcProperties") and isinstance(obj.IfcProperties,dict):
 
-                    # 0.18 behaviour: properties are saved as pset;;type;;value in IfcProperties
+                        # 0.18 behaviour: properties are saved as pset;;type;;value in IfcProperties
 
-                    d = obj.IfcProperties
-                    for pset in properties[pid].keys():
-                        psetname = ifcfile[pset].Name
-                        if sys.version_info.major < 3:
-                            psetname = psetname.encode("utf8")
-                        for prop in properties[pid][pset]:
-                            e = ifcfile[prop]
-                            pname = e.Name
+                        d = obj.IfcProperties
+                        for pset in properties[pid].keys():
+                            psetname = ifcfile[pset].Name
                             if sys.version_info.major < 3:
-                                pname = pname.encode("utf8")
-                            if e.is_a("IfcPropertySingleValue"):
-                                ptype = e.NominalValue.is_a()
-                                if ptype in ['IfcLabel','IfcText','IfcIdentifier','IfcDescriptiveMeasure']:
-                                    pvalue = e.NominalValue.wrappedValue
-                                    if sys.version_info.major < 3:
-                                        pvalue = pvalue.encode("utf8")
-                                else:
-                                    pvalue = str(e.NominalValue.wrappedValue)
-                                if hasattr(e.NominalValue,'Unit'):
-                                    if e.NominalValue.Unit:
-                                        pvalue += e.NominalValue.Unit
-                                d[pname] = psetname+";;"+ptype+";;"+pvalue
-                                #print("adding property: ",pname,ptype,pvalue," pset ",psetname)
-                    obj.IfcProperties = d
-
-                elif hasattr(obj,"IfcAttributes"):
+                                psetname = psetname.encode("utf8")
+                            for prop in properties[pid][pset]:
+                                e = ifcfile[prop]
+                                pname = e.Name
+                                if sys.version_info.major < 3:
+                                    pname = pname.encode("utf8")
+                                if e.is_a("IfcPropertySingleValue"):
+                                    ptype = e.NominalValue.is_a()
+                                    if ptype in ['IfcLabel','IfcText','IfcIdentifier','IfcDescriptiveMeasure']:
+                                        pvalue = e.NominalValue.wrappedValue
+                                        if sys.version_info.major < 3:
+                                            pvalue = pvalue.encode("utf8")
+                                    else:
+                                        pvalue = str(e.NominalValue.wrappedValue)
+                                    if hasattr(e.NominalValue,'Unit'):
+                                        if e.NominalValue.Unit:
+                                            pvalue += e.NominalValue.Unit
+                                    d[pname] = psetname+";;"+ptype+";;"+pvalue
+                                    #print("adding property: ",pname,ptype,pvalue," pset ",psetname)
+                        obj.IfcProperties = d
 
-                    # 0.17: properties are saved as type(value) in IfcAttributes
+                    elif hasattr(obj,"IfcAttributes"):
 
-                    a = obj.IfcAttributes
-                    for c in properties[pid].keys():
-                        for p in properties[pid][c]:
-                            l = ifcfile[p]
-                            if l.is_a("IfcPropertySingleValue"):
-                                a[l.Name.encode("utf8")] = str(l.NominalValue) # no py3 support here
-                    obj.IfcAttributes = a
+                        # 0.17: properties are saved as type(value) in IfcAttributes
 
-            # color
+                        a = obj.IfcAttributes
+                        for c in properties[pid].keys():
+                            for p in properties[pid][c]:
+                                l = ifcfile[p]
+                                if l.is_a("IfcPropertySingleValue"):
+                                    a[l.Name.encode("utf8")] = str(l.NominalValue) # no py3 support here
+                        obj.IfcAttributes = a
 
-            if FreeCAD.GuiUp and (pid in colors) and hasattr(obj.ViewObject,"ShapeColor"):
-                #if DEBUG: print("    setting color: ",int(colors[pid][0]*255),"/",int(colors[pid][1]*255),"/",int(colors[pid][2]*255))
-                obj.ViewObject.ShapeColor = colors[pid]
+                # color
 
-            # if DEBUG is on, recompute after each shape
-            if DEBUG: FreeCAD.ActiveDocument.recompute()
+                if FreeCAD.GuiUp and (pid in colors) and hasattr(obj.ViewObject,"ShapeColor"):
+                    #if DEBUG: print("    setting color: ",int(colors[pid][0]*255),"/",int(colors[pid][1]*255),"/",int(colors[pid][2]*255))
+                    obj.ViewObject.ShapeColor = colors[pid]
 
-            # attached 2D elements
+                # if DEBUG is on, recompute after each shape
+                if DEBUG: FreeCAD.ActiveDocument.recompute()
 
-            if product.Representation:
-                for r in product.Representation.Representations:
-                    if r.RepresentationIdentifier == "FootPrint":
-                        annotations.append(product)
-                        break
+                # attached 2D elements
 
-            # additional properties for specific types
-
-            if product.is_a("IfcSite"):
-                if product.RefElevation:
-                    obj.Elevation = product.RefElevation * getScaling(ifcfile)
-                if product.RefLatitude:
-                    obj.Latitude = dms2dd(*product.RefLatitude)
-                if product.RefLongitude:
-                    obj.Longitude = dms2dd(*product.RefLongitude)
-                if product.SiteAddress:
-                    if product.SiteAddress.AddressLines:
-                        obj.Address = product.SiteAddress.AddressLines[0]
-                    if product.SiteAddress.Town:
-                        obj.City = product.SiteAddress.Town
-                    if product.SiteAddress.Region:
-                        obj.Region = product.SiteAddress.Region
-                    if product.SiteAddress.Country:
-                        obj.Country = product.SiteAddress.Country
-                    if product.SiteAddress.PostalCode:
-                        obj.PostalCode = product.SiteAddress.PostalCode
+                if product.Representation:
+                    for r in product.Representation.Representations:
+                        if r.RepresentationIdentifier == "FootPrint":
+                            annotations.append(product)
+                            break
 
-        try:
-            progressbar.next(True)
-        except(RuntimeError):
-            print("Aborted.")
-            progressbar.stop()
-            FreeCAD.ActiveDocument.recompute()
-            return
+                # additional properties for specific types
+
+                if product.is_a("IfcSite"):
+                    if product.RefElevation:
+                        obj.Elevation = product.RefElevation * getScaling(ifcfile)
+                    if product.RefLatitude:
+                        obj.Latitude = dms2dd(*product.RefLatitude)
+                    if product.RefLongitude:
+                        obj.Longitude = dms2dd(*product.RefLongitude)
+                    if product.SiteAddress:
+                        if product.SiteAddress.AddressLines:
+                            obj.Address = product.SiteAddress.AddressLines[0]
+                        if product.SiteAddress.Town:
+                            obj.City = product.SiteAddress.Town
+                        if product.SiteAddress.Region:
+                            obj.Region = product.SiteAddress.Region
+                        if product.SiteAddress.Country:
+                            obj.Country = product.SiteAddress.Country
+                        if product.SiteAddress.PostalCode:
+                            obj.PostalCode = product.SiteAddress.PostalCode
+
+            try:
+                progressbar.next(True)
+            except(RuntimeError):
+                print("Aborted.")
+                progressbar.stop()
+                FreeCAD.ActiveDocument.recompute()
+                return
+    finally:
+        pipeline.close()
+        if cache:
+            cache.close(colors)
 
     progressbar.stop()
     FreeCAD.ActiveDocument.recompute()
@@ -1274,8 +1251,12 @@ def insert(filename,docname,skip=[],only=[],root=None):
             if aid in remaining.keys():
                 remaining[aid].addObject(anno)
             else:
-                for host,children in additions.items():
-                    if (aid in children) and (host in objects.keys()):
+                hosts = []
+                for host in relationships.parents.get(aid,[]):
+                    if (aid in additions.get(host,[])) and not (host in hosts):
+                        hosts.append(host)
+                for host in hosts:
+                    if host in objects.keys():
                         Arch.addComponents(anno,objects[host])
 
     FreeCAD.ActiveDocument.recompute()
@@ -0,0 +1,583 @@
+#***************************************************************************
+#*                                                                         *
+#*   Copyright (c) 2026 - FreeCAD Developers                               *
+#*                                                                         *
+#*   This program is free software; you can redistribute it and/or modify  *
+#*   it under the terms of the GNU Lesser General Public License (LGPL)    *
+#*   as published by the Free Software Foundation; either version 2 of     *
+#*   the License, or (at your option) any later version.                   *
+#*   for detail see the LICENCE text file.                                 *
+#*                                                                         *
+#*   This program is distributed in the hope that it will be useful,       *
+#*   but WITHOUT ANY WARRANTY; without even the implied warranty of        *
+#*   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the         *
+#*   GNU Library General Public License for more details.                  *
+#*                                                                         *
+#*   You should have received a copy of the GNU Library General Public     *
+#*   License along with this program; if not, write to the Free Software   *
+#*   Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  *
+#*   USA                                                                   *
+#*                                                                         *
+#***************************************************************************
+
+from __future__ import print_function
+
+__title__ =  "FreeCAD IFC importer - helper tools"
+__url__ =    "http://www.freecadweb.org"
+
+import os,shutil,tempfile,hashlib
+import ForkProcesses
+
+try:
+    import cPickle as pickle
+except ImportError:
+    import pickle
+
+## @package importIFCHelper
+#  \ingroup ARCH
+#  \brief Helper tools of the IFC importer
+#
+#  This module provides the parts of the IFC importer that don't need
+#  a FreeCAD document: the relationship tables of an IFC file, the
+#  geometry pipeline computing the BReps of the products in worker processes
+#  and the on-disk cache of the BReps of imported products.
+
+# number of products a worker process gets at once
+CHUNKSIZE = 20
+
+# the file and geometry settings used by the worker processes, they are
+# inherited from the importing process when the workers are forked
+_ifcfile = None
+_settings = None
+
+
+def createBrep(settings,product,structural=False):
+
+    """createBrep(settings,product,structural=False): returns the BRep string
+    of an IFC product computed by IfcOpenShell, or None if the product has no shape.
+    Curves are included for structural products."""
+
+    import ifcopenshell
+    if hasattr(settings,"INCLUDE_CURVES"):
+        settings.set(settings.INCLUDE_CURVES,structural)
+    try:
+        cr = ifcopenshell.geom.create_shape(settings,product)
+        return cr.geometry.brep_data
+    except:
+        return None # IfcOpenShell will yield an error if a given product has no shape, but we don't care, we're brave enough
+
+
+def _geometryWorker(tasks,results,tempdir):
+
+    """the loop of a worker process: computes the BReps of the products of each
+    chunk in tasks, writes them to tempdir and puts (id,filename) in results"""
+
+    for chunk in iter(tasks.get,None):
+        for pid,structural in chunk:
+            path = None
+            brep = createBrep(_settings,_ifcfile[pid],structural)
+            if brep:
+                path = os.path.join(tempdir,str(pid)+".brep")
+                if not isinstance(brep,bytes):
+                    brep = brep.encode("utf8")
+                with open(path,"wb") as f:
+                    f.write(brep)
+            results.put((pid,path))
+
+
+class GeometryPipeline:
+
+    """GeometryPipeline(ifcfile,settings,tasks,processes,cache): computes the BReps
+    of the products in tasks, a list of (product id, is structural) tuples.
+    With processes > 0 they are computed by that many forked worker processes
+    (see ForkProcesses) in the order of tasks, while the importer creates the
+    objects of the products computed before. The BReps are passed through
+    files in a temporary directory. Without processes, if processes can't be
+    forked or once a worker failed, each BRep is computed when it is asked
+    for. If an opened IfcCache is given, the BReps found in it are not
+    computed and the computed ones are stored in it. getBrep(id) returns the
+    BRep of a product, close() stops the workers and removes the temporary
+    files."""
+
+    def __init__(self,ifcfile,settings,tasks,processes=0,cache=None):
+
+        self.ifcfile = ifcfile
+        self.settings = settings
+        self.structural = dict(tasks)
+        self.pool = None
+        self.pending = set() # ids of the products given to the workers, not received yet
+        self.done = {} # { id:BRep file } received from the workers
+        self.tempdir = None
+        self.cache = cache
+        self.keys = {} # { id:cache key }
+        if cache:
+            remaining = []
+            for pid,structural in tasks:
+                key = cache.productKey(pid,structural)
+                self.keys[pid] = key
+                if not cache.has(key):
+                    remaining.append((pid,structural))
+            tasks = remaining
+        if processes > 0 and len(tasks) > 1:
+            global _ifcfile,_settings
+            _ifcfile = ifcfile
+            _settings = settings
+            self.tempdir = tempfile.mkdtemp(prefix="ifcgeom")
+            processes = min(processes,(len(tasks)+CHUNKSIZE-1)//CHUNKSIZE)
+            self.pool = ForkProcesses.Pool(_geometryWorker,processes,(self.tempdir,))
+            if self.pool.workers:
+                for i in range(0,len(tasks),CHUNKSIZE):
+                    self.pool.put(tasks[i:i+CHUNKSIZE])
+                self.pool.finish()
+                self.pending = set(pid for pid,structural in tasks)
+            else:
+                self.close()
+
+    def getBrep(self,pid):
+
+        """getBrep(id): returns the BRep string of the product with the given id,
+        or None if it has no shape"""
+
+        key = self.keys.get(pid)
+        if key:
+            found,brep = self.cache.get(key)
+            if found:
+                return brep
+        # products missing from the cache when the pipeline started were given to
+        # the workers, an entry removed since then is computed here
+        brep = self._computeBrep(pid)
+        if key:
+            self.cache.put(key,brep)
+        return brep
+
+    def _computeBrep(self,pid):
+
+        while (pid in self.pending) and not (pid in self.done):
+            try:
+                rid,path = self.pool.get()
+            except ForkProcesses.WorkerError:
+                # a worker died, the remaining products are computed here
+                print("IFC geometry processes stopped, continuing in this process")
+                self._stop()
+                break
+            self.pending.discard(rid)
+            self.done[rid] = path
+        if not pid in self.done:
+            return createBrep(self.settings,self.ifcfile[pid],self.structural.get(pid,False))
+        path = self.done.pop(pid)
+        if not path:
+            return None
+        with open(path,"rb") as f:
+            brep = f.read()
+        os.remove(path)
+        if not isinstance(brep,str):
+            brep = brep.decode("utf8")
+        return brep
+
+    def _stop(self):
+
+        if self.pool:
+            self.pool.close()
+            self.pool = None
+        self.pending = set()
+        global _ifcfile,_settings
+        _ifcfile = None
+        _settings = None
+
+    def close(self):
+
+        """close(): stops the worker processes and removes the temporary files"""
+
+        self._stop()
+        self.done = {}
+        if self.tempdir:
+            shutil.rmtree(self.tempdir,ignore_errors=True)
+            self.tempdir = None
+
+
+class IfcRelationships:
+
+    """IfcRelationships(ifcfile): the relationship tables of an IFC file.
+    Each group of tables is built on first use, with one pass over the
+    relationship entities:
+    additions:    { host:[child,...], ... } from spatial containment and aggregation
+    groups:       { host:[child,...], ... } from group assignments
+    subtractions: [ [opening,host], ... ]
+    parents:      { child:[host,...], ... } from aggregation, containment and voids, in this order
+    properties:   { objid : { psetid : [propertyid, ... ], ... }, ... }
+    mattable:     { objid:matid }
+    prodrepr:     { productid:[representation item id,...], ... }
+    itemproducts: { representation item id:[productid,...], ... } the reverse of prodrepr
+    colors:       { id:(r,g,b) } of products and materials, from the styled items"""
+
+    # table name: method building it
+    _tables = {
+        "additions":"_buildStructure",
+        "groups":"_buildStructure",
+        "subtractions":"_buildStructure",
+        "parents":"_buildStructure",
+        "properties":"_buildProperties",
+        "mattable":"_buildMaterials",
+        "prodrepr":"_buildRepresentations",
+        "itemproducts":"_buildRepresentations",
+        "colors":"_buildColors",
+    }
+
+    def __init__(self,ifcfile):
+
+        self.ifcfile = ifcfile
+
+    def __getattr__(self,name):
+
+        if name in IfcRelationships._tables:
+            getattr(self,IfcRelationships._tables[name])()
+            return self.__dict__[name]
+        raise AttributeError(name)
+
+    def entityId(self,entity):
+
+        """entityId(entity): the id of an entity, used by the structure tables"""
+
+        return entity.id()
+
+    def attribute(self,entity,name):
+
+        """attribute(entity,name): an attribute of an entity, used by the structure tables.
+        Both can be redefined for wrappers of older IfcOpenShell versions."""
+
+        return getattr(entity,name)
+
+    def _buildStructure(self):
+
+        additions = {}
+        groups = {}
+        subtractions = []
+        parents = {}
+        eid = self.entityId
+        attr = self.attribute
+        aggregates = self.ifcfile.by_type("IfcRelAggregates")
+        containments = self.ifcfile.by_type("IfcRelContainedInSpatialStructure")
+        for r in containments:
+            additions.setdefault(eid(attr(r,"RelatingStructure")),[]).extend([eid(e) for e in attr(r,"RelatedElements")])
+        for r in aggregates:
+            host = eid(attr(r,"RelatingObject"))
+            children = [eid(e) for e in attr(r,"RelatedObjects")]
+            additions.setdefault(host,[]).extend(children)
+            for c in children:
+                parents.setdefault(c,[]).append(host)
+        for r in containments:
+            host = eid(attr(r,"RelatingStructure"))
+            for e in attr(r,"RelatedElements"):
+                parents.setdefault(eid(e),[]).append(host)
+        for r in self.ifcfile.by_type("IfcRelAssignsToGroup"):
+            groups.setdefault(eid(attr(r,"RelatingGroup")),[]).extend([eid(e) for e in attr(r,"RelatedObjects")])
+        for r in self.ifcfile.by_type("IfcRelVoidsElement"):
+            opening = eid(attr(r,"RelatedOpeningElement"))
+            host = eid(attr(r,"RelatingBuildingElement"))
+            subtractions.append([opening,host])
+            parents.setdefault(opening,[]).append(host)
+        self.additions = additions
+        self.groups = groups
+        self.subtractions = subtractions
+        self.parents = parents
+
+    def _buildProperties(self):
+
+        properties = {}
+        for r in self.ifcfile.by_type("IfcRelDefinesByProperties"):
+            for obj in r.RelatedObjects:
+                if not obj.id() in properties:
+                    properties[obj.id()] = {}
+                psets = {}
+                props = []
+                if r.RelatingPropertyDefinition.is_a("IfcPropertySet"):
+                    props.extend([prop.id() for prop in r.RelatingPropertyDefinition.HasProperties])
+                    psets[r.RelatingPropertyDefinition.id()] = props
+                    properties[obj.id()].update(psets)
+        self.properties = properties
+
+    def _buildMaterials(self):
+
+        mattable = {}
+        for r in self.ifcfile.by_type("IfcRelAssociatesMaterial"):
+            for o in r.RelatedObjects:
+                if r.RelatingMaterial.is_a("IfcMaterial"):
+                    mattable[o.id()] = r.RelatingMaterial.id()
+                elif r.RelatingMaterial.is_a("IfcMaterialLayer"):
+                    mattable[o.id()] = r.RelatingMaterial.Material.id()
+                elif r.RelatingMaterial.is_a("IfcMaterialLayerSet"):
+                    mattable[o.id()] = r.RelatingMaterial.MaterialLayers[0].Material.id()
+                elif r.RelatingMaterial.is_a("IfcMaterialLayerSetUsage"):
+                    mattable[o.id()] = r.RelatingMaterial.ForLayerSet.MaterialLayers[0].Material.id()
+        self.mattable = mattable
+
+    def _buildRepresentations(self):
+
+        prodrepr = {}
+        itemproducts = {}
+        for p in self.ifcfile.by_type("IfcProduct"):
+            if hasattr(p,"Representation"):
+                if p.Representation:
+                    items = []
+                    for it in p.Representation.Representations:
+                        for it1 in it.Items:
+                            items.append(it1.id())
+                            if it1.is_a("IfcBooleanResult"):
+                                items.append(it1.FirstOperand.id())
+                            elif it.Items[0].is_a("IfcMappedItem"):
+                                items.append(it1.MappingSource.MappedRepresentation.id())
+                                if it1.MappingSource.MappedRepresentation.is_a("IfcShapeRepresentation"):
+                                    for it2 in it1.MappingSource.MappedRepresentation.Items:
+                                        items.append(it2.id())
+                    if items:
+                        prodrepr[p.id()] = items
+                        for i in set(items):
+                            itemproducts.setdefault(i,[]).append(p.id())
+        self.prodrepr = prodrepr
+        self.itemproducts = itemproducts
+
+    def _buildColors(self):
+
+        colors = {}
+        itemproducts = self.itemproducts
+        # styled item id: [material id,...] for the styles of materials
+        matstyles = {}
+        for m in self.ifcfile.by_type("IfcMaterialDefinitionRepresentation"):
+            for it in m.Representations:
+                if it.Items:
+                    matstyles.setdefault(it.Items[0].id(),[]).append(m.RepresentedMaterial.id())
+        for r in self.ifcfile.by_type("IfcStyledItem"):
+            if r.Styles:
+                if r.Styles[0].is_a("IfcPresentationStyleAssignment"):
+                    if r.Styles[0].Styles[0].is_a("IfcSurfaceStyle"):
+                        if r.Styles[0].Styles[0].Styles[0].is_a("IfcSurfaceStyleRendering"):
+                            if r.Styles[0].Styles[0].Styles[0].SurfaceColour:
+                                c = r.Styles[0].Styles[0].Styles[0].SurfaceColour
+                                if r.Item:
+                                    for p in itemproducts.get(r.Item.id(),[]):
+                                        colors[p] = (c.Red,c.Green,c.Blue)
+                                else:
+                                    for m in matstyles.get(r.id(),[]):
+                                        colors[m] = (c.Red,c.Green,c.Blue)
+        self.colors = colors
+
+    def getChildren(self,ifcid):
+
+        """getChildren(id): returns the ids of the given element and of all its
+        children in the additions table, recursively"""
+
+        ids = []
+        todo = [ifcid]
+        while todo:
+            currentid = todo.pop()
+            ids.append(currentid)
+            if currentid in self.additions:
+                todo.extend(self.additions[currentid])
+        return ids
+
+
+class IfcCache:
+
+    """IfcCache(directory,maxsize): an on-disk cache of the BReps of imported
+    IFC products, limited to maxsize bytes. When it's full, the least recently
+    used entries are removed. open(filename,ifcfile,settingskey,relationships)
+    prepares it for the import of a file, settingskey describes the geometry
+    settings. The BRep of a product is stored under a key made from its
+    GlobalId, the settings and the contents of all entities its geometry
+    depends on, so unchanged products of a changed file are found again.
+    For each file, identified by the hash of its contents, the keys of its
+    products (by entity id) and its colors are stored too, so a file that
+    didn't change doesn't need any product key to be computed again."""
+
+    def __init__(self,directory,maxsize):
+
+        self.directory = directory
+        self.maxsize = maxsize
+        self.filekey = None
+        self.record = {}
+        self.productkeys = {}
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+        self.size = 0
+        for f in os.listdir(directory):
+            try:
+                self.size += os.path.getsize(os.path.join(directory,f))
+            except OSError:
+                pass
+
+    def _path(self,key,ext=".brep"):
+
+        return os.path.join(self.directory,key+ext)
+
+    def _write(self,path,data):
+
+        tmp = path + "." + str(os.getpid()) + ".tmp"
+        with open(tmp,"wb") as f:
+            f.write(data)
+        if os.path.exists(path):
+            self.size -= os.path.getsize(path)
+            os.remove(path)
+        os.rename(tmp,path)
+        self.size += len(data)
+
+    def open(self,filename,ifcfile,settingskey,relationships):
+
+        """open(filename,ifcfile,settingskey,relationships): prepares the cache
+        for the import of the given file"""
+
+        self.ifcfile = ifcfile
+        self.settingskey = settingskey
+        self.relationships = relationships
+        h = hashlib.sha1()
+        with open(filename,"rb") as f:
+            while True:
+                block = f.read(1<<20)
+                if not block:
+                    break
+                h.update(block)
+        h.update(settingskey.encode("utf8"))
+        self.filekey = h.hexdigest()
+        self.record = {}
+        path = self._path(self.filekey,".index")
+        if os.path.exists(path):
+            try:
+                with open(path,"rb") as f:
+                    self.record = pickle.load(f)
+                os.utime(path,None)
+            except Exception:
+                self.record = {}
+        self.productkeys = dict(self.record.get("products",{}))
+        self.openings = None
+
+    def getColors(self):
+
+        """getColors(): the colors table stored for the opened file, or None"""
+
+        return self.record.get("colors")
+
+    def productKey(self,pid,structural=False):
+
+        """productKey(id,structural=False): the cache key of the BRep of a product"""
+
+        if (pid,structural) in self.productkeys:
+            return self.productkeys[(pid,structural)]
+        product = self.ifcfile[pid]
+        guid = product.GlobalId
+        if self.openings is None:
+            self.openings = {}
+            for opening,host in self.relationships.subtractions:
+                self.openings.setdefault(host,[]).append(opening)
+        h = hashlib.sha1()
+        h.update((self.settingskey+";"+str(guid)+";"+str(structural)).encode("utf8"))
+        # the product with its representation and placement, and the openings cut out of it
+        self._hashEntities(h,[product] + [self.ifcfile[o] for o in self.openings.get(pid,[])])
+        key = h.hexdigest()
+        self.productkeys[(pid,structural)] = key
+        return key
+
+    def _hashEntities(self,h,entities):
+
+        """adds the contents of the entities and of all the entities they reference
+        to the hash h. The entity ids are replaced by the order in which the entities
+        are met, and the owner histories are left out, so a product keeps its key when
+        other entities are added to the file or when the file is saved again"""
+
+        order = {} # { entity id:order }
+        todo = []
+        def ref(e):
+            if not e.id() in order:
+                order[e.id()] = len(order)
+                todo.append(e)
+            return "#"+str(order[e.id()])
+        def value(v):
+            if isinstance(v,(list,tuple)):
+                return "("+",".join([value(x) for x in v])+")"
+            if hasattr(v,"is_a"):
+                if v.is_a("IfcOwnerHistory"):
+                    return "*"
+                if not v.id():
+                    # a typed value, like IfcLabel('...')
+                    return v.is_a()+value([v[k] for k in range(len(v))])
+                return ref(v)
+            return repr(v)
+        for e in entities:
+            ref(e)
+        n = 0
+        while n < len(todo):
+            e = todo[n]
+            n += 1
+            h.update((e.is_a()+value([e[k] for k in range(len(e))])+";").encode("utf8"))
+
+    def has(self,key):
+
+        return os.path.exists(self._path(key))
+
+    def get(self,key):
+
+        """get(key): returns (True,BRep) if key is in the cache, (False,None) otherwise.
+        The BRep is None for products without shape"""
+
+        path = self._path(key)
+        try:
+            with open(path,"rb") as f:
+                brep = f.read()
+            os.utime(path,None)
+        except (IOError,OSError):
+            return False,None
+        if not brep:
+            return True,None
+        if not isinstance(brep,str):
+            brep = brep.decode("utf8")
+        return True,brep
+
+    def put(self,key,brep):
+
+        """put(key,brep): stores a BRep in the cache, None for products without shape"""
+
+        if not brep:
+            brep = b""
+        elif not isinstance(brep,bytes):
+            brep = brep.encode("utf8")
+        try:
+            self._write(self._path(key),brep)
+        except (IOError,OSError):
+            pass
+
+    def close(self,colors=None):
+
+        """close(colors=None): stores the product keys and colors of the opened
+        file and removes the least recently used entries if the cache is too big"""
+
+        if self.filekey:
+            record = {"products":self.productkeys,"colors":colors}
+            try:
+                self._write(self._path(self.filekey,".index"),pickle.dumps(record,2))
+            except (IOError,OSError):
+                pass
+            self.filekey = None
+        self.evict()
+
+    def evict(self):
+
+        """evict(): removes the least recently used entries until the cache fits in its size"""
+
+        if self.size <= self.maxsize:
+            return
+        entries = []
+        for f in os.listdir(self.directory):
+            path = os.path.join(self.directory,f)
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            entries.append((st.st_mtime,st.st_size,path))
+        entries.sort()
+        self.size = sum(e[1] for e in entries)
+        for mtime,size,path in entries:
+            if self.size <= self.maxsize:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            self.size -= size
@@ -29,6 +29,7 @@
 
 
 import FreeCAD, Arch, Draft, os, sys, time, Part, DraftVecUtils, uuid, math, re
+import importIFCHelper
 from DraftTools import translate
 
 __title__="FreeCAD IFC importer"
@@ -165,7 +166,7 @@ def read(filename,skip=None):
             ifc = IfcImport.open(filename)
             objects = ifc.by_type("IfcProduct")
             num_lines = len(objects)
-            relations = ifc.by_type("IfcRelAggregates") + ifc.by_type("IfcRelContainedInSpatialStructure") + ifc.by_type("IfcRelVoidsElement")
+            relationships = IfcRelationships(ifc)
             if not objects:
                 print("Error opening IFC file")
                 return 
@@ -185,19 +186,8 @@ def read(filename,skip=None):
                 objid = int(str(obj).split("=")[0].strip("#"))
                 objname = obj.get_argument(obj.get_argument_index("Name"))
                 objtype = str(obj).split("=")[1].split("(")[0]
-                for r in relations:
-                    if r.is_a("IfcRelAggregates"):
-                        for c in getAttr(r,"RelatedObjects"):
-                            if str(obj) == str(c):
-                                objparentid.append(int(str(getAttr(r,"RelatingObject")).split("=")[0].strip("#")))
-                    elif r.is_a("IfcRelContainedInSpatialStructure"):
-                        for c in getAttr(r,"RelatedElements"):
-                            if str(obj) == str(c):
-                                objparentid.append(int(str(getAttr(r,"RelatingStructure")).split("=")[0].strip("#")))
-                    elif r.is_a("IfcRelVoidsElement"):
-                        if str(obj) == str(getAttr(r,"RelatedOpeningElement")):
-                            objparentid.append(int(str(getAttr(r,"RelatingBuildingElement")).split("=")[0].strip("#")))
-                    
+                objparentid.extend(relationships.parents.get(objid,[]))
+
             else:
                 if hasattr(IfcImport, 'GetBrepData'):
                     obj = IfcImport.GetBrepData()  
@@ -775,6 +765,15 @@ def getPlacement(entity):
     if DEBUG: print("    made placement for ",entityid,":",pl)
     return pl
     
+class IfcRelationships(importIFCHelper.IfcRelationships):
+    "the relationship tables of importIFCHelper, for the entities of the IfcOpenShell wrapper"
+
+    def entityId(self,entity):
+        return int(str(entity).split("=")[0].strip("#"))
+
+    def attribute(self,entity,attr):
+        return getAttr(entity,attr)
+
 def getAttr(entity,attr):
     "returns the given attribute from the given entity"
     if IFCOPENSHELL5:
@@ -411,8 +411,11 @@ def getGroupContents(objectslist,walls=False,addgroups=False,spaces=False,noarch
 
     # cleaning possible duplicates
     cleanlist = []
+    found = set()
     for obj in newlist:
-        if not obj in cleanlist:
+        key = (obj.Document.Name,obj.Name)
+        if not key in found:
+            found.add(key)
             cleanlist.append(obj)
     return cleanlist
 
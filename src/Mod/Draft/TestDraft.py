@@ -23,7 +23,49 @@
 #*                                                                         *
 #***************************************************************************/
 
-import FreeCAD, os, unittest, FreeCADGui, Draft
+import FreeCAD, os, time, tempfile, unittest, FreeCADGui, Draft
+
+def writeInsertDXF(filename,blockcount=200,insertcount=100000,layercount=20):
+    """writes a synthetic dxf file with blockcount blocks of a few lines and a circle,
+    and insertcount rotated inserts of them spread over layercount layers.
+    Used to benchmark the import of drawings with many block inserts."""
+    f = open(filename,"w")
+    def group(code,value):
+        f.write("%d\n%s\n" % (code,value))
+    group(0,"SECTION")
+    group(2,"BLOCKS")
+    for b in range(blockcount):
+        name = "Block%d" % b
+        group(0,"BLOCK")
+        group(8,"0")
+        group(2,name)
+        group(70,0)
+        for k,v in ((10,0),(20,0),(30,0)):
+            group(k,v)
+        group(3,name)
+        for i in range(4):
+            group(0,"LINE")
+            group(8,"0")
+            for k,v in ((10,i),(20,0),(30,0),(11,i+1),(21,b%7+1),(31,0)):
+                group(k,v)
+        group(0,"CIRCLE")
+        group(8,"0")
+        for k,v in ((10,2),(20,1),(30,0),(40,0.5+b%3)):
+            group(k,v)
+        group(0,"ENDBLK")
+        group(8,"0")
+    group(0,"ENDSEC")
+    group(0,"SECTION")
+    group(2,"ENTITIES")
+    for i in range(insertcount):
+        group(0,"INSERT")
+        group(8,"Layer%d" % (i%layercount))
+        group(2,"Block%d" % (i%blockcount))
+        for k,v in ((10,(i%500)*10.0),(20,(i//500)*10.0),(30,0),(50,(i*15)%360)):
+            group(k,v)
+    group(0,"ENDSEC")
+    group(0,"EOF")
+    f.close()
 
 class DraftTest(unittest.TestCase):
 
@@ -138,6 +180,50 @@ class DraftTest(unittest.TestCase):
         clone = Draft.clone(box)
         self.failUnless(clone.hasExtension("Part::AttachExtension"))
 
+    # import tools
+
+    def testDXFInserts(self):
+        FreeCAD.Console.PrintLog ('Checking DXF import of block inserts...\n')
+        if not os.path.exists(os.path.join(FreeCAD.ConfigGet("UserAppData"),"dxfReader.py")):
+            self.skipTest("DXF libraries not installed")
+        import importDXF
+        importDXF.getDXFlibs()
+        importDXF.readPreferences()
+        importDXF.dxfCreateDraft = importDXF.dxfCreateSketch = importDXF.dxfMakeBlocks = False
+        importDXF.dxfImportTexts = importDXF.dxfStarBlocks = False
+        filename = os.path.join(tempfile.gettempdir(),"DraftTestInserts.dxf")
+        writeInsertDXF(filename,blockcount=20,insertcount=2000,layercount=5)
+        t = time.time()
+        importDXF.processdxf(FreeCAD.ActiveDocument,filename,reComputeFlag=False)
+        FreeCAD.Console.PrintLog ('imported 2000 inserts in %.2f s\n' % (time.time()-t))
+        os.remove(filename)
+        self.failUnless(len(importDXF.layers) == 5,"DXF import of layers failed")
+        objs = [o for o in FreeCAD.ActiveDocument.Objects if o.Name.startswith("Block")]
+        self.failUnless(len(objs) == 2000,"DXF import of block inserts failed")
+        self.failUnless(objs[1].Shape.Placement.Base.isEqual(FreeCAD.Vector(10,0,0),1e-9),"DXF insert placement failed")
+
+    def testDXFBatchImport(self):
+        FreeCAD.Console.PrintLog ('Checking DXF batch import...\n')
+        if not os.path.exists(os.path.join(FreeCAD.ConfigGet("UserAppData"),"dxfReader.py")):
+            self.skipTest("DXF libraries not installed")
+        import importDXF
+        importDXF.getDXFlibs()
+        importDXF.readPreferences()
+        importDXF.dxfCreateDraft = importDXF.dxfCreateSketch = importDXF.dxfMakeBlocks = False
+        importDXF.dxfImportTexts = importDXF.dxfStarBlocks = importDXF.dxfGetColors = False
+        importDXF.dxfBatchImport = True
+        filename = os.path.join(tempfile.gettempdir(),"DraftTestBatch.dxf")
+        writeInsertDXF(filename,blockcount=20,insertcount=2000,layercount=5)
+        doc = FreeCAD.ActiveDocument
+        undoMode = doc.UndoMode
+        importDXF.processdxf(doc,filename,reComputeFlag=False)
+        importDXF.dxfBatchImport = False
+        os.remove(filename)
+        objs = [o for o in doc.Objects if o.isDerivedFrom("Part::Feature")]
+        self.failUnless(len(objs) == 5,"DXF batch import failed")
+        self.failUnless(sum(len(o.Shape.childShapes()) for o in objs) == 2000,"DXF batch import of inserts failed")
+        self.failUnless(doc.UndoMode == undoMode and not doc.RecomputesFrozen,"DXF batch import did not restore the document")
+
     # modification tools
 
     def tearDown(self):
@@ -230,15 +230,15 @@ def deformat(text):
 def locateLayer(wantedLayer,color=None):
     "returns layer group and creates it if needed"
     wantedLayerName = decodeName(wantedLayer)
-    for l in layers:
-        if wantedLayerName==l.Label:
-            return l
+    if wantedLayerName in layerNames:
+        return layerNames[wantedLayerName]
     if dxfUseDraftVisGroups:
         newLayer = Draft.makeVisGroup(name=wantedLayer)
     else:
         newLayer = doc.addObject("App::DocumentObjectGroup",wantedLayer)
     newLayer.Label = wantedLayerName
     layers.append(newLayer)
+    layerNames[wantedLayerName] = newLayer
     return newLayer
 
 def getdimheight(style):
@@ -830,9 +830,11 @@ def drawBlock(blockref,num=None,createObject=False):
     "returns a shape from a dxf block reference"
     if not dxfStarBlocks:
         if blockref.name[0] == '*':
+            blockshapes[blockref.name] = None
             return None
     if len(blockref.entities.data) == 0:
         print("skipping empty block ",blockref.name)
+        blockshapes[blockref.name] = None
         return None
     #print("creating block ", blockref.name, " containing ", len(blockref.entities.data), " entities")
     shapes = []
@@ -874,10 +876,11 @@ def drawBlock(blockref,num=None,createObject=False):
              if dxfImportLayouts or (not rawValue(text,67)):
                 print("adding block text",text.value, " from ",blockref)
                 addText(text)
+    shape = None
     try: shape = Part.makeCompound(shapes)
     except Part.OCCError: warn(blockref)
+    blockshapes[blockref.name] = shape
     if shape:
-        blockshapes[blockref.name]=shape
         if createObject:
             newob=doc.addObject("Part::Feature",blockref.name)
             newob.Shape = shape
@@ -907,29 +910,22 @@ def drawInsert(insert,num=None,clone=False):
         else:
             shape = None
     else:
-        if insert in blockshapes:
-            shape = blockshapes[insert.block].copy()
+        # the block is drawn only once, every insert of it is a placed
+        # compound sharing the sub-shapes of the block shape
+        if insert.block in blockshapes:
+            shape = blockshapes[insert.block]
         else:
             shape = None
-            for b in drawing.blocks.data:
-                if b.name == insert.block:
-                    shape = drawBlock(b,num)
+            if insert.block in blockdefs:
+                shape = drawBlock(blockdefs[insert.block],num)
         if shape:
-            pos = vec(insert.loc)
-            rot = math.radians(insert.rotation)
-            scale = insert.scale
-            tsf = FreeCAD.Matrix()
+            #scale = insert.scale
             #tsf.scale(scale[0],scale[1],0) # for some reason z must be 0 to work
-            tsf.rotateZ(rot)
-            try:
-                shape = shape.transformGeometry(tsf)
-            except Part.OCCError:
-                tsf.scale(scale[0],scale[1],0)
-                try:
-                    shape = shape.transformGeometry(tsf)
-                except Part.OCCError:
-                    print("importDXF: unable to apply insert transform:",tsf)
-            shape.translate(pos)
+            tsf = FreeCAD.Matrix()
+            tsf.rotateZ(math.radians(insert.rotation))
+            tsf.move(vec(insert.loc))
+            shape = Part.makeCompound(shape.childShapes())
+            shape.Placement = FreeCAD.Placement(tsf)
             return shape
     return None
 
@@ -956,20 +952,16 @@ def attribs(insert):
     "checks if an insert has attributes, and returns the values if yes"
     atts = []
     if rawValue(insert,66) != 1: return []
-    index = None
-    for i in range(len(drawing.entities.data)):
-        if drawing.entities.data[i] == insert:
-            index = i
-            break
+    global entityIndex
+    if entityIndex is None:
+        entityIndex = dict((id(e),i) for i,e in enumerate(drawing.entities.data))
+    index = entityIndex.get(id(insert))
     if index == None: return []
-    j = index+1
-    while True:
-        ent = drawing.entities.data[j]
-        if str(ent) == 'seqend':
-            return atts
-        elif str(ent) == 'attrib':
-            atts.append(ent)
-            j += 1
+    for ent in drawing.entities.data[index+1:]:
+        if str(ent) != 'attrib':
+            break
+        atts.append(ent)
+    return atts
 
 def addObject(shape,name="Shape",layer=None):
     "adds a new object to the document with passed arguments"
@@ -1066,6 +1058,48 @@ def addToBlock(obj,layer):
     else:
         layerBlocks[layer] = [obj]
 
+def addToBatch(shape,name,layer,dxfobj):
+    "adds given shape to the batch of its layer, type and color"
+    color = None
+    if dxfGetColors:
+        color = getattr(dxfobj,"color_index",None)
+    key = (layer,name,color)
+    if key in batchShapes:
+        batchShapes[key][1].append(shape)
+    else:
+        batchShapes[key] = (dxfobj,[shape])
+
+def makeBatchObjects():
+    "creates one compound object per batch, the objects are formatted afterwards"
+    FreeCAD.Console.PrintMessage("creating "+str(len(batchShapes))+" batch objects...\n")
+    newobs = []
+    for (layer,name,color),(dxfobj,shapes) in batchShapes.items():
+        try:
+            shape = Part.makeCompound(shapes)
+        except Part.OCCError:
+            warn(dxfobj)
+            continue
+        newob = doc.addObject("Part::Feature",name)
+        newob.Shape = shape
+        if layer:
+            lay = locateLayer(layer)
+            lay.addObject(newob)
+        newobs.append((newob,dxfobj))
+    if gui:
+        for newob,dxfobj in newobs:
+            formatObject(newob,dxfobj)
+
+def suspendDocument(document):
+    "disables undo and automatic recomputes of the document, returns their former state"
+    state = (document.UndoMode,document.RecomputesFrozen)
+    document.UndoMode = 0
+    document.RecomputesFrozen = True
+    return state
+
+def resumeDocument(document,state):
+    "restores the undo mode and automatic recomputes of the document"
+    document.UndoMode,document.RecomputesFrozen = state
+
 def processdxf(document,filename,getShapes=False,reComputeFlag=True):
     "Recompute causes OpenSCAD import to loop, supply flag to make conditional"
     "this does the translation of the dxf contents into FreeCAD Part objects"
@@ -1077,456 +1111,502 @@ def processdxf(document,filename,getShapes=False,reComputeFlag=True):
     drawing = dxfReader.readDXF(filename)
     global layers
     layers = []
+    global layerNames
+    layerNames = {}
     global doc
     doc = document
     global blockshapes
     blockshapes = {}
     global blockobjects
     blockobjects = {}
+    global blockdefs
+    blockdefs = {}
+    for ref in drawing.blocks.data:
+        blockdefs[ref.name] = ref
+    global entityIndex
+    entityIndex = None
     global badobjects
     badobjects = []
     global layerBlocks
     layerBlocks = {}
+    global batchShapes
+    batchShapes = {}
     sketch = None
     shapes = []
 
-    # drawing lines
+    # in batch mode the entities are collected per layer and type and turned
+    # into a few compound objects at the end, recomputes and undo are suspended
 
-    lines = drawing.entities.get_type("line")
-    if lines: FreeCAD.Console.PrintMessage("drawing "+str(len(lines))+" lines...\n")
-    for line in lines:
-        if dxfImportLayouts or (not rawValue(line,67)):
-            shape = drawLine(line)
-            if shape:
-                if dxfCreateSketch:
-                    if dxfMakeBlocks or dxfJoin:
-                        if sketch:
-                            shape = Draft.makeSketch(shape,autoconstraints=True,addTo=sketch)
+    batch = dxfBatchImport and (document != None) and not getShapes
+    if batch:
+        FreeCAD.Console.PrintMessage("batch import, one object per layer and entity type\n")
+        docState = suspendDocument(doc)
+
+    try:
+        # drawing lines
+
+        lines = drawing.entities.get_type("line")
+        if lines: FreeCAD.Console.PrintMessage("drawing "+str(len(lines))+" lines...\n")
+        for line in lines:
+            if dxfImportLayouts or (not rawValue(line,67)):
+                shape = drawLine(line,forceShape=batch)
+                if shape:
+                    if batch:
+                        addToBatch(shape,"Line",line.layer,line)
+                    elif dxfCreateSketch:
+                        if dxfMakeBlocks or dxfJoin:
+                            if sketch:
+                                shape = Draft.makeSketch(shape,autoconstraints=True,addTo=sketch)
+                            else:
+                                shape = Draft.makeSketch(shape,autoconstraints=True)
+                                sketch = shape
                         else:
                             shape = Draft.makeSketch(shape,autoconstraints=True)
-                            sketch = shape
-                    else:
-                        shape = Draft.makeSketch(shape,autoconstraints=True)
-                elif dxfJoin or getShapes:
-                    if isinstance(shape,Part.Shape):
-                        shapes.append(shape)
+                    elif dxfJoin or getShapes:
+                        if isinstance(shape,Part.Shape):
+                            shapes.append(shape)
+                        else:
+                            shapes.append(shape.Shape)
+                    elif dxfMakeBlocks:
+                        addToBlock(shape,line.layer)
                     else:
-                        shapes.append(shape.Shape)
-                elif dxfMakeBlocks:
-                    addToBlock(shape,line.layer)
+                        newob = addObject(shape,"Line",line.layer)
+                        if gui: formatObject(newob,line)
+
+        # drawing polylines
+
+        pls = drawing.entities.get_type("lwpolyline")
+        pls.extend(drawing.entities.get_type("polyline"))
+        polylines = []
+        meshes = []
+        for p in pls:
+            if hasattr(p,"flags"):
+                if p.flags in [16,64]:
+                    meshes.append(p)
                 else:
-                    newob = addObject(shape,"Line",line.layer)
-                    if gui: formatObject(newob,line)
-
-    # drawing polylines
-
-    pls = drawing.entities.get_type("lwpolyline")
-    pls.extend(drawing.entities.get_type("polyline"))
-    polylines = []
-    meshes = []
-    for p in pls:
-        if hasattr(p,"flags"):
-            if p.flags in [16,64]:
-                meshes.append(p)
+                    polylines.append(p)
             else:
                 polylines.append(p)
-        else:
-            polylines.append(p)
-    if polylines:
-        FreeCAD.Console.PrintMessage("drawing "+str(len(polylines))+" polylines...\n")
-    num = 0
-    for polyline in polylines:
-        if dxfImportLayouts or (not rawValue(polyline,67)):
-            shape = drawPolyline(polyline,num)
-            if shape:
-                if dxfCreateSketch:
-                    if isinstance(shape,Part.Shape):
-                        t = FreeCAD.ActiveDocument.addObject("Part::Feature","Shape")
-                        t.Shape = shape
-                        shape = t
-                    if dxfMakeBlocks or dxfJoin:
-                        if sketch:
-                            shape = Draft.makeSketch(shape,autoconstraints=True,addTo=sketch)
+        if polylines:
+            FreeCAD.Console.PrintMessage("drawing "+str(len(polylines))+" polylines...\n")
+        num = 0
+        for polyline in polylines:
+            if dxfImportLayouts or (not rawValue(polyline,67)):
+                shape = drawPolyline(polyline,batch or num)
+                if shape:
+                    if batch:
+                        addToBatch(shape,"Polyline",polyline.layer,polyline)
+                    elif dxfCreateSketch:
+                        if isinstance(shape,Part.Shape):
+                            t = FreeCAD.ActiveDocument.addObject("Part::Feature","Shape")
+                            t.Shape = shape
+                            shape = t
+                        if dxfMakeBlocks or dxfJoin:
+                            if sketch:
+                                shape = Draft.makeSketch(shape,autoconstraints=True,addTo=sketch)
+                            else:
+                                shape = Draft.makeSketch(shape,autoconstraints=True)
+                                sketch = shape
                         else:
                             shape = Draft.makeSketch(shape,autoconstraints=True)
-                            sketch = shape
-                    else:
-                        shape = Draft.makeSketch(shape,autoconstraints=True)
-                elif dxfJoin or getShapes:
-                    if isinstance(shape,Part.Shape):
-                        shapes.append(shape)
+                    elif dxfJoin or getShapes:
+                        if isinstance(shape,Part.Shape):
+                            shapes.append(shape)
+                        else:
+                            shapes.append(shape.Shape)
+                    elif dxfMakeBlocks:
+                        addToBlock(shape,polyline.layer)
                     else:
-                        shapes.append(shape.Shape)
-                elif dxfMakeBlocks:
-                    addToBlock(shape,polyline.layer)
-                else:
-                    newob = addObject(shape,"Polyline",polyline.layer)
-                    if gui: formatObject(newob,polyline)
-            num += 1
-
-    # drawing arcs
-
-    arcs = drawing.entities.get_type("arc")
-    if arcs: FreeCAD.Console.PrintMessage("drawing "+str(len(arcs))+" arcs...\n")
-    for arc in arcs:
-        if dxfImportLayouts or (not rawValue(arc,67)):
-            shape = drawArc(arc)
-            if shape:
-                if dxfCreateSketch:
-                    if dxfMakeBlocks or dxfJoin:
-                        if sketch:
-                            shape = Draft.makeSketch(shape,autoconstraints=True,addTo=sketch)
+                        newob = addObject(shape,"Polyline",polyline.layer)
+                        if gui: formatObject(newob,polyline)
+                num += 1
+
+        # drawing arcs
+
+        arcs = drawing.entities.get_type("arc")
+        if arcs: FreeCAD.Console.PrintMessage("drawing "+str(len(arcs))+" arcs...\n")
+        for arc in arcs:
+            if dxfImportLayouts or (not rawValue(arc,67)):
+                shape = drawArc(arc,forceShape=batch)
+                if shape:
+                    if batch:
+                        addToBatch(shape,"Arc",arc.layer,arc)
+                    elif dxfCreateSketch:
+                        if dxfMakeBlocks or dxfJoin:
+                            if sketch:
+                                shape = Draft.makeSketch(shape,autoconstraints=True,addTo=sketch)
+                            else:
+                                shape = Draft.makeSketch(shape,autoconstraints=True)
+                                sketch = shape
                         else:
                             shape = Draft.makeSketch(shape,autoconstraints=True)
-                            sketch = shape
-                    else:
-                        shape = Draft.makeSketch(shape,autoconstraints=True)
-                elif dxfJoin or getShapes:
-                    if isinstance(shape,Part.Shape):
-                        shapes.append(shape)
+                    elif dxfJoin or getShapes:
+                        if isinstance(shape,Part.Shape):
+                            shapes.append(shape)
+                        else:
+                            shapes.append(shape.Shape)
+                    elif dxfMakeBlocks:
+                        addToBlock(shape,arc.layer)
                     else:
-                        shapes.append(shape.Shape)
-                elif dxfMakeBlocks:
-                    addToBlock(shape,arc.layer)
-                else:
-                    newob = addObject(shape,"Arc",arc.layer)
-                    if gui: formatObject(newob,arc)
-
-    # joining lines, polylines and arcs if needed
-
-    if dxfJoin and shapes:
-        FreeCAD.Console.PrintMessage("Joining geometry...\n")
-        edges = []
-        for s in shapes:
-            edges.extend(s.Edges)
-        if len(edges) > (100):
-            FreeCAD.Console.PrintMessage(str(len(edges))+" edges to join\n")
-            if FreeCAD.GuiUp:
-                from PySide import QtGui
-                d = QtGui.QMessageBox()
-                d.setText("Warning: High number of entities to join (>100)")
-                d.setInformativeText("This might take a long time or even freeze your computer. Are you sure? You can also disable the \"join geometry\" setting in DXF import preferences")
-                d.setStandardButtons(QtGui.QMessageBox.Ok | QtGui.QMessageBox.Cancel)
-                d.setDefaultButton(QtGui.QMessageBox.Cancel)
-                res = d.exec_()
-                if res == QtGui.QMessageBox.Cancel:
-                    FreeCAD.Console.PrintMessage("Aborted\n")
-                    return
-        shapes = DraftGeomUtils.findWires(edges)
-        for s in shapes:
-            newob = addObject(s)
-
-    # drawing circles
-
-    circles = drawing.entities.get_type("circle")
-    if circles: FreeCAD.Console.PrintMessage("drawing "+str(len(circles))+" circles...\n")
-    for circle in circles:
-        if dxfImportLayouts or (not rawValue(circle,67)):
-            shape = drawCircle(circle)
-            if shape:
-                if dxfCreateSketch:
-                    if dxfMakeBlocks or dxfJoin:
-                        if sketch:
-                            shape = Draft.makeSketch(shape,autoconstraints=True,addTo=sketch)
+                        newob = addObject(shape,"Arc",arc.layer)
+                        if gui: formatObject(newob,arc)
+
+        # joining lines, polylines and arcs if needed
+
+        if dxfJoin and shapes:
+            FreeCAD.Console.PrintMessage("Joining geometry...\n")
+            edges = []
+            for s in shapes:
+                edges.extend(s.Edges)
+            if len(edges) > (100):
+                FreeCAD.Console.PrintMessage(str(len(edges))+" edges to join\n")
+                if FreeCAD.GuiUp:
+                    from PySide import QtGui
+                    d = QtGui.QMessageBox()
+                    d.setText("Warning: High number of entities to join (>100)")
+                    d.setInformativeText("This might take a long time or even freeze your computer. Are you sure? You can also disable the \"join geometry\" setting in DXF import preferences")
+                    d.setStandardButtons(QtGui.QMessageBox.Ok | QtGui.QMessageBox.Cancel)
+                    d.setDefaultButton(QtGui.QMessageBox.Cancel)
+                    res = d.exec_()
+                    if res == QtGui.QMessageBox.Cancel:
+                        FreeCAD.Console.PrintMessage("Aborted\n")
+                        return
+            shapes = DraftGeomUtils.findWires(edges)
+            for s in shapes:
+                newob = addObject(s)
+
+        # drawing circles
+
+        circles = drawing.entities.get_type("circle")
+        if circles: FreeCAD.Console.PrintMessage("drawing "+str(len(circles))+" circles...\n")
+        for circle in circles:
+            if dxfImportLayouts or (not rawValue(circle,67)):
+                shape = drawCircle(circle,forceShape=batch)
+                if shape:
+                    if batch:
+                        addToBatch(shape,"Circle",circle.layer,circle)
+                    elif dxfCreateSketch:
+                        if dxfMakeBlocks or dxfJoin:
+                            if sketch:
+                                shape = Draft.makeSketch(shape,autoconstraints=True,addTo=sketch)
+                            else:
+                                shape = Draft.makeSketch(shape,autoconstraints=True)
+                                sketch = shape
                         else:
                             shape = Draft.makeSketch(shape,autoconstraints=True)
-                            sketch = shape
+                    elif dxfMakeBlocks:
+                        addToBlock(shape,circle.layer)
+                    elif getShapes:
+                        if isinstance(shape,Part.Shape):
+                            shapes.append(shape)
+                        else:
+                            shapes.append(shape.Shape)
                     else:
-                        shape = Draft.makeSketch(shape,autoconstraints=True)
-                elif dxfMakeBlocks:
-                    addToBlock(shape,circle.layer)
-                elif getShapes:
-                    if isinstance(shape,Part.Shape):
-                        shapes.append(shape)
+                        newob = addObject(shape,"Circle",circle.layer)
+                        if gui: formatObject(newob,circle)
+
+        # drawing solids
+
+        solids = drawing.entities.get_type("solid")
+        if solids: FreeCAD.Console.PrintMessage("drawing "+str(len(solids))+" solids...\n")
+        for solid in solids:
+            lay = rawValue(solid,8)
+            if dxfImportLayouts or (not rawValue(solid,67)):
+                shape = drawSolid(solid)
+                if shape:
+                    if batch:
+                        addToBatch(shape,"Solid",lay,solid)
+                    elif dxfMakeBlocks:
+                        addToBlock(shape,lay)
+                    elif getShapes:
+                        if isinstance(shape,Part.Shape):
+                            shapes.append(shape)
+                        else:
+                            shapes.append(shape.Shape)
                     else:
-                        shapes.append(shape.Shape)
-                else:
-                    newob = addObject(shape,"Circle",circle.layer)
-                    if gui: formatObject(newob,circle)
-
-    # drawing solids
-
-    solids = drawing.entities.get_type("solid")
-    if solids: FreeCAD.Console.PrintMessage("drawing "+str(len(solids))+" solids...\n")
-    for solid in solids:
-        lay = rawValue(solid,8)
-        if dxfImportLayouts or (not rawValue(solid,67)):
-            shape = drawSolid(solid)
-            if shape:
-                if dxfMakeBlocks:
-                    addToBlock(shape,lay)
-                elif getShapes:
-                    if isinstance(shape,Part.Shape):
-                        shapes.append(shape)
+                        newob = addObject(shape,"Solid",lay)
+                        if gui: formatObject(newob,solid)
+
+        # drawing splines
+
+        splines = drawing.entities.get_type("spline")
+        if splines: FreeCAD.Console.PrintMessage("drawing "+str(len(splines))+" splines...\n")
+        for spline in splines:
+            lay = rawValue(spline,8)
+            if dxfImportLayouts or (not rawValue(spline,67)):
+                shape = drawSpline(spline,forceShape=batch)
+                if shape:
+                    if batch:
+                        addToBatch(shape,"Spline",lay,spline)
+                    elif dxfMakeBlocks:
+                        addToBlock(shape,lay)
+                    elif getShapes:
+                        if isinstance(shape,Part.Shape):
+                            shapes.append(shape)
+                        else:
+                            shapes.append(shape.Shape)
                     else:
-                        shapes.append(shape.Shape)
-                else:
-                    newob = addObject(shape,"Solid",lay)
-                    if gui: formatObject(newob,solid)
-
-    # drawing splines
-
-    splines = drawing.entities.get_type("spline")
-    if splines: FreeCAD.Console.PrintMessage("drawing "+str(len(splines))+" splines...\n")
-    for spline in splines:
-        lay = rawValue(spline,8)
-        if dxfImportLayouts or (not rawValue(spline,67)):
-            shape = drawSpline(spline)
-            if shape:
-                if dxfMakeBlocks:
-                    addToBlock(shape,lay)
-                elif getShapes:
-                    if isinstance(shape,Part.Shape):
-                        shapes.append(shape)
+                        newob = addObject(shape,"Spline",lay)
+                        if gui: formatObject(newob,spline)
+
+        # drawing ellipses
+
+        ellipses = drawing.entities.get_type("ellipse")
+        if ellipses: FreeCAD.Console.PrintMessage("drawing "+str(len(ellipses))+" ellipses...\n")
+        for ellipse in ellipses:
+            lay = rawValue(ellipse,8)
+            if dxfImportLayouts or (not rawValue(ellipse,67)):
+                shape = drawEllipse(ellipse,forceShape=batch)
+                if shape:
+                    if batch:
+                        addToBatch(shape,"Ellipse",lay,ellipse)
+                    elif dxfMakeBlocks:
+                        addToBlock(shape,lay)
+                    elif getShapes:
+                        if isinstance(shape,Part.Shape):
+                            shapes.append(shape)
+                        else:
+                            shapes.append(shape.Shape)
                     else:
-                        shapes.append(shape.Shape)
-                else:
-                    newob = addObject(shape,"Spline",lay)
-                    if gui: formatObject(newob,spline)
+                        newob = addObject(shape,"Ellipse",lay)
+                        if gui: formatObject(newob,ellipse)
 
-    # drawing ellipses
+        # drawing texts
 
-    ellipses = drawing.entities.get_type("ellipse")
-    if ellipses: FreeCAD.Console.PrintMessage("drawing "+str(len(ellipses))+" ellipses...\n")
-    for ellipse in ellipses:
-        lay = rawValue(ellipse,8)
-        if dxfImportLayouts or (not rawValue(ellipse,67)):
-            shape = drawEllipse(ellipse)
+        if dxfImportTexts:
+            texts = drawing.entities.get_type("mtext")
+            texts.extend(drawing.entities.get_type("text"))
+            if texts:
+                FreeCAD.Console.PrintMessage("drawing "+str(len(texts))+" texts...\n")
+            for text in texts:
+                if dxfImportLayouts or (not rawValue(text,67)):
+                    addText(text)
+
+        else: FreeCAD.Console.PrintMessage("skipping texts...\n")
+
+        # drawing 3D objects
+
+        faces3d = drawing.entities.get_type("3dface")
+        if faces3d: FreeCAD.Console.PrintMessage("drawing "+str(len(faces3d))+" 3dfaces...\n")
+        for face3d in faces3d:
+            shape = drawFace(face3d)
             if shape:
-                if dxfMakeBlocks:
-                    addToBlock(shape,lay)
+                if batch:
+                    addToBatch(shape,"Face",face3d.layer,face3d)
                 elif getShapes:
                     if isinstance(shape,Part.Shape):
                         shapes.append(shape)
                     else:
                         shapes.append(shape.Shape)
                 else:
-                    newob = addObject(shape,"Ellipse",lay)
-                    if gui: formatObject(newob,ellipse)
-
-    # drawing texts
-
-    if dxfImportTexts:
-        texts = drawing.entities.get_type("mtext")
-        texts.extend(drawing.entities.get_type("text"))
-        if texts:
-            FreeCAD.Console.PrintMessage("drawing "+str(len(texts))+" texts...\n")
-        for text in texts:
-            if dxfImportLayouts or (not rawValue(text,67)):
-                addText(text)
-
-    else: FreeCAD.Console.PrintMessage("skipping texts...\n")
-
-    # drawing 3D objects
-
-    faces3d = drawing.entities.get_type("3dface")
-    if faces3d: FreeCAD.Console.PrintMessage("drawing "+str(len(faces3d))+" 3dfaces...\n")
-    for face3d in faces3d:
-        shape = drawFace(face3d)
-        if shape:
-            if getShapes:
-                if isinstance(shape,Part.Shape):
-                    shapes.append(shape)
-                else:
-                    shapes.append(shape.Shape)
-            else:
-                newob = addObject(shape,"Face",face3d.layer)
-                if gui: formatObject(newob,face3d)
-    if meshes: FreeCAD.Console.PrintMessage("drawing "+str(len(meshes))+" 3dmeshes...\n")
-    for mesh in meshes:
-        me = drawMesh(mesh)
-        if me:
-            newob = doc.addObject("Mesh::Feature","Mesh")
-            lay = locateLayer(rawValue(mesh,8))
-            lay.addObject(newob)
-            newob.Mesh = me
-            if gui: formatObject(newob,mesh)
+                    newob = addObject(shape,"Face",face3d.layer)
+                    if gui: formatObject(newob,face3d)
+        if meshes: FreeCAD.Console.PrintMessage("drawing "+str(len(meshes))+" 3dmeshes...\n")
+        for mesh in meshes:
+            me = drawMesh(mesh)
+            if me:
+                newob = doc.addObject("Mesh::Feature","Mesh")
+                lay = locateLayer(rawValue(mesh,8))
+                lay.addObject(newob)
+                newob.Mesh = me
+                if gui: formatObject(newob,mesh)
 
-    # end of shape-based objects, return if we are just getting shapes
+        # end of shape-based objects, return if we are just getting shapes
 
-    if getShapes and shapes:
-        return(shapes)
+        if getShapes and shapes:
+            return(shapes)
 
-    # drawing dims
+        # drawing dims
 
-    if dxfImportTexts:
-        dims = drawing.entities.get_type("dimension")
-        FreeCAD.Console.PrintMessage("drawing "+str(len(dims))+" dimensions...\n")
-        for dim in dims:
-            if dxfImportLayouts or (not rawValue(dim,67)):
-                try:
-                    layer = rawValue(dim,8)
-                    if rawValue(dim,15) != None:
-                        # this is a radial or diameter dimension
-                        #x1 = float(rawValue(dim,11))
-                        #y1 = float(rawValue(dim,21))
-                        #z1 = float(rawValue(dim,31))
-                        x2 = float(rawValue(dim,10))
-                        y2 = float(rawValue(dim,20))
-                        z2 = float(rawValue(dim,30))
-                        x3 = float(rawValue(dim,15))
-                        y3 = float(rawValue(dim,25))
-                        z3 = float(rawValue(dim,35))
-                        x1 = x2
-                        y1 = y2
-                        z1 = z2
-                    else:
-                        x1 = float(rawValue(dim,10))
-                        y1 = float(rawValue(dim,20))
-                        z1 = float(rawValue(dim,30))
-                        x2 = float(rawValue(dim,13))
-                        y2 = float(rawValue(dim,23))
-                        z2 = float(rawValue(dim,33))
-                        x3 = float(rawValue(dim,14))
-                        y3 = float(rawValue(dim,24))
-                        z3 = float(rawValue(dim,34))
-                    d = rawValue(dim,70)
-                    if d: align = int(d)
-                    else: align = 0
-                    d = rawValue(dim,50)
-                    if d: angle = float(d)
-                    else: angle = 0
-                except (ValueError,TypeError):
-                    warn(dim)
-                else:
-                    lay=locateLayer(layer)
-                    pt = vec([x1,y1,z1])
-                    p1 = vec([x2,y2,z2])
-                    p2 = vec([x3,y3,z3])
-                    if align >= 128:
-                        align -= 128
-                    elif align >= 64:
-                        align -= 64
-                    elif align >= 32:
-                        align -= 32
-                    if align == 0:
-                        if angle in [0,180]:
-                            p2 = vec([x3,y2,z2])
-                        elif angle in [90,270]:
-                            p2 = vec([x2,y3,z2])
-                    newob = doc.addObject("App::FeaturePython","Dimension")
-                    lay.addObject(newob)
-                    _Dimension(newob)
-                    _ViewProviderDimension(newob.ViewObject)
-                    newob.Start = p1
-                    newob.End = p2
-                    newob.Dimline = pt
-                    if gui:
-                        dim.layer = layer
-                        dim.color_index = 256
-                        formatObject (newob,dim)
-                        if dxfUseStandardSize and draftui:
-                            newob.ViewObject.FontSize = draftui.fontsize
+        if dxfImportTexts:
+            dims = drawing.entities.get_type("dimension")
+            FreeCAD.Console.PrintMessage("drawing "+str(len(dims))+" dimensions...\n")
+            for dim in dims:
+                if dxfImportLayouts or (not rawValue(dim,67)):
+                    try:
+                        layer = rawValue(dim,8)
+                        if rawValue(dim,15) != None:
+                            # this is a radial or diameter dimension
+                            #x1 = float(rawValue(dim,11))
+                            #y1 = float(rawValue(dim,21))
+                            #z1 = float(rawValue(dim,31))
+                            x2 = float(rawValue(dim,10))
+                            y2 = float(rawValue(dim,20))
+                            z2 = float(rawValue(dim,30))
+                            x3 = float(rawValue(dim,15))
+                            y3 = float(rawValue(dim,25))
+                            z3 = float(rawValue(dim,35))
+                            x1 = x2
+                            y1 = y2
+                            z1 = z2
                         else:
-                            st = rawValue(dim,3)
-                            size = getdimheight(st) or 1
-                            newob.ViewObject.FontSize = float(size)*TEXTSCALING
-    else:
-        FreeCAD.Console.PrintMessage("skipping dimensions...\n")
-
-    # drawing points
-
-    if dxfImportPoints:
-        points = drawing.entities.get_type("point")
-        if points: FreeCAD.Console.PrintMessage("drawing "+str(len(points))+" points...\n")
-        for point in points:
-                x = vec(rawValue(point,10))
-                y = vec(rawValue(point,20))
-                z = vec(rawValue(point,30))
-                lay = rawValue(point,8)
-                if dxfImportLayouts or (not rawValue(point,67)):
-                    if dxfMakeBlocks:
-                        shape = Part.Vertex(x,y,z)
-                        addToBlock(shape,lay)
+                            x1 = float(rawValue(dim,10))
+                            y1 = float(rawValue(dim,20))
+                            z1 = float(rawValue(dim,30))
+                            x2 = float(rawValue(dim,13))
+                            y2 = float(rawValue(dim,23))
+                            z2 = float(rawValue(dim,33))
+                            x3 = float(rawValue(dim,14))
+                            y3 = float(rawValue(dim,24))
+                            z3 = float(rawValue(dim,34))
+                        d = rawValue(dim,70)
+                        if d: align = int(d)
+                        else: align = 0
+                        d = rawValue(dim,50)
+                        if d: angle = float(d)
+                        else: angle = 0
+                    except (ValueError,TypeError):
+                        warn(dim)
                     else:
-                        newob = Draft.makePoint(x,y,z)
-                        lay = locateLayer(lay)
+                        lay=locateLayer(layer)
+                        pt = vec([x1,y1,z1])
+                        p1 = vec([x2,y2,z2])
+                        p2 = vec([x3,y3,z3])
+                        if align >= 128:
+                            align -= 128
+                        elif align >= 64:
+                            align -= 64
+                        elif align >= 32:
+                            align -= 32
+                        if align == 0:
+                            if angle in [0,180]:
+                                p2 = vec([x3,y2,z2])
+                            elif angle in [90,270]:
+                                p2 = vec([x2,y3,z2])
+                        newob = doc.addObject("App::FeaturePython","Dimension")
                         lay.addObject(newob)
+                        _Dimension(newob)
+                        _ViewProviderDimension(newob.ViewObject)
+                        newob.Start = p1
+                        newob.End = p2
+                        newob.Dimline = pt
                         if gui:
-                            formatObject(newob,point)
-    else:
-        FreeCAD.Console.PrintMessage("skipping points...\n")
+                            dim.layer = layer
+                            dim.color_index = 256
+                            formatObject (newob,dim)
+                            if dxfUseStandardSize and draftui:
+                                newob.ViewObject.FontSize = draftui.fontsize
+                            else:
+                                st = rawValue(dim,3)
+                                size = getdimheight(st) or 1
+                                newob.ViewObject.FontSize = float(size)*TEXTSCALING
+        else:
+            FreeCAD.Console.PrintMessage("skipping dimensions...\n")
+
+        # drawing points
+
+        if dxfImportPoints:
+            points = drawing.entities.get_type("point")
+            if points: FreeCAD.Console.PrintMessage("drawing "+str(len(points))+" points...\n")
+            for point in points:
+                    x = vec(rawValue(point,10))
+                    y = vec(rawValue(point,20))
+                    z = vec(rawValue(point,30))
+                    lay = rawValue(point,8)
+                    if dxfImportLayouts or (not rawValue(point,67)):
+                        if dxfMakeBlocks:
+                            shape = Part.Vertex(x,y,z)
+                            addToBlock(shape,lay)
+                        else:
+                            newob = Draft.makePoint(x,y,z)
+                            lay = locateLayer(lay)
+                            lay.addObject(newob)
+                            if gui:
+                                formatObject(newob,point)
+        else:
+            FreeCAD.Console.PrintMessage("skipping points...\n")
 
-    # drawing leaders
+        # drawing leaders
 
-    if dxfImportTexts:
-        leaders = drawing.entities.get_type("leader")
-        if leaders:
-            FreeCAD.Console.PrintMessage("drawing "+str(len(leaders))+" leaders...\n")
-        for leader in leaders:
-            if dxfImportLayouts or (not rawValue(leader,67)):
-                points = getMultiplePoints(leader)
-                newob = Draft.makeWire(points)
-                lay = locateLayer(rawValue(leader,8))
-                lay.addObject(newob)
-                if gui:
-                    newob.ViewObject.EndArrow = True
-                    formatObject(newob,leader)
-    else:
-        FreeCAD.Console.PrintMessage("skipping leaders...\n")
-
-    # drawing hatches
-
-    if dxfImportHatches:
-        hatches = drawing.entities.get_type("hatch")
-        if hatches:
-            FreeCAD.Console.PrintMessage("drawing "+str(len(hatches))+" hatches...\n")
-        for hatch in hatches:
-            if dxfImportLayouts or (not rawValue(hatch,67)):
-                points = getMultiplePoints(hatch)
-                if len(points) > 1:
-                    lay = rawValue(hatch,8)
-                    points = points[:-1]
-                    newob = None
-                    if dxfCreatePart or dxfMakeBlocks:
-                        points.append(points[0])
-                        s = Part.makePolygon(points)
-                        if dxfMakeBlocks:
-                            addToBlock(s,lay)
+        if dxfImportTexts:
+            leaders = drawing.entities.get_type("leader")
+            if leaders:
+                FreeCAD.Console.PrintMessage("drawing "+str(len(leaders))+" leaders...\n")
+            for leader in leaders:
+                if dxfImportLayouts or (not rawValue(leader,67)):
+                    points = getMultiplePoints(leader)
+                    newob = Draft.makeWire(points)
+                    lay = locateLayer(rawValue(leader,8))
+                    lay.addObject(newob)
+                    if gui:
+                        newob.ViewObject.EndArrow = True
+                        formatObject(newob,leader)
+        else:
+            FreeCAD.Console.PrintMessage("skipping leaders...\n")
+
+        # drawing hatches
+
+        if dxfImportHatches:
+            hatches = drawing.entities.get_type("hatch")
+            if hatches:
+                FreeCAD.Console.PrintMessage("drawing "+str(len(hatches))+" hatches...\n")
+            for hatch in hatches:
+                if dxfImportLayouts or (not rawValue(hatch,67)):
+                    points = getMultiplePoints(hatch)
+                    if len(points) > 1:
+                        lay = rawValue(hatch,8)
+                        points = points[:-1]
+                        newob = None
+                        if dxfCreatePart or dxfMakeBlocks:
+                            points.append(points[0])
+                            s = Part.makePolygon(points)
+                            if dxfMakeBlocks:
+                                addToBlock(s,lay)
+                            else:
+                                newob = addObject(s,"Hatch",lay)
+                                if gui:
+                                    formatObject(newob,hatch)
                         else:
-                            newob = addObject(s,"Hatch",lay)
+                            newob = Draft.makeWire(points)
+                            locateLayer(lay).addObject(newob)
                             if gui:
                                 formatObject(newob,hatch)
+        else:
+            FreeCAD.Console.PrintMessage("skipping hatches...\n")
+
+        # drawing blocks
+
+        inserts = drawing.entities.get_type("insert")
+        if not dxfStarBlocks:
+            FreeCAD.Console.PrintMessage("skipping *blocks...\n")
+            newinserts = []
+            for i in inserts:
+                if dxfImportLayouts or (not rawValue(i,67)):
+                    if i.block[0] != '*':
+                        newinserts.append(i)
+            inserts = newinserts
+        if inserts:
+            FreeCAD.Console.PrintMessage("drawing "+str(len(inserts))+" blocks...\n")
+            blockrefs = drawing.blocks.data
+            for ref in blockrefs:
+                if (dxfCreateDraft or dxfCreateSketch) and not batch:
+                    drawBlock(ref,createObject=True)
+                elif not ref.name in blockshapes:
+                    drawBlock(ref,createObject=False)
+            num = 0
+            for insert in inserts:
+                if (dxfCreateDraft or dxfCreateSketch) and not(dxfMakeBlocks or batch):
+                    shape = drawInsert(insert,num,clone=True)
+                else:
+                    shape = drawInsert(insert,num)
+                if shape:
+                    if batch:
+                        addToBatch(shape,"Block",insert.layer,insert)
+                    elif dxfMakeBlocks:
+                        addToBlock(shape,insert.layer)
                     else:
-                        newob = Draft.makeWire(points)
-                        locateLayer(lay).addObject(newob)
-                        if gui:
-                            formatObject(newob,hatch)
-    else:
-        FreeCAD.Console.PrintMessage("skipping hatches...\n")
+                        newob = addObject(shape,"Block."+insert.block,insert.layer)
+                        if gui: formatObject(newob,insert)
+                num += 1
 
-    # drawing blocks
+        # make batch objects, if any
 
-    inserts = drawing.entities.get_type("insert")
-    if not dxfStarBlocks:
-        FreeCAD.Console.PrintMessage("skipping *blocks...\n")
-        newinserts = []
-        for i in inserts:
-            if dxfImportLayouts or (not rawValue(i,67)):
-                if i.block[0] != '*':
-                    newinserts.append(i)
-        inserts = newinserts
-    if inserts:
-        FreeCAD.Console.PrintMessage("drawing "+str(len(inserts))+" blocks...\n")
-        blockrefs = drawing.blocks.data
-        for ref in blockrefs:
-            if dxfCreateDraft or dxfCreateSketch:
-                drawBlock(ref,createObject=True)
-            else:
-                drawBlock(ref,createObject=False)
-        num = 0
-        for insert in inserts:
-            if (dxfCreateDraft or dxfCreateSketch) and not(dxfMakeBlocks):
-                shape = drawInsert(insert,num,clone=True)
-            else:
-                shape = drawInsert(insert,num)
-            if shape:
-                if dxfMakeBlocks:
-                    addToBlock(shape,insert.layer)
-                else:
-                    newob = addObject(shape,"Block."+insert.block,insert.layer)
-                    if gui: formatObject(newob,insert)
-            num += 1
+        if batch:
+            makeBatchObjects()
+    finally:
+        if batch:
+            resumeDocument(doc,docState)
+    del batchShapes
 
     # make blocks, if any
 
@@ -1558,6 +1638,8 @@ def processdxf(document,filename,getShapes=False,reComputeFlag=True):
         print("dxf: ",len(badobjects)," objects were not imported")
     del doc
     del blockshapes
+    del blockdefs
+    del entityIndex
 
 def warn(dxfobject,num=None):
     "outputs a warning if a dxf object couldn't be imported"
@@ -2306,12 +2388,14 @@ def readPreferences():
     global dxfMakeBlocks, dxfJoin, dxfRenderPolylineWidth, dxfImportTexts, dxfImportLayouts
     global dxfImportPoints, dxfImportHatches, dxfUseStandardSize, dxfGetColors, dxfUseDraftVisGroups
     global dxfFillMode, dxfBrightBackground, dxfDefaultColor, dxfUseLegacyImporter, dxfExportBlocks, dxfScaling
+    global dxfBatchImport
     dxfCreatePart = p.GetBool("dxfCreatePart",True)
     dxfCreateDraft = p.GetBool("dxfCreateDraft",False)
     dxfCreateSketch = p.GetBool("dxfCreateSketch",False)
     dxfDiscretizeCurves = p.GetBool("DiscretizeEllipses",True)
     dxfStarBlocks = p.GetBool("dxfstarblocks",False)
     dxfMakeBlocks = p.GetBool("groupLayers",False)
+    dxfBatchImport = p.GetBool("dxfBatchImport",False)
     dxfJoin = p.GetBool("joingeometry",False)
     dxfRenderPolylineWidth = p.GetBool("renderPolylineWidth",False)
     dxfImportTexts = p.GetBool("dxftext",False)
@@ -118,7 +118,7 @@ class _TaskPanelFemResultShow:
     '''The task panel for the post-processing'''
 
     def __init__(self, obj):
-        self.result_obj = obj
+        self.result_obj = resulttools.load_result(obj)
         self.mesh_obj = self.result_obj.Mesh
         # task panel should be started by use of setEdit of view provider
         # in view provider checks: Mesh, active analysis and if Mesh and result are in active analysis
@@ -32,6 +32,10 @@ __url__ = "http://www.freecadweb.org"
 
 import FreeCAD
 import os
+try:
+    from collections.abc import Mapping
+except ImportError:
+    from collections import Mapping
 
 
 # ********* generic FreeCAD import and export methods *********
@@ -62,10 +66,17 @@ def insert(filename, docname):
 # ********* module specific methods *********
 def importFrd(filename, analysis=None, result_name_prefix=None):
     from . import importToolsFem
+    import femresult.resulttools as resulttools
     import ObjectsFem
     if result_name_prefix is None:
         result_name_prefix = ''
-    m = readResult(filename)
+    ccx_prefs = FreeCAD.ParamGet("User parameter:BaseApp/Preferences/Mod/Fem/Ccx")
+    # result data is read on demand by femresult.resulttools.load_result()
+    load_on_demand = ccx_prefs.GetBool("LoadResultsOnDemand", False)
+    if ccx_prefs.GetBool("UseArrayFrdReader", True) or load_on_demand:
+        m = readResultArrays(filename, ccx_prefs.GetString("FrdReaderScratchDir", ""), load_on_demand)
+    else:
+        m = readResult(filename)
     result_mesh_object = None
     if len(m['Nodes']) > 0:
         if analysis:
@@ -75,11 +86,16 @@ def importFrd(filename, analysis=None, result_name_prefix=None):
         result_mesh_object = ObjectsFem.makeMeshResult(FreeCAD.ActiveDocument, 'Result_mesh')
         result_mesh_object.FemMesh = mesh
 
-        positions = []
-        for k, v in m['Nodes'].items():
-            positions.append(v)
-        p_x_max, p_y_max, p_z_max = map(max, zip(*positions))
-        p_x_min, p_y_min, p_z_min = map(min, zip(*positions))
+        if isinstance(m['Nodes'], FrdArrayMap):
+            positions = m['Nodes'].values_array
+            p_x_max, p_y_max, p_z_max = positions.max(axis=0).tolist()
+            p_x_min, p_y_min, p_z_min = positions.min(axis=0).tolist()
+        else:
+            positions = []
+            for k, v in m['Nodes'].items():
+                positions.append(v)
+            p_x_max, p_y_max, p_z_max = map(max, zip(*positions))
+            p_x_min, p_y_min, p_z_min = map(min, zip(*positions))
         x_span = abs(p_x_max - p_x_min)
         y_span = abs(p_y_max - p_y_min)
         z_span = abs(p_z_max - p_z_min)
@@ -104,7 +120,10 @@ def importFrd(filename, analysis=None, result_name_prefix=None):
 
                 results = ObjectsFem.makeResultMechanical(FreeCAD.ActiveDocument, results_name)
                 results.Mesh = result_mesh_object
-                results = importToolsFem.fill_femresult_mechanical(results, result_set, span)
+                if 'frd_range' in result_set:
+                    resulttools.set_result_file(results, filename, result_set['frd_range'], eigenmode_number, step_time)
+                else:
+                    results = importToolsFem.fill_femresult_mechanical(results, result_set, span)
                 if analysis:
                     analysis_object.addObject(results)
         else:
@@ -127,9 +146,7 @@ def importFrd(filename, analysis=None, result_name_prefix=None):
         FreeCAD.Console.PrintError('Problem on frd file import. No nodes found in frd file.\n')
 
 
-# read a calculix result file and extract the nodes, displacement vectors and stress values.
-def readResult(frd_input):
-    print('Read ccx results from frd file: ' + frd_input)
+def read_inout_nodes(frd_input):
     inout_nodes = []
     inout_nodes_file = frd_input.rsplit('.', 1)[0] + '_inout_nodes.txt'
     if os.path.exists(inout_nodes_file):
@@ -141,6 +158,13 @@ def readResult(frd_input):
             inout_nodes.append(a)
         f.close()
         print(inout_nodes)
+    return inout_nodes
+
+
+# read a calculix result file and extract the nodes, displacement vectors and stress values.
+def readResult(frd_input):
+    print('Read ccx results from frd file: ' + frd_input)
+    inout_nodes = read_inout_nodes(frd_input)
     frd_file = pyopen(frd_input, "r")
     nodes = {}
     elements_hexa8 = {}
@@ -628,3 +652,456 @@ def readResult(frd_input):
         'Penta15Elem': elements_penta15,
         'Results': results
     }
+
+
+# ********* array based frd reader *********
+# The frd file is written in fixed columns. Instead of converting every value of every line
+# with int() and float(), the data lines of a block are sliced out of the memory mapped file
+# chunkwise and converted column wise by numpy. The returned data has the same structure as
+# the one of readResult(), but nodes, elements and results are array backed mappings.
+
+# frd element type: (FreeCAD element key, number of nodes, node order in FreeCAD)
+# the node order uses the (one based) node position in the frd file, see readResult() for details
+FRD_ELEMENT_TYPES = {
+    1: ('Hexa8Elem', 8, (6, 7, 8, 5, 2, 3, 4, 1)),
+    2: ('Penta6Elem', 6, (5, 6, 4, 2, 3, 1)),
+    3: ('Tetra4Elem', 4, (2, 1, 3, 4)),
+    4: ('Hexa20Elem', 20, (8, 5, 6, 7, 4, 1, 2, 3, 20, 17, 18, 19, 12, 9, 10, 11, 16, 13, 14, 15)),
+    5: ('Penta15Elem', 15, (5, 6, 4, 2, 3, 1, 14, 15, 13, 8, 9, 7, 11, 12, 10)),
+    6: ('Tetra10Elem', 10, (2, 1, 3, 4, 5, 7, 6, 9, 8, 10)),
+    7: ('Tria3Elem', 3, (1, 2, 3)),
+    8: ('Tria6Elem', 6, (1, 2, 3, 4, 5, 6)),
+    9: ('Quad4Elem', 4, (1, 2, 3, 4)),
+    10: ('Quad8Elem', 8, (1, 2, 3, 4, 5, 6, 7, 8)),
+    11: ('Seg2Elem', 2, (1, 2)),
+    12: ('Seg3Elem', 3, (1, 2, 3)),
+}
+
+# result block name in frd file: (key in result set, number of values to read)
+FRD_RESULT_BLOCKS = (
+    (b'DISP', 'disp', 3),
+    (b'STRESS', 'stress', 6),
+    (b'TOSTRAIN', 'strainv', 3),
+    (b'PE', 'peeq', 1),
+    (b'NDTEMP', 'temp', 1),
+    (b'MAFLOW', 'mflow', 1),
+    (b'STPRES', 'npressure', 1),
+)
+
+# number of bytes of a data block converted at once
+FRD_CHUNK_SIZE = 16 * 1024 * 1024
+
+
+class FrdArrayMap(Mapping):
+    '''read only mapping of node or element numbers to values
+    The numbers and the values are held in numpy arrays (ids, values_array). The values
+    are converted into FreeCAD.Vector (value_type 'vector'), tuple or float on access,
+    thus the map can be used wherever the dicts of readResult() are used.
+    '''
+
+    def __init__(self, ids, values_array, value_type='scalar'):
+        self.ids = ids
+        self.values_array = values_array
+        self.value_type = value_type
+        self._index = None
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __iter__(self):
+        return iter(self.ids.tolist())
+
+    def __contains__(self, key):
+        return key in self.get_index()
+
+    def __getitem__(self, key):
+        return self._convert(self.values_array[self.get_index()[key]].tolist())
+
+    def get_index(self):
+        ''' returns a dict id --> row in values_array, created on first use
+        '''
+        if self._index is None:
+            self._index = dict(zip(self.ids.tolist(), range(len(self.ids))))
+        return self._index
+
+    def keys(self):
+        return self.ids.tolist()
+
+    def values(self):
+        return [self._convert(v) for v in self.values_array.tolist()]
+
+    def items(self):
+        return list(zip(self.keys(), self.values()))
+
+    def _convert(self, value):
+        if self.value_type == 'vector':
+            return FreeCAD.Vector(value[0], value[1], value[2])
+        elif self.value_type == 'tuple':
+            return tuple(value)
+        return value
+
+
+def _frd_byte_matrix(lines):
+    # lines of different length are padded with zero bytes
+    import numpy as np
+    width = max([len(line) for line in lines] or [0])
+    return np.array(lines, dtype='S{}'.format(max(width, 3))).view(np.uint8).reshape(len(lines), -1)
+
+
+def _frd_line_rows(raw, key):
+    # indices of the lines starting with key, ' -1' or ' -2'
+    import numpy as np
+    return np.flatnonzero(np.ascontiguousarray(raw[:, 1:3]).view('S2')[:, 0] == key)
+
+
+def _frd_columns(raw, start, width, count, dtype):
+    # the fixed width fields raw[:, start:start + count * width] as (n, count) array of dtype
+    import numpy as np
+    fields = np.ascontiguousarray(raw[:, start:start + count * width])
+    return fields.view('S{}'.format(width)).astype(dtype)
+
+
+def _frd_store(array, scratch_dir):
+    # move the array into a memory mapped temporary file if a scratch directory is given
+    if not scratch_dir or not len(array):
+        return array
+    import numpy as np
+    import tempfile
+    scratch_file = tempfile.TemporaryFile(dir=scratch_dir)
+    mapped = np.memmap(scratch_file, dtype=array.dtype, mode='w+', shape=array.shape)
+    mapped[...] = array
+    return mapped
+
+
+class _FrdBlockReader(object):
+    ''' converts the ' -1' lines of a nodes or results block into an id and a value array
+    '''
+
+    def __init__(self, value_count):
+        self.value_count = value_count
+        self.ids = []
+        self.values = []
+
+    def add(self, data):
+        import numpy as np
+        raw = _frd_byte_matrix(data.splitlines())
+        raw = raw[_frd_line_rows(raw, b'-1')]
+        self.ids.append(_frd_columns(raw, 4, 9, 1, np.int64)[:, 0])
+        self.values.append(_frd_columns(raw, 13, 12, self.value_count, np.float64))
+
+    def get_arrays(self, scratch_dir=None):
+        import numpy as np
+        if self.ids:
+            ids = np.concatenate(self.ids)
+            values = np.concatenate(self.values)
+        else:
+            ids = np.empty(0, dtype=np.int64)
+            values = np.empty((0, self.value_count), dtype=np.float64)
+        if self.value_count == 1:
+            values = values[:, 0]
+        self.ids = []
+        self.values = []
+        return _frd_store(ids, scratch_dir), _frd_store(values, scratch_dir)
+
+
+class _FrdElementBlockReader(object):
+    ''' converts the ' -1' and ' -2' lines of an elements block into id and node arrays per element type
+    '''
+
+    def __init__(self, inout_nodes):
+        self.inout_nodes = inout_nodes
+        self.pending_lines = []
+        self.elements = {}
+
+    def add(self, data):
+        lines = self.pending_lines + data.splitlines()
+        # the last element is kept, its node lines may continue in the next chunk
+        last = len(lines) - 1
+        while last > 0 and lines[last][1:3] != b'-1':
+            last -= 1
+        self.pending_lines = lines[last:]
+        self._convert(lines[:last])
+
+    def _convert(self, lines):
+        if not lines:
+            return
+        import numpy as np
+        raw = _frd_byte_matrix(lines)
+        header_rows = _frd_line_rows(raw, b'-1')
+        node_rows = _frd_line_rows(raw, b'-2')
+        elem_ids = _frd_columns(raw[header_rows], 4, 9, 1, np.int64)[:, 0]
+        elem_types = _frd_columns(raw[header_rows], 14, 4, 1, np.int64)[:, 0]
+        # index of the first node line of every element in node_lines
+        first_node_line = np.searchsorted(node_rows, header_rows)
+        node_lines = raw[node_rows]
+        for elem_type in np.unique(elem_types).tolist():
+            if elem_type not in FRD_ELEMENT_TYPES:
+                FreeCAD.Console.PrintError('FEM: Element type {} in frd file not supported.\n'.format(elem_type))
+                continue
+            name, node_count, node_order = FRD_ELEMENT_TYPES[elem_type]
+            of_type = elem_types == elem_type
+            ids = elem_ids[of_type]
+            first = first_node_line[of_type]
+            # ten nodes per line, hexa20 and penta15 continue on the following line
+            nodes = _frd_columns(node_lines[first], 3, 10, min(node_count, 10), np.int64)
+            if node_count > 10:
+                nodes = np.hstack((nodes, _frd_columns(node_lines[first + 1], 3, 10, node_count - 10, np.int64)))
+            nodes = nodes[:, [n - 1 for n in node_order]]
+            if elem_type == 12 and self.inout_nodes:
+                ids, nodes = self._renumber_inout_nodes(ids, nodes)
+            self.elements.setdefault(name, []).append((ids, nodes))
+
+    def _renumber_inout_nodes(self, ids, nodes):
+        # special 1DFlow seg3 node numbering, see readResult()
+        import numpy as np
+        new_ids = []
+        new_nodes = []
+        for elem, (nd1, nd2, nd3) in zip(ids.tolist(), nodes.tolist()):
+            elem_nodes = None
+            for inout in self.inout_nodes:
+                if nd1 == int(inout[1]):
+                    elem_nodes = (int(inout[2]), nd3, nd1)  # fluid inlet node numbering
+                elif nd3 == int(inout[1]):
+                    elem_nodes = (nd1, int(inout[2]), nd3)  # fluid outlet node numbering
+            if elem_nodes is not None:
+                new_ids.append(elem)
+                new_nodes.append(elem_nodes)
+        return np.array(new_ids, dtype=np.int64).reshape(-1), np.array(new_nodes, dtype=np.int64).reshape(-1, 3)
+
+    def get_elements(self, scratch_dir=None):
+        import numpy as np
+        self._convert(self.pending_lines)
+        self.pending_lines = []
+        elements = {}
+        for name, node_count, node_order in FRD_ELEMENT_TYPES.values():
+            elements[name] = {}
+            if name in self.elements:
+                ids = np.concatenate([ids for ids, nodes in self.elements[name]])
+                nodes = np.concatenate([nodes for ids, nodes in self.elements[name]])
+                if len(ids):
+                    elements[name] = FrdArrayMap(
+                        _frd_store(ids, scratch_dir),
+                        _frd_store(nodes, scratch_dir),
+                        'tuple'
+                    )
+        self.elements = {}
+        return elements
+
+
+def _frd_network_result(ids, values, inout_nodes, factor=1.0):
+    # mass flow and network pressure of 1D flow networks, small, thus a dict is used
+    network_result = {}
+    for elem, value in zip(ids.tolist(), values.tolist()):
+        network_result[elem] = value * factor
+        for inout in inout_nodes:
+            if elem == int(inout[1]):
+                network_result[int(inout[2])] = value * factor
+    return network_result
+
+
+def _frd_read_block(frd_data, start, block):
+    # feeds the data lines from start up to the end of section line (' -3') chunkwise into block
+    # returns the position of the end of section line
+    end = frd_data.find(b'\n -3', start - 1)
+    end = len(frd_data) if end < 0 else end + 1
+    while start < end:
+        stop = min(start + FRD_CHUNK_SIZE, end)
+        if stop < end:
+            stop = frd_data.find(b'\n', stop, end) + 1 or end
+        if block is not None:
+            block.add(frd_data[start:stop])
+        start = stop
+    return end
+
+
+def _frd_add_result_block(mode_results, result_key, block, inout_nodes, scratch_dir):
+    # adds the data of a converted result block to the result set mode_results
+    ids, values = block.get_arrays(scratch_dir)
+    if result_key == 'disp':
+        mode_results['disp'] = FrdArrayMap(ids, values, 'vector')
+    elif result_key == 'stress':
+        mode_results['stress'] = FrdArrayMap(ids, values, 'tuple')
+        mode_results['stressv'] = FrdArrayMap(ids, values[:, :3], 'vector')
+    elif result_key == 'strainv':
+        mode_results['strainv'] = FrdArrayMap(ids, values, 'vector')
+    elif result_key == 'mflow':
+        mode_results['mflow'] = _frd_network_result(ids, values, inout_nodes, 1000)  # t/s --> kg/s
+    elif result_key == 'npressure':
+        mode_results['npressure'] = _frd_network_result(ids, values, inout_nodes)
+    else:
+        mode_results[result_key] = FrdArrayMap(ids, values)
+
+
+def _frd_result_block_type(line):
+    # key in result set and number of values of the result block started by a ' -4' line
+    for name, result_key, value_count in FRD_RESULT_BLOCKS:
+        if line[5:5 + len(name)] == name:
+            return result_key, value_count
+    return None, 0
+
+
+def _frd_open(frd_input):
+    import mmap
+    frd_file = pyopen(frd_input, "rb")
+    if os.fstat(frd_file.fileno()).st_size > 0:
+        frd_data = mmap.mmap(frd_file.fileno(), 0, access=mmap.ACCESS_READ)
+    else:
+        frd_data = b''
+    return frd_file, frd_data
+
+
+def _frd_close(frd_file, frd_data):
+    if len(frd_data):
+        frd_data.close()
+    frd_file.close()
+
+
+def readResultArrays(frd_input, scratch_dir=None, index_results=False):
+    ''' reads a calculix frd result file like readResult() does, but the fixed column data
+    blocks are converted into numpy arrays. If scratch_dir is given, the arrays are memory
+    mapped into temporary files in this directory, which keeps memory usage low for huge files.
+    If index_results is True, the result blocks are not read. Every result set only contains
+    its 'number', 'time' and the byte range 'frd_range' of its blocks in the frd file. The
+    result data can be read later on with readResultSet().
+    '''
+    print('Read ccx results from frd file into arrays: ' + frd_input)
+    inout_nodes = read_inout_nodes(frd_input)
+
+    nodes_reader = _FrdBlockReader(3)
+    elements_reader = _FrdElementBlockReader(inout_nodes)
+    results = []
+    mode_results = {}
+    mode_results['number'] = float('NaN')
+    mode_results['time'] = float('NaN')
+    # position of the first result block of the result set, the blocks of the nodes and elements are not in its range
+    mode_results_start = None
+
+    mode_time_found = False
+    end_of_section_found = False
+    end_of_frd_data_found = False
+    node_element_section = False
+    mode_eigen_changed = False
+    mode_time_changed = False
+
+    eigenmode = 0
+    timestep = 0
+
+    frd_file, frd_data = _frd_open(frd_input)
+    pos = 0
+    while pos < len(frd_data):
+        # only header and end of section lines are read one by one,
+        # the data lines of a block are skipped over by _frd_read_block
+        line_start = pos
+        line_end = frd_data.find(b'\n', pos) + 1 or len(frd_data)
+        line = frd_data[pos:line_end]
+        pos = line_end
+
+        # Check for the begin of a nodes, elements or results block
+        if line[4:6] == b'2C':
+            pos = _frd_read_block(frd_data, pos, nodes_reader)
+            node_element_section = True
+        elif line[4:6] == b'3C':
+            pos = _frd_read_block(frd_data, pos, elements_reader)
+            node_element_section = True
+        elif line[1:3] == b'-4':
+            if mode_results_start is None:
+                mode_results_start = line_start
+            result_key, value_count = _frd_result_block_type(line)
+            if result_key is None or index_results:
+                pos = _frd_read_block(frd_data, pos, None)
+            else:
+                block = _FrdBlockReader(value_count)
+                pos = _frd_read_block(frd_data, pos, block)
+                _frd_add_result_block(mode_results, result_key, block, inout_nodes, scratch_dir)
+            if result_key is not None:
+                node_element_section = False
+
+        # Check if we found new eigenmode line
+        if line[5:10] == b'PMODE':
+            eigentemp = int(line[30:36])
+            if eigentemp > eigenmode:
+                eigenmode = eigentemp
+                mode_eigen_changed = True
+
+        # Check if we found new time step
+        if line[4:10] == b'1PSTEP':
+            mode_time_found = True
+        if mode_time_found and (line[2:7] == b'100CL'):
+            timetemp = float(line[13:25])
+            if timetemp > timestep:
+                timestep = timetemp
+                mode_time_changed = True
+
+        # Check if we found the end of a section
+        if line[1:3] == b'-3':
+            end_of_section_found = True
+
+        # Check if we found the end of frd data
+        if line[1:5] == b'9999':
+            end_of_frd_data_found = True
+
+        if (mode_eigen_changed or mode_time_changed or end_of_frd_data_found) and end_of_section_found and not node_element_section:
+            # append mode_results to results and reset mode_result
+            if index_results:
+                if mode_results_start is None:
+                    mode_results_start = line_start
+                mode_results['frd_range'] = (mode_results_start, line_start)
+            results.append(mode_results)
+            mode_results = {}
+            mode_results['number'] = float('NaN')
+            mode_results['time'] = float('NaN')
+            mode_results_start = None
+            end_of_section_found = False
+
+        # on changed --> write changed values in mode_result
+        if mode_eigen_changed:
+            mode_results['number'] = eigenmode
+            mode_eigen_changed = False
+
+        if mode_time_changed:
+            mode_results['time'] = timestep
+            mode_time_found = False
+            mode_time_changed = False
+
+    _frd_close(frd_file, frd_data)
+
+    node_ids, node_coords = nodes_reader.get_arrays(scratch_dir)
+    nodes = FrdArrayMap(node_ids, node_coords, 'vector')
+    frd_content = elements_reader.get_elements(scratch_dir)
+
+    if not inout_nodes:
+        if results:
+            if 'mflow' in results[0] or 'npressure' in results[0]:
+                FreeCAD.Console.PrintError('We have mflow or npressure, but no inout_nodes file.\n')
+    if not len(nodes):
+        FreeCAD.Console.PrintError('FEM: No nodes found in Frd file.\n')
+    frd_content['Nodes'] = nodes
+    frd_content['Results'] = results
+    return frd_content
+
+
+def readResultSet(frd_input, frd_range, scratch_dir=None):
+    ''' reads the result blocks in the byte range frd_range of a calculix frd result file
+    frd_range is the range of a result set indexed by readResultArrays(index_results=True)
+    returns the result set without 'number' and 'time', they are known from the index
+    '''
+    inout_nodes = read_inout_nodes(frd_input)
+    mode_results = {}
+    frd_file, frd_data = _frd_open(frd_input)
+    pos, end = frd_range
+    while pos < end:
+        line_end = frd_data.find(b'\n', pos) + 1 or len(frd_data)
+        line = frd_data[pos:line_end]
+        pos = line_end
+        if line[4:6] in (b'2C', b'3C'):
+            pos = _frd_read_block(frd_data, pos, None)
+        elif line[1:3] == b'-4':
+            result_key, value_count = _frd_result_block_type(line)
+            if result_key is None:
+                pos = _frd_read_block(frd_data, pos, None)
+            else:
+                block = _FrdBlockReader(value_count)
+                pos = _frd_read_block(frd_data, pos, block)
+                _frd_add_result_block(mode_results, result_key, block, inout_nodes, scratch_dir)
+    _frd_close(frd_file, frd_data)
+    return mode_results
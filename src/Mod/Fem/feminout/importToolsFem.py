@@ -212,6 +212,7 @@ def make_femmesh(mesh_data):
 
 def fill_femresult_mechanical(results, result_set, span):
     ''' fills a FreeCAD FEM mechanical result object with result data
+    all values are calculated with numpy arrays for all nodes at once
     '''
     if 'number' in result_set:
         eigenmode_number = result_set['number']
@@ -222,14 +223,10 @@ def fill_femresult_mechanical(results, result_set, span):
         step_time = round(step_time, 2)
 
     if 'disp' in result_set:
-        disp = result_set['disp']
-        displacement = []
-        for k, v in disp.items():
-            displacement.append(v)
+        disp_nodes, disp_values = get_result_arrays(result_set['disp'])
 
-        x_max, y_max, z_max = map(max, zip(*displacement))
         if eigenmode_number > 0:
-            max_disp = max(x_max, y_max, z_max)
+            max_disp = float(disp_values.max())
             # Allow for max displacement to be 0.1% of the span
             # FIXME - add to Preferences
             max_allowed_disp = 0.001 * span
@@ -237,47 +234,36 @@ def fill_femresult_mechanical(results, result_set, span):
         else:
             scale = 1.0
 
-        results.DisplacementVectors = list(map((lambda x: x * scale), disp.values()))
-        results.NodeNumbers = list(disp.keys())
-        results.DisplacementLengths = calculate_disp_abs(displacement)
+        results.DisplacementVectors = make_vectors(disp_values * scale)
+        results.NodeNumbers = disp_nodes.tolist()
+        results.DisplacementLengths = calculate_disp_abs(disp_values)
 
         if 'stressv' in result_set:
-            stressv = result_set['stressv']
-            results.StressVectors = list(map((lambda x: x * scale), stressv.values()))
+            stressv_nodes, stressv_values = get_result_arrays(result_set['stressv'])
+            results.StressVectors = make_vectors(stressv_values * scale)
 
         if 'strainv' in result_set:
-            strainv = result_set['strainv']
-            results.StrainVectors = list(map((lambda x: x * scale), strainv.values()))
+            strainv_nodes, strainv_values = get_result_arrays(result_set['strainv'])
+            results.StrainVectors = make_vectors(strainv_values * scale)
 
         if 'stress' in result_set:
-            stress = result_set['stress']
-            if len(stress) > 0:
-                mstress = []
-                prinstress1 = []
-                prinstress2 = []
-                prinstress3 = []
-                shearstress = []
-                for i in stress.values():
-                    mstress.append(calculate_von_mises(i))
-                    prin1, prin2, prin3, shear = calculate_principal_stress(i)
-                    prinstress1.append(prin1)
-                    prinstress2.append(prin2)
-                    prinstress3.append(prin3)
-                    shearstress.append(shear)
+            stress_nodes, stress_values = get_result_arrays(result_set['stress'])
+            if len(stress_nodes) > 0:
+                mstress, prinstress1, prinstress2, prinstress3, shearstress = calculate_stress_values(stress_values)
                 if eigenmode_number > 0:
-                    results.StressValues = list(map((lambda x: x * scale), mstress))
-                    results.PrincipalMax = list(map((lambda x: x * scale), prinstress1))
-                    results.PrincipalMed = list(map((lambda x: x * scale), prinstress2))
-                    results.PrincipalMin = list(map((lambda x: x * scale), prinstress3))
-                    results.MaxShear = list(map((lambda x: x * scale), shearstress))
+                    results.StressValues = (mstress * scale).tolist()
+                    results.PrincipalMax = (prinstress1 * scale).tolist()
+                    results.PrincipalMed = (prinstress2 * scale).tolist()
+                    results.PrincipalMin = (prinstress3 * scale).tolist()
+                    results.MaxShear = (shearstress * scale).tolist()
                     results.Eigenmode = eigenmode_number
                 else:
-                    results.StressValues = mstress
-                    results.PrincipalMax = prinstress1
-                    results.PrincipalMed = prinstress2
-                    results.PrincipalMin = prinstress3
-                    results.MaxShear = shearstress
-            stress_keys = list(stress.keys())
+                    results.StressValues = mstress.tolist()
+                    results.PrincipalMax = prinstress1.tolist()
+                    results.PrincipalMed = prinstress2.tolist()
+                    results.PrincipalMin = prinstress3.tolist()
+                    results.MaxShear = shearstress.tolist()
+            stress_keys = stress_nodes.tolist()
             if (results.NodeNumbers != 0 and results.NodeNumbers != stress_keys):
                 print("Inconsistent FEM results: element number for Stress doesn't equal element number for Displacement {} != {}"
                       .format(results.NodeNumbers, len(results.StressValues)))
@@ -285,40 +271,26 @@ def fill_femresult_mechanical(results, result_set, span):
 
         # Read Equivalent Plastic strain if they exist
         if 'peeq' in result_set:
-            Peeq = result_set['peeq']
-            if len(Peeq) > 0:
-                if len(Peeq.values()) != len(disp.values()):
-                    Pe = []
-                    Pe_extra_nodes = Peeq.values()
-                    nodes = len(disp.values())
-                    for i in range(nodes):
-                        Pe_value = Pe_extra_nodes[i]
-                        Pe.append(Pe_value)
-                    results.Peeq = Pe
-                else:
-                    results.Peeq = Peeq.values()
+            peeq_nodes, peeq_values = get_result_arrays(result_set['peeq'])
+            if len(peeq_nodes) > 0:
+                # there might be more peeq values than nodes, only the values of the nodes are used
+                results.Peeq = peeq_values[:len(disp_nodes)].tolist()
 
     # Read temperatures if they exist
     if 'temp' in result_set:
-        Temperature = result_set['temp']
-        if len(Temperature) > 0:
-            if len(Temperature.values()) != len(disp.values()):
-                Temp = []
-                Temp_extra_nodes = Temperature.values()
-                nodes = len(disp.values())
-                for i in range(nodes):
-                    Temp_value = Temp_extra_nodes[i]
-                    Temp.append(Temp_value)
-                results.Temperature = list(map((lambda x: x), Temp))
-            else:
-                results.Temperature = list(map((lambda x: x), Temperature.values()))
+        temp_nodes, temp_values = get_result_arrays(result_set['temp'])
+        if len(temp_nodes) > 0:
+            # there might be more temperature values than nodes, see peeq
+            if 'disp' in result_set:
+                temp_values = temp_values[:len(disp_nodes)]
+            results.Temperature = temp_values.tolist()
             results.Time = step_time
 
     # read MassFlow
     if 'mflow' in result_set:
         MassFlow = result_set['mflow']
         if len(MassFlow) > 0:
-            results.MassFlowRate = list(map((lambda x: x), MassFlow.values()))
+            results.MassFlowRate = list(MassFlow.values())
             results.Time = step_time
             results.NodeNumbers = list(MassFlow.keys())  # disp does not exist, results.NodeNumbers needs to be set
 
@@ -326,7 +298,7 @@ def fill_femresult_mechanical(results, result_set, span):
     if 'npressure' in result_set:
         NetworkPressure = result_set['npressure']
         if len(NetworkPressure) > 0:
-            results.NetworkPressure = list(map((lambda x: x), NetworkPressure.values()))
+            results.NetworkPressure = list(NetworkPressure.values())
             results.Time = step_time
 
     # fill the stats list
@@ -349,51 +321,31 @@ def fill_femresult_stats(results):
     temp_min = temp_avg = temp_max = mflow_min = mflow_avg = mflow_max = npress_min = npress_avg = npress_max = 0
 
     if results.DisplacementVectors:
-        no_of_values = len(results.DisplacementVectors)
-        x_max, y_max, z_max = map(max, zip(*results.DisplacementVectors))
-        x_min, y_min, z_min = map(min, zip(*results.DisplacementVectors))
-        sum_list = map(sum, zip(*results.DisplacementVectors))
-        x_avg, y_avg, z_avg = [i / no_of_values for i in sum_list]
-        a_min = min(results.DisplacementLengths)
-        a_avg = sum(results.DisplacementLengths) / no_of_values
-        a_max = max(results.DisplacementLengths)
+        displacements = np.array(results.DisplacementVectors, dtype=float).reshape(-1, 3)
+        no_of_values = len(displacements)
+        x_min, y_min, z_min = displacements.min(axis=0).tolist()
+        x_avg, y_avg, z_avg = (displacements.sum(axis=0) / no_of_values).tolist()
+        x_max, y_max, z_max = displacements.max(axis=0).tolist()
+        a_min, a_avg, a_max = calculate_min_avg_max(results.DisplacementLengths, no_of_values)
     if results.StressValues:
-        s_min = min(results.StressValues)
-        s_avg = sum(results.StressValues) / no_of_values
-        s_max = max(results.StressValues)
+        s_min, s_avg, s_max = calculate_min_avg_max(results.StressValues, no_of_values)
     if results.PrincipalMax:
-        p1_min = min(results.PrincipalMax)
-        p1_avg = sum(results.PrincipalMax) / no_of_values
-        p1_max = max(results.PrincipalMax)
+        p1_min, p1_avg, p1_max = calculate_min_avg_max(results.PrincipalMax, no_of_values)
     if results.PrincipalMed:
-        p2_min = min(results.PrincipalMed)
-        p2_avg = sum(results.PrincipalMed) / no_of_values
-        p2_max = max(results.PrincipalMed)
+        p2_min, p2_avg, p2_max = calculate_min_avg_max(results.PrincipalMed, no_of_values)
     if results.PrincipalMin:
-        p3_min = min(results.PrincipalMin)
-        p3_avg = sum(results.PrincipalMin) / no_of_values
-        p3_max = max(results.PrincipalMin)
+        p3_min, p3_avg, p3_max = calculate_min_avg_max(results.PrincipalMin, no_of_values)
     if results.MaxShear:
-        ms_min = min(results.MaxShear)
-        ms_avg = sum(results.MaxShear) / no_of_values
-        ms_max = max(results.MaxShear)
+        ms_min, ms_avg, ms_max = calculate_min_avg_max(results.MaxShear, no_of_values)
     if results.Peeq:
-        peeq_min = min(results.Peeq)
-        peeq_avg = sum(results.Peeq) / no_of_values
-        peeq_max = max(results.Peeq)
+        peeq_min, peeq_avg, peeq_max = calculate_min_avg_max(results.Peeq, no_of_values)
     if results.Temperature:
-        temp_min = min(results.Temperature)
-        temp_avg = sum(results.Temperature) / no_of_values
-        temp_max = max(results.Temperature)
+        temp_min, temp_avg, temp_max = calculate_min_avg_max(results.Temperature, no_of_values)
     if results.MassFlowRate:
         no_of_values = len(results.MassFlowRate)  # DisplacementVectors is empty, no_of_values needs to be set
-        mflow_min = min(results.MassFlowRate)
-        mflow_avg = sum(results.MassFlowRate) / no_of_values
-        mflow_max = max(results.MassFlowRate)
+        mflow_min, mflow_avg, mflow_max = calculate_min_avg_max(results.MassFlowRate, no_of_values)
     if results.NetworkPressure:
-        npress_min = min(results.NetworkPressure)
-        npress_avg = sum(results.NetworkPressure) / no_of_values
-        npress_max = max(results.NetworkPressure)
+        npress_min, npress_avg, npress_max = calculate_min_avg_max(results.NetworkPressure, no_of_values)
 
     results.Stats = [x_min, x_avg, x_max,
                      y_min, y_avg, y_max,
@@ -455,7 +407,56 @@ def calculate_principal_stress(i):
 
 
 def calculate_disp_abs(displacements):
-    disp_abs = []
-    for d in displacements:
-        disp_abs.append(sqrt(pow(d[0], 2) + pow(d[1], 2) + pow(d[2], 2)))
-    return disp_abs
+    displacements = np.array(displacements, dtype=float).reshape(-1, 3)
+    return np.sqrt((displacements * displacements).sum(axis=1)).tolist()
+
+
+def calculate_stress_values(stress, chunk_size=1000000):
+    '''
+    calculates the von Mises stress, the principal stresses and the max shear stress of all nodes at once
+    stress: array of shape (N, 6) with the stress tensor components s11, s22, s33, s12, s23, s31 of N nodes
+    returns five arrays of shape (N,): von Mises, max, med and min principal stress and max shear stress
+    rows with NaN values result in NaN, see calculate_principal_stress()
+    the eigenvalues are calculated chunkwise to limit the memory used by the stacked tensors
+    '''
+    stress = np.asarray(stress, dtype=float).reshape(-1, 6)
+    s11, s22, s33, s12, s23, s31 = stress.T
+    vm_stress = np.sqrt(0.5 * (
+        (s11 - s22) ** 2 + (s22 - s33) ** 2 + (s33 - s11) ** 2
+        + 6 * (s12 ** 2 + s23 ** 2 + s31 ** 2)
+    ))
+    eigvals = np.full((len(stress), 3), np.nan)
+    valid_rows = np.flatnonzero(np.isfinite(stress).all(axis=1))
+    for start in range(0, len(valid_rows), chunk_size):
+        rows = valid_rows[start:start + chunk_size]
+        # https://forum.freecadweb.org/viewtopic.php?f=18&t=24637&start=10#p240408
+        sigma = stress[rows][:, [0, 3, 5, 3, 1, 4, 5, 4, 2]].reshape(-1, 3, 3)
+        # eigvalsh returns the eigenvalues in ascending order
+        eigvals[rows] = np.linalg.eigvalsh(sigma)[:, ::-1]
+    maxshear = (eigvals[:, 0] - eigvals[:, 2]) / 2.0
+    return vm_stress, eigvals[:, 0], eigvals[:, 1], eigvals[:, 2], maxshear
+
+
+def calculate_min_avg_max(values, no_of_values):
+    values = np.asarray(values, dtype=float)
+    return float(values.min()), float(values.sum()) / no_of_values, float(values.max())
+
+
+def get_result_arrays(result_values):
+    '''
+    returns the node numbers and the values of a result dict (node number --> value) as numpy arrays
+    the array backed maps of the frd reader (importCcxFrdResults.FrdArrayMap) are used without copy
+    '''
+    if hasattr(result_values, 'values_array'):
+        return np.asarray(result_values.ids), np.asarray(result_values.values_array, dtype=float)
+    return (
+        np.array(list(result_values.keys()), dtype=np.int64),
+        np.array([tuple(v) if hasattr(v, '__len__') else v for v in result_values.values()], dtype=float)
+    )
+
+
+def make_vectors(values):
+    '''
+    returns a list of FreeCAD.Vector from an array of shape (N, 3)
+    '''
+    return [FreeCAD.Vector(x, y, z) for x, y, z in np.asarray(values).reshape(-1, 3).tolist()]
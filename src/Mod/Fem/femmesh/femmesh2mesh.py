@@ -85,114 +85,94 @@ face_dicts = {
 
 
 def femmesh_2_mesh(myFemMesh, myResults=None):
-    shiftBits = 20  # allows a million nodes, needs to be higher for more nodes in a FemMesh
-
-    # This code generates a dict and a faceCode for each face of all elements
-    # All faceCodes are than sorted.
+    # This code collects the faces of all elements in an array, one row per face.
+    # The sorted node ids of a face are its key, the face keys are sorted by np.lexsort
+    # and the faces with an odd number of occurrences are the faces on the surface of the mesh.
+    import FreeCAD
+    import numpy as np
 
     start_time = time.clock()
-    faceCodeList = []
-    faceCodeDict = {}
+    element_faces = []  # (element_faces, face_nodes) arrays, the face node lists of all elements of a node count
+    element_counts = {}  # element node count: element position of the elements
+    element_nodes = {}  # element node count: node lists of the elements
 
     if myFemMesh.VolumeCount > 0:
-        for ele in myFemMesh.Volumes:
-            element_nodes = myFemMesh.getElementNodes(ele)
-            # print('element_node: ', element_nodes)
-            faceDef = face_dicts[len(element_nodes)]
-
-            for key in faceDef:
-                nodeList = []
-                codeList = []
-                faceCode = 0
-                shifter = 0
-                for nodeIdx in faceDef[key]:
-                    nodeList.append(element_nodes[nodeIdx])
-                    codeList.append(element_nodes[nodeIdx])
-                codeList.sort()
-                for node in codeList:
-                    faceCode += (node << shifter)
-                    # x << n: x shifted left by n bits = Multiplication
-                    shifter += shiftBits
-                # print('codeList: ', codeList)
-                faceCodeDict[faceCode] = nodeList
-                faceCodeList.append(faceCode)
+        for i, ele in enumerate(myFemMesh.Volumes):
+            nodes = myFemMesh.getElementNodes(ele)
+            element_nodes.setdefault(len(nodes), []).append(nodes)
+            element_counts.setdefault(len(nodes), []).append(i)
+        for node_count in element_nodes:
+            faceDef = face_dicts[node_count]
+            eles = np.array(element_nodes[node_count], dtype=np.int64)
+            for face_number, key in enumerate(sorted(faceDef)):
+                element_faces.append((
+                    np.array(element_counts[node_count], dtype=np.int64) * 6 + face_number,
+                    eles[:, faceDef[key]]))
     elif myFemMesh.FaceCount > 0:
-        for ele in myFemMesh.Faces:
-            element_nodes = myFemMesh.getElementNodes(ele)
-            # print('element_node: ', element_nodes)
-            faceDef = {1: [0, 1, 2]}
-
-            for key in faceDef:
-                nodeList = []
-                codeList = []
-                faceCode = 0
-                shifter = 0
-                for nodeIdx in faceDef[key]:
-                    nodeList.append(element_nodes[nodeIdx])
-                    codeList.append(element_nodes[nodeIdx])
-                codeList.sort()
-                for node in codeList:
-                    faceCode += (node << shifter)
-                    # x << n: x shifted left by n bits = Multiplication
-                    shifter += shiftBits
-                # print('codeList: ', codeList)
-                faceCodeDict[faceCode] = nodeList
-                faceCodeList.append(faceCode)
-
-    faceCodeList.sort()
-    allFaces = len(faceCodeList)
-    actFaceIdx = 0
-    singleFaces = []
+        faceDef = [0, 1, 2]
+        face_nodes = [myFemMesh.getElementNodes(ele)[:3] for ele in myFemMesh.Faces]
+        element_faces.append((
+            np.arange(len(face_nodes), dtype=np.int64),
+            np.array(face_nodes, dtype=np.int64).reshape(-1, 3)))
+
+    # all faces padded to four nodes, the face node count marks the triangles
+    face_count = sum(len(f[0]) for f in element_faces)
+    face_seq = np.zeros(face_count, dtype=np.int64)  # element and face position, the last face of a key is used
+    face_lens = np.zeros(face_count, dtype=np.int64)
+    face_nodes = np.zeros((face_count, 4), dtype=np.int64)
+    face_keys = np.zeros((face_count, 4), dtype=np.int64)
+    start = 0
+    for seq, nodes in element_faces:
+        end = start + len(seq)
+        face_seq[start:end] = seq
+        face_lens[start:end] = nodes.shape[1]
+        face_nodes[start:end, :nodes.shape[1]] = nodes
+        face_keys[start:end, :nodes.shape[1]] = np.sort(nodes, axis=1)
+        start = end
+
     # Here we search for faces, which do not have a counterpart.
     # These are the faces on the surface of the mesh.
-    while actFaceIdx < allFaces:
-        if actFaceIdx < (allFaces - 1):
-            if faceCodeList[actFaceIdx] == faceCodeList[actFaceIdx + 1]:
-                actFaceIdx += 2
-            else:
-                # print('found a single Face: ', faceCodeList[actFaceIdx])
-                singleFaces.append(faceCodeList[actFaceIdx])
-                actFaceIdx += 1
-        else:
-            print('found a last Face: ', faceCodeList[actFaceIdx])
-            singleFaces.append(faceCodeList[actFaceIdx])
-            actFaceIdx += 1
-
-    output_mesh = []
+    # The sort order is the same as the one of the former integer face codes:
+    # node count, then the sorted node ids starting with the highest.
+    single_faces = np.zeros(0, dtype=np.int64)
+    if face_count:
+        order = np.lexsort((face_seq, face_keys[:, 0], face_keys[:, 1], face_keys[:, 2], face_keys[:, 3], face_lens))
+        sorted_keys = np.column_stack((face_lens[order], face_keys[order]))
+        key_starts = np.flatnonzero(np.concatenate(([True], np.any(sorted_keys[1:] != sorted_keys[:-1], axis=1))))
+        key_counts = np.diff(np.append(key_starts, face_count))
+        key_lasts = key_starts + key_counts - 1
+        single_faces = order[key_lasts[key_counts % 2 == 1]]
+
+    # triangles of the surface faces, quads are split into two triangles
+    triangles = face_nodes[single_faces][:, [0, 1, 2]]
+    quads = single_faces[face_lens[single_faces] == 4]
+    if len(quads):
+        triangles = np.column_stack((triangles, face_nodes[single_faces][:, [2, 3, 0]])).reshape(-1, 3)
+        # keep the second triangle only for quads
+        keep = np.ones((len(single_faces), 2), dtype=bool)
+        keep[:, 1] = face_lens[single_faces] == 4
+        triangles = triangles[keep.ravel()]
+    triangle_nodes = triangles.ravel()
+
+    # node coordinates, the node ids are mapped to rows of the coordinate array
+    mesh_nodes = myFemMesh.Nodes
+    node_ids = np.array(list(mesh_nodes.keys()), dtype=np.int64)
+    node_coords = np.array([(v.x, v.y, v.z) for v in mesh_nodes.values()], dtype=float).reshape(-1, 3)
+    node_order = np.argsort(node_ids)
+    points = node_coords[node_order[np.searchsorted(node_ids[node_order], triangle_nodes)]]
+
     if myResults:
         print(myResults.Name)
-        for myFace in singleFaces:
-            face_nodes = faceCodeDict[myFace]
-            dispVec0 = myResults.DisplacementVectors[myResults.NodeNumbers.index(face_nodes[0])]
-            dispVec1 = myResults.DisplacementVectors[myResults.NodeNumbers.index(face_nodes[1])]
-            dispVec2 = myResults.DisplacementVectors[myResults.NodeNumbers.index(face_nodes[2])]
-            triangle = [myFemMesh.getNodeById(face_nodes[0]) + dispVec0,
-                        myFemMesh.getNodeById(face_nodes[1]) + dispVec1,
-                        myFemMesh.getNodeById(face_nodes[2]) + dispVec2]
-            output_mesh.extend(triangle)
-            # print('my triangle: ', triangle)
-            if len(face_nodes) == 4:
-                dispVec3 = myResults.DisplacementVectors[myResults.NodeNumbers.index(face_nodes[3])]
-                triangle = [myFemMesh.getNodeById(face_nodes[2]) + dispVec2,
-                            myFemMesh.getNodeById(face_nodes[3]) + dispVec3,
-                            myFemMesh.getNodeById(face_nodes[0]) + dispVec0]
-                output_mesh.extend(triangle)
-                # print('my 2. triangle: ', triangle)
-
-    else:
-        for myFace in singleFaces:
-            face_nodes = faceCodeDict[myFace]
-            triangle = [myFemMesh.getNodeById(face_nodes[0]),
-                        myFemMesh.getNodeById(face_nodes[1]),
-                        myFemMesh.getNodeById(face_nodes[2])]
-            output_mesh.extend(triangle)
-            # print('my triangle: ', triangle)
-            if len(face_nodes) == 4:
-                triangle = [myFemMesh.getNodeById(face_nodes[2]),
-                            myFemMesh.getNodeById(face_nodes[3]),
-                            myFemMesh.getNodeById(face_nodes[0])]
-                output_mesh.extend(triangle)
-                # print('my 2. triangle: ', triangle)
+        result_nodes = np.array(myResults.NodeNumbers, dtype=np.int64)
+        result_order = np.argsort(result_nodes)
+        rows = np.searchsorted(result_nodes[result_order], triangle_nodes)
+        rows[rows == len(result_nodes)] = 0
+        if len(triangle_nodes) and not np.all(result_nodes[result_order][rows] == triangle_nodes):
+            raise ValueError('femmesh_2_mesh: not all nodes of the mesh surface are in the results ' + myResults.Name)
+        disp = np.array([(v.x, v.y, v.z) for v in myResults.DisplacementVectors], dtype=float).reshape(-1, 3)
+        points = points + disp[result_order[rows]]
+
+    output_mesh = [FreeCAD.Vector(*p) for p in points.tolist()]
 
     end_time = time.clock()
     print('Mesh by surface search method: ', end_time - start_time)
@@ -0,0 +1,166 @@
+# ***************************************************************************
+# *   Copyright (c) 2026 - FreeCAD Developers                               *
+# *                                                                         *
+# *   This program is free software; you can redistribute it and/or modify  *
+# *   it under the terms of the GNU Lesser General Public License (LGPL)    *
+# *   as published by the Free Software Foundation; either version 2 of     *
+# *   the License, or (at your option) any later version.                   *
+# *   for detail see the LICENCE text file.                                 *
+# *                                                                         *
+# *   This program is distributed in the hope that it will be useful,       *
+# *   but WITHOUT ANY WARRANTY; without even the implied warranty of        *
+# *   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the         *
+# *   GNU Library General Public License for more details.                  *
+# *                                                                         *
+# *   You should have received a copy of the GNU Library General Public     *
+# *   License along with this program; if not, write to the Free Software   *
+# *   Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  *
+# *   USA                                                                   *
+# *                                                                         *
+# ***************************************************************************
+
+__title__ = "FreeCAD FEM mesh mapping cache"
+__url__ = "http://www.freecadweb.org"
+
+## \addtogroup FEM
+#  @{
+
+import FreeCAD
+import hashlib
+import os
+from six.moves import cPickle as pickle
+
+
+# increase if the results of the cached mesh mappings change
+MAPPING_CACHE_VERSION = '1'
+
+# default size limit of the mapping files in the cache directory in MB
+MAPPING_CACHE_SIZE = 100
+
+
+def get_femmesh_hash(femmesh):
+    '''sha1 hash of the nodes and elements of a femmesh
+    the node coordinates and the nodes of the edge, face and volume elements are hashed by their ids
+    '''
+    mesh_hash = hashlib.sha1()
+    nodes = femmesh.Nodes
+    mesh_hash.update('\n'.join(['%d %r %r %r' % (n, nodes[n].x, nodes[n].y, nodes[n].z) for n in sorted(nodes)]).encode('utf-8'))
+    for elements in ('Edges', 'Faces', 'Volumes'):
+        mesh_hash.update(('\n' + elements + '\n').encode('utf-8'))
+        mesh_hash.update('\n'.join(['%d %s' % (e, femmesh.getElementNodes(e)) for e in getattr(femmesh, elements)]).encode('utf-8'))
+    mesh_hash.update(str(femmesh.Placement).encode('utf-8'))
+    return mesh_hash.hexdigest()
+
+
+def get_shape_hash(shape):
+    '''sha1 hash of the brep of a shape, it includes the placement of the shape
+    '''
+    return hashlib.sha1(shape.exportBrepToString().encode('utf-8')).hexdigest()
+
+
+class MeshMappingCache(object):
+    '''cache of the mappings of reference shapes to a femmesh (nodes, elements, faces of a reference shape)
+    the mappings are held in memory and if a cache_dir is given they are stored on disk too
+    the key of a mapping is the hash of the femmesh, the name of the mapping and the hash of the reference shape,
+    thus a stored mapping is valid as long as the mesh and the reference shape are not changed
+    the mapping files in cache_dir are limited to max_size bytes, the least recently used ones are removed
+    '''
+
+    def __init__(self, femmesh, cache_dir=None, max_size=MAPPING_CACHE_SIZE * 1024 * 1024):
+        self.femmesh = femmesh
+        self.mesh_hash = get_femmesh_hash(femmesh)
+        self.cache_dir = cache_dir
+        self.max_size = max_size
+        if self.cache_dir and not os.path.isdir(self.cache_dir):
+            try:
+                os.makedirs(self.cache_dir)
+            except OSError:
+                FreeCAD.Console.PrintError('Error: mesh mapping cache directory could not be created: ' + self.cache_dir + '\n')
+                self.cache_dir = None
+        self.mappings = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get_key(self, mapping_name, ref_shape):
+        key = MAPPING_CACHE_VERSION + ':' + self.mesh_hash + ':' + mapping_name + ':' + get_shape_hash(ref_shape)
+        return hashlib.sha1(key.encode('utf-8')).hexdigest()
+
+    def get_mapping(self, mapping_name, ref_shape, get_mapping, *args):
+        '''returns the cached mapping of ref_shape or the result of get_mapping(*args), which is cached
+        '''
+        key = self.get_key(mapping_name, ref_shape)
+        if key in self.mappings:
+            self.hits += 1
+            return self.mappings[key]
+        mapping_file = None
+        if self.cache_dir:
+            mapping_file = os.path.join(self.cache_dir, key + '.pkl')
+            if os.path.isfile(mapping_file):
+                try:
+                    with open(mapping_file, 'rb') as f:
+                        mapping = pickle.load(f)
+                    # the modification time is the time of the last use
+                    os.utime(mapping_file, None)
+                    self.mappings[key] = mapping
+                    self.hits += 1
+                    return mapping
+                except Exception:
+                    FreeCAD.Console.PrintWarning('Cached mesh mapping could not be read, it is recalculated: ' + mapping_file + '\n')
+        self.misses += 1
+        mapping = get_mapping(*args)
+        self.mappings[key] = mapping
+        if mapping_file:
+            # write to a temporary file first, a mapping file is either complete or not there
+            tmp_file = mapping_file + '.' + str(os.getpid()) + '.tmp'
+            try:
+                with open(tmp_file, 'wb') as f:
+                    pickle.dump(mapping, f, 2)
+                if os.path.isfile(mapping_file):
+                    os.remove(mapping_file)
+                os.rename(tmp_file, mapping_file)
+            except (IOError, OSError):
+                FreeCAD.Console.PrintWarning('Mesh mapping could not be written to the cache: ' + mapping_file + '\n')
+            self.evict()
+        return mapping
+
+    def evict(self):
+        '''removes the least recently used mapping files until the files in the cache directory fit in max_size
+        '''
+        entries = []
+        for f in os.listdir(self.cache_dir):
+            if not f.endswith('.pkl'):
+                continue
+            path = os.path.join(self.cache_dir, f)
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            entries.append((st.st_mtime, st.st_size, path))
+        size = sum(e[1] for e in entries)
+        for mtime, file_size, path in sorted(entries):
+            if size <= self.max_size:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            size -= file_size
+
+
+def get_mapping_cache_dir():
+    '''the directory of the mesh mapping cache from the Ccx preferences
+    '''
+    ccx_prefs = FreeCAD.ParamGet("User parameter:BaseApp/Preferences/Mod/Fem/Ccx")
+    cache_dir = ccx_prefs.GetString("MeshMappingCacheDir", "")
+    if not cache_dir:
+        cache_dir = os.path.join(FreeCAD.getUserAppDataDir(), 'FemMeshMappingCache')
+    return cache_dir
+
+
+def get_mapping_cache_size():
+    '''the size limit of the mesh mapping cache directory in bytes from the Ccx preferences
+    '''
+    ccx_prefs = FreeCAD.ParamGet("User parameter:BaseApp/Preferences/Mod/Fem/Ccx")
+    return max(ccx_prefs.GetInt("MeshMappingCacheSize", MAPPING_CACHE_SIZE), 0) * 1024 * 1024
+
+##  @}
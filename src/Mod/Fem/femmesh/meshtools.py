@@ -78,31 +78,64 @@ def get_femnodes_by_refshape(femmesh, ref):
     for refelement in ref[1]:
         r = get_element(ref[0], refelement)  # the method getElement(element) does not return Solid elements
         print('  ReferenceShape ... Type: ' + r.ShapeType + ', Object name: ' + ref[0].Name + ', Object label: ' + ref[0].Label + ', Element name: ' + refelement)
-        if r.ShapeType == 'Vertex':
-            nodes += femmesh.getNodesByVertex(r)
-        elif r.ShapeType == 'Edge':
-            nodes += femmesh.getNodesByEdge(r)
-        elif r.ShapeType == 'Face':
-            nodes += femmesh.getNodesByFace(r)
-        elif r.ShapeType == 'Solid':
-            nodes += femmesh.getNodesBySolid(r)
-        else:
-            print('  No Vertice, Edge, Face or Solid as reference shapes!')
+        nodes += get_cached_mapping(femmesh, 'femnodes_by_shape', r, get_femnodes_by_shape, femmesh, r)
     return nodes
 
 
+def get_femnodes_by_shape(femmesh, r):
+    if r.ShapeType == 'Vertex':
+        return list(femmesh.getNodesByVertex(r))
+    elif r.ShapeType == 'Edge':
+        return list(femmesh.getNodesByEdge(r))
+    elif r.ShapeType == 'Face':
+        return list(femmesh.getNodesByFace(r))
+    elif r.ShapeType == 'Solid':
+        return list(femmesh.getNodesBySolid(r))
+    else:
+        print('  No Vertice, Edge, Face or Solid as reference shapes!')
+        return []
+
+
+# the MeshMappingCache (see femmesh.meshcache) used for the mappings of the reference shapes
+# to the femmesh it was created for, it is set by the solver input file writer by set_mapping_cache()
+mapping_cache = None
+
+
+def set_mapping_cache(cache):
+    global mapping_cache
+    mapping_cache = cache
+    femmesh_indices.clear()
+
+
+def get_cached_mapping(femmesh, mapping_name, ref_shape, get_mapping, *args):
+    '''returns get_mapping(*args), if a mapping cache is set for the femmesh the mapping is taken from the cache
+    '''
+    if mapping_cache is not None and mapping_cache.femmesh is femmesh:
+        return mapping_cache.get_mapping(mapping_name, ref_shape, get_mapping, *args)
+    return get_mapping(*args)
+
+
+def get_ccxvolumes_by_face(femmesh, ref_face):
+    '''[(volumeID, ccx_face_nr), ...] of the volume elements with an element face on ref_face
+    '''
+    return get_cached_mapping(femmesh, 'ccxvolumes_by_face', ref_face, femmesh.getccxVolumesByFace, ref_face)
+
+
 def get_femelement_table(femmesh):
     """ get_femelement_table(femmesh): { elementid : [ nodeid, nodeid, ... , nodeid ] }"""
-    femelement_table = {}
+    femelement_table = FemElementTable()
     if is_solid_femmesh(femmesh):
         for i in femmesh.Volumes:
             femelement_table[i] = femmesh.getElementNodes(i)
+        femelement_table.set_femmesh(femmesh, 'Volumes')
     elif is_face_femmesh(femmesh):
         for i in femmesh.Faces:
             femelement_table[i] = femmesh.getElementNodes(i)
+        femelement_table.set_femmesh(femmesh, 'Faces')
     elif is_edge_femmesh(femmesh):
         for i in femmesh.Edges:
             femelement_table[i] = femmesh.getElementNodes(i)
+        femelement_table.set_femmesh(femmesh, 'Edges')
     else:
         FreeCAD.Console.PrintError('Neither solid nor face nor edge femmesh!\n')
     return femelement_table
@@ -110,32 +143,237 @@ def get_femelement_table(femmesh):
 
 def get_femelement_volumes_table(femmesh):
     """ get_femelement_volumes_table(femmesh): { elementid : [ nodeid, nodeid, ... , nodeid ] }"""
-    table = {}
+    table = FemElementTable()
     for i in femmesh.Volumes:
         table[i] = femmesh.getElementNodes(i)
+    table.set_femmesh(femmesh, 'Volumes')
     return table
 
 
 def get_femelement_faces_table(femmesh, faces_only=None):
     """ get_femelement_faces_table(femmesh): { elementid : [ nodeid, nodeid, ... , nodeid ] }"""
-    table = {}
+    table = FemElementTable()
+    elements = None
     if not faces_only:
         faces_only = femmesh.FacesOnly
+        elements = 'FacesOnly'
     for i in faces_only:
         table[i] = femmesh.getElementNodes(i)
+    table.set_femmesh(femmesh, elements)
     return table
 
 
 def get_femelement_edges_table(femmesh, edges_only=None):
     """ get_femelement_edges_table(femmesh): { elementid : [ nodeid, nodeid, ... , nodeid ] }"""
-    table = {}
+    table = FemElementTable()
+    elements = None
     if not edges_only:
         edges_only = femmesh.EdgesOnly
+        elements = 'EdgesOnly'
     for i in edges_only:
         table[i] = femmesh.getElementNodes(i)
+    table.set_femmesh(femmesh, elements)
     return table
 
 
+class FemElementTable(dict):
+    '''the femelement_table { elementid : [ nodeid, nodeid, ... , nodeid ] }
+    holds the connectivity index of its elements (see FemElementIndex), which is
+    built on first use by get_femelement_index() and dropped if the table is changed
+    a table of all elements of a kind of a femmesh knows its femmesh, the index is then shared
+    by the tables of these elements of the femmesh (see get_femmesh_index())
+    '''
+    index = None
+    femmesh = None
+    elements = None
+
+    def set_femmesh(self, femmesh, elements):
+        '''the table holds the elements of femmesh given by the femmesh attribute elements, None for other elements
+        '''
+        if elements is not None:
+            self.femmesh = femmesh
+            self.elements = elements
+
+    def changed(self):
+        self.index = None
+        self.femmesh = None
+        self.elements = None
+
+    def __setitem__(self, key, value):
+        self.changed()
+        dict.__setitem__(self, key, value)
+
+    def __delitem__(self, key):
+        self.changed()
+        dict.__delitem__(self, key)
+
+    def clear(self):
+        self.changed()
+        dict.clear(self)
+
+    def pop(self, *args):
+        self.changed()
+        return dict.pop(self, *args)
+
+    def popitem(self):
+        self.changed()
+        return dict.popitem(self)
+
+    def setdefault(self, key, default=None):
+        self.changed()
+        return dict.setdefault(self, key, default)
+
+    def update(self, *args, **kwargs):
+        self.changed()
+        dict.update(self, *args, **kwargs)
+
+
+class FemElementIndex(object):
+    '''array based connectivity index of a femelement_table in compressed sparse row layout
+    element --> nodes: the nodes of element row i are ele_nodes[ele_ptr[i]:ele_ptr[i + 1]]
+    node --> elements: the entries of node row j are node_entries[node_ptr[j]:node_ptr[j + 1]],
+    an entry is a position in ele_nodes, entry_rows gives its element row, entry_bits the
+    position of the node in the element coded as a set bit (see get_femnodes_ele_table())
+    '''
+
+    def __init__(self, femelement_table):
+        import itertools
+        import numpy as np
+        node_lists = list(femelement_table.values())
+        self.ele_ids = np.array(list(femelement_table.keys()), dtype=np.int64)
+        self.ele_node_counts = np.array([len(nodes) for nodes in node_lists], dtype=np.int64)
+        self.ele_ptr = np.zeros(len(node_lists) + 1, dtype=np.int64)
+        np.cumsum(self.ele_node_counts, out=self.ele_ptr[1:])
+        entry_count = int(self.ele_ptr[-1])
+        self.ele_nodes = np.fromiter(itertools.chain.from_iterable(node_lists), dtype=np.int64, count=entry_count)
+        self.entry_rows = np.repeat(np.arange(len(node_lists), dtype=np.int64), self.ele_node_counts)
+        self.entry_bits = np.left_shift(1, np.arange(entry_count, dtype=np.int64) - self.ele_ptr[:-1][self.entry_rows])
+        self.node_entries = np.argsort(self.ele_nodes, kind='mergesort')
+        self.node_ids, node_starts = np.unique(self.ele_nodes[self.node_entries], return_index=True)
+        self.node_ptr = np.append(node_starts, entry_count).astype(np.int64)
+
+    def get_node_elements(self, node):
+        '''[[eleID, NodePosition], ...] of a node, see get_femnodes_ele_table()
+        '''
+        import numpy as np
+        j = np.searchsorted(self.node_ids, node)
+        if j == len(self.node_ids) or self.node_ids[j] != node:
+            return []
+        entries = self.node_entries[self.node_ptr[j]:self.node_ptr[j + 1]]
+        return [list(e) for e in zip(self.ele_ids[self.entry_rows[entries]].tolist(), self.entry_bits[entries].tolist())]
+
+    def get_entries_in(self, node_set):
+        '''boolean array, True for the entries of ele_nodes which are in node_set
+        '''
+        import numpy as np
+        return np.isin(self.ele_nodes, np.fromiter(node_set, dtype=np.int64, count=len(node_set)))
+
+    def count_nodes_in(self, node_set):
+        '''number of nodes of every element which are in node_set
+        '''
+        import numpy as np
+        entries_in = self.get_entries_in(node_set)
+        return np.bincount(self.entry_rows[entries_in], minlength=len(self.ele_ids))
+
+    def get_bit_patterns(self, node_set):
+        '''bit array of every element with the bits of the nodes in node_set set, see get_bit_pattern_dict()
+        '''
+        import numpy as np
+        entries_in = self.get_entries_in(node_set)
+        bits = np.zeros(len(self.ele_ids), dtype=np.int64)
+        np.add.at(bits, self.entry_rows[entries_in], self.entry_bits[entries_in])
+        return bits
+
+
+def get_femelement_index(femelement_table):
+    '''returns the FemElementIndex of a femelement_table
+    the index of a FemElementTable is built once and kept with the table
+    '''
+    if isinstance(femelement_table, FemElementIndex):
+        return femelement_table
+    if isinstance(femelement_table, FemElementTable):
+        if femelement_table.index is None:
+            if femelement_table.femmesh is not None:
+                femelement_table.index = get_femmesh_index(femelement_table.femmesh, femelement_table.elements, femelement_table)
+            else:
+                femelement_table.index = FemElementIndex(femelement_table)
+        return femelement_table.index
+    return FemElementIndex(femelement_table)
+
+
+# the FemElementIndex of the elements of the femmesh of the current solver input file writer run,
+# by the femmesh attribute of the elements, the number of nodes and elements of the femmesh and the
+# content of the element table, no femmesh is referenced, the indices are dropped by set_mapping_cache()
+femmesh_indices = {}
+
+
+def get_femmesh_index(femmesh, elements, femelement_table):
+    '''returns the FemElementIndex of the elements of femmesh given by the femmesh attribute elements
+    femelement_table is a table of these elements, the index is built from it if it is not cached yet
+    '''
+    state = (femmesh.NodeCount, femmesh.EdgeCount, femmesh.FaceCount, femmesh.VolumeCount)
+    key = (elements, state, hash(tuple(femelement_table.items())))
+    index = femmesh_indices.get(key)
+    if index is None:
+        index = FemElementIndex(femelement_table)
+        femmesh_indices[key] = index
+    return index
+
+
+try:
+    from collections.abc import Mapping
+except ImportError:
+    from collections import Mapping
+
+
+class FemNodesEleTable(Mapping):
+    '''the femnodes_ele_table {nodeID : [[eleID, NodePosition], [], ...], ...} of get_femnodes_ele_table()
+    the lists of a node are created on access from the FemElementIndex of the femelement_table
+    '''
+
+    def __init__(self, femnodes_mesh, femelement_table):
+        self.femnodes_mesh = femnodes_mesh
+        self.femelement_table = femelement_table
+        self.index = get_femelement_index(femelement_table)
+
+    def __len__(self):
+        return len(self.femnodes_mesh)
+
+    def __iter__(self):
+        return iter(self.femnodes_mesh)
+
+    def __contains__(self, node):
+        return node in self.femnodes_mesh
+
+    def __getitem__(self, node):
+        if node not in self.femnodes_mesh:
+            raise KeyError(node)
+        return self.index.get_node_elements(node)
+
+
+class FemBitPatternDict(Mapping):
+    '''the bit_pattern_dict {eleID : [lenEleNodes, binary_position]} of get_bit_pattern_dict()
+    held as arrays of the FemElementIndex element rows
+    '''
+
+    def __init__(self, index, bits):
+        self.index = index
+        self.bits = bits
+        self._rows = None
+
+    def __len__(self):
+        return len(self.index.ele_ids)
+
+    def __iter__(self):
+        return iter(self.index.ele_ids.tolist())
+
+    def __getitem__(self, ele):
+        if self._rows is None:
+            self._rows = dict(zip(self.index.ele_ids.tolist(), range(len(self.index.ele_ids))))
+        row = self._rows[ele]
+        return [int(self.index.ele_node_counts[row]), int(self.bits[row])]
+
+
 def get_femnodes_ele_table(femnodes_mesh, femelement_table):
     '''the femnodes_ele_table contains for each node its membership in elements
     {nodeID : [[eleID, NodePosition], [], ...], nodeID : [[], [], ...], ...}
@@ -146,19 +384,10 @@ def get_femnodes_ele_table(femnodes_mesh, femelement_table):
     but I did not know, how to get this from the mesh.
     Since the femelement_table contains either volume or face or edgemesh the femnodes_ele_table only
     has either volume or face or edge elements, see get_femelement_table()
+    The table is a FemNodesEleTable, which uses the FemElementIndex of the femelement_table.
     '''
-    femnodes_ele_table = {}  # node_dict in ulrichs class
-    for n in femnodes_mesh:  # initialize it with sorted node keys and empty lists
-        femnodes_ele_table[n] = []
-    for ele in femelement_table:
-        ele_list = femelement_table[ele]
-        # print(ele_list)
-        pos = int(1)
-        for ele_node in ele_list:
-            femnodes_ele_table[ele_node].append([ele, pos])
-            pos = pos << 1
+    femnodes_ele_table = FemNodesEleTable(femnodes_mesh, femelement_table)  # node_dict in ulrichs class
     print('len femnodes_ele_table: ' + str(len(femnodes_ele_table)))
-    # print('femnodes_ele_table: ', femnodes_ele_table)
     return femnodes_ele_table
 
 
@@ -181,26 +410,21 @@ def get_bit_pattern_dict(femelement_table, femnodes_ele_table, node_set):
     Is this element part of the node list (searching for elements) or has this element a face we are searching for?
     The number in the ele_dict is organized as a bit array.
     The corresponding bit is set, if the node of the node_set is contained in the element.
+    The bit arrays of all elements are calculated at once by the FemElementIndex of the femelement_table,
+    the femnodes_ele_table is not needed anymore.
     '''
     print('len femnodes_ele_table: ' + str(len(femnodes_ele_table)))
     print('len node_set: ' + str(len(node_set)))
-    # print('node_set: ', node_set)
-    bit_pattern_dict = get_copy_of_empty_femelement_table(femelement_table)
-    # # initializing the bit_pattern_dict
-    for ele in femelement_table:
-        len_ele = len(femelement_table[ele])
-        bit_pattern_dict[ele] = [len_ele, 0]
-    for node in node_set:
-        for nList in femnodes_ele_table[node]:
-            bit_pattern_dict[nList[0]][1] += nList[1]
+    index = get_femelement_index(femelement_table)
+    bit_pattern_dict = FemBitPatternDict(index, index.get_bit_patterns(node_set))
     print('len bit_pattern_dict: ' + str(len(bit_pattern_dict)))
-    # print('bit_pattern_dict: ', bit_pattern_dict)
     return bit_pattern_dict
 
 
 def get_ccxelement_faces_from_binary_search(bit_pattern_dict):
     '''get the CalculiX element face numbers
     '''
+    import numpy as np
     tet10_mask = {
         119: 1,
         411: 2,
@@ -244,12 +468,34 @@ def get_ccxelement_faces_from_binary_search(bit_pattern_dict):
         10: tet10_mask,
         15: pent15_mask,
         20: hex20_mask}
-    faces = []
-    for ele in bit_pattern_dict:
-        mask_dict = vol_dict[bit_pattern_dict[ele][0]]
-        for key in mask_dict:
-            if (key & bit_pattern_dict[ele][1]) == key:
-                faces.append([ele, mask_dict[key]])
+    if not isinstance(bit_pattern_dict, FemBitPatternDict):
+        faces = []
+        for ele in bit_pattern_dict:
+            mask_dict = vol_dict[bit_pattern_dict[ele][0]]
+            for key in mask_dict:
+                if (key & bit_pattern_dict[ele][1]) == key:
+                    faces.append([ele, mask_dict[key]])
+    else:
+        # all elements at once, faces are sorted by element and mask order like above
+        index = bit_pattern_dict.index
+        bits = bit_pattern_dict.bits
+        face_rows = []
+        face_masks = []
+        face_numbers = []
+        for node_count in np.unique(index.ele_node_counts[bits != 0]).tolist():
+            rows = np.flatnonzero((index.ele_node_counts == node_count) & (bits != 0))
+            for mask_position, key in enumerate(vol_dict[node_count]):
+                found = rows[(bits[rows] & key) == key]
+                face_rows.append(found)
+                face_masks.append(np.full(len(found), mask_position, dtype=np.int64))
+                face_numbers.append(np.full(len(found), vol_dict[node_count][key], dtype=np.int64))
+        faces = []
+        if face_rows:
+            face_rows = np.concatenate(face_rows)
+            face_masks = np.concatenate(face_masks)
+            face_numbers = np.concatenate(face_numbers)
+            order = np.lexsort((face_masks, face_rows))
+            faces = [list(f) for f in zip(index.ele_ids[face_rows[order]].tolist(), face_numbers[order].tolist())]
     print('found Faces: ', len(faces))
     print('faces: ', faces)
     return faces
@@ -262,22 +508,13 @@ def get_femelements_by_femnodes_bin(femelement_table, femnodes_ele_table, node_l
     blind fast binary search, but works for volumes only
     '''
     print('binary search: get_femelements_by_femnodes_bin')
-    vol_masks = {
-        4: 15,
-        6: 63,
-        8: 255,
-        10: 1023,
-        15: 32767,
-        20: 1048575}
     # Now we are looking for nodes inside of the Volumes = filling the bit_pattern_dict
     print('len femnodes_ele_table: ' + str(len(femnodes_ele_table)))
     bit_pattern_dict = get_bit_pattern_dict(femelement_table, femnodes_ele_table, node_list)
-    # search
-    ele_list = []  # The ele_list contains the result of the search.
-    for ele in bit_pattern_dict:
-        # print('bit_pattern_dict[ele][0]: ', bit_pattern_dict[ele][0])
-        if bit_pattern_dict[ele][1] == vol_masks[bit_pattern_dict[ele][0]]:
-            ele_list.append(ele)
+    # search, all bits of a volume are set if all its nodes are in the node_list
+    index = bit_pattern_dict.index
+    all_bits = (1 << index.ele_node_counts) - 1
+    ele_list = index.ele_ids[bit_pattern_dict.bits == all_bits].tolist()  # The ele_list contains the result of the search.
     print('found Volumes: ', len(ele_list))
     print('   volumes: ', len(ele_list))
     return ele_list
@@ -290,14 +527,9 @@ def get_femelements_by_femnodes_std(femelement_table, node_list):
     e: elementlist
     nodes: nodelist '''
     print('std search: get_femelements_by_femnodes_std')
-    e = []  # elementlist
-    for elementID in sorted(femelement_table):
-        nodecount = 0
-        for nodeID in femelement_table[elementID]:
-            if nodeID in node_list:
-                nodecount = nodecount + 1
-        if nodecount == len(femelement_table[elementID]):   # all nodes of the element are in the node_list!
-            e.append(elementID)
+    index = get_femelement_index(femelement_table)
+    nodecount = index.count_nodes_in(node_list)
+    e = sorted(index.ele_ids[nodecount == index.ele_node_counts].tolist())  # all nodes of the element are in the node_list!
     return e
 
 
@@ -311,48 +543,25 @@ def get_femvolumeelements_by_femfacenodes(femelement_table, node_list):
     if penta15 volume element --> if exact 6 or 8 element nodes are in node_list --> add femelement
     e: elementlist
     nodes: nodelist '''
-    e = []  # elementlist
-    for elementID in sorted(femelement_table):
-        nodecount = 0
-        el_nd_ct = len(femelement_table[elementID])
-        if el_nd_ct == 4:  # tetra4
-            for nodeID in femelement_table[elementID]:
-                if nodeID in node_list:
-                    nodecount = nodecount + 1
-            if nodecount == 3:
-                e.append(elementID)
-        elif el_nd_ct == 10:  # tetra10
-            for nodeID in femelement_table[elementID]:
-                if nodeID in node_list:
-                    nodecount = nodecount + 1
-            if nodecount == 4:
-                e.append(elementID)
-        elif el_nd_ct == 8:  # hexa8
-            for nodeID in femelement_table[elementID]:
-                if nodeID in node_list:
-                    nodecount = nodecount + 1
-            if nodecount == 4:
-                e.append(elementID)
-        elif el_nd_ct == 20:  # hexa20
-            for nodeID in femelement_table[elementID]:
-                if nodeID in node_list:
-                    nodecount = nodecount + 1
-            if nodecount == 8:
-                e.append(elementID)
-        elif el_nd_ct == 6:  # penta6
-            for nodeID in femelement_table[elementID]:
-                if nodeID in node_list:
-                    nodecount = nodecount + 1
-            if nodecount == 3 or nodecount == 4:
-                e.append(elementID)
-        elif el_nd_ct == 15:  # penta15
-            for nodeID in femelement_table[elementID]:
-                if nodeID in node_list:
-                    nodecount = nodecount + 1
-            if nodecount == 6 or nodecount == 8:
-                e.append(elementID)
-        else:
-            FreeCAD.Console.PrintError('Error in get_femvolumeelements_by_femfacenodes(): unknown volume element: ' + el_nd_ct + '\n')
+    import numpy as np
+    # volume element node count: node counts in node_list of an element face
+    face_node_counts = {
+        4: (3, ),  # tetra4
+        10: (4, ),  # tetra10
+        8: (4, ),  # hexa8
+        20: (8, ),  # hexa20
+        6: (3, 4),  # penta6
+        15: (6, 8)  # penta15
+    }
+    index = get_femelement_index(femelement_table)
+    nodecount = index.count_nodes_in(node_list)
+    found = np.zeros(len(index.ele_ids), dtype=bool)
+    for el_nd_ct in np.unique(index.ele_node_counts).tolist():
+        if el_nd_ct not in face_node_counts:
+            FreeCAD.Console.PrintError('Error in get_femvolumeelements_by_femfacenodes(): unknown volume element: ' + str(el_nd_ct) + '\n')
+            continue
+        found |= (index.ele_node_counts == el_nd_ct) & np.isin(nodecount, face_node_counts[el_nd_ct])
+    e = sorted(index.ele_ids[found].tolist())
     # print(sorted(e))
     return e
 
@@ -377,6 +586,7 @@ def get_femelement_sets(femmesh, femelement_table, fem_objects, femnodes_ele_tab
     # get remaining femelements for the fem_objects
     if has_remaining_femelements:
         remaining_femelements = []
+        referenced_femelements = set(referenced_femelements)
         for elemid in femelement_table:
             if elemid not in referenced_femelements:
                 remaining_femelements.append(elemid)
@@ -773,18 +983,19 @@ def get_force_obj_face_nodeload_table(femmesh, femelement_table, femnodes_mesh,
 
 
 def get_ref_edgenodes_table(femmesh, femelement_table, refedge):
+    return get_cached_mapping(femmesh, 'ref_edgenodes_table', refedge, calculate_ref_edgenodes_table, femmesh, femelement_table, refedge)
+
+
+def calculate_ref_edgenodes_table(femmesh, femelement_table, refedge):
     edge_table = {}  # { meshedgeID : ( nodeID, ... , nodeID ) }
     refedge_nodes = femmesh.getNodesByEdge(refedge)
+    if is_solid_femmesh(femmesh) or is_face_femmesh(femmesh):
+        index = get_femelement_index(femelement_table)
+        refedge_nodecount = index.count_nodes_in(refedge_nodes)
+        refedge_nodes = set(refedge_nodes)
     if is_solid_femmesh(femmesh):
-        refedge_fem_volumeelements = []
         # if at least two nodes of a femvolumeelement are in refedge_nodes the volume is added to refedge_fem_volumeelements
-        for elem in femelement_table:
-            nodecount = 0
-            for node in femelement_table[elem]:
-                if node in refedge_nodes:
-                    nodecount += 1
-            if nodecount > 1:
-                refedge_fem_volumeelements.append(elem)
+        refedge_fem_volumeelements = index.ele_ids[refedge_nodecount > 1].tolist()
         # for every refedge_fem_volumeelement look which of its nodes is in refedge_nodes --> add all these nodes to edge_table
         for elem in refedge_fem_volumeelements:
             fe_refedge_nodes = []
@@ -795,15 +1006,8 @@ def get_ref_edgenodes_table(femmesh, femelement_table, refedge):
         # FIXME: duplicate_mesh_elements: as soon as contact and springs are supported the user should decide on which edge the load is applied
         edge_table = delete_duplicate_mesh_elements(edge_table)
     elif is_face_femmesh(femmesh):
-        refedge_fem_faceelements = []
         # if at least two nodes of a femfaceelement are in refedge_nodes the volume is added to refedge_fem_volumeelements
-        for elem in femelement_table:
-            nodecount = 0
-            for node in femelement_table[elem]:
-                if node in refedge_nodes:
-                    nodecount += 1
-            if nodecount > 1:
-                refedge_fem_faceelements.append(elem)
+        refedge_fem_faceelements = index.ele_ids[refedge_nodecount > 1].tolist()
         # for every refedge_fem_faceelement look which of his nodes is in refedge_nodes --> add all these nodes to edge_table
         for elem in refedge_fem_faceelements:
             fe_refedge_nodes = []
@@ -867,6 +1071,10 @@ def get_ref_edgenodes_lengths(femnodes_mesh, edge_table):
 
 
 def get_ref_facenodes_table(femmesh, femelement_table, ref_face):
+    return get_cached_mapping(femmesh, 'ref_facenodes_table', ref_face, calculate_ref_facenodes_table, femmesh, femelement_table, ref_face)
+
+
+def calculate_ref_facenodes_table(femmesh, femelement_table, ref_face):
     face_table = {}  # { meshfaceID : ( nodeID, ... , nodeID ) }
     if is_solid_femmesh(femmesh):
         if has_no_face_data(femmesh):
@@ -875,6 +1083,7 @@ def get_ref_facenodes_table(femmesh, femelement_table, ref_face):
             # the problem if we retrieve the nodes ourself is they are not sorted we just have the nodes.
             # We need to sort them according the shell mesh notation of tria3, tria6, quad4, quad8
             ref_face_nodes = femmesh.getNodesByFace(ref_face)
+            ref_face_nodes_set = set(ref_face_nodes)
             # try to use getccxVolumesByFace() to get the volume ids of element with elementfaces on the ref_face --> should work for tetra4 and tetra10
             ref_face_volume_elements = femmesh.getccxVolumesByFace(ref_face)  # list of tupels (mv, ccx_face_nr)
             if ref_face_volume_elements:  # mesh with tetras
@@ -883,7 +1092,7 @@ def get_ref_facenodes_table(femmesh, femelement_table, ref_face):
                     veID = ve[0]
                     ve_ref_face_nodes = []
                     for nodeID in femelement_table[veID]:
-                        if nodeID in ref_face_nodes:
+                        if nodeID in ref_face_nodes_set:
                             ve_ref_face_nodes.append(nodeID)
                     face_table[veID] = ve_ref_face_nodes  # { volumeID : ( facenodeID, ... , facenodeID ) } only the ref_face nodes
             else:  # mesh with hexa or penta
@@ -892,7 +1101,7 @@ def get_ref_facenodes_table(femmesh, femelement_table, ref_face):
                 for veID in ref_face_volume_elements:
                     ve_ref_face_nodes = []
                     for nodeID in femelement_table[veID]:
-                        if nodeID in ref_face_nodes:
+                        if nodeID in ref_face_nodes_set:
                             ve_ref_face_nodes.append(nodeID)
                     face_table[veID] = ve_ref_face_nodes  # { volumeID : ( facenodeID, ... , facenodeID ) } only the ref_face nodes
                 face_table = build_mesh_faces_of_volume_elements(face_table, femelement_table)  # we need to resort the nodes to make them build an element face
@@ -1480,8 +1689,11 @@ def femelements_count_ok(len_femelement_table, count_femelements):
 
 def delete_duplicate_mesh_elements(refelement_table):
     new_refelement_table = {}  # duplicates deleted
+    sorted_nodes_found = set()
     for elem, nodes in refelement_table.items():
-        if sorted(nodes) not in sortlistoflistvalues(new_refelement_table.values()):
+        sorted_nodes = tuple(sorted(nodes))
+        if sorted_nodes not in sorted_nodes_found:
+            sorted_nodes_found.add(sorted_nodes)
             new_refelement_table[elem] = nodes
     return new_refelement_table
 
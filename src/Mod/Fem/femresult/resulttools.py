@@ -30,17 +30,97 @@ __url__ = "http://www.freecadweb.org"
 import FreeCAD
 
 
+# result objects with data read on demand, which hold their data at the moment
+# (document name, object name), the least recently used first
+loaded_results = []
+
+# node data properties of a mechanical result object, emptied if the data of a result read on demand is unloaded
+result_node_data = [
+    "NodeNumbers", "DisplacementVectors", "StressVectors", "StrainVectors", "Peeq",
+    "DisplacementLengths", "StressValues", "PrincipalMax", "PrincipalMed", "PrincipalMin",
+    "MaxShear", "MassFlowRate", "NetworkPressure", "UserDefined", "Temperature"
+]
+
+
 ## Removes all result objects from an analysis group
 #  @param analysis
 def purge_results(analysis):
     for m in analysis.Group:
         if (m.isDerivedFrom('Fem::FemResultObject')):
+            if (analysis.Document.Name, m.Name) in loaded_results:
+                loaded_results.remove((analysis.Document.Name, m.Name))
             if m.Mesh and hasattr(m.Mesh, "Proxy") and m.Mesh.Proxy.Type == "Fem::FemMeshResult":
                 analysis.Document.removeObject(m.Mesh.Name)
             analysis.Document.removeObject(m.Name)
     FreeCAD.ActiveDocument.recompute()
 
 
+## Sets the result file a result object reads its data from on demand, see load_result
+#  @param result object
+#  @param result_file frd file the result set is part of
+#  @param file_range byte range (start, end) of the result set in the frd file
+#  @param eigenmode_number
+#  @param step_time
+def set_result_file(resultobj, result_file, file_range, eigenmode_number=0, step_time=0.0):
+    if not hasattr(resultobj, "ResultFile"):
+        resultobj.addProperty("App::PropertyFile", "ResultFile", "Base", "Result file the result data is read from on demand", 1)
+        # byte offsets may exceed the range of App::PropertyInteger
+        resultobj.addProperty("App::PropertyString", "ResultFileRange", "Base", "Byte range of the result data in the result file", 1)
+    resultobj.ResultFile = result_file
+    resultobj.ResultFileRange = '{} {}'.format(*file_range)
+    if eigenmode_number > 0:
+        resultobj.Eigenmode = int(eigenmode_number)
+    resultobj.Time = step_time
+
+
+## Reads the data of a result object with a result file (see set_result_file) if it is not loaded yet.
+#  Only the data of the last used results is held, the limit is set by the
+#  preference LoadedResultsLimit, the data of least recently used results is unloaded.
+#  Results without result file are not changed.
+#  @param result object
+def load_result(resultobj):
+    if not getattr(resultobj, "ResultFileRange", ""):
+        return resultobj
+    key = (resultobj.Document.Name, resultobj.Name)
+    if key in loaded_results:
+        loaded_results.remove(key)
+        loaded_results.append(key)
+        return resultobj
+    from feminout import importCcxFrdResults
+    from feminout import importToolsFem
+    FreeCAD.Console.PrintLog('Read result data of {} from {}\n'.format(resultobj.Name, resultobj.ResultFile))
+    file_range = [int(i) for i in resultobj.ResultFileRange.split()]
+    result_set = importCcxFrdResults.readResultSet(resultobj.ResultFile, file_range)
+    result_set['number'] = resultobj.Eigenmode
+    result_set['time'] = resultobj.Time
+    bound_box = resultobj.Mesh.FemMesh.BoundBox
+    span = max(bound_box.XLength, bound_box.YLength, bound_box.ZLength)
+    importToolsFem.fill_femresult_mechanical(resultobj, result_set, span)
+    loaded_results.append(key)
+    fem_prefs = FreeCAD.ParamGet("User parameter:BaseApp/Preferences/Mod/Fem/General")
+    limit = max(fem_prefs.GetInt("LoadedResultsLimit", 10), 1)
+    while len(loaded_results) > limit:
+        doc_name, obj_name = loaded_results[0]
+        doc = FreeCAD.listDocuments().get(doc_name)
+        obj = doc.getObject(obj_name) if doc else None
+        if obj:
+            unload_result(obj)
+        else:
+            loaded_results.pop(0)
+    return resultobj
+
+
+## Empties the node data of a result object with a result file, it is read again by load_result
+#  @param result object
+def unload_result(resultobj):
+    key = (resultobj.Document.Name, resultobj.Name)
+    if key in loaded_results:
+        loaded_results.remove(key)
+    if getattr(resultobj, "ResultFileRange", ""):
+        for prop in result_node_data:
+            setattr(resultobj, prop, [])
+
+
 ## Resets result mesh deformation
 #  @param result object
 def reset_mesh_deformation(resultobj):
@@ -62,6 +142,7 @@ def reset_mesh_color(resultobj):
 
 
 def show_displacement(resultobj, displacement_factor=0.0):
+    load_result(resultobj)
     if FreeCAD.GuiUp:
         if resultobj.Mesh.ViewObject.Visibility is False:
             resultobj.Mesh.ViewObject.Visibility = True
@@ -81,6 +162,7 @@ def show_result(resultobj, result_type="Sabs", limit=None):
         reset_mesh_color(resultobj.Mesh)
         return
     if resultobj:
+        load_result(resultobj)
         if result_type == "Sabs":
             values = resultobj.StressValues
         elif result_type == "Uabs":
@@ -131,7 +213,7 @@ def show_color_by_scalar_with_cutoff(resultobj, values, limit=None):
 #  - NPress - NetworkPressure
 #  - None - always return (0.0, 0.0, 0.0)
 def get_stats(resultobj, result_type):
-    m = resultobj
+    m = load_result(resultobj)
     stats = (0.0, 0.0, 0.0)
     match_table = {
         "U1": (m.Stats[0], m.Stats[1], m.Stats[2]),
@@ -33,6 +33,10 @@ import sys
 import time
 import codecs
 import femmesh.meshtools as FemMeshTools
+from femmesh.meshcache import MeshMappingCache
+from femmesh.meshcache import get_mapping_cache_dir
+from femmesh.meshcache import get_mapping_cache_size
+from multiprocessing.pool import ThreadPool
 from .. import writerbase as FemInputWriter
 import six
 
@@ -70,10 +74,19 @@ class FemInputWriterCcx(FemInputWriter.FemInputWriter):
 
     def write_calculix_input_file(self):
         timestart = time.clock()
-        if self.solver_obj.SplitInputWriter is True:
-            self.write_calculix_splitted_input_file()
-        else:
-            self.write_calculix_one_input_file()
+        # the mappings of the reference shapes to the mesh are taken from the mesh mapping cache if it is used
+        ccx_prefs = FreeCAD.ParamGet("User parameter:BaseApp/Preferences/Mod/Fem/Ccx")
+        if ccx_prefs.GetBool("UseMeshMappingCache", False):
+            FemMeshTools.set_mapping_cache(MeshMappingCache(self.femmesh, get_mapping_cache_dir(), get_mapping_cache_size()))
+        try:
+            if self.solver_obj.SplitInputWriter is True:
+                self.write_calculix_splitted_input_file()
+            else:
+                self.write_calculix_one_input_file()
+        finally:
+            if FemMeshTools.mapping_cache is not None:
+                FreeCAD.Console.PrintMessage('Mesh mapping cache: {} mappings reused, {} mappings calculated\n'.format(FemMeshTools.mapping_cache.hits, FemMeshTools.mapping_cache.misses))
+            FemMeshTools.set_mapping_cache(None)
         writing_time_string = "Writing time input file: " + str(time.clock() - timestart)
         if self.femelement_count_test is True:
             FreeCAD.Console.PrintMessage(writing_time_string + ' \n\n')
@@ -199,20 +212,22 @@ class FemInputWriterCcx(FemInputWriter.FemInputWriter):
         inpfileMain.write('*INCLUDE,INPUT=' + include_name + "_Node_Elem_sets.inp \n")
 
         # create separate inputfiles for each node set or constraint
+        # they are written into buffers, at the end all buffers are written to their files at once
+        split_files = {}
         if self.fixed_objects or self.displacement_objects or self.planerotation_objects:
-            inpfileNodes = open(name + "_Node_sets.inp", 'w')
+            inpfileNodes = split_files[name + "_Node_sets.inp"] = six.StringIO()
         if self.analysis_type == "thermomech" and self.temperature_objects:
-            inpfileNodeTemp = open(name + "_Node_Temp.inp", 'w')
+            inpfileNodeTemp = split_files[name + "_Node_Temp.inp"] = six.StringIO()
         if self.force_objects:
-            inpfileForce = open(name + "_Node_Force.inp", 'w')
+            inpfileForce = split_files[name + "_Node_Force.inp"] = six.StringIO()
         if self.pressure_objects:
-            inpfilePressure = open(name + "_Pressure.inp", 'w')
+            inpfilePressure = split_files[name + "_Pressure.inp"] = six.StringIO()
         if self.analysis_type == "thermomech" and self.heatflux_objects:
-            inpfileHeatflux = open(name + "_Node_Heatlfux.inp", 'w')
+            inpfileHeatflux = split_files[name + "_Node_Heatlfux.inp"] = six.StringIO()
         if self.contact_objects:
-            inpfileContact = open(name + "_Surface_Contact.inp", 'w')
+            inpfileContact = split_files[name + "_Surface_Contact.inp"] = six.StringIO()
         if self.transform_objects:
-            inpfileTransform = open(name + "_Node_Transform.inp", 'w')
+            inpfileTransform = split_files[name + "_Node_Transform.inp"] = six.StringIO()
 
         # node and element sets
         self.write_element_sets_material_and_femelement_type(inpfileMain)
@@ -338,6 +353,9 @@ class FemInputWriterCcx(FemInputWriter.FemInputWriter):
         self.write_footer(inpfileMain)
         inpfileMain.close()
 
+        # write the separate inputfiles concurrently
+        write_split_files(split_files)
+
     def write_element_sets_material_and_femelement_type(self, f):
         f.write('\n***********************************************************\n')
         f.write('** Element sets for materials and FEM element type (solid, shell, beam, fluid)\n')
@@ -526,7 +544,7 @@ class FemInputWriterCcx(FemInputWriter.FemInputWriter):
                         else:
                             name = "IND" + str(obj)
                         f.write('*SURFACE, NAME =' + name + '\n')
-                        v = self.mesh_object.FemMesh.getccxVolumesByFace(ref_shape)
+                        v = FemMeshTools.get_ccxvolumes_by_face(self.femmesh, ref_shape)
                         for i in v:
                             f.write("{},S{}\n".format(i[0], i[1]))
 
@@ -994,7 +1012,7 @@ class FemInputWriterCcx(FemInputWriter.FemInputWriter):
                     for elem in elem_tup:
                         ho = o.Shape.getElement(elem)
                         if ho.ShapeType == 'Face':
-                            v = self.mesh_object.FemMesh.getccxVolumesByFace(ho)
+                            v = FemMeshTools.get_ccxvolumes_by_face(self.femmesh, ho)
                             f.write("** Heat flux on face {}\n".format(elem))
                             for i in v:
                                 # SvdW: add factor to force heatflux to units system of t/mm/s/K # OvG: Only write out the VolumeIDs linked to a particular face
@@ -1005,7 +1023,7 @@ class FemInputWriterCcx(FemInputWriter.FemInputWriter):
                     for elem in elem_tup:
                         ho = o.Shape.getElement(elem)
                         if ho.ShapeType == 'Face':
-                            v = self.mesh_object.FemMesh.getccxVolumesByFace(ho)
+                            v = FemMeshTools.get_ccxvolumes_by_face(self.femmesh, ho)
                             f.write("** Heat flux on face {}\n".format(elem))
                             for i in v:
                                 f.write("{},S{},{}\n".format(i[0], i[1], heatflux_obj.DFlux * 0.001))
@@ -1356,6 +1374,23 @@ class FemInputWriterCcx(FemInputWriter.FemInputWriter):
 
 # Helpers
 # ccx elset names: M .. Material, B .. Beam, R .. BeamRotation, D ..Direction, F .. Fluid, S .. Shell, TODO write comment into input file to elset ids and elset attributes
+def write_split_files(split_files):
+    '''writes the buffers of split_files {file_name: buffer} to their files, one thread per file
+    '''
+    def write_split_file(file_name):
+        with open(file_name, 'w') as f:
+            f.write(split_files[file_name].getvalue())
+        split_files[file_name].close()
+    if not split_files:
+        return
+    pool = ThreadPool(len(split_files))
+    try:
+        pool.map(write_split_file, list(split_files))
+    finally:
+        pool.close()
+        pool.join()
+
+
 def get_ccx_elset_name_standard(names):
     # standard max length = 80
     ccx_elset_name = ''
@@ -106,17 +106,15 @@ class FemInputWriter():
             print('We need to find the solid nodes.')
             if not self.femelement_volumes_table:
                 self.femelement_volumes_table = FemMeshTools.get_femelement_volumes_table(self.femmesh)
+            # all nodes of the volume elements, taken from the connectivity index of the table
+            volume_nodes = set(FemMeshTools.get_femelement_index(self.femelement_volumes_table).node_ids.tolist())
             for femobj in self.fixed_objects:  # femobj --> dict, FreeCAD document object is femobj['Object']
                 nds_solid = []
                 nds_faceedge = []
                 for n in femobj['Nodes']:
-                    solid_node = False
-                    for ve in self.femelement_volumes_table:
-                        if n in self.femelement_volumes_table[ve]:
-                            solid_node = True
-                            nds_solid.append(n)
-                            break
-                    if not solid_node:
+                    if n in volume_nodes:
+                        nds_solid.append(n)
+                    else:
                         nds_faceedge.append(n)
                 femobj['NodesSolid'] = set(nds_solid)
                 femobj['NodesFaceEdge'] = set(nds_faceedge)
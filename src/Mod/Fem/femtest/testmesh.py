@@ -25,6 +25,7 @@
 
 import Fem
 import FreeCAD
+import os
 import unittest
 from . import utilstest as testtools
 from .utilstest import fcc_print
@@ -105,6 +106,31 @@ class TestMeshCommon(unittest.TestCase):
         expected = (1, 2, 3, 4, 5, 6, 7, 8, 9, 10)
         self.assertEqual(newmesh.getElementNodes(1), expected, "Nodes order of quadratic volume element is unexpected")
 
+    def test_mesh_mapping_cache(self):
+        import Part
+        import femmesh.meshtools as FemMeshTools
+        from femmesh.meshcache import MeshMappingCache
+        box = Part.makeBox(1, 1, 1)
+        femmesh = Fem.FemMesh()
+        femmesh.addNode(0, 0, 0, 1)
+        femmesh.addNode(1, 0, 0, 2)
+        femmesh.addNode(0, 1, 0, 3)
+        femmesh.addNode(0, 0, 1, 4)
+        femmesh.addVolume([1, 2, 3, 4])
+        cache_dir = testtools.get_fem_test_tmp_dir() + '/mesh_mapping_cache'
+        expected = FemMeshTools.get_femnodes_by_shape(femmesh, box.Faces[0])
+        FemMeshTools.set_mapping_cache(MeshMappingCache(femmesh, cache_dir))
+        self.assertEqual(FemMeshTools.get_cached_mapping(femmesh, 'femnodes_by_shape', box.Faces[0], FemMeshTools.get_femnodes_by_shape, femmesh, box.Faces[0]), expected, "Calculated mesh mapping is unexpected")
+        # a new cache of the same mesh reads the mapping from the cache directory
+        FemMeshTools.set_mapping_cache(MeshMappingCache(femmesh, cache_dir))
+        self.assertEqual(FemMeshTools.get_cached_mapping(femmesh, 'femnodes_by_shape', box.Faces[0], FemMeshTools.get_femnodes_by_shape, femmesh, box.Faces[0]), expected, "Cached mesh mapping is unexpected")
+        self.assertEqual(FemMeshTools.mapping_cache.hits, 1, "Mesh mapping was not taken from the cache directory")
+        # the mapping files are removed if the cache directory exceeds its size limit
+        FemMeshTools.set_mapping_cache(MeshMappingCache(femmesh, cache_dir, 0))
+        FemMeshTools.get_cached_mapping(femmesh, 'femnodes_by_shape', box.Faces[1], FemMeshTools.get_femnodes_by_shape, femmesh, box.Faces[1])
+        self.assertEqual([f for f in os.listdir(cache_dir) if f.endswith('.pkl')], [], "Mesh mapping cache directory exceeds its size limit")
+        FemMeshTools.set_mapping_cache(None)
+
     def test_writeAbaqus_precision(self):
         # https://forum.freecadweb.org/viewtopic.php?f=18&t=22759#p176669
         # ccx reads only F20.0 (i. e. Fortran floating point field 20 chars wide)
@@ -215,6 +241,32 @@ class TestMeshEleTetra10(unittest.TestCase):
         obj.ViewObject.DisplayMode = "Faces, Wireframe & Nodes"
         '''
 
+    def test_tetra10_meshtools_index(self):
+        # tetra10 element: node and face search by the connectivity index of the femelement_table
+        import femmesh.meshtools as FemMeshTools
+        femelement_table = FemMeshTools.get_femelement_table(self.femmesh)
+        femnodes_ele_table = FemMeshTools.get_femnodes_ele_table(self.femmesh.Nodes, femelement_table)
+        self.assertEqual(femnodes_ele_table[1], [[1, 1]], "Element of node 1 of " + self.elem + " femnodes_ele_table is unexpected")
+        self.assertEqual(femnodes_ele_table[10], [[1, 512]], "Element of node 10 of " + self.elem + " femnodes_ele_table is unexpected")
+        face_nodes = [1, 2, 3, 5, 6, 7]
+        bit_pattern_dict = FemMeshTools.get_bit_pattern_dict(femelement_table, femnodes_ele_table, face_nodes)
+        self.assertEqual(bit_pattern_dict[1], [10, 119], "Bit pattern of " + self.elem + " element is unexpected")
+        faces = FemMeshTools.get_ccxelement_faces_from_binary_search(bit_pattern_dict)
+        self.assertEqual(faces, [[1, 1]], "CalculiX faces of " + self.elem + " element are unexpected")
+        self.assertEqual(FemMeshTools.get_femelements_by_femnodes_std(femelement_table, face_nodes), [], "Elements of " + self.elem + " face nodes are unexpected")
+        self.assertEqual(FemMeshTools.get_femelements_by_femnodes_std(femelement_table, list(range(1, 11))), [1], "Elements of " + self.elem + " nodes are unexpected")
+        # the tables of the elements of the femmesh share the index
+        index = FemMeshTools.get_femelement_index(femelement_table)
+        self.assertTrue(FemMeshTools.get_femelement_index(FemMeshTools.get_femelement_volumes_table(self.femmesh)) is index, "Index of " + self.elem + " femmesh is not shared")
+        # the index is rebuilt if the femelement_table is changed
+        femelement_table[2] = (1, 2, 3, 4, 5, 6, 7, 8, 9, 11)
+        femnodes_ele_table = FemMeshTools.get_femnodes_ele_table(self.femmesh.Nodes, femelement_table)
+        self.assertEqual(femnodes_ele_table[1], [[1, 1], [2, 1]], "Elements of node 1 of changed " + self.elem + " femnodes_ele_table are unexpected")
+        # the index is rebuilt if the femmesh is changed
+        self.femmesh.addVolume([1, 2, 3, 4, 5, 6, 7, 8, 9, 10])
+        index = FemMeshTools.get_femelement_index(FemMeshTools.get_femelement_table(self.femmesh))
+        self.assertEqual(len(index.ele_ids), 2, "Index of changed " + self.elem + " femmesh is unexpected")
+
     def test_tetra10_inp(self):
         # tetra10 element: reading from and writing to inp mesh file format
         filetyp = 'inp'
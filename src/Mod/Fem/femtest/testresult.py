@@ -222,6 +222,111 @@ class TestResult(unittest.TestCase):
         self.assertEqual(read_mflow, expected_mflow, "Values of read mflow result data are unexpected")
         self.assertEqual(read_npressure, expected_npressure, "Values of read npressure result data are unexpected")
 
+    def test_read_frd_arrays(self):
+        # the array based frd reader has to return the same data as the line based one
+        import feminout.importCcxFrdResults as importCcxFrdResults
+        for frd_name in ['cube_static', 'cube_frequency', 'spine_thermomech', 'Flow1D_thermomech']:
+            frd_file = testtools.get_fem_test_home_dir() + 'ccx/' + frd_name + '.frd'
+            fcc_print('Read frd file with both readers: ' + frd_file)
+            frd_content = importCcxFrdResults.readResult(frd_file)
+            frd_arrays = importCcxFrdResults.readResultArrays(frd_file)
+            self.assertEqual(sorted(frd_arrays.keys()), sorted(frd_content.keys()), "Keys of read frd data are unexpected")
+            for key in frd_content.keys():
+                if key != 'Results':
+                    self.assertEqual(frd_arrays[key], frd_content[key], "Values of read {} data are unexpected".format(key))
+            self.assertEqual(len(frd_arrays['Results']), len(frd_content['Results']), "Number of read result sets is unexpected")
+            for result_arrays, result_set in zip(frd_arrays['Results'], frd_content['Results']):
+                self.assertEqual(sorted(result_arrays.keys()), sorted(result_set.keys()), "Keys of read result set are unexpected")
+                for key in result_set.keys():
+                    if key not in ('number', 'time'):
+                        self.assertEqual(result_arrays[key], result_set[key], "Values of read {} result data are unexpected".format(key))
+
+    def test_read_frd_result_sets_on_demand(self):
+        # result sets read from their indexed byte range have to match the ones read with the whole file
+        import feminout.importCcxFrdResults as importCcxFrdResults
+        frd_file = testtools.get_fem_test_home_dir() + 'ccx/Flow1D_thermomech.frd'
+        frd_arrays = importCcxFrdResults.readResultArrays(frd_file)
+        frd_index = importCcxFrdResults.readResultArrays(frd_file, index_results=True)
+        self.assertEqual(len(frd_index['Results']), len(frd_arrays['Results']), "Number of indexed result sets is unexpected")
+        for result_index, result_set in zip(frd_index['Results'], frd_arrays['Results']):
+            self.assertEqual(sorted(result_index.keys()), ['frd_range', 'number', 'time'], "Keys of indexed result set are unexpected")
+            result_read = importCcxFrdResults.readResultSet(frd_file, result_index['frd_range'])
+            for key in result_set.keys():
+                if key not in ('number', 'time'):
+                    self.assertEqual(result_read[key], result_set[key], "Values of {} result data read on demand are unexpected".format(key))
+
+    def test_read_frd_result_ranges(self):
+        # the byte range of a result set starts at its first result block, the nodes and elements are not part of it
+        import feminout.importCcxFrdResults as importCcxFrdResults
+        for frd_name in ['cube_static', 'cube_frequency', 'Flow1D_thermomech']:
+            frd_file = testtools.get_fem_test_home_dir() + 'ccx/' + frd_name + '.frd'
+            with open(frd_file, 'rb') as f:
+                frd_data = f.read()
+            frd_index = importCcxFrdResults.readResultArrays(frd_file, index_results=True)
+            for result_index in frd_index['Results']:
+                start, end = result_index['frd_range']
+                self.assertEqual(frd_data[start:start + 3], b' -4', "Range of result set does not start at a result block")
+                self.assertEqual(frd_data.find(b'\n    2C', start, end), -1, "Range of result set contains the nodes")
+                self.assertEqual(frd_data.find(b'\n    3C', start, end), -1, "Range of result set contains the elements")
+
+    def test_load_result_on_demand(self):
+        # results read on demand have to get the data of the results read on import,
+        # only the data of the last LoadedResultsLimit used results is held
+        import feminout.importCcxFrdResults as importCcxFrdResults
+        import femresult.resulttools as resulttools
+        frd_file = testtools.get_fem_test_home_dir() + 'ccx/Flow1D_thermomech.frd'
+        ccx_prefs = FreeCAD.ParamGet("User parameter:BaseApp/Preferences/Mod/Fem/Ccx")
+        fem_prefs = FreeCAD.ParamGet("User parameter:BaseApp/Preferences/Mod/Fem/General")
+        load_on_demand = ccx_prefs.GetBool("LoadResultsOnDemand", False)
+        limit = fem_prefs.GetInt("LoadedResultsLimit", 10)
+        try:
+            ccx_prefs.SetBool("LoadResultsOnDemand", False)
+            importCcxFrdResults.importFrd(frd_file, result_name_prefix='read_')
+            ccx_prefs.SetBool("LoadResultsOnDemand", True)
+            fem_prefs.SetInt("LoadedResultsLimit", 2)
+            importCcxFrdResults.importFrd(frd_file, result_name_prefix='demand_')
+            read = [o for o in self.active_doc.Objects if o.Label.startswith('read_')]
+            demand = [o for o in self.active_doc.Objects if o.Label.startswith('demand_')]
+            self.assertEqual(len(demand), len(read), "Number of results read on demand is unexpected")
+            self.assertTrue(len(demand) > 2, "Not enough results to unload one")
+            self.assertEqual(demand[0].NodeNumbers, [], "Result data is read on import")
+            for result_read, result_demand in zip(read[:3], demand[:3]):
+                resulttools.load_result(result_demand)
+                for prop in resulttools.result_node_data:
+                    self.assertEqual(getattr(result_demand, prop), getattr(result_read, prop), "Values of {} read on demand are unexpected".format(prop))
+            # the least recently used result is unloaded
+            self.assertEqual(demand[0].NodeNumbers, [], "Least recently used result is not unloaded")
+            self.assertEqual(demand[1].NodeNumbers, read[1].NodeNumbers, "Recently used result is unloaded")
+            # using a result again makes it the most recently used one
+            resulttools.load_result(demand[1])
+            resulttools.load_result(demand[0])
+            self.assertEqual(demand[2].NodeNumbers, [], "Least recently used result is not unloaded")
+            self.assertEqual(demand[1].NodeNumbers, read[1].NodeNumbers, "Used result is unloaded")
+            self.assertEqual(demand[0].NodeNumbers, read[0].NodeNumbers, "Result is not read again")
+        finally:
+            ccx_prefs.SetBool("LoadResultsOnDemand", load_on_demand)
+            fem_prefs.SetInt("LoadedResultsLimit", limit)
+            resulttools.loaded_results[:] = [key for key in resulttools.loaded_results if key[0] != self.doc_name]
+
+    def test_stress_values(self):
+        # the stress values calculated for all nodes at once have to match the ones calculated per node
+        from feminout import importToolsFem
+        stress = [
+            (1.0, 2.0, 3.0, 0.0, 0.0, 0.0),
+            (-10.5, 22.0, 3.5, 4.0, -5.0, 6.0),
+            (0.0, 0.0, 0.0, 0.0, 0.0, 0.0),
+            (float('NaN'), 1.0, 1.0, 1.0, 1.0, 1.0)
+        ]
+        vm, prin1, prin2, prin3, shear = importToolsFem.calculate_stress_values(stress)
+        for i, s in enumerate(stress[:3]):
+            expected_prin1, expected_prin2, expected_prin3, expected_shear = importToolsFem.calculate_principal_stress(s)
+            self.assertAlmostEqual(vm[i], importToolsFem.calculate_von_mises(s), 10, "Von Mises stress is unexpected")
+            self.assertAlmostEqual(prin1[i], expected_prin1, 10, "Max principal stress is unexpected")
+            self.assertAlmostEqual(prin2[i], expected_prin2, 10, "Med principal stress is unexpected")
+            self.assertAlmostEqual(prin3[i], expected_prin3, 10, "Min principal stress is unexpected")
+            self.assertAlmostEqual(shear[i], expected_shear, 10, "Max shear stress is unexpected")
+        self.assertTrue(prin1[3] != prin1[3], "Principal stress of a NaN row is not NaN")
+
     def tearDown(self):
         FreeCAD.closeDocument(self.doc_name)
         pass
@@ -0,0 +1,278 @@
+# Copyright (c) 2026, FreeCAD Developers
+# All rights reserved.
+
+# This file is part of the StepClassLibrary (SCL).
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+#   Redistributions of source code must retain the above copyright notice,
+#   this list of conditions and the following disclaimer.
+#
+#   Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+#   Neither the name of the <ORGANIZATION> nor the names of its contributors may
+#   be used to endorse or promote products derived from this software without
+#   specific prior written permission.
+
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED.
+# IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY
+# DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES
+# (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND
+# ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF
+# THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+"""Lazy loading of the schema modules generated by fedex_python
+
+Importing a schema module (config_control_design, automotive_design, ifc2x3, ifc4)
+executes all its type, entity, function and rule definitions. A LazySchema reads
+the schema module as text only and splits it into its top level definitions.
+A definition is executed when it is needed, together with the definitions it uses.
+
+The schema index (definition name -> lines, used names, supertypes, attributes,
+select members) is built once and cached in the temp directory.
+"""
+
+import os
+import re
+import sys
+import types
+import hashlib
+import tempfile
+
+try:
+    import cPickle as pickle
+except ImportError:
+    import pickle
+
+
+__title__="Lazy SCL schema loader"
+__version__ = "0.1"
+
+# increase if the format of the schema index changes
+SCHEMA_INDEX_VERSION = 1
+
+NAME_RE = re.compile(r"[A-Za-z_]\w*")
+CLASS_RE = re.compile(r"class\s+(\w+)\s*(?:\(([^)]*)\))?\s*:")
+DEF_RE = re.compile(r"def\s+(\w+)\s*\(")
+ASSIGN_RE = re.compile(r"(\w+)\s*=")
+INIT_RE = re.compile(r"\sdef\s+__init__\s*\(\s*self\s*,([^)]*)\)")
+SELECT_RE = re.compile(r"=\s*SELECT\s*\(")
+STRING_RE = re.compile(r"'(\w+)'")
+
+
+def find_schema_file(schema_name):
+    """ the file of the schema module, the module is not imported
+    """
+    try:
+        import importlib.util
+    except ImportError:
+        import imp
+        return imp.find_module(schema_name)[1]
+    spec = importlib.util.find_spec(schema_name)
+    if spec is None or not spec.origin:
+        raise ImportError("No schema module %s"%schema_name)
+    return spec.origin
+
+
+def split_schema_source(lines):
+    """ Splits the lines of a schema module into its top level statements.
+    In the generated modules every top level statement starts in the first column,
+    everything else (bodies, continuation lines) is indented.
+    Returns a list of (first_line, end_line) indices, the comment lines directly before
+    a statement (the ENTITY, RULE, FUNCTION headers) belong to it.
+    """
+    blocks = []
+    block_start = 0
+    has_statement = False
+    for i, line in enumerate(lines):
+        if line[:1] and line[:1] not in ' \t\r\n#':
+            if has_statement:
+                statement_start = i
+                while statement_start > block_start + 1 and lines[statement_start - 1].lstrip()[:1] == '#':
+                    statement_start -= 1
+                blocks.append((block_start, statement_start))
+                block_start = statement_start
+            has_statement = True
+    blocks.append((block_start, len(lines)))
+    return blocks
+
+
+def build_schema_index(lines):
+    """ The schema index of the lines of a schema module:
+    'blocks': list of (first_line, end_line, name, used_names) of the top level statements,
+    name is None for statements which define nothing (imports, expressions), they are always executed.
+    'names': definition name -> block number
+    'entities': entity name -> {'supertypes': [...], 'attributes': [...]}
+    'selects': select name -> [select members]
+    """
+    blocks = []
+    names = {}
+    entities = {}
+    selects = {}
+    for first_line, end_line in split_schema_source(lines):
+        text = ''.join(lines[first_line:end_line])
+        statement = ''.join(l for l in lines[first_line:end_line] if l[:1] not in ('#', ' ', '\t', '\r', '\n'))
+        name = None
+        m = CLASS_RE.match(statement)
+        if m:
+            name = m.group(1)
+            supertypes = [s.strip() for s in (m.group(2) or '').split(',') if s.strip()]
+            init = INIT_RE.search(text)
+            attributes = []
+            if init:
+                attributes = [a.strip() for a in init.group(1).split(',') if a.strip()]
+            if 'ENTITY %s '%name in text:
+                entities[name] = {'supertypes': supertypes, 'attributes': attributes}
+        else:
+            m = DEF_RE.match(statement) or ASSIGN_RE.match(statement)
+            if m and not statement.startswith(('import', 'from')):
+                name = m.group(1)
+                if SELECT_RE.search(text):
+                    selects[name] = STRING_RE.findall(text)
+        used_names = set(NAME_RE.findall(text))
+        used_names.discard(name)
+        blocks.append((first_line, end_line, name, used_names))
+        if name is not None:
+            # a later definition of a name replaces the former one, both are executed in file order
+            names.setdefault(name, []).append(len(blocks) - 1)
+    # only the names defined in the schema are of interest as used names
+    blocks = [(f, e, n, sorted(u for u in used if u in names)) for f, e, n, used in blocks]
+    return {
+        'version': SCHEMA_INDEX_VERSION,
+        'blocks': blocks,
+        'names': names,
+        'entities': entities,
+        'selects': selects}
+
+
+def get_schema_index(schema_file, lines):
+    """ the schema index of a schema module, from the cache if the module file was not changed
+    """
+    stat = os.stat(schema_file)
+    key = '%s|%i|%f|%i|%s'%(os.path.abspath(schema_file), stat.st_size, stat.st_mtime, SCHEMA_INDEX_VERSION, sys.version_info[0])
+    cache_dir = os.path.join(tempfile.gettempdir(), 'SCL_schema_index')
+    cache_file = os.path.join(cache_dir, os.path.basename(schema_file) + '_' + hashlib.sha1(key.encode('utf-8')).hexdigest() + '.pkl')
+    if os.path.isfile(cache_file):
+        try:
+            with open(cache_file, 'rb') as f:
+                return pickle.load(f)
+        except Exception:
+            pass
+    schema_index = build_schema_index(lines)
+    try:
+        if not os.path.isdir(cache_dir):
+            os.makedirs(cache_dir)
+        tmp_file = cache_file + '.%i.tmp'%os.getpid()
+        with open(tmp_file, 'wb') as f:
+            pickle.dump(schema_index, f, 2)
+        os.rename(tmp_file, cache_file)
+    except (IOError, OSError):
+        pass
+    return schema_index
+
+
+class LazySchema(object):
+    """
+    A schema module, whose definitions are executed on demand.
+    schema.get_class('cartesian_point') or schema['cartesian_point'] returns the entity class,
+    its supertypes and all types, functions and rules used by them are defined before.
+    schema.module is the module object of the schema, it holds the executed definitions.
+    """
+    def __init__(self, schema_name, schema_file=None):
+        self.schema_name = schema_name
+        self.schema_file = schema_file or find_schema_file(schema_name)
+        if self.schema_file.endswith(('.pyc', '.pyo')):
+            self.schema_file = self.schema_file[:-1]
+        with open(self.schema_file) as f:
+            self._lines = f.readlines()
+        self._index = get_schema_index(self.schema_file, self._lines)
+        self._executed = set()
+        # the schema module, the generated code uses sys.modules[__name__] as scope
+        module_name = 'SCL_lazy_schema_' + schema_name
+        self.module = types.ModuleType(module_name)
+        self.module.__file__ = self.schema_file
+        sys.modules[module_name] = self.module
+        # the statements which define nothing (imports, schema_scope) are executed at once
+        for block_number, block in enumerate(self._index['blocks']):
+            if block[2] is None:
+                self._execute_blocks([block_number])
+
+    def get_entity_names(self):
+        return list(self._index['entities'].keys())
+
+    def get_entity_info(self, name):
+        """ {'supertypes': [...], 'attributes': [...]} of an entity, None for unknown entities
+        """
+        return self._index['entities'].get(name)
+
+    def get_select_members(self, name):
+        return self._index['selects'].get(name)
+
+    def __contains__(self, name):
+        return name in self._index['names']
+
+    def __getitem__(self, name):
+        return self.get_class(name)
+
+    def get_class(self, name):
+        """ the definition of name, it is executed with everything it uses if not done yet
+        """
+        if name not in self._index['names']:
+            raise KeyError(name)
+        if name not in self.module.__dict__:
+            self._execute_blocks(self._get_needed_blocks(name))
+            if name not in self.module.__dict__:
+                raise KeyError("Definition %s of schema %s could not be loaded"%(name, self.schema_name))
+        return self.module.__dict__[name]
+
+    def _get_needed_blocks(self, name):
+        blocks = self._index['blocks']
+        names = self._index['names']
+        needed = set()
+        stack = list(names[name])
+        while stack:
+            block_number = stack.pop()
+            if block_number in needed or block_number in self._executed:
+                continue
+            needed.add(block_number)
+            for used_name in blocks[block_number][3]:
+                stack.extend(names[used_name])
+        # executed in file order, like the import of the module would do
+        return sorted(needed)
+
+    def _execute_blocks(self, block_numbers):
+        for block_number in block_numbers:
+            first_line, end_line, name, used_names = self._index['blocks'][block_number]
+            # the leading empty lines keep the line numbers of the schema file in tracebacks
+            source = '\n' * first_line + ''.join(self._lines[first_line:end_line])
+            self._executed.add(block_number)
+            try:
+                code = compile(source, self.schema_file, 'exec')
+            except (SyntaxError, ValueError) as e:
+                print('Definition %s of schema %s could not be compiled: %s'%(name, self.schema_name, e))
+                continue
+            try:
+                exec(code, self.module.__dict__)
+            except (TypeError, NameError) as e:
+                # some generated definitions are not valid, e.g. subclasses of bool in ifc4,
+                # get_class() raises a KeyError if the definition asked for is missing
+                print('Definition %s of schema %s could not be executed: %s'%(name, self.schema_name, e))
+
+
+_schemas = {}
+
+
+def load_schema(schema_name):
+    """ the LazySchema of a schema module, one per schema name
+    """
+    if schema_name not in _schemas:
+        _schemas[schema_name] = LazySchema(schema_name)
+    return _schemas[schema_name]
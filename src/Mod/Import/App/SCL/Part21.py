@@ -32,6 +32,8 @@
 import re
 from . import Utils
 import time
+import bisect
+from array import array
 
 
 INSTANCE_DEFINITION_RE = re.compile("#(\d+)[^\S\n]?=[^\S\n]?(.*?)\((.*)\)[^\S\n]?;[\\r]?$")
@@ -90,70 +92,265 @@ class Part21EntityInstance:
         print(self._attributes_definition)
 
 
+# the tokens to split a Part21 file into records: strings, comments and the record end
+RECORD_TOKEN_RE = re.compile(b"'|;|/\\*|\\*/")
+# the head of an entity instance record: #id = ENTITY_NAME(
+ENTITY_INSTANCE_RE = re.compile(b"\\s*#(\\d+)\\s*=\\s*([^(]*)\\(")
+# strings and references in the attributes of an entity instance record
+ATTRIBUTE_REFERENCE_RE = re.compile(b"(?:'[^']*')+|#(\\d+)")
+
+# the array type code used for ids, offsets and references
+if 'q' in getattr(array, 'typecodes', ''):
+    INDEX_TYPECODE = 'q'
+else:
+    INDEX_TYPECODE = 'l'
+
+
+def iter_records(fp):
+    """ Reads the records of a Part21 file, a record ends with a ';' outside of strings and comments.
+    fp has to be opened in binary mode. Records spanning several lines are collected in a list and
+    joined once. Yields (start, end, record) with start, end the offsets of the record in the file
+    and the record text without comments and line breaks.
+    """
+    parts = []
+    in_string = False
+    in_comment = False
+    offset = 0
+    record_start = 0
+    for line in fp:
+        start = 0
+        for m in RECORD_TOKEN_RE.finditer(line):
+            token = m.group()
+            if in_comment:
+                if token == b'*/':
+                    in_comment = False
+                    start = m.end()
+            elif in_string:
+                if token == b"'":
+                    in_string = False
+            elif token == b"'":
+                in_string = True
+            elif token == b'/*':
+                parts.append(line[start:m.start()])
+                in_comment = True
+            elif token == b';':
+                parts.append(line[start:m.start()])
+                yield record_start, offset + m.start(), b''.join(parts)
+                parts = []
+                start = m.end()
+                record_start = offset + start
+        if not in_comment:
+            parts.append(line[start:].rstrip(b'\r\n'))
+        offset += len(line)
+    if b''.join(parts).strip():
+        print('Part21 file does not end with a complete record')
+
+
+def clean_record(record):
+    """ Removes comments and line breaks of a record read from a Part21 file
+    """
+    import io
+    return b''.join(r[2] for r in iter_records(io.BytesIO(record + b';')))
+
+
+def decode_str(data):
+    """ bytes read from the file to str, Python 2 str are bytes already
+    """
+    if str is bytes:
+        return data
+    return data.decode('utf-8', 'replace')
+
+
+class Part21InstanceDefinitions(object):
+    """
+    The instance definitions of a Part21Parser as dict like object:
+    key is the instance integer id, value is (entity_name, attributes list).
+    The values are read from the file on access, see Part21Parser.get_instance_definition()
+    """
+    def __init__(self, part21_parser):
+        self._part21_parser = part21_parser
+
+    def __len__(self):
+        return self._part21_parser.get_number_of_instances()
+
+    def __iter__(self):
+        return iter(self._part21_parser.get_instance_ids())
+
+    def __contains__(self, instance_id):
+        return self._part21_parser.get_instance_row(instance_id) is not None
+
+    def __getitem__(self, instance_id):
+        definition = self._part21_parser.get_instance_definition(instance_id)
+        if definition is None:
+            raise KeyError(instance_id)
+        return definition
+
+    def keys(self):
+        return self._part21_parser.get_instance_ids()
+
+
 class Part21Parser:
     """
-    Loads all instances definition of a Part21 file into memory.
-    Two dicts are created:
-    self._instance_definition : stores attributes, key is the instance integer id
-    self._number_of_ancestors : stores the number of ancestors of entity id. This enables
-    to define the order of instances creation.
+    Loads the index of all instances definition of a Part21 file into memory.
+    The instances are held in arrays, one row per instance in file order:
+    self._instance_ids : the instance integer id
+    self._instance_types : the index of the entity name in self._entity_names
+    self._instance_starts, self._instance_ends : the offsets of the instance record in the file
+    self._reference_starts, self._references : the ids of the instances referenced by the
+    instance of row i are self._references[self._reference_starts[i]:self._reference_starts[i + 1]]
+    The attributes of an instance are read from the file on demand by get_instance_definition().
+    self._instances_definition gives the instance definitions as dict like object,
+    key is the instance integer id, value is (entity_name, attributes list).
     """
     def __init__(self, filename):
         self._filename = filename
         # the schema
         self._schema_name = ""
-        # the dict self._instances contain instance definition
-        self._instances_definition = {}
-        # this dict contains lists of 0 ancestors, 1 ancestor, etc.
-        # initializes this dict
-        #self._number_of_ancestors = {} # this kind of sorting don't work on non-trivial files
-        #for i in range(2000):
-        #    self._number_of_ancestors[i]=[]
+        # the instance index
+        self._entity_names = []
+        self._entity_name_index = {}  # entity name as read from the file: index in self._entity_names
+        self._instance_ids = array(INDEX_TYPECODE)
+        self._instance_types = array(INDEX_TYPECODE)
+        self._instance_starts = array(INDEX_TYPECODE)
+        self._instance_ends = array(INDEX_TYPECODE)
+        self._reference_starts = array(INDEX_TYPECODE, [0])
+        self._references = array(INDEX_TYPECODE)
+        # sorted instance ids and their rows, None as long as the ids in the file are increasing
+        self._sorted_ids = None
+        self._sorted_rows = None
+        # the reverse reference index, built on first use
+        self._referencing_targets = None
+        self._referencing_ids = None
+        self._fp = None
+        self._instances_definition = Part21InstanceDefinitions(self)
         self.parse_file()
-        # reduce number_of_ancestors dict
-        #for item in self._number_of_ancestors.keys():
-        #    if len(self._number_of_ancestors[item])==0:
-        #        del self._number_of_ancestors[item]
 
     def get_schema_name(self):
         return self._schema_name
-        print(schema_name)
 
     def get_number_of_instances(self):
-        return len(list(self._instances_definition.keys()))
+        return len(self._instance_ids)
+
+    def get_instance_ids(self):
+        return self._instance_ids.tolist()
 
     def parse_file(self):
         init_time = time.time()
         print("Parsing file %s..."%self._filename)
-        fp = open(self._filename)
-        while True:
-            line = fp.readline()
-            if not line:
-                break
-            # there may be a multiline definition. In this case, we read lines until we found
-            # a ;
-            while (line.find(';') == -1): #it's a multiline
-                line = line.replace("\n","").replace("\r","") + fp.readline()
-            # parse line
-            match_instance_definition = INSTANCE_DEFINITION_RE.search(line)  # id,name,attrs
+        fp = open(self._filename, 'rb')
+        increasing = True
+        last_id = -1
+        for start, end, record in iter_records(fp):
+            match_instance_definition = ENTITY_INSTANCE_RE.match(record)  # id,name
             if match_instance_definition:
-                instance_id, entity_name, entity_attrs = match_instance_definition.groups()
+                instance_id, entity_name = match_instance_definition.groups()
                 instance_int_id = int(instance_id)
-                # find number of ancestors
-                #number_of_ancestors = entity_attrs.count('#')
-                # fill number of ancestors dict
-                #self._number_of_ancestors[number_of_ancestors].append(instance_int_id) # this kind of sorting don't work on non-trivial files
-                # parse attributes string
-                entity_attrs_list, str_len = Utils.process_nested_parent_str(entity_attrs)
-                # then finally append this instance to the disct instance
-                self._instances_definition[instance_int_id] = (entity_name,entity_attrs_list)
+                # intern the entity name
+                entity_type = self._entity_name_index.get(entity_name)
+                if entity_type is None:
+                    entity_type = self._entity_name_index[entity_name] = len(self._entity_names)
+                    self._entity_names.append(decode_str(entity_name.strip()))
+                # the referenced instances, references in strings are skipped
+                self._references.extend([int(r) for r in ATTRIBUTE_REFERENCE_RE.findall(record, match_instance_definition.end()) if r])
+                self._reference_starts.append(len(self._references))
+                self._instance_ids.append(instance_int_id)
+                self._instance_types.append(entity_type)
+                self._instance_starts.append(start)
+                self._instance_ends.append(end)
+                if instance_int_id <= last_id:
+                    increasing = False
+                last_id = instance_int_id
             else: #does not match with entity instance definition, parse the header
-                if line.startswith('FILE_SCHEMA'):
+                record = record.strip()
+                if record.startswith(b'FILE_SCHEMA'):
                     #identify the schema name
-                    self._schema_name = line.split("'")[1].split("'")[0].split(" ")[0].lower()
+                    self._schema_name = decode_str(record).split("'")[1].split("'")[0].split(" ")[0].lower()
         fp.close()
+        if not increasing:
+            rows = sorted(range(len(self._instance_ids)), key=self._instance_ids.__getitem__)
+            self._sorted_rows = array(INDEX_TYPECODE, rows)
+            self._sorted_ids = array(INDEX_TYPECODE, [self._instance_ids[r] for r in rows])
         print('done in %fs.'%(time.time()-init_time))
-        print('schema: - %s entities %i'%(self._schema_name,len(list(self._instances_definition.keys()))))
+        print('schema: - %s entities %i'%(self._schema_name,self.get_number_of_instances()))
+
+    def get_instance_row(self, instance_id):
+        """ the row of an instance in the instance arrays, None if there is no instance with this id
+        """
+        if self._sorted_ids is None:
+            row = bisect.bisect_left(self._instance_ids, instance_id)
+            if row < len(self._instance_ids) and self._instance_ids[row] == instance_id:
+                return row
+        else:
+            i = bisect.bisect_left(self._sorted_ids, instance_id)
+            if i < len(self._sorted_ids) and self._sorted_ids[i] == instance_id:
+                return self._sorted_rows[i]
+        return None
+
+    def get_entity_name(self, instance_id):
+        row = self.get_instance_row(instance_id)
+        if row is None:
+            return None
+        return self._entity_names[self._instance_types[row]]
+
+    def get_references(self, instance_id):
+        """ the ids of the instances referenced by an instance
+        """
+        row = self.get_instance_row(instance_id)
+        if row is None:
+            return []
+        return self._references[self._reference_starts[row]:self._reference_starts[row + 1]].tolist()
+
+    def get_referencing_instances(self, instance_id):
+        """ the ids of the instances which reference an instance (reverse reference index)
+        """
+        if self._referencing_targets is None:
+            self._build_reverse_index()
+        lo = bisect.bisect_left(self._referencing_targets, instance_id)
+        hi = bisect.bisect_right(self._referencing_targets, instance_id)
+        return self._referencing_ids[lo:hi].tolist()
+
+    def _build_reverse_index(self):
+        # (referenced id, referencing id) pairs sorted by the referenced id
+        import numpy as np
+        def to_numpy(a):
+            if len(a) == 0:
+                return np.zeros(0, dtype=np.int64)
+            return np.frombuffer(a, dtype=a.typecode).astype(np.int64)
+        references = to_numpy(self._references)
+        reference_counts = np.diff(to_numpy(self._reference_starts))
+        sources = np.repeat(to_numpy(self._instance_ids), reference_counts)
+        order = np.argsort(references, kind='mergesort')
+        self._referencing_targets = array(INDEX_TYPECODE, references[order].tolist())
+        self._referencing_ids = array(INDEX_TYPECODE, sources[order].tolist())
+
+    def get_instance_definition(self, instance_id):
+        """ (entity_name, attributes list) of an instance, the attributes are read from the file,
+        for instance, the following record:
+        #4 = PRODUCT_DEFINITION_SHAPE('$','$',#5);
+        will result in:
+        ('PRODUCT_DEFINITION_SHAPE', ["'$'", "'$'", '#5'])
+        None if there is no instance with this id
+        """
+        row = self.get_instance_row(instance_id)
+        if row is None:
+            return None
+        if self._fp is None:
+            self._fp = open(self._filename, 'rb')
+        self._fp.seek(self._instance_starts[row])
+        record = clean_record(self._fp.read(self._instance_ends[row] - self._instance_starts[row]))
+        match_instance_definition = ENTITY_INSTANCE_RE.match(record)
+        attrs_end = record.rfind(b')')
+        if attrs_end < match_instance_definition.end():
+            attrs_end = len(record)
+        entity_attrs = decode_str(record[match_instance_definition.end():attrs_end])
+        return (self._entity_names[self._instance_types[row]], Utils.parse_attributes(entity_attrs))
+
+    def close(self):
+        """ closes the file opened by get_instance_definition()
+        """
+        if self._fp is not None:
+            self._fp.close()
+            self._fp = None
 
 class EntityInstancesFactory(object):
     '''
@@ -36,7 +36,8 @@ corresponding classes.
 In addition it writes out a graphviz file with the entity graph.
 """
 
-import Part21,sys
+import sys
+from . import Part21, LazySchema
 
 
 
@@ -49,11 +50,10 @@ __version__ = "0.1 (Jan 2014)"
 class SimpleParser:
     """ read the file
 
-    Part21.Part21Parser Loads all instances definition of a Part21 file into memory.
-    Two dicts are created:
-    Part21.Part21Parser._instance_definition : stores attributes, key is the instance integer id
-    Part21.Part21Parser._number_of_ancestors : stores the number of ancestors of entity id. This enables
-    to define the order of instances creation.
+    Part21.Part21Parser Loads the index of all instances definition of a Part21 file into memory.
+    The entity name and the referenced instances of an instance are held in arrays,
+    the attributes are read from the file by Part21.Part21Parser.get_instance_definition().
+    The references define the order of instances creation.
     """
     def __init__(self, filename):
         import time
@@ -66,53 +66,64 @@ class SimpleParser:
         #for i in self._p21loader._instances_definition.keys():
         #    print i,self._p21loader._instances_definition[i][0],self._p21loader._instances_definition[i][1]
 
-    def _writeGraphVizEdge(self,num,attrList,file):
-        for i in attrList:
-            if isinstance(i,list):
-                self._writeGraphVizEdge(num,i,file)
-            elif  isinstance(i,str):
-                if not i == '' and i[0] == '#':
-                    key = int(i[1:])
-                    file.write('  '+repr(num)+' -> '+repr(key)+'\n')
-
-
     def writeGraphViz(self,fileName):
         print("Writing GraphViz file %s..."%fileName)
         gvFile = open(fileName,'w')
 
         gvFile.write('digraph G {\n  node [fontname=Verdana,fontsize=12]\n  node [style=filled]\n  node [fillcolor="#EEEEEE"]\n  node [color="#EEEEEE"]\n  edge [color="#31CEF0"]\n')
-        for i in list(self._p21loader._instances_definition.keys()):
+        # one instance after the other is read from the file, the edges are taken from the reference index
+        for i in self._p21loader.get_instance_ids():
+            instance_definition = self._p21loader.get_instance_definition(i)
             entityStr = '#'+repr(i)
-            nameStr   = self._p21loader._instances_definition[i][0].lower()
-            sttrStr   = repr(self._p21loader._instances_definition[i][1]).replace('"','').replace("'",'').replace(" ",'')
+            nameStr   = instance_definition[0].lower()
+            sttrStr   = repr(instance_definition[1]).replace('"','').replace("'",'').replace(" ",'')
             if len (sttrStr) > 40:
                 sttrStr = sttrStr[:39]+'....'
             gvFile.write('  '+repr(i)+' [label="'+entityStr+'\n'+nameStr+'\n'+sttrStr+'"]\n')
-            self._writeGraphVizEdge( i,self._p21loader._instances_definition[i][1],gvFile)
+            for key in self._p21loader.get_references(i):
+                gvFile.write('  '+repr(i)+' -> '+repr(key)+'\n')
         gvFile.write('}\n')
+        gvFile.close()
+        self._p21loader.close()
 
     def instantiate(self):
         """Instantiate the python class from the entities"""
-        import inspect
-        # load the needed schema module
-        if self._p21loader.get_schema_name() == 'config_control_design':
-            import config_control_design
-            self.schemaModule = config_control_design
-        if self._p21loader.get_schema_name() == 'automotive_design':
-            import automotive_design
-            self.schemaModule = automotive_design
-
-        if self.schemaModule:
-            self.schemaClasses = dict(inspect.getmembers(self.schemaModule))
-
-        for i in list(self._p21loader._instances_definition.keys()):
-            #print i
-            if i not in self.instanceMape:
-                self._create_entity_instance(i)
+        # load the needed schema, its entity classes are defined when they are used the first time
+        schema_name = self._p21loader.get_schema_name()
+        if schema_name in ('config_control_design', 'automotive_design', 'ifc2x3', 'ifc4'):
+            self.schemaClasses = LazySchema.load_schema(schema_name)
+            self.schemaModule = self.schemaClasses.module
+
+        # the referenced instances are created before the instance, by the reference index
+        # of the loader and a stack instead of recursion, long reference chains are no problem
+        # the instances waiting for their references are in_progress, meeting one again is a cycle
+        try:
+            for i in self._p21loader.get_instance_ids():
+                if i in self.instanceMape:
+                    continue
+                stack = [(i, False)]
+                in_progress = set()
+                while stack:
+                    instance_id, references_done = stack.pop()
+                    if instance_id in self.instanceMape:
+                        continue
+                    if references_done:
+                        self._create_entity_instance(instance_id)
+                        in_progress.discard(instance_id)
+                        continue
+                    if instance_id in in_progress:
+                        raise NameError("Reference cycle of instance: ", instance_id)
+                    in_progress.add(instance_id)
+                    stack.append((instance_id, True))
+                    for key in self._p21loader.get_references(instance_id):
+                        if key not in self.instanceMape:
+                            stack.append((key, False))
+        finally:
+            self._p21loader.close()
 
     def _create_entity_instance(self, instance_id):
-        if instance_id in self._p21loader._instances_definition:
-            instance_definition = self._p21loader._instances_definition[instance_id]
+        instance_definition = self._p21loader.get_instance_definition(instance_id)
+        if instance_definition is not None:
             #print "Instance definition to process",instance_definition
             # first find class name
             class_name = instance_definition[0].lower()
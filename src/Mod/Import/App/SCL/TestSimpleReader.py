@@ -0,0 +1,75 @@
+# Copyright (c) 2026, FreeCAD Developers
+# All rights reserved.
+
+# This file is part of the StepClassLibrary (SCL).
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+#   Redistributions of source code must retain the above copyright notice,
+#   this list of conditions and the following disclaimer.
+#
+#   Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+#   Neither the name of the <ORGANIZATION> nor the names of its contributors may
+#   be used to endorse or promote products derived from this software without
+#   specific prior written permission.
+
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED.
+# IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY
+# DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES
+# (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND
+# ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF
+# THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+"""Tests of the Part21 readers, run from the parent directory with
+python -m unittest SCL.TestSimpleReader
+"""
+
+import os
+import tempfile
+import unittest
+
+from . import SimpleReader
+
+PART21_HEADER = """ISO-10303-21;
+HEADER;
+FILE_DESCRIPTION(('test'),'1');
+FILE_NAME('test.stp','2026-01-01 T00:00:00',(''),(''),'','','');
+FILE_SCHEMA(('TEST_SCHEMA'));
+ENDSEC;
+DATA;
+"""
+
+
+class TestSimpleReader(unittest.TestCase):
+
+    def parser(self, data):
+        fd, filename = tempfile.mkstemp(suffix='.stp')
+        with os.fdopen(fd, 'w') as f:
+            f.write(PART21_HEADER + data + "ENDSEC;\nEND-ISO-10303-21;\n")
+        self.addCleanup(os.remove, filename)
+        parser = SimpleReader.SimpleParser(filename)
+        # the test schema has no classes, any entity name is accepted
+        parser.schemaClasses = dict((name.lower(), None) for name in ['A', 'B'])
+        return parser
+
+    def test_instantiate(self):
+        parser = self.parser("#1=A(#2,#3);\n#2=B(#3);\n#3=B($);\n")
+        parser.instantiate()
+        self.assertEqual(sorted(parser.instanceMape.keys()), [1, 2, 3])
+
+    def test_reference_cycle(self):
+        parser = self.parser("#1=A(#2);\n#2=B(#1);\n")
+        self.assertRaises(NameError, parser.instantiate)
+
+
+if __name__ == "__main__":
+    unittest.main()
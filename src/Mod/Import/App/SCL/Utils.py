@@ -31,6 +31,8 @@
 
 ''' This module provide string utils'''
 
+import re
+
 def process_nested_parent_str(attr_str,idx=0):
     '''
     The first letter should be a parenthesis
@@ -60,6 +62,50 @@ def process_nested_parent_str(attr_str,idx=0):
     params.append(current_param)
     return params,k
 
+# strings (with '' inside), parentheses and commas and the text between them
+ATTRIBUTE_TOKEN_RE = re.compile(r"(?:'[^']*')+|[(),]|[^'(),]+|'")
+
+def parse_attributes(attr_str):
+    '''
+    Tokenizer based version of process_nested_parent_str, strings are kept as one item
+    input string: "1,4,(5,6),7"
+    output: ['1','4',['5','6'],'7']
+    '''
+    params = []
+    stack = []
+    current_param = ''
+    after_list = False
+    for token in ATTRIBUTE_TOKEN_RE.findall(attr_str):
+        if token == ',':
+            if not after_list:
+                params.append(current_param)
+            current_param = ''
+            after_list = False
+        elif token == '(':
+            stack.append(params)
+            params = []
+            current_param = ''
+            after_list = False
+        elif token == ')':
+            if not stack:
+                continue
+            if not after_list:
+                params.append(current_param)
+            nested = params
+            params = stack.pop()
+            params.append(nested)
+            current_param = ''
+            after_list = True
+        elif not after_list:
+            current_param += token
+    if not after_list:
+        params.append(current_param)
+    while stack:
+        nested = params
+        params = stack.pop()
+        params.append(nested)
+    return params
+
 if __name__=="__main__":
     print(process_nested_parent_str2("'A'")[0])
     print(process_nested_parent_str2("30.0,0.0,5.0")[0])
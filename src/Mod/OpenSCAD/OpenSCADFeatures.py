@@ -240,6 +240,25 @@ class RefineShape:
             sh=fp.Base.Shape.removeSplitter()
             fp.Shape=OpenSCADUtils.applyPlacement(sh)
 
+class Instance:
+    '''the shape of a shared object at the placement of the instance'''
+    def __init__(self, obj,child=None):
+        obj.addProperty("App::PropertyLink","Base","Base",
+                        "The shared object")
+        obj.Proxy = self
+        obj.Base = child
+
+    def onChanged(self, fp, prop):
+        "Do something when a property has changed"
+        pass
+
+    def execute(self, fp):
+        if fp.Base:
+            # the geometry is shared with the base object, only the location differs
+            sh=fp.Base.Shape
+            sh.Placement=fp.Placement
+            fp.Shape=sh
+
 class IncreaseTolerance:
     '''increase the tolerance of every vertex
     in the current implementation its' placement is linked'''
@@ -623,3 +623,131 @@ def applyPlacement(shape):
             return Part.Shell(shape.childShapes())
         else:
             return Part.Compound([shape])
+
+booleantypes = ['Part::Fuse','Part::MultiFuse','Part::Cut','Part::Common','Part::MultiCommon']
+
+def booleaninputs(obj):
+    '''the input objects of a boolean feature'''
+    if obj.TypeId in ['Part::MultiFuse','Part::MultiCommon']:
+        return obj.Shapes
+    return [obj.Base,obj.Tool]
+
+def booleanshape(typeid,shapes,refine=False):
+    '''computes the shape of a boolean feature of the given type from the
+    shapes of its inputs, as the feature itself does'''
+    if len(shapes) == 1 and shapes[0].ShapeType == 'Compound':
+        shapes = shapes[0].childShapes()
+    if len(shapes) < 2 or any(sh.isNull() for sh in shapes):
+        raise ValueError('not enough input shapes')
+    if typeid in ['Part::Fuse','Part::MultiFuse']:
+        result = shapes[0].fuse(shapes[1:])
+    elif typeid == 'Part::Cut':
+        result = shapes[0].cut(shapes[1])
+    else:
+        result = shapes[0]
+        for sh in shapes[1:]:
+            result = result.common(sh)
+    if refine:
+        try:
+            result = result.removeSplitter()
+        except Exception:
+            pass
+    return result
+
+def _booleanworker(tasks,results):
+    '''the loop of a process computing boolean operations, the shapes are
+    exchanged as BRep strings'''
+    import Part
+    while True:
+        task = tasks.get()
+        if task is None:
+            break
+        name,typeid,refine,breps = task
+        try:
+            shapes = []
+            for brep in breps:
+                sh = Part.Shape()
+                sh.importBrepFromString(brep)
+                shapes.append(sh)
+            result = booleanshape(typeid,shapes,refine).exportBrepToString()
+        except Exception:
+            # computed again by the parent
+            result = None
+        results.put((name,result))
+
+def evaluatebooleans(objs,processes):
+    '''evaluatebooleans(objs,processes): computes the objects in objs bottom-up.
+    The boolean features whose inputs are computed are handed to processes
+    forked worker processes (see ForkProcesses), so independent branches of
+    a CSG tree are computed at the same time, while the other objects are
+    recomputed here. The results are assigned to the features, which are
+    marked as computed. Features a worker fails on are recomputed here,
+    objects failing to recompute are left to the document recompute. Nothing
+    is done if processes is lower than 2 or processes can't be forked'''
+    import Part
+    import ForkProcesses
+    if processes < 2:
+        return
+    import collections
+    names = set([obj.Name for obj in objs])
+    # number of inputs not computed yet and users of every object
+    waiting = {}
+    users = collections.defaultdict(list)
+    for obj in objs:
+        deps = set([dep.Name for dep in obj.OutList if dep.Name in names])
+        waiting[obj.Name] = len(deps)
+        for dep in deps:
+            users[dep].append(obj)
+    ready = collections.deque([obj for obj in objs if not waiting[obj.Name]])
+    pool = ForkProcesses.Pool(_booleanworker,processes)
+    if not pool.workers:
+        return
+    running = {}
+    def recompute(obj):
+        try:
+            return obj.recompute()
+        except Exception:
+            return False
+    def done(obj,ok=True):
+        if ok:
+            obj.purgeTouched()
+        for user in users[obj.Name]:
+            waiting[user.Name] -= 1
+            if not waiting[user.Name]:
+                ready.append(user)
+    try:
+        while ready or running:
+            while ready:
+                obj = ready.popleft()
+                if pool.workers and obj.TypeId in booleantypes:
+                    try:
+                        breps = [o.Shape.exportBrepToString() for o in booleaninputs(obj)]
+                    except Exception:
+                        breps = None
+                    if breps:
+                        running[obj.Name] = obj
+                        pool.put((obj.Name,obj.TypeId,obj.Refine,breps))
+                        continue
+                done(obj,recompute(obj))
+            if not running:
+                break
+            try:
+                name,brep = pool.get()
+            except ForkProcesses.WorkerError:
+                FreeCAD.Console.PrintWarning('Boolean processes stopped, continuing in this process\n')
+                pool.close()
+                ready.extend(running.values())
+                running = {}
+                continue
+            obj = running.pop(name)
+            if brep:
+                sh = Part.Shape()
+                sh.importBrepFromString(brep)
+                # a recomputed feature moves its shape to its placement
+                sh.Placement = obj.Placement
+                obj.Shape = sh
+                done(obj)
+            else:
+                done(obj,recompute(obj))
+    finally:
+        pool.close()
@@ -68,6 +68,125 @@ except AttributeError:
         from PySide import QtGui
         return QtGui.QApplication.translate(context, text, None)
 
+# the lexer and the parser, built on first use
+lexer = None
+parser = None
+
+# the CSGNodes by structure during parsing, None if subtrees are not shared
+nodes = None
+
+# names of the objects used more than once
+sharedobjects = set()
+
+class CSGNode(object):
+    """CSGNode(action,values): a statement of the CSG file, the grammar action
+    creating its objects and the values it is called with. The block lists in
+    the values contain the child nodes."""
+
+    __slots__ = ['action','values','users','objects']
+
+    def __init__(self,action,values):
+        self.action = action
+        self.values = values
+        self.users = 0
+        self.objects = None
+        for child in self.children():
+            child.users += 1
+
+    def children(self):
+        for v in self.values:
+            if isinstance(v,list) and v and isinstance(v[0],CSGNode):
+                for child in v:
+                    yield child
+
+def nodeKey(value):
+    "hashable key of the structure of a grammar value, child nodes are unique already"
+    if isinstance(value,list):
+        return tuple([nodeKey(v) for v in value])
+    if isinstance(value,dict):
+        return tuple(sorted([(k,nodeKey(v)) for k,v in value.items()]))
+    return value
+
+def deferred(p,action):
+    """called first by the grammar actions creating objects. While parsing
+    the result of the action is replaced by a CSGNode, identical statements
+    give the same node. Returns False when the node is built."""
+    if nodes is None or isinstance(p,list):
+        return False
+    values = [None]+[p[i] for i in range(1,len(p))]
+    key = (action.__name__,nodeKey(values))
+    node = nodes.get(key)
+    if node is None:
+        node = CSGNode(action,values)
+        nodes[key] = node
+    p[0] = [node]
+    return True
+
+def buildNodes(roots):
+    """creates the objects of the nodes, children first. Every node is built
+    once, the objects of nodes with several users are added to sharedobjects"""
+    objects = []
+    for root in roots:
+        stack = [root]
+        while stack:
+            node = stack[-1]
+            if node.objects is not None:
+                stack.pop()
+                continue
+            pending = [c for c in node.children() if c.objects is None]
+            if pending:
+                stack.extend(reversed(pending))
+                continue
+            values = []
+            for v in node.values:
+                if isinstance(v,list) and v and isinstance(v[0],CSGNode):
+                    v = sum([c.objects for c in v],[])
+                values.append(v)
+            node.action(values)
+            node.objects = values[0] or []
+            if node.users > 1:
+                for obj in node.objects:
+                    sharedobjects.add(obj.Name)
+            node.values = None
+            stack.pop()
+        objects.extend(root.objects)
+    return objects
+
+def getParser():
+    """returns the lexer and the parser. The parser tables are stored in the
+    user data directory, so they are only generated when the grammar changes"""
+    global lexer
+    global parser
+    if parser is None:
+        if printverbose: print('Start Lex')
+        lexer = lex.lex(module=tokrules)
+        if printverbose: print('Load Parser')
+        tabfile = os.path.join(FreeCAD.getUserAppDataDir(),'csgparsetab%d.pkl' % sys.version_info[0])
+        # No debug out otherwise Linux has protection exception
+        try:
+            parser = yacc.yacc(debug=0,picklefile=tabfile)
+        except (IOError,OSError):
+            # the tables can't be stored
+            parser = yacc.yacc(debug=0,write_tables=0)
+        if printverbose: print('Parser Loaded')
+    return lexer,parser
+
+def instance(obj):
+    "returns a new object with the shape of the shared object obj, to place it without moving obj"
+    from OpenSCADFeatures import Instance
+    newobj=doc.addObject("Part::FeaturePython",'Instance')
+    Instance(newobj,obj)
+    newobj.Placement=obj.Placement
+    if gui:
+        if FreeCAD.ParamGet("User parameter:BaseApp/Preferences/Mod/OpenSCAD").\
+            GetBool('useViewProviderTree'):
+            from OpenSCADFeatures import ViewProviderTree
+            ViewProviderTree(newobj.ViewObject)
+        else:
+            newobj.ViewObject.Proxy = 0
+        obj.ViewObject.hide()
+    return newobj
+
 def open(filename):
     "called when freecad opens a file."
     global doc
@@ -119,32 +238,43 @@ def insert(filename,docname):
 
 def processcsg(filename):
     global doc
+    global nodes
+    global sharedobjects
 
     if printverbose: print ('ImportCSG Version 0.6a')
-    # Build the lexer
-    if printverbose: print('Start Lex')
-    lex.lex(module=tokrules)
-    if printverbose: print('End Lex')
-
-    # Build the parser   
-    if printverbose: print('Load Parser')
-    # No debug out otherwise Linux has protection exception
-    parser = yacc.yacc(debug=0)
-    if printverbose: print('Parser Loaded')
+    # Build the lexer and the parser
+    lexer,parser = getParser()
+    lexer.lineno = 1
     # Give the lexer some input
     #f=open('test.scad', 'r')
     f = io.open(filename, 'r', encoding="utf8")
     #lexer.input(f.read())
 
+    existing = set([obj.Name for obj in doc.Objects])
+    # identical statements become one node, the objects are created after parsing
+    if params.GetBool('shareSubtrees',True):
+        nodes = {}
+    sharedobjects = set()
     if printverbose: print('Start Parser')
     # Swap statements to enable Parser debugging
     #result = parser.parse(f.read(),debug=1)
-    result = parser.parse(f.read())
-    f.close()
+    try:
+        result = parser.parse(f.read(),lexer=lexer)
+        f.close()
+        if nodes is not None:
+            if printverbose: print('%d unique nodes' % len(nodes))
+            nodes = None
+            result = buildNodes(result or [])
+    finally:
+        nodes = None
     if printverbose:
         print('End Parser')
         print(result)
     FreeCAD.Console.PrintMessage('End processing CSG file\n')
+    processes = params.GetInt('booleanProcesses',0)
+    if processes > 1:
+        # the boolean operations are computed in parallel, the recompute does the rest
+        evaluatebooleans([obj for obj in doc.Objects if not obj.Name in existing],processes)
     doc.recompute()
 
 def p_block_list_(p):
@@ -170,6 +300,7 @@ def p_render_action(p):
 
 def p_group_action1(p):
     'group_action1 : group LPAREN RPAREN OBRACE block_list EBRACE'
+    if deferred(p,p_group_action1): return
     if printverbose: print("Group")
 # Test if need for implicit fuse
     if (len(p[5]) > 1) :
@@ -378,6 +509,7 @@ def CGALFeatureObj(name,children,arguments=[]):
 
 def p_offset_action(p):
     'offset_action : offset LPAREN keywordargument_list RPAREN OBRACE block_list EBRACE'
+    if deferred(p,p_offset_action): return
     if len(p[6]) == 0:
         newobj = placeholder('group',[],'{}')
     elif (len(p[6]) == 1 ): #single object
@@ -412,11 +544,13 @@ def p_offset_action(p):
 
 def p_hull_action(p):
     'hull_action : hull LPAREN RPAREN OBRACE block_list EBRACE'
+    if deferred(p,p_hull_action): return
     p[0] = [ CGALFeatureObj(p[1],p[5]) ]
 
 def p_minkowski_action(p):
     '''
     minkowski_action : minkowski LPAREN keywordargument_list RPAREN OBRACE block_list EBRACE'''
+    if deferred(p,p_minkowski_action): return
     p[0] = [ CGALFeatureObj(p[1],p[6],p[3]) ]
 
 def p_not_supported(p):
@@ -425,6 +559,7 @@ def p_not_supported(p):
                   | resize LPAREN keywordargument_list RPAREN OBRACE block_list EBRACE
                   | subdiv LPAREN keywordargument_list RPAREN OBRACE block_list EBRACE
                   '''
+    if deferred(p,p_not_supported): return
     if gui and not FreeCAD.ParamGet("User parameter:BaseApp/Preferences/Mod/OpenSCAD").\
             GetBool('usePlaceholderForUnsupported'):
         from PySide import QtGui
@@ -462,14 +597,21 @@ def p_keywordargument_list(p):
 
 def p_color_action(p):
     'color_action : color LPAREN vector RPAREN OBRACE block_list EBRACE'
+    if deferred(p,p_color_action): return
     import math
     if printverbose: print("Color")
     color = tuple([float(f) for f in p[3][:3]]) #RGB
     transp = 100 - int(math.floor(100*float(p[3][3]))) #Alpha
     if gui:
+        objs = []
         for obj in p[6]:
+            if obj.Name in sharedobjects:
+                # the object is used elsewhere too, only its instance is colored
+                obj = instance(obj)
             obj.ViewObject.ShapeColor =color
             obj.ViewObject.Transparency = transp
+            objs.append(obj)
+        p[6] = objs
     p[0] = p[6]
 
 # Error rule for syntax errors
@@ -505,6 +647,7 @@ def fuse(lst,name):
 
 def p_union_action(p):
     'union_action : union LPAREN RPAREN OBRACE block_list EBRACE'
+    if deferred(p,p_union_action): return
     if printverbose: print("union")
     newpart = fuse(p[5],p[1])
     if printverbose: print("Push Union Result")
@@ -513,6 +656,7 @@ def p_union_action(p):
     
 def p_difference_action(p):  
     'difference_action : difference LPAREN RPAREN OBRACE block_list EBRACE'
+    if deferred(p,p_difference_action): return
 
     if printverbose: print("difference")
     if printverbose: print(len(p[5]))
@@ -540,6 +684,7 @@ def p_difference_action(p):
 
 def p_intersection_action(p):
     'intersection_action : intersection LPAREN RPAREN OBRACE block_list EBRACE'
+    if deferred(p,p_intersection_action): return
 
     if printverbose: print("intersection")
     # Is this Multi Common
@@ -588,6 +733,7 @@ def process_rotate_extrude(obj):
 
 def p_rotate_extrude_action(p): 
     'rotate_extrude_action : rotate_extrude LPAREN keywordargument_list RPAREN OBRACE block_list EBRACE'
+    if deferred(p,p_rotate_extrude_action): return
     if printverbose: print("Rotate Extrude")
     if (len(p[6]) > 1) :
         part = fuse(p[6],"Rotate Extrude Union")
@@ -598,6 +744,7 @@ def p_rotate_extrude_action(p):
 
 def p_rotate_extrude_file(p):
     'rotate_extrude_file : rotate_extrude LPAREN keywordargument_list RPAREN SEMICOL'
+    if deferred(p,p_rotate_extrude_file): return
     if printverbose: print("Rotate Extrude File")
     filen,ext =p[3]['file'] .rsplit('.',1)
     obj = process_import_file(filen,ext,p[3]['layer'])
@@ -643,6 +790,7 @@ def process_linear_extrude_with_twist(base,height,twist) :
 
 def p_linear_extrude_with_twist(p):
     'linear_extrude_with_twist : linear_extrude LPAREN keywordargument_list RPAREN OBRACE block_list EBRACE'
+    if deferred(p,p_linear_extrude_with_twist): return
     if printverbose: print("Linear Extrude With Twist")
     h = float(p[3]['height'])
     if printverbose: print("Twist : ",p[3])
@@ -669,6 +817,7 @@ def p_linear_extrude_with_twist(p):
 
 def p_import_file1(p):
     'import_file1 : import LPAREN keywordargument_list RPAREN SEMICOL'
+    if deferred(p,p_import_file1): return
     if printverbose: print("Import File")
     filen,ext =p[3]['file'].rsplit('.',1)
     p[0] = [process_import_file(filen,ext,p[3]['layer'])]
@@ -676,6 +825,7 @@ def p_import_file1(p):
 
 def p_surface_action(p):
     'surface_action : surface LPAREN keywordargument_list RPAREN SEMICOL'
+    if deferred(p,p_surface_action): return
     if printverbose: print("Surface")
     obj = doc.addObject("Part::Feature",'surface')
     obj.Shape,xoff,yoff=makeSurfaceVolume(p[3]['file'])
@@ -768,6 +918,7 @@ def processSTL(fname):
 
 def p_multmatrix_action(p):
     'multmatrix_action : multmatrix LPAREN matrix RPAREN OBRACE block_list EBRACE'
+    if deferred(p,p_multmatrix_action): return
     if printverbose: print("MultMatrix")
     transform_matrix = FreeCAD.Matrix()
     if printverbose: print("Multmatrix")
@@ -795,6 +946,9 @@ def p_multmatrix_action(p):
         part = p[6][0]
     if (isspecialorthogonalpython(fcsubmatrix(transform_matrix))) :
         if printverbose: print("special orthogonal")
+        if part.Name in sharedobjects:
+            # the part is used elsewhere too, only its instance is moved
+            part = instance(part)
         if matrixisrounded:
             if printverbose: print("rotation rounded")
             plm=FreeCAD.Placement(transform_matrix)
@@ -870,6 +1024,7 @@ def center(obj,x,y,z):
     
 def p_sphere_action(p):
     'sphere_action : sphere LPAREN keywordargument_list RPAREN SEMICOL'
+    if deferred(p,p_sphere_action): return
     if printverbose: print("Sphere : ",p[3])
     r = float(p[3]['r'])
     mysphere = doc.addObject("Part::Sphere",p[1])
@@ -896,6 +1051,7 @@ def myPolygon(n,r1):
 
 def p_cylinder_action(p):
     'cylinder_action : cylinder LPAREN keywordargument_list RPAREN SEMICOL'
+    if deferred(p,p_cylinder_action): return
     if printverbose: print("Cylinder")
     tocenter = p[3]['center']
     h = float(p[3]['h'])
@@ -988,6 +1144,7 @@ def p_cylinder_action(p):
 
 def p_cube_action(p):
     'cube_action : cube LPAREN keywordargument_list RPAREN SEMICOL'
+    if deferred(p,p_cube_action): return
     global doc
     l,w,h = [float(str1) for str1 in p[3]['size']]
     if (l > 0 and w > 0 and h >0):
@@ -1007,6 +1164,7 @@ def p_cube_action(p):
 
 def p_circle_action(p) :
     'circle_action : circle LPAREN keywordargument_list RPAREN SEMICOL'
+    if deferred(p,p_circle_action): return
     if printverbose: print("Circle : "+str(p[3]))
     r = float(p[3]['r'])
     # Avoid zero radius
@@ -1041,6 +1199,7 @@ def p_circle_action(p) :
 
 def p_square_action(p) :
     'square_action : square LPAREN keywordargument_list RPAREN SEMICOL'
+    if deferred(p,p_square_action): return
     if printverbose: print("Square")
     size = p[3]['size']
     x = float(size[0])
@@ -1060,6 +1219,7 @@ def addValue(t,v,p):
 
 def p_text_action(p) :
     'text_action : text LPAREN keywordargument_list RPAREN SEMICOL'
+    if deferred(p,p_text_action): return
     # If text string is null ignore
     if p[3]['text'] == "" or p[3]['text'] == " " :
         p[0] = []
@@ -1092,6 +1252,7 @@ def convert_points_list_to_vector(l):
 
 def p_polygon_action_nopath(p) :
     'polygon_action_nopath : polygon LPAREN points EQ OSQUARE points_list_2d ESQUARE COMMA paths EQ undef COMMA keywordargument_list RPAREN SEMICOL'
+    if deferred(p,p_polygon_action_nopath): return
     if printverbose: print("Polygon")
     if printverbose: print(p[6])
     v = convert_points_list_to_vector(p[6])
@@ -1106,6 +1267,7 @@ def p_polygon_action_nopath(p) :
 
 def p_polygon_action_plus_path(p) :
     'polygon_action_plus_path : polygon LPAREN points EQ OSQUARE points_list_2d ESQUARE COMMA paths EQ OSQUARE path_set ESQUARE COMMA keywordargument_list RPAREN SEMICOL'
+    if deferred(p,p_polygon_action_plus_path): return
     if printverbose: print("Polygon with Path")
     if printverbose: print(p[6])
     v = convert_points_list_to_vector(p[6])
@@ -1136,6 +1298,7 @@ def make_face(v1,v2,v3):
 def p_polyhedron_action(p) :
     '''polyhedron_action : polyhedron LPAREN points EQ OSQUARE points_list_3d ESQUARE COMMA faces EQ OSQUARE path_set ESQUARE COMMA keywordargument_list RPAREN SEMICOL
                       | polyhedron LPAREN points EQ OSQUARE points_list_3d ESQUARE COMMA triangles EQ OSQUARE points_list_3d ESQUARE COMMA keywordargument_list RPAREN SEMICOL'''
+    if deferred(p,p_polyhedron_action): return
     if printverbose: print("Polyhedron Points")
     v = []
     for i in p[6] :
@@ -1174,6 +1337,7 @@ def p_polyhedron_action(p) :
 
 def p_projection_action(p) :
     'projection_action : projection LPAREN keywordargument_list RPAREN OBRACE block_list EBRACE'
+    if deferred(p,p_projection_action): return
     if printverbose: print('Projection')
     if p[3]['cut']=='true' :
         planedim=1e9 # large but finite
@@ -1204,3 +1368,47 @@ def p_projection_action(p) :
             QtGui.QMessageBox.critical(None, translate('OpenSCAD',"Unsupported Function")+" : "+p[1],translate('OpenSCAD',"Press OK"))
         else:
             p[0] = [placeholder(p[1],p[6],p[3])]
+
+def benchmark(count=1000,unique=5,processes=0):
+    """benchmark([count,unique,processes]): imports a generated CSG file placing
+    count brackets, a cube with a hole, of unique different heights, with and
+    without sharing identical subtrees, and if processes is more than 1 without
+    sharing and with the boolean operations computed by that many processes.
+    Prints and returns the import time and the number of objects of each"""
+    import tempfile, time
+    global doc
+    text = ['group() {\n']
+    for i in range(count):
+        text.append('multmatrix([[1, 0, 0, %d], [0, 1, 0, %d], [0, 0, 1, 0], [0, 0, 0, 1]]) {\n' % (20*(i%100),20*(i//100)))
+        text.append('difference() {\n')
+        text.append('cube(size = [10, 10, %d], center = false);\n' % (5+i%unique))
+        text.append('multmatrix([[1, 0, 0, 5], [0, 1, 0, 5], [0, 0, 1, -1], [0, 0, 0, 1]]) {\n')
+        text.append('cylinder($fn = 0, $fa = 12, $fs = 2, h = 20, r1 = 2, r2 = 2, center = false);\n')
+        text.append('}\n}\n}\n')
+    text.append('}\n')
+    fd,filename = tempfile.mkstemp(suffix='.csg')
+    os.close(fd)
+    f = io.open(filename, 'w', encoding="utf8")
+    f.write(u''.join(text))
+    f.close()
+    settings = (params.GetBool('shareSubtrees',True),params.GetInt('booleanProcesses',0))
+    runs = [("shared",True,0),("not shared",False,0)]
+    if processes > 1:
+        runs.append(("parallel",False,processes))
+    report = {}
+    try:
+        for name,share,procs in runs:
+            params.SetBool('shareSubtrees',share)
+            params.SetInt('booleanProcesses',procs)
+            doc = FreeCAD.newDocument("CSGBenchmark")
+            t = time.time()
+            processcsg(filename)
+            report[name] = (time.time()-t,len(doc.Objects))
+            FreeCAD.closeDocument(doc.Name)
+    finally:
+        params.SetBool('shareSubtrees',settings[0])
+        params.SetInt('booleanProcesses',settings[1])
+        os.unlink(filename)
+    for name,share,procs in runs:
+        print("%s: time %.2f s, objects %d" % (name,report[name][0],report[name][1]))
+    return report
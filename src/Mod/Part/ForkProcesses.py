@@ -0,0 +1,205 @@
+#***************************************************************************
+#*   Copyright (c) 2026 - FreeCAD Developers                               *
+#*                                                                         *
+#*   This file is part of the FreeCAD CAx development system.              *
+#*                                                                         *
+#*   This program is free software; you can redistribute it and/or modify  *
+#*   it under the terms of the GNU Lesser General Public License (LGPL)    *
+#*   as published by the Free Software Foundation; either version 2 of     *
+#*   the License, or (at your option) any later version.                   *
+#*   for detail see the LICENCE text file.                                 *
+#*                                                                         *
+#*   FreeCAD is distributed in the hope that it will be useful,            *
+#*   but WITHOUT ANY WARRANTY; without even the implied warranty of        *
+#*   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the         *
+#*   GNU Library General Public License for more details.                  *
+#*                                                                         *
+#*   You should have received a copy of the GNU Library General Public     *
+#*   License along with FreeCAD; if not, write to the Free Software        *
+#*   Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  *
+#*   USA                                                                   *
+#*                                                                         *
+#***************************************************************************
+
+__title__ = "Forked worker processes"
+__url__ = "http://www.freecadweb.org"
+
+__doc__ = """Worker processes forked from the FreeCAD process, for the modules
+computing shapes in parallel. A worker inherits the whole state of the parent,
+documents and shapes included, so the tasks only need to name what to compute.
+Starting a fresh interpreter instead would mean starting FreeCAD again, so only
+forking is supported: where processes can't be forked, no workers are started
+and the callers compute everything in this process. Callers start workers only
+if processes are asked for, which their settings don't do by default."""
+
+import os
+
+try:
+    import Queue as queue
+except ImportError:
+    import queue
+
+
+class WorkerError(Exception):
+
+    "raised when the worker processes stopped before delivering all results"
+
+    pass
+
+
+def forkContext():
+
+    """forkContext(): the multiprocessing context whose processes are forked,
+    or None if processes can't be forked on this system"""
+
+    if not hasattr(os,"fork"):
+        return None
+    import multiprocessing
+    if hasattr(multiprocessing,"get_context"):
+        try:
+            return multiprocessing.get_context("fork")
+        except ValueError:
+            return None
+    # Python 2 always forks on posix
+    return multiprocessing
+
+
+class Pool:
+
+    """Pool(target,processes,[args,private]): starts processes forked worker
+    processes, each running target(tasks,results,*args). A worker gets its
+    tasks from the tasks queue until it gets None, and puts its results in the
+    results queue. The workers share one tasks queue, or with private each one
+    has its own. No workers are started if processes is lower than 1 or if
+    processes can't be forked, the workers list is then empty."""
+
+    def __init__(self,target,processes,args=(),private=False):
+
+        self.workers = []
+        self.queues = []
+        self.results = None
+        context = None
+        if processes > 0:
+            context = forkContext()
+        if context is None:
+            return
+        self.results = context.Queue()
+        tasks = None
+        for i in range(processes):
+            if private or (tasks is None):
+                tasks = context.Queue()
+            w = context.Process(target=target,args=(tasks,self.results)+tuple(args))
+            w.daemon = True
+            w.start()
+            self.workers.append(w)
+            self.queues.append(tasks)
+
+    def put(self,task,worker=0):
+
+        """put(task,[worker]): gives a task to the workers, or with private
+        queues to the worker with the given index"""
+
+        self.queues[worker].put(task)
+
+    def putAll(self,task):
+
+        "putAll(task): gives a task to every worker, they must have private queues"
+
+        for tasks in self.queues:
+            tasks.put(task)
+
+    def finish(self):
+
+        "finish(): tells the workers to stop once they have done their tasks"
+
+        for tasks in self.queues:
+            tasks.put(None)
+
+    def get(self,timeout=None):
+
+        """get([timeout]): returns the next result of the workers. Waits at most
+        timeout seconds if given, then raises queue.Empty. Raises WorkerError
+        if a worker failed, or if all workers ended, without a result left"""
+
+        wait = 1
+        if timeout is not None:
+            wait = min(wait,timeout)
+        waited = 0
+        while True:
+            try:
+                return self.results.get(True,wait)
+            except queue.Empty:
+                waited += wait
+            if any(w.exitcode for w in self.workers) or not any(w.is_alive() for w in self.workers):
+                # a result put just before the worker ended may still be on its way
+                try:
+                    return self.results.get(True,0.1)
+                except queue.Empty:
+                    raise WorkerError("worker processes stopped")
+            if (timeout is not None) and (waited >= timeout):
+                raise queue.Empty()
+
+    def close(self):
+
+        "close(): stops the worker processes"
+
+        for w in self.workers:
+            if w.is_alive():
+                w.terminate()
+            w.join()
+        self.workers = []
+        self.queues = []
+
+
+def _mapWorker(tasks,results,function,initializer,initargs):
+
+    "the loop of a map() worker, results are sent as (index,ok,result)"
+
+    if initializer:
+        initializer(*initargs)
+    for i,item in iter(tasks.get,None):
+        try:
+            results.put((i,True,function(item)))
+        except Exception:
+            # computed again by the parent, which reports the error
+            results.put((i,False,None))
+
+
+def map(function,items,processes=0,initializer=None,initargs=(),fallback=None):
+
+    """map(function,items,[processes,initializer,initargs,fallback]): returns
+    [function(item) for item in items]. With processes > 1, the items are given
+    to that many forked workers, which call initializer(*initargs) first, and
+    the results must be picklable. The items the workers fail on, or all items
+    if processes can't be forked, are computed in this process by fallback(item),
+    function(item) by default after calling initializer(*initargs)."""
+
+    items = list(items)
+    results = [None]*len(items)
+    todo = set(range(len(items)))
+    pool = None
+    if processes > 1:
+        pool = Pool(_mapWorker,min(processes,len(items)),(function,initializer,initargs))
+    if pool and pool.workers:
+        try:
+            for i,item in enumerate(items):
+                pool.put((i,item))
+            pool.finish()
+            for k in range(len(items)):
+                i,ok,result = pool.get()
+                if ok:
+                    results[i] = result
+                    todo.discard(i)
+        except WorkerError:
+            import FreeCAD
+            FreeCAD.Console.PrintWarning("Worker processes stopped, continuing in this process\n")
+        finally:
+            pool.close()
+    if todo:
+        if not fallback:
+            fallback = function
+            if initializer:
+                initializer(*initargs)
+        for i in sorted(todo):
+            results[i] = fallback(items[i])
+    return results
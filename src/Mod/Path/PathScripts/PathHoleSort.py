@@ -0,0 +1,278 @@
+# -*- coding: utf-8 -*-
+
+# ***************************************************************************
+# *                                                                         *
+# *   Copyright (c) 2026 - FreeCAD Developers                               *
+# *                                                                         *
+# *   This program is free software; you can redistribute it and/or modify  *
+# *   it under the terms of the GNU Lesser General Public License (LGPL)    *
+# *   as published by the Free Software Foundation; either version 2 of     *
+# *   the License, or (at your option) any later version.                   *
+# *   for detail see the LICENCE text file.                                 *
+# *                                                                         *
+# *   This program is distributed in the hope that it will be useful,       *
+# *   but WITHOUT ANY WARRANTY; without even the implied warranty of        *
+# *   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the         *
+# *   GNU Library General Public License for more details.                  *
+# *                                                                         *
+# *   You should have received a copy of the GNU Library General Public     *
+# *   License along with this program; if not, write to the Free Software   *
+# *   Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  *
+# *   USA                                                                   *
+# *                                                                         *
+# ***************************************************************************
+
+import heapq
+import math
+import time
+
+__title__ = "PathHoleSort - ordering of hole locations"
+__url__ = "http://www.freecadweb.org"
+__doc__ = "Nearest neighbor ordering of hole locations backed by a k-d tree, with an optional 2-opt improvement."
+
+# maximum number of locations in a leaf of the LocationTree
+LeafSize = 8
+
+
+class LocationTree(object):
+    """LocationTree(points, weights) ... k-d tree over the points (tuples of coordinates).
+    nearest(point) returns the index of the remaining point with the smallest
+    squared distance to point plus its weight, remove(index) takes a point out of the tree."""
+
+    def __init__(self, points, weights=None):
+        self.points = points
+        self.weights = weights if weights is not None else [0] * len(points)
+        self.dim = len(points[0]) if points else 0
+        self.removed = [False] * len(points)
+        # node arrays, a node is either a leaf with items or has two children
+        self.lo = []
+        self.hi = []
+        self.minWeight = []
+        self.alive = []
+        self.children = []
+        self.items = []
+        self.parent = []
+        self.leaf = [0] * len(points)
+        if points:
+            self._build()
+
+    def _addNode(self, indices, parent):
+        points = self.points
+        lo = tuple(min(points[i][k] for i in indices) for k in range(self.dim))
+        hi = tuple(max(points[i][k] for i in indices) for k in range(self.dim))
+        self.lo.append(lo)
+        self.hi.append(hi)
+        self.minWeight.append(min(self.weights[i] for i in indices))
+        self.alive.append(len(indices))
+        self.children.append(None)
+        self.items.append(None)
+        self.parent.append(parent)
+        return len(self.lo) - 1
+
+    def _build(self):
+        root = self._addNode(list(range(len(self.points))), -1)
+        stack = [(root, list(range(len(self.points))))]
+        while stack:
+            node, indices = stack.pop()
+            lo, hi = self.lo[node], self.hi[node]
+            axis = max(range(self.dim), key=lambda k: hi[k] - lo[k])
+            if len(indices) <= LeafSize or hi[axis] == lo[axis]:
+                self.items[node] = indices
+                for i in indices:
+                    self.leaf[i] = node
+                continue
+            indices.sort(key=lambda i: self.points[i][axis])
+            mid = len(indices) // 2
+            left = self._addNode(indices[:mid], node)
+            right = self._addNode(indices[mid:], node)
+            self.children[node] = (left, right)
+            stack.append((left, indices[:mid]))
+            stack.append((right, indices[mid:]))
+
+    def _sqdist(self, point, node):
+        """squared distance of point to the bounding box of node, never more than the distance to any point in node"""
+        d = 0
+        for p, l, h in zip(point, self.lo[node], self.hi[node]):
+            if p < l:
+                d += (l - p) ** 2
+            elif p > h:
+                d += (p - h) ** 2
+        return d
+
+    def remove(self, index):
+        self.removed[index] = True
+        node = self.leaf[index]
+        while node != -1:
+            self.alive[node] -= 1
+            node = self.parent[node]
+
+    def nearest(self, point):
+        """nearest(point) ... index of the remaining point with the smallest cost,
+        cost is the squared distance to point plus the weight of the point.
+        Of several points with the same cost the one with the lowest index is returned."""
+        best = (float('inf'), -1)
+        if not self.points or self.alive[0] == 0:
+            return None
+        points = self.points
+        weights = self.weights
+        removed = self.removed
+        stack = [0]
+        while stack:
+            node = stack.pop()
+            if self.alive[node] == 0 or self._sqdist(point, node) + self.minWeight[node] > best[0]:
+                continue
+            items = self.items[node]
+            if items is not None:
+                for i in items:
+                    if removed[i]:
+                        continue
+                    d = 0
+                    for a, b in zip(points[i], point):
+                        d += (a - b) ** 2
+                    cost = (d + weights[i], i)
+                    if cost < best:
+                        best = cost
+            else:
+                left, right = self.children[node]
+                # the nearer child is processed first
+                if self._sqdist(point, left) <= self._sqdist(point, right):
+                    stack.append(right)
+                    stack.append(left)
+                else:
+                    stack.append(left)
+                    stack.append(right)
+        return best[1]
+
+    def neighbours(self, index, count):
+        """neighbours(index, count) ... indices of the count points closest to point index, without weights and removal."""
+        point = self.points[index]
+        heap = []  # (-squared distance, index) of the closest points found so far
+        stack = [0]
+        while stack:
+            node = stack.pop()
+            if len(heap) == count and self._sqdist(point, node) > -heap[0][0]:
+                continue
+            items = self.items[node]
+            if items is not None:
+                for i in items:
+                    if i == index:
+                        continue
+                    d = 0
+                    for a, b in zip(self.points[i], point):
+                        d += (a - b) ** 2
+                    if len(heap) < count:
+                        heapq.heappush(heap, (-d, i))
+                    elif d < -heap[0][0]:
+                        heapq.heapreplace(heap, (-d, i))
+            else:
+                left, right = self.children[node]
+                if self._sqdist(point, left) <= self._sqdist(point, right):
+                    stack.append(right)
+                    stack.append(left)
+                else:
+                    stack.append(left)
+                    stack.append(right)
+        return [i for d, i in sorted(heap, reverse=True)]
+
+
+def nearestNeighbourOrder(points, weights, start):
+    """nearestNeighbourOrder(points, weights, start) ... indices of points in nearest neighbour order.
+    The first point is the one with the smallest cost to start, every following point the
+    remaining one with the smallest cost to its predecessor. The cost is the squared distance plus the weight."""
+    tree = LocationTree(points, weights)
+    order = []
+    current = start
+    for _ in range(len(points)):
+        i = tree.nearest(current)
+        tree.remove(i)
+        order.append(i)
+        current = points[i]
+    return order, tree
+
+
+def twoOptImprove(points, order, start, timeLimit, tree=None, neighbourCount=8):
+    """twoOptImprove(points, order, start, timeLimit, tree=None, neighbourCount=8) ... shortens the path
+    from start through the points in order by reversing sections of it (2-opt), the end of the path is open.
+    Only exchanges with the neighbourCount closest points of a point are tried. Stops when no exchange
+    shortens the path anymore or timeLimit seconds are exceeded. Returns the improved order."""
+    n = len(order)
+    if n < 3 or timeLimit <= 0:
+        return order
+    endTime = time.time() + timeLimit
+    if tree is None:
+        tree = LocationTree(points)
+    neighbours = {}
+    order = list(order)
+    position = [0] * len(points)
+    for p, i in enumerate(order):
+        position[i] = p
+
+    def dist(a, b):
+        return math.sqrt(sum((x - y) ** 2 for x, y in zip(a, b)))
+
+    improved = True
+    while improved:
+        improved = False
+        for p in range(1, n):
+            if time.time() > endTime:
+                return order
+            a = order[p - 1]
+            b = order[p]
+            dab = dist(points[a], points[b])
+            if a not in neighbours:
+                neighbours[a] = tree.neighbours(a, neighbourCount)
+            for c in neighbours[a]:
+                q = position[c]
+                if q <= p:
+                    continue
+                dac = dist(points[a], points[c])
+                if dac >= dab:
+                    continue
+                # reversing order[p:q+1] replaces a-b and c-d with a-c and b-d
+                gain = dab - dac
+                if q + 1 < n:
+                    d = order[q + 1]
+                    gain += dist(points[c], points[d]) - dist(points[b], points[d])
+                if gain > 1e-9:
+                    order[p:q + 1] = order[p:q + 1][::-1]
+                    for r in range(p, q + 1):
+                        position[order[r]] = r
+                    improved = True
+                    break
+        # the first point can be exchanged with the origin's closest candidates too
+        b = order[0]
+        for q in range(1, min(n, neighbourCount + 1)):
+            c = order[q]
+            gain = dist(start, points[b]) - dist(start, points[c])
+            if q + 1 < n:
+                d = order[q + 1]
+                gain += dist(points[c], points[d]) - dist(points[b], points[d])
+            if gain > 1e-9:
+                order[0:q + 1] = order[0:q + 1][::-1]
+                for r in range(0, q + 1):
+                    position[order[r]] = r
+                improved = True
+                break
+    return order
+
+
+def sortLocations(locations, keys, attractors=None, optimizeTime=0):
+    """sortLocations(locations, keys, attractors=None, optimizeTime=0) ... locations in nearest neighbour order.
+    keys: the keys of the coordinates of a location, for example ['x', 'y']
+    attractors: keys whose absolute values are added to the squared distance of a location, default keys[0]
+    optimizeTime: if > 0 the order is improved by 2-opt for at most optimizeTime seconds afterwards"""
+    if not locations:
+        return []
+    attractors = attractors or [keys[0]]
+    points = [tuple(location[k] for k in keys) for location in locations]
+    weights = []
+    for location in locations:
+        w = 0
+        for k in attractors:
+            w += abs(location[k])
+        weights.append(w)
+    start = tuple(0 for k in keys)
+    order, tree = nearestNeighbourOrder(points, weights, start)
+    if optimizeTime > 0:
+        order = twoOptImprove(points, order, start, optimizeTime, tree)
+    return [locations[i] for i in order]
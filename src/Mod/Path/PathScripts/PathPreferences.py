@@ -47,6 +47,9 @@ LibAreaCurveAccuracy    = "LibAreaCurveAccuarcy"
 
 EnableExperimentalFeatures = "EnableExperimentalFeatures"
 
+# number of forked processes computing the waterline levels of the Surface op, 0 for none
+SurfaceProcesses = "SurfaceProcesses"
+
 
 def preferences():
     return FreeCAD.ParamGet("User parameter:BaseApp/Preferences/Mod/Path")
@@ -166,3 +169,6 @@ def setDefaultTaskPanelLayout(style):
 def experimentalFeaturesEnabled():
     return preferences().GetBool(EnableExperimentalFeatures, False)
 
+def surfaceProcesses():
+    return preferences().GetInt(SurfaceProcesses, 0)
+
@@ -25,10 +25,13 @@
 from __future__ import print_function
 
 import FreeCAD
+import ForkProcesses
 import MeshPart
+import numpy
 # import Part
 import Path
 import PathScripts.PathLog as PathLog
+import PathScripts.PathPreferences as PathPreferences
 # import PathScripts.PathPocketBase as PathPocketBase
 import PathScripts.PathUtils as PathUtils
 import PathScripts.PathOp as PathOp
@@ -104,14 +107,6 @@ class ObjectSurface(PathOp.ObjectOp):
         '''opExecute(obj) ... process surface operation'''
         PathLog.track()
 
-        # OCL must be installed
-        try:
-            import ocl
-        except:
-            FreeCAD.Console.PrintError(
-                translate("Path_Surface", "This operation requires OpenCamLib to be installed.") + "\n")
-            return
-
         print("StepOver is  " + str(obj.StepOver))
         if obj.StepOver > 100:
             obj.StepOver = 100
@@ -147,27 +142,24 @@ class ObjectSurface(PathOp.ObjectOp):
             else:
                 bb = parentJob.Stock.Shape.BoundBox
 
-            s = ocl.STLSurf()
-            for f in mesh.Facets:
-                p = f.Points[0]
-                q = f.Points[1]
-                r = f.Points[2]
-                # offset the triangle in Z with DepthOffset
-                t = ocl.Triangle(ocl.Point(p[0], p[1], p[2] + obj.DepthOffset.Value),
-                                 ocl.Point(q[0], q[1], q[2] + obj.DepthOffset.Value),
-                                 ocl.Point(r[0], r[1], r[2] + obj.DepthOffset.Value))
-                s.addTriangle(t)
-
-            if obj.Algorithm == 'OCL Dropcutter':
-                output = self._dropcutter(obj, s, bb)
-            elif obj.Algorithm == 'OCL Waterline':
-                output = self._waterline(obj, s, bb)
+            # offset the triangles in Z with DepthOffset
+            points, facets = meshArrays(mesh, obj.DepthOffset.Value)
+
+            # OCL must be installed, it is imported where it is used
+            try:
+                if obj.Algorithm == 'OCL Dropcutter':
+                    output = self._dropcutter(obj, makeSTLSurf(points, facets), bb)
+                elif obj.Algorithm == 'OCL Waterline':
+                    output = self._waterline(obj, points, facets, bb)
+            except ImportError:
+                FreeCAD.Console.PrintError(
+                    translate("Path_Surface", "This operation requires OpenCamLib to be installed.") + "\n")
+                return
 
             self.commandlist.extend(output)
 
-    def _waterline(self, obj, s, bb):
+    def _waterline(self, obj, points, facets, bb):
         import time
-        import ocl
 
         def drawLoops(loops):
             nloop = 0
@@ -178,27 +170,14 @@ class ObjectSurface(PathOp.ObjectOp):
                 p = loop[0]
                 pp.append(Path.Command("(loop begin)"))
                 pp.append(Path.Command('G0', {"Z": obj.SafeHeight.Value, 'F': self.vertRapid}))
-                pp.append(Path.Command('G0', {'X': p.x, "Y": p.y, 'F': self.horizRapid}))
-                pp.append(Path.Command('G1', {"Z": p.z, 'F': self.vertFeed}))
-                prev = ocl.Point(float("inf"), float("inf"), float("inf"))
-                next = ocl.Point(float("inf"), float("inf"), float("inf"))
-                optimize = obj.Optimize
-                for i in range(1, len(loop)):
-                    p = loop[i]
-                    if i < len(loop) - 1:
-                        next.x = loop[i + 1].x
-                        next.y = loop[i + 1].y
-                        next.z = loop[i + 1].z
-                    else:
-                        optimize = False
-                    if not optimize or not self.isPointOnLine(FreeCAD.Vector(prev.x, prev.y, prev.z), FreeCAD.Vector(next.x, next.y, next.z), FreeCAD.Vector(p.x, p.y, p.z)):
-                        pp.append(Path.Command('G1', {'X': p.x, "Y": p.y, "Z": p.z, 'F': self.horizFeed}))
-                    prev.x = p.x
-                    prev.y = p.y
-                    prev.z = p.z
-                    # zheight = p.z
+                pp.append(Path.Command('G0', {'X': p[0], "Y": p[1], 'F': self.horizRapid}))
+                pp.append(Path.Command('G1', {"Z": p[2], 'F': self.vertFeed}))
+                skip = pointsToSkip(loop[1:], obj.Optimize)
+                for i, p in enumerate(loop[1:]):
+                    if not skip[i]:
+                        pp.append(Path.Command('G1', {'X': p[0], "Y": p[1], "Z": p[2], 'F': self.horizFeed}))
                 p = loop[0]
-                pp.append(Path.Command('G1', {'X': p.x, "Y": p.y, "Z": p.z, 'F': self.horizFeed}))
+                pp.append(Path.Command('G1', {'X': p[0], "Y": p[1], "Z": p[2], 'F': self.horizFeed}))
                 pp.append(Path.Command("(loop end)"))
 
                 print("    loop ", nloop, " with ", len(loop), " points")
@@ -213,27 +192,13 @@ class ObjectSurface(PathOp.ObjectOp):
         t_before = time.time()
         zheights = [i for i in depthparams]
 
-        wl = ocl.Waterline()
-        wl.setSTL(s)
-
-        if obj.ToolController.Tool.ToolType == 'BallEndMill':
-            cutter = ocl.BallCutter(obj.ToolController.Tool.Diameter, 5)  # TODO: 5 represents cutting edge height. Should be replaced with the data from toolcontroller?
-        else:
-            cutter = ocl.CylCutter(obj.ToolController.Tool.Diameter, 5)
-
-        wl.setCutter(cutter)
-        # this should be smaller than the smallest details in the STL file
-        wl.setSampling(obj.SampleInterval)
+        # TODO: 5 represents cutting edge height. Should be replaced with the data from toolcontroller?
+        cutter = (obj.ToolController.Tool.ToolType, obj.ToolController.Tool.Diameter, 5)
+        # SampleInterval should be smaller than the smallest details in the STL file
         # AdaptiveWaterline() also has settings for minimum sampling interval
         # (see c++ code)
-        all_loops = []
         print ("zheights: {}".format(zheights))
-        for zh in zheights:
-            print("calculating Waterline at z= ", zh)
-            wl.reset()
-            wl.setZ(zh)  # height for this waterline
-            wl.run()
-            all_loops.append(wl.getLoops())
+        all_loops = waterlineLoops(points, facets, cutter, obj.SampleInterval, zheights, PathPreferences.surfaceProcesses())
         t_after = time.time()
         calctime = t_after - t_before
         n = 0
@@ -266,10 +231,8 @@ class ObjectSurface(PathOp.ObjectOp):
     def _dropcutter(self, obj, s, bb):
         import ocl
         import time
-        if obj.ToolController.Tool.ToolType == 'BallEndMill':
-            cutter = ocl.BallCutter(obj.ToolController.Tool.Diameter, 5)  # TODO: 5 represents cutting edge height. Should be replaced with the data from toolcontroller?
-        else:
-            cutter = ocl.CylCutter(obj.ToolController.Tool.Diameter, 5)
+        # TODO: 5 represents cutting edge height. Should be replaced with the data from toolcontroller?
+        cutter = makeCutter(obj.ToolController.Tool.ToolType, obj.ToolController.Tool.Diameter, 5)
 
         pdc = ocl.PathDropCutter()   # create a pdc
         pdc.setSTL(s)
@@ -333,23 +296,11 @@ class ObjectSurface(PathOp.ObjectOp):
         output.append(Path.Command('G0', {'Z': obj.ClearanceHeight.Value, 'F': self.vertRapid}))
         output.append(Path.Command('G0', {'X': clp[0].x, "Y": clp[0].y, 'F': self.horizRapid}))
         output.append(Path.Command('G1', {'Z': clp[0].z, 'F': self.vertFeed}))
-        prev = ocl.Point(float("inf"), float("inf"), float("inf"))
-        next = ocl.Point(float("inf"), float("inf"), float("inf"))
-        optimize = obj.Optimize
-        for i in range(0, len(clp)):
-            c = clp[i]
-            if i < len(clp) - 1:
-                next.x = clp[i + 1].x
-                next.y = clp[i + 1].y
-                next.z = clp[i + 1].z
-            else:
-                optimize = False
-
-            if not optimize or not self.isPointOnLine(FreeCAD.Vector(prev.x, prev.y, prev.z), FreeCAD.Vector(next.x, next.y, next.z), FreeCAD.Vector(c.x, c.y, c.z)):
-                output.append(Path.Command('G1', {'X': c.x, "Y": c.y, "Z": c.z, 'F': self.horizFeed}))
-            prev.x = c.x
-            prev.y = c.y
-            prev.z = c.z
+        points = [(c.x, c.y, c.z) for c in clp]
+        skip = pointsToSkip(points, obj.Optimize)
+        for i, c in enumerate(points):
+            if not skip[i]:
+                output.append(Path.Command('G1', {'X': c[0], "Y": c[1], "Z": c[2], 'F': self.horizFeed}))
         print("points after optimization: " + str(len(output)))
         return output
 
@@ -370,6 +321,95 @@ class ObjectSurface(PathOp.ObjectOp):
             obj.OpFinalDepth = d.final_depth
 
 
+def meshArrays(mesh, zOffset=0.0):
+    '''meshArrays(mesh, zOffset=0.0) ... the points (n x 3) and facets (m x 3 point indices) of mesh as arrays.
+    The points are shifted by zOffset in Z.'''
+    points, facets = mesh.Topology
+    points = numpy.array([(p.x, p.y, p.z) for p in points], dtype=numpy.float64).reshape(-1, 3)
+    points[:, 2] += zOffset
+    facets = numpy.array(facets, dtype=numpy.int64).reshape(-1, 3)
+    return points, facets
+
+
+def makeSTLSurf(points, facets):
+    '''makeSTLSurf(points, facets) ... OCL surface of the triangles, every point is converted once only.'''
+    import ocl
+    s = ocl.STLSurf()
+    oclPoints = [ocl.Point(x, y, z) for x, y, z in points.tolist()]
+    for a, b, c in facets.tolist():
+        s.addTriangle(ocl.Triangle(oclPoints[a], oclPoints[b], oclPoints[c]))
+    return s
+
+
+def makeCutter(toolType, diameter, length):
+    import ocl
+    if toolType == 'BallEndMill':
+        return ocl.BallCutter(diameter, length)
+    return ocl.CylCutter(diameter, length)
+
+
+def pointsOnLine(points):
+    '''pointsOnLine(points) ... for every point if it lies on the line between its predecessor and its successor.
+    The first and the last point are never on a line. Same result as ObjectSurface.isPointOnLine for all points at once.'''
+    onLine = numpy.zeros(len(points), dtype=bool)
+    if len(points) < 3:
+        return onLine
+    p = numpy.asarray(points, dtype=numpy.float64)
+    a = p[:-2]
+    b = p[2:]
+    c = p[1:-1]
+    ab = b - a
+    ac = c - a
+    cx = ab[:, 1] * ac[:, 2] - ab[:, 2] * ac[:, 1]
+    cy = ab[:, 2] * ac[:, 0] - ab[:, 0] * ac[:, 2]
+    cz = ab[:, 0] * ac[:, 1] - ab[:, 1] * ac[:, 0]
+    crossLength = numpy.sqrt(cx * cx + cy * cy + cz * cz)
+    dot = ab[:, 0] * ac[:, 0] + ab[:, 1] * ac[:, 1] + ab[:, 2] * ac[:, 2]
+    abLength = numpy.sqrt(ab[:, 0] * ab[:, 0] + ab[:, 1] * ab[:, 1] + ab[:, 2] * ab[:, 2])
+    onLine[1:-1] = (crossLength <= 1e-6) & (dot >= 0) & (dot <= abLength * abLength)
+    return onLine
+
+
+def pointsToSkip(points, optimize):
+    '''pointsToSkip(points, optimize) ... for every point if the optimized path skips it: the points on a line
+    (see pointsOnLine) and the first point, unless it is the last one too. The point by point loops this replaces
+    compared the first point with an infinite predecessor, which isPointOnLine takes as a point on the line.'''
+    if not optimize or len(points) < 2:
+        return numpy.zeros(len(points), dtype=bool)
+    skip = pointsOnLine(points)
+    skip[0] = True
+    return skip
+
+
+# the waterline of the current process, set up by _initWaterline
+_waterline = None
+
+
+def _initWaterline(points, facets, cutter, sampling):
+    global _waterline
+    import ocl
+    _waterline = ocl.Waterline()
+    _waterline.setSTL(makeSTLSurf(points, facets))
+    _waterline.setCutter(makeCutter(*cutter))
+    _waterline.setSampling(sampling)
+
+
+def _waterlineLoops(zh):
+    '''the loops of the waterline at zh as lists of (x, y, z)'''
+    _waterline.reset()
+    _waterline.setZ(zh)  # height for this waterline
+    _waterline.run()
+    return [[(p.x, p.y, p.z) for p in loop] for loop in _waterline.getLoops()]
+
+
+def waterlineLoops(points, facets, cutter, sampling, zheights, processes=0):
+    '''waterlineLoops(points, facets, cutter, sampling, zheights, processes=0) ... the loops of the waterlines at zheights.
+    cutter is (tool type, diameter, length). With processes > 1 the z levels are computed by that many forked
+    processes (see ForkProcesses), every process sets up the surface once.'''
+    print("calculating Waterline at z= {} in {} processes".format(zheights, max(1, min(processes, len(zheights)))))
+    return ForkProcesses.map(_waterlineLoops, zheights, processes, _initWaterline, (points, facets, cutter, sampling))
+
+
 def SetupProperties():
     setup = []
     setup.append("Algorithm")
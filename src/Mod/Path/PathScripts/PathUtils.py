@@ -28,6 +28,7 @@ import Part
 import Path
 import PathScripts
 import PathScripts.PathGeom as PathGeom
+import PathScripts.PathHoleSort as PathHoleSort
 import TechDraw
 import math
 import numpy
@@ -710,57 +711,14 @@ def rampPlunge(edge, rampangle, destZ, startZ):
     return rampCmds
 
 
-def sort_jobs(locations, keys, attractors=[]):
+def sort_jobs(locations, keys, attractors=[], optimizeTime=0):
     """ sort holes by the nearest neighbor method
         keys: two-element list of keys for X and Y coordinates. for example ['x','y']
-        originally written by m0n5t3r for PathHelix
+        attractors: keys whose absolute values are added to the squared distance of a location, default keys[0]
+        optimizeTime: if > 0 the order is shortened by 2-opt for at most optimizeTime seconds
+        originally written by m0n5t3r for PathHelix, the nearest neighbors are found with a k-d tree (PathHoleSort)
     """
-    try:
-        from queue import PriorityQueue
-    except ImportError:
-        from Queue import PriorityQueue
-    from collections import defaultdict
-
-    attractors = attractors or [keys[0]]
-
-    def sqdist(a, b):
-        """ square Euclidean distance """
-        d = 0
-        for k in keys:
-            d += (a[k] - b[k]) ** 2
-
-        return d
-
-    def weight(location):
-        w = 0
-
-        for k in attractors:
-            w += abs(location[k])
-
-        return w
-
-    def find_closest(location_list, location, dist):
-        q = PriorityQueue()
-
-        for j in location_list:
-            q.put((dist(j, location) + weight(j), j))
-
-        prio, result = q.get()
-
-        return result
-
-    out = []
-    zero = defaultdict(lambda: 0)
-
-    out.append(find_closest(locations, zero, sqdist))
-    locations.remove(out[-1])
-
-    while locations:
-        closest = find_closest(locations, out[-1], sqdist)
-        out.append(closest)
-        locations.remove(closest)
-
-    return out
+    return PathHoleSort.sortLocations(locations, keys, attractors, optimizeTime)
 
 def guessDepths(objshape, subs=None):
     """
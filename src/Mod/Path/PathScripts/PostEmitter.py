@@ -0,0 +1,217 @@
+# ***************************************************************************
+# *   Copyright (c) 2026 - FreeCAD Developers                               *
+# *                                                                         *
+# *   This file is part of the FreeCAD CAx development system.              *
+# *                                                                         *
+# *   This program is free software; you can redistribute it and/or modify  *
+# *   it under the terms of the GNU Lesser General Public License (LGPL)    *
+# *   as published by the Free Software Foundation; either version 2 of     *
+# *   the License, or (at your option) any later version.                   *
+# *   for detail see the LICENCE text file.                                 *
+# *                                                                         *
+# *   FreeCAD is distributed in the hope that it will be useful,            *
+# *   but WITHOUT ANY WARRANTY; without even the implied warranty of        *
+# *   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the         *
+# *   GNU Lesser General Public License for more details.                   *
+# *                                                                         *
+# *   You should have received a copy of the GNU Library General Public     *
+# *   License along with FreeCAD; if not, write to the Free Software        *
+# *   Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  *
+# *   USA                                                                   *
+# *                                                                         *
+# ***************************************************************************/
+
+'''
+Shared core of the post processors. The commands of a path are converted into
+one array per parameter, unit scaling, suppression of repeated values and the
+formatting are done per parameter for the whole path, the lines are written in chunks.
+A post processor only configures a GCodeEmitter for its dialect.
+'''
+
+import numpy
+
+# number of lines joined into one string before it is written
+CHUNK_SIZE = 10000
+
+
+def unitDivisor(unit):
+    '''unitDivisor(unit) ... value of unit in internal units, values divided by it are the same as Quantity.getValueAs(unit)'''
+    from FreeCAD import Units
+    return Units.Quantity(unit).Value
+
+
+def unitScale(unit):
+    '''unitScale(unit) ... function converting an array of values in internal units to unit'''
+    divisor = unitDivisor(unit)
+    return lambda values: values / divisor
+
+
+class PathColumns(object):
+    '''PathColumns(commands, params) ... the names of the commands and for each of params
+    the rows of the commands which have it and its values.'''
+
+    def __init__(self, commands, params):
+        self.names = []
+        columns = dict((p, ([], [])) for p in params)
+        for i, c in enumerate(commands):
+            self.names.append(c.Name)
+            for p, v in c.Parameters.items():
+                column = columns.get(p)
+                if column is not None:
+                    column[0].append(i)
+                    column[1].append(v)
+        self.rows = {}
+        self.values = {}
+        for p, (rows, values) in columns.items():
+            self.rows[p] = numpy.array(rows, dtype=numpy.int64)
+            self.values[p] = numpy.array(values, dtype=numpy.float64)
+
+    def __len__(self):
+        return len(self.names)
+
+
+class GCodeEmitter(object):
+    '''GCodeEmitter(params, precision, ...) ... turns path commands into lines of gcode.
+    params:          the parameters in the order they are written
+    precision:       digits of the parameters
+    lengthScale:     function converting an array of parameter values, None keeps them as they are
+    speedParam:      the parameter holding the feed rate, it's converted by speedScale and written with speedPrecision digits
+    intParams:       parameters written as integers, they are never suppressed
+    rapidMoves:      commands whose feed rate is not written
+    skipZeroSpeed:   feed rates which are not > 0 are not written
+    modal:           commands are suppressed if the same as the previous one
+    doubles:         if False parameter values are suppressed if the same as the previous one
+    comments:        if False comments are not written
+    commandSpace:    separator between the words of a line
+    lineNumber:      if given it's called for the line number prefix of every line
+    specialCommands: command name -> function(line) returning (lines before, line) for commands like M6
+    startLocation:   parameter values the first values are compared to if doubles is False
+    '''
+
+    def __init__(self, params, precision=3, lengthScale=None, speedParam='F', speedScale=None, speedPrecision=None,
+                 intParams=(), rapidMoves=(), skipZeroSpeed=False, modal=False, doubles=True, comments=True,
+                 commandSpace=' ', lineNumber=None, specialCommands=None, startLocation=None):
+        self.params = list(params)
+        self.precision = int(precision)
+        self.lengthScale = lengthScale
+        self.speedParam = speedParam
+        self.speedScale = speedScale
+        self.speedPrecision = self.precision if speedPrecision is None else int(speedPrecision)
+        self.intParams = set(intParams)
+        self.rapidMoves = set(rapidMoves)
+        self.skipZeroSpeed = skipZeroSpeed
+        self.modal = modal
+        self.doubles = doubles
+        self.comments = comments
+        self.commandSpace = commandSpace
+        self.lineNumber = lineNumber
+        self.specialCommands = specialCommands or {}
+        self.startLocation = startLocation or {}
+
+    def _paramWords(self, columns, param, isRapid):
+        '''rows and words (including the leading separator) of param'''
+        rows = columns.rows[param]
+        values = columns.values[param]
+        keep = numpy.ones(len(rows), dtype=bool)
+        if not self.doubles and param not in self.intParams:
+            previous = numpy.empty_like(values)
+            previous[1:] = values[:-1]
+            previous[:1] = self.startLocation.get(param, numpy.nan)
+            keep &= values != previous
+        sep = self.commandSpace
+        if param in self.intParams:
+            rows = rows[keep]
+            return rows, [sep + param + str(int(v)) for v in values[keep].tolist()]
+        if param == self.speedParam:
+            keep &= ~isRapid[rows]
+            if self.speedScale is not None:
+                values = self.speedScale(values)
+            if self.skipZeroSpeed:
+                keep &= values > 0.0
+            precision = self.speedPrecision
+        else:
+            if self.lengthScale is not None:
+                values = self.lengthScale(values)
+            precision = self.precision
+        fmt = sep + param + '%.' + str(precision) + 'f'
+        return rows[keep], [fmt % v for v in values[keep].tolist()]
+
+    def lines(self, commands):
+        '''lines(commands) ... generator of the lines of gcode of commands, without line end'''
+        columns = commands if isinstance(commands, PathColumns) else PathColumns(commands, self.params)
+        names = columns.names
+        if not names:
+            return
+        skip = [False] * len(names)
+        if not self.comments:
+            skip = [name[:1] == '(' for name in names]
+        words = numpy.empty(len(names), dtype=object)
+        words[:] = names
+        if self.modal:
+            lastcommand = None
+            for i, name in enumerate(names):
+                if skip[i]:
+                    continue
+                if name == lastcommand:
+                    words[i] = ''
+                lastcommand = name
+        isRapid = numpy.array([name in self.rapidMoves for name in names], dtype=bool)
+
+        for param in self.params:
+            rows, paramWords = self._paramWords(columns, param, isRapid)
+            if len(rows):
+                words[rows] = words[rows] + numpy.array(paramWords, dtype=object)
+
+        lineNumber = self.lineNumber
+        specialCommands = self.specialCommands
+        sep = self.commandSpace
+        for i, line in enumerate(words.tolist()):
+            if skip[i]:
+                continue
+            line = line.strip()
+            special = specialCommands.get(names[i])
+            if special is not None:
+                before, line = special(line)
+                for l in before:
+                    yield (lineNumber() + l) if lineNumber else l
+                line = line.strip() if line else None
+            if line:
+                yield (lineNumber() + sep + line).strip() if lineNumber else line
+
+    def chunks(self, commands):
+        '''chunks(commands) ... generator of the gcode of commands in chunks of CHUNK_SIZE lines'''
+        chunk = []
+        for line in self.lines(commands):
+            chunk.append(line)
+            if len(chunk) >= CHUNK_SIZE:
+                chunk.append('')
+                yield '\n'.join(chunk)
+                chunk = []
+        if chunk:
+            chunk.append('')
+            yield '\n'.join(chunk)
+
+    def emit(self, commands, write):
+        '''emit(commands, write) ... calls write with chunks of the gcode of commands'''
+        for chunk in self.chunks(commands):
+            write(chunk)
+
+    def toString(self, commands):
+        '''toString(commands) ... the gcode of commands'''
+        return ''.join(self.chunks(commands))
+
+
+def writeGCode(filename, parts):
+    '''writeGCode(filename, parts) ... writes the strings of parts to filename as parts generates them
+    and returns them joined, nothing is written for "-"'''
+    gcode = []
+    gfile = None if filename == '-' else open(filename, 'wb')
+    try:
+        for part in parts:
+            gcode.append(part)
+            if gfile is not None:
+                gfile.write(part if isinstance(part, bytes) else part.encode('utf-8'))
+    finally:
+        if gfile is not None:
+            gfile.close()
+    return ''.join(gcode)
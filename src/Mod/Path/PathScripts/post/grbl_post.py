@@ -30,6 +30,7 @@ grbl_post.export(object,"/path/to/file.ncc")
 '''
 
 import FreeCAD
+import PathScripts.PostEmitter as PostEmitter
 import PathScripts.PostUtils as PostUtils
 import argparse
 import datetime
@@ -151,15 +152,33 @@ def export(objectslist,filename,argstring):
     if not processArguments(argstring):
         return None
 
-    global UNITS
-
     for obj in objectslist:
         if not hasattr(obj,"Path"):
             print("the object " + obj.Name + " is not a path. Please select only path and Compounds.")
             return
 
     print("postprocessing...")
-    gcode = ""
+    # the gcode is written as it is generated, adding to one string gets slow for big paths
+    gcode = exportChunks(objectslist)
+
+    if FreeCAD.GuiUp and SHOW_EDITOR:
+        dia = PostUtils.GCodeEditorDialog()
+        gcode = ''.join(gcode)
+        dia.editor.setText(gcode)
+        result = dia.exec_()
+        if result:
+            gcode = dia.editor.toPlainText()
+        gcode = [gcode]
+
+    gcode = PostEmitter.writeGCode(filename, gcode)
+
+    print("done postprocessing.")
+
+    return gcode
+
+
+def exportChunks(objectslist):
+    global UNITS
 
     #Find the machine.
     #The user my have overridden post processor defaults in the GUI.  Make sure we're using the current values in the Machine Def.
@@ -180,52 +199,36 @@ def export(objectslist,filename,argstring):
 
     # write header
     if OUTPUT_HEADER:
-        gcode += linenumber() + "(Exported by FreeCAD)\n"
-        gcode += linenumber() + "(Post Processor: " + __name__ +")\n"
-        gcode += linenumber() + "(Output Time:"+str(now)+")\n"
+        yield linenumber() + "(Exported by FreeCAD)\n"
+        yield linenumber() + "(Post Processor: " + __name__ +")\n"
+        yield linenumber() + "(Output Time:"+str(now)+")\n"
 
     #Write the preamble
-    if OUTPUT_COMMENTS: gcode += linenumber() + "(begin preamble)\n"
+    if OUTPUT_COMMENTS: yield linenumber() + "(begin preamble)\n"
     for line in PREAMBLE.splitlines(True):
-        gcode += linenumber() + line
-    gcode += linenumber() + UNITS + "\n"
+        yield linenumber() + line
+    yield linenumber() + UNITS + "\n"
 
     for obj in objectslist:
 
         #do the pre_op
-        if OUTPUT_COMMENTS: gcode += linenumber() + "(begin operation: " + obj.Label + ")\n"
+        if OUTPUT_COMMENTS: yield linenumber() + "(begin operation: " + obj.Label + ")\n"
         for line in PRE_OPERATION.splitlines(True):
-            gcode += linenumber() + line
+            yield linenumber() + line
 
-        gcode += parse(obj)
+        for chunk in parseChunks(obj):
+            yield chunk
 
         #do the post_op
-        if OUTPUT_COMMENTS: gcode += linenumber() + "(finish operation: " + obj.Label + ")\n"
+        if OUTPUT_COMMENTS: yield linenumber() + "(finish operation: " + obj.Label + ")\n"
         for line in POST_OPERATION.splitlines(True):
-            gcode += linenumber() + line
+            yield linenumber() + line
 
     #do the post_amble
 
-    if OUTPUT_COMMENTS: gcode += "(begin postamble)\n"
+    if OUTPUT_COMMENTS: yield "(begin postamble)\n"
     for line in POSTAMBLE.splitlines(True):
-        gcode += linenumber() + line
-
-    if FreeCAD.GuiUp and SHOW_EDITOR:
-        dia = PostUtils.GCodeEditorDialog()
-        dia.editor.setText(gcode)
-        result = dia.exec_()
-        if result:
-            final = dia.editor.toPlainText()
-        else:
-            final = gcode
-    else:
-        final = gcode
-
-    print("done postprocessing.")
-
-    gfile = pythonopen(filename,"wb")
-    gfile.write(gcode)
-    gfile.close()
+        yield linenumber() + line
 
 
 def linenumber():
@@ -235,82 +238,56 @@ def linenumber():
         return "N" + str(LINENR) + " "
     return ""
 
-def parse(pathobj):
-    out = ""
-    lastcommand = None
-    precision_string = '.' + str(PRECISION) +'f'
+def toolChange(line):
     global SUPPRESS_TOOL_CHANGE
+    before = []
+    if OUTPUT_COMMENTS:
+        before.append("(begin toolchange)")
+    if not OUTPUT_TOOL_CHANGE or SUPPRESS_TOOL_CHANGE > 0:
+        line = ";" + COMMAND_SPACE + line
+        SUPPRESS_TOOL_CHANGE = SUPPRESS_TOOL_CHANGE - 1
+    else:
+        before.extend(TOOL_CHANGE.splitlines(False))
+    return (before, line)
 
+def message(line):
+    # the message itself is not written
+    return ([], None)
+
+def suppressCommand(line):
+    return ([], ";" + COMMAND_SPACE + line)
+
+def getEmitter():
     #params = ['X','Y','Z','A','B','I','J','K','F','S'] #This list control the order of parameters
     params = ['X','Y','Z','A','B','I','J','F','S','T','Q','R','L'] #linuxcnc doesn't want K properties on XY plane  Arcs need work.
+    specialCommands = dict((command, suppressCommand) for command in SUPPRESS_COMMANDS)
+    specialCommands['M6'] = toolChange
+    specialCommands['message'] = message
+    return PostEmitter.GCodeEmitter(
+        params,
+        precision=PRECISION,
+        speedScale=lambda values: values * 60,
+        speedPrecision=2,
+        intParams=['T'],
+        rapidMoves=RAPID_MOVES,
+        modal=MODAL,
+        commandSpace=COMMAND_SPACE,
+        lineNumber=linenumber if OUTPUT_LINE_NUMBERS else None,
+        specialCommands=specialCommands)
+
+def parse(pathobj):
+    return ''.join(parseChunks(pathobj))
 
+def parseChunks(pathobj):
     if hasattr(pathobj,"Group"): #We have a compound or project.
-        if OUTPUT_COMMENTS: out += linenumber() + "(compound: " + pathobj.Label + ")\n"
+        if OUTPUT_COMMENTS: yield linenumber() + "(compound: " + pathobj.Label + ")\n"
         for p in pathobj.Group:
-            out += parse(p)
-        return out
-    else: #parsing simple path
-
-        if not hasattr(pathobj,"Path"): #groups might contain non-path things like stock.
-            return out
-
-        if OUTPUT_COMMENTS: out += linenumber() + "(Path: " + pathobj.Label + ")\n"
-
-        for c in pathobj.Path.Commands:
-            outstring = []
-            command = c.Name
-            outstring.append(command)
-            # if modal: only print the command if it is not the same as the last one
-            if MODAL == True:
-                if command == lastcommand:
-                    outstring.pop(0)
-
-
-            # Now add the remaining parameters in order
-            for param in params:
-                if param in c.Parameters:
-                    if param == 'F':
-                        if command not in RAPID_MOVES:
-                            outstring.append(param + format(c.Parameters['F'] * 60, '.2f'))
-                    elif param == 'T':
-                        outstring.append(param + str(int(c.Parameters['T'])))
-                    else:
-                        outstring.append(param + format(c.Parameters[param], precision_string))
-
-            # store the latest command
-            lastcommand = command
-
-            # Check for Tool Change:
-            if command == 'M6':
-                if OUTPUT_COMMENTS:
-                    out += linenumber() + "(begin toolchange)\n"
-                if not OUTPUT_TOOL_CHANGE or SUPPRESS_TOOL_CHANGE > 0:
-                    outstring.insert(0, ";")
-                    SUPPRESS_TOOL_CHANGE = SUPPRESS_TOOL_CHANGE - 1
-                else:
-                    for line in TOOL_CHANGE.splitlines(True):
-                        out += linenumber() + line
-
-            if command == "message":
-                if OUTPUT_COMMENTS == False:
-                    out = []
-                else:
-                    outstring.pop(0) #remove the command
-
-            if command in SUPPRESS_COMMANDS:
-                outstring.insert(0, ";")
-
-            #prepend a line number and append a newline
-            if len(outstring) >= 1:
-                if OUTPUT_LINE_NUMBERS:
-                    outstring.insert(0,(linenumber()))
-
-                #append the line to the final output
-                for w in outstring:
-                    out += w + COMMAND_SPACE
-                out = out.strip() + "\n"
-
-        return out
+            for chunk in parseChunks(p):
+                yield chunk
+    elif hasattr(pathobj,"Path"): #groups might contain non-path things like stock.
+        if OUTPUT_COMMENTS: yield linenumber() + "(Path: " + pathobj.Label + ")\n"
+        for chunk in getEmitter().chunks(pathobj.Path.Commands):
+            yield chunk
 
 
 print(__name__ + " gcode postprocessor loaded.")
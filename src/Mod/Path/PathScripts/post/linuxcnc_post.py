@@ -22,11 +22,10 @@
 # ***************************************************************************/
 from __future__ import print_function
 import FreeCAD
-from FreeCAD import Units
-import Path
 import argparse
 import datetime
 import shlex
+from PathScripts import PostEmitter
 from PathScripts import PostUtils
 from PathScripts import PathUtils
 
@@ -151,9 +150,6 @@ def processArguments(argstring):
 def export(objectslist, filename, argstring):
     if not processArguments(argstring):
         return None
-    global UNITS
-    global UNIT_FORMAT
-    global UNIT_SPEED_FORMAT
 
     for obj in objectslist:
         if not hasattr(obj, "Path"):
@@ -161,20 +157,42 @@ def export(objectslist, filename, argstring):
             return None
 
     print("postprocessing...")
-    gcode = ""
+    # the gcode is written as it is generated, adding to one string gets slow for big paths
+    gcode = exportChunks(objectslist)
+
+    if FreeCAD.GuiUp and SHOW_EDITOR:
+        dia = PostUtils.GCodeEditorDialog()
+        gcode = ''.join(gcode)
+        dia.editor.setText(gcode)
+        result = dia.exec_()
+        if result:
+            gcode = dia.editor.toPlainText()
+        gcode = [gcode]
+
+    gcode = PostEmitter.writeGCode(filename, gcode)
+
+    print("done postprocessing.")
+
+    return gcode
+
+
+def exportChunks(objectslist):
+    global UNITS
+    global UNIT_FORMAT
+    global UNIT_SPEED_FORMAT
 
     # write header
     if OUTPUT_HEADER:
-        gcode += linenumber() + "(Exported by FreeCAD)\n"
-        gcode += linenumber() + "(Post Processor: " + __name__ + ")\n"
-        gcode += linenumber() + "(Output Time:" + str(now) + ")\n"
+        yield linenumber() + "(Exported by FreeCAD)\n"
+        yield linenumber() + "(Post Processor: " + __name__ + ")\n"
+        yield linenumber() + "(Output Time:" + str(now) + ")\n"
 
     # Write the preamble
     if OUTPUT_COMMENTS:
-        gcode += linenumber() + "(begin preamble)\n"
+        yield linenumber() + "(begin preamble)\n"
     for line in PREAMBLE.splitlines(False):
-        gcode += linenumber() + line + "\n"
-    gcode += linenumber() + UNITS + "\n"
+        yield linenumber() + line + "\n"
+    yield linenumber() + UNITS + "\n"
 
     for obj in objectslist:
 
@@ -198,44 +216,25 @@ def export(objectslist, filename, argstring):
 
         # do the pre_op
         if OUTPUT_COMMENTS:
-            gcode += linenumber() + "(begin operation: %s)\n" % obj.Label
-            gcode += linenumber() + "(machine: %s, %s)\n" % (myMachine, UNIT_SPEED_FORMAT)
+            yield linenumber() + "(begin operation: %s)\n" % obj.Label
+            yield linenumber() + "(machine: %s, %s)\n" % (myMachine, UNIT_SPEED_FORMAT)
         for line in PRE_OPERATION.splitlines(True):
-            gcode += linenumber() + line
+            yield linenumber() + line
 
-        gcode += parse(obj)
+        for chunk in parseChunks(obj):
+            yield chunk
 
         # do the post_op
         if OUTPUT_COMMENTS:
-            gcode += linenumber() + "(finish operation: %s)\n" % obj.Label
+            yield linenumber() + "(finish operation: %s)\n" % obj.Label
         for line in POST_OPERATION.splitlines(True):
-            gcode += linenumber() + line
+            yield linenumber() + line
 
     # do the post_amble
     if OUTPUT_COMMENTS:
-        gcode += "(begin postamble)\n"
+        yield "(begin postamble)\n"
     for line in POSTAMBLE.splitlines(True):
-        gcode += linenumber() + line
-
-    if FreeCAD.GuiUp and SHOW_EDITOR:
-        dia = PostUtils.GCodeEditorDialog()
-        dia.editor.setText(gcode)
-        result = dia.exec_()
-        if result:
-            final = dia.editor.toPlainText()
-        else:
-            final = gcode
-    else:
-        final = gcode
-
-    print("done postprocessing.")
-
-    if not filename == '-':
-        gfile = pythonopen(filename, "wb")
-        gfile.write(final)
-        gfile.close()
-
-    return final
+        yield linenumber() + line
 
 
 def linenumber():
@@ -246,106 +245,52 @@ def linenumber():
     return ""
 
 
-def parse(pathobj):
-    global PRECISION
-    global MODAL
-    global OUTPUT_DOUBLES
-    global UNIT_FORMAT
-    global UNIT_SPEED_FORMAT
+def toolChange(line):
+    return (TOOL_CHANGE.splitlines(False), line)
+
 
-    out = ""
-    lastcommand = None
-    precision_string = '.' + str(PRECISION) + 'f'
-    currLocation = {}  # keep track for no doubles
+def message(line):
+    # the message itself is not written
+    return ([], None)
 
+
+def getEmitter():
     # the order of parameters
     # linuxcnc doesn't want K properties on XY plane  Arcs need work.
     params = ['X', 'Y', 'Z', 'A', 'B', 'C', 'I', 'J', 'F', 'S', 'T', 'Q', 'R', 'L', 'H', 'D', 'P']
-    firstmove = Path.Command("G0", {"X": -1, "Y": -1, "Z": -1, "F": 0.0})
-    currLocation.update(firstmove.Parameters)  # set First location Parameters
+    return PostEmitter.GCodeEmitter(
+        params,
+        precision=PRECISION,
+        lengthScale=PostEmitter.unitScale(UNIT_FORMAT),
+        speedScale=PostEmitter.unitScale(UNIT_SPEED_FORMAT),
+        intParams=['T', 'H', 'D', 'S'],
+        rapidMoves=['G0', 'G00'],  # linuxcnc doesn't use rapid speeds
+        skipZeroSpeed=True,
+        modal=MODAL,
+        doubles=OUTPUT_DOUBLES,
+        comments=OUTPUT_COMMENTS,
+        commandSpace=COMMAND_SPACE,
+        lineNumber=linenumber if OUTPUT_LINE_NUMBERS else None,
+        specialCommands={'M6': toolChange, 'message': message},
+        startLocation={"X": -1, "Y": -1, "Z": -1, "F": 0.0})
+
 
+def parse(pathobj):
+    return ''.join(parseChunks(pathobj))
+
+
+def parseChunks(pathobj):
     if hasattr(pathobj, "Group"):  # We have a compound or project.
         # if OUTPUT_COMMENTS:
-        #     out += linenumber() + "(compound: " + pathobj.Label + ")\n"
+        #     yield linenumber() + "(compound: " + pathobj.Label + ")\n"
         for p in pathobj.Group:
-            out += parse(p)
-        return out
-    else:  # parsing simple path
-
-        # groups might contain non-path things like stock.
-        if not hasattr(pathobj, "Path"):
-            return out
-
+            for chunk in parseChunks(p):
+                yield chunk
+    # groups might contain non-path things like stock.
+    elif hasattr(pathobj, "Path"):
         # if OUTPUT_COMMENTS:
-        #     out += linenumber() + "(" + pathobj.Label + ")\n"
-
-        for c in pathobj.Path.Commands:
-
-            outstring = []
-            command = c.Name
-            outstring.append(command)
-
-            # if modal: suppress the command if it is the same as the last one
-            if MODAL is True:
-                if command == lastcommand:
-                    outstring.pop(0)
-
-            if c.Name[0] == '(' and not OUTPUT_COMMENTS: # command is a comment
-                continue
-
-            # Now add the remaining parameters in order
-            for param in params:
-                if param in c.Parameters:
-                    if param == 'F' and (currLocation[param] != c.Parameters[param] or OUTPUT_DOUBLES):
-                        if c.Name not in ["G0", "G00"]:  # linuxcnc doesn't use rapid speeds
-                            speed = Units.Quantity(c.Parameters['F'], FreeCAD.Units.Velocity)
-                            if speed.getValueAs(UNIT_SPEED_FORMAT) > 0.0:
-                                outstring.append(param + format(float(speed.getValueAs(UNIT_SPEED_FORMAT)), precision_string))
-                        else:
-                            continue
-                    elif param == 'T':
-                        outstring.append(param + str(int(c.Parameters['T'])))
-                    elif param == 'H':
-                        outstring.append(param + str(int(c.Parameters['H'])))
-                    elif param == 'D':
-                        outstring.append(param + str(int(c.Parameters['D'])))
-                    elif param == 'S':
-                        outstring.append(param + str(int(c.Parameters['S'])))
-                    else:
-                        if (not OUTPUT_DOUBLES) and (param in currLocation) and (currLocation[param] == c.Parameters[param]):
-                            continue
-                        else:
-                            pos = Units.Quantity(c.Parameters[param], FreeCAD.Units.Length)
-                            outstring.append(
-                                param + format(float(pos.getValueAs(UNIT_FORMAT)), precision_string))
-
-            # store the latest command
-            lastcommand = command
-            currLocation.update(c.Parameters)
-
-            # Check for Tool Change:
-            if command == 'M6':
-                # if OUTPUT_COMMENTS:
-                #     out += linenumber() + "(begin toolchange)\n"
-                for line in TOOL_CHANGE.splitlines(True):
-                    out += linenumber() + line
-
-            if command == "message":
-                if OUTPUT_COMMENTS is False:
-                    out = []
-                else:
-                    outstring.pop(0)  # remove the command
-
-            # prepend a line number and append a newline
-            if len(outstring) >= 1:
-                if OUTPUT_LINE_NUMBERS:
-                    outstring.insert(0, (linenumber()))
-
-                # append the line to the final output
-                for w in outstring:
-                    out += w + COMMAND_SPACE
-                out = out.strip() + "\n"
-
-        return out
+        #     yield linenumber() + "(" + pathobj.Label + ")\n"
+        for chunk in getEmitter().chunks(pathobj.Path.Commands):
+            yield chunk
 
 print(__name__ + " gcode postprocessor loaded.")
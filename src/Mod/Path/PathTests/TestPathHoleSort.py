@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+
+# ***************************************************************************
+# *                                                                         *
+# *   Copyright (c) 2026 - FreeCAD Developers                               *
+# *                                                                         *
+# *   This program is free software; you can redistribute it and/or modify  *
+# *   it under the terms of the GNU Lesser General Public License (LGPL)    *
+# *   as published by the Free Software Foundation; either version 2 of     *
+# *   the License, or (at your option) any later version.                   *
+# *   for detail see the LICENCE text file.                                 *
+# *                                                                         *
+# *   This program is distributed in the hope that it will be useful,       *
+# *   but WITHOUT ANY WARRANTY; without even the implied warranty of        *
+# *   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the         *
+# *   GNU Library General Public License for more details.                  *
+# *                                                                         *
+# *   You should have received a copy of the GNU Library General Public     *
+# *   License along with this program; if not, write to the Free Software   *
+# *   Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  *
+# *   USA                                                                   *
+# *                                                                         *
+# ***************************************************************************
+
+import PathScripts.PathHoleSort as PathHoleSort
+import math
+import random
+
+from PathTests.PathTestUtils import PathTestBase
+
+
+def bruteForceSort(locations, keys, attractors=None):
+    '''The nearest neighbor order as PathUtils.sort_jobs always did it, by scanning all remaining locations.'''
+    attractors = attractors or [keys[0]]
+    remaining = list(locations)
+    out = []
+    current = dict((k, 0) for k in keys)
+    while remaining:
+        def cost(l):
+            return sum((l[k] - current[k]) ** 2 for k in keys) + sum(abs(l[k]) for k in attractors)
+        closest = min(remaining, key=cost)
+        remaining.remove(closest)
+        out.append(closest)
+        current = closest
+    return out
+
+def pathLength(locations):
+    length = 0
+    x, y = 0, 0
+    for l in locations:
+        length += math.hypot(l['x'] - x, l['y'] - y)
+        x, y = l['x'], l['y']
+    return length
+
+
+class TestPathHoleSort(PathTestBase):
+    '''Unit tests for the PathHoleSort module.'''
+
+    def setUp(self):
+        self.rnd = random.Random(4711)
+        self.locations = [{'x': self.rnd.uniform(-50, 100), 'y': self.rnd.uniform(-20, 40), 'z': self.rnd.uniform(0, 5)} for i in range(300)]
+
+    def test00(self):
+        '''Verify the order of holes is the one of the brute force nearest neighbor search.'''
+        self.assertEqual([], PathHoleSort.sortLocations([], ['x', 'y']))
+        for attractors in [None, ['x', 'y'], ['z']]:
+            self.assertEqual(bruteForceSort(self.locations, ['x', 'y'], attractors), PathHoleSort.sortLocations(self.locations, ['x', 'y'], attractors))
+
+    def test01(self):
+        '''Verify holes on a regular grid, with many equal distances, are all ordered.'''
+        locations = [{'x': 2.5 * (i % 20), 'y': 2.5 * (i // 20)} for i in range(400)]
+        self.rnd.shuffle(locations)
+        ordered = PathHoleSort.sortLocations(locations, ['x', 'y'])
+        self.assertEqual(sorted(id(l) for l in locations), sorted(id(l) for l in ordered))
+        self.assertRoughly(pathLength(bruteForceSort(locations, ['x', 'y'])), pathLength(ordered))
+
+    def test02(self):
+        '''Verify the 2-opt improvement keeps all holes and does not make the path longer.'''
+        ordered = PathHoleSort.sortLocations(self.locations, ['x', 'y'])
+        optimized = PathHoleSort.sortLocations(self.locations, ['x', 'y'], optimizeTime=5)
+        self.assertEqual(sorted(id(l) for l in ordered), sorted(id(l) for l in optimized))
+        self.assertTrue(pathLength(optimized) <= pathLength(ordered) + 0.00001)
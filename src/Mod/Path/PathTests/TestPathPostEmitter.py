@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+
+# ***************************************************************************
+# *                                                                         *
+# *   Copyright (c) 2026 - FreeCAD Developers                               *
+# *                                                                         *
+# *   This program is free software; you can redistribute it and/or modify  *
+# *   it under the terms of the GNU Lesser General Public License (LGPL)    *
+# *   as published by the Free Software Foundation; either version 2 of     *
+# *   the License, or (at your option) any later version.                   *
+# *   for detail see the LICENCE text file.                                 *
+# *                                                                         *
+# *   This program is distributed in the hope that it will be useful,       *
+# *   but WITHOUT ANY WARRANTY; without even the implied warranty of        *
+# *   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the         *
+# *   GNU Library General Public License for more details.                  *
+# *                                                                         *
+# *   You should have received a copy of the GNU Library General Public     *
+# *   License along with this program; if not, write to the Free Software   *
+# *   Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  *
+# *   USA                                                                   *
+# *                                                                         *
+# ***************************************************************************
+
+import Path
+import PathScripts.PostEmitter as PostEmitter
+import os
+import tempfile
+
+from PathTests.PathTestUtils import PathTestBase
+
+
+class TestPathPostEmitter(PathTestBase):
+    '''Unit tests for the gcode emitter shared by the post processors.'''
+
+    def commands(self):
+        return [
+                Path.Command('(begin)'),
+                Path.Command('M6', {'T': 2}),
+                Path.Command('G0', {'X': 0, 'Y': 0, 'Z': 5, 'F': 10}),
+                Path.Command('G1', {'X': 10, 'Y': 0, 'Z': 5, 'F': 10}),
+                Path.Command('G1', {'X': 10, 'Y': 25.4, 'Z': 5, 'F': 10}),
+                Path.Command('G1', {'X': 10, 'Y': 25.4, 'Z': 5})
+                ]
+
+    def test00(self):
+        '''Verify the plain output of all parameters.'''
+        emitter = PostEmitter.GCodeEmitter(['X', 'Y', 'Z', 'F', 'T'], precision=2, intParams=['T'])
+        self.assertEqual(emitter.toString(self.commands()),
+                '(begin)\nM6 T2\nG0 X0.00 Y0.00 Z5.00 F10.00\nG1 X10.00 Y0.00 Z5.00 F10.00\nG1 X10.00 Y25.40 Z5.00 F10.00\nG1 X10.00 Y25.40 Z5.00\n')
+
+    def test01(self):
+        '''Verify unit scaling, rapid feeds, modal commands and suppression of repeated values, F of G0 counts too.'''
+        emitter = PostEmitter.GCodeEmitter(['X', 'Y', 'Z', 'F', 'T'], precision=1,
+                lengthScale=PostEmitter.unitScale('in'), speedScale=PostEmitter.unitScale('mm/min'), speedPrecision=0,
+                intParams=['T'], rapidMoves=['G0'], modal=True, doubles=False, comments=False)
+        self.assertEqual(list(emitter.lines(self.commands())),
+                ['M6 T2', 'G0 X0.0 Y0.0 Z0.2', 'G1 X0.4', 'Y1.0'])
+
+    def test02(self):
+        '''Verify line numbers and special commands.'''
+        self.lineNumber = 100
+        def lineNumber():
+            self.lineNumber += 10
+            return "N%d " % self.lineNumber
+        def toolChange(line):
+            return (['M5'], ';' + line)
+        emitter = PostEmitter.GCodeEmitter(['X', 'T'], precision=0, intParams=['T'],
+                lineNumber=lineNumber, specialCommands={'M6': toolChange})
+        self.assertEqual(list(emitter.lines(self.commands()[:3])),
+                ['N110  (begin)', 'N120 M5', 'N130  ;M6 T2', 'N140  G0 X0'])
+
+    def test03(self):
+        '''Verify the gcode is written and returned as the chunks are generated.'''
+        emitter = PostEmitter.GCodeEmitter(['X', 'Y', 'Z', 'F', 'T'], precision=2, intParams=['T'])
+        gcode = emitter.toString(self.commands())
+        filename = os.path.join(tempfile.gettempdir(), 'TestPathPostEmitter.ngc')
+        self.assertEqual(PostEmitter.writeGCode(filename, emitter.chunks(self.commands())), gcode)
+        with open(filename, 'r') as f:
+            self.assertEqual(f.read(), gcode)
+        os.remove(filename)
+        self.assertEqual(PostEmitter.writeGCode('-', iter(['G0\n', 'G1\n'])), 'G0\nG1\n')
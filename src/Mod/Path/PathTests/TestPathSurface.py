@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*-
+
+# ***************************************************************************
+# *                                                                         *
+# *   Copyright (c) 2026 - FreeCAD Developers                               *
+# *                                                                         *
+# *   This program is free software; you can redistribute it and/or modify  *
+# *   it under the terms of the GNU Lesser General Public License (LGPL)    *
+# *   as published by the Free Software Foundation; either version 2 of     *
+# *   the License, or (at your option) any later version.                   *
+# *   for detail see the LICENCE text file.                                 *
+# *                                                                         *
+# *   This program is distributed in the hope that it will be useful,       *
+# *   but WITHOUT ANY WARRANTY; without even the implied warranty of        *
+# *   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the         *
+# *   GNU Library General Public License for more details.                  *
+# *                                                                         *
+# *   You should have received a copy of the GNU Library General Public     *
+# *   License along with this program; if not, write to the Free Software   *
+# *   Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  *
+# *   USA                                                                   *
+# *                                                                         *
+# ***************************************************************************
+
+import FreeCAD
+import PathScripts.PathSurface as PathSurface
+import random
+
+from PathTests.PathTestUtils import PathTestBase
+
+
+def pointByPoint(points, optimize):
+    '''The points the Surface op fed to before the optimization was computed for all points at once.'''
+    op = object.__new__(PathSurface.ObjectSurface)
+    inf = float("inf")
+    prev = FreeCAD.Vector(inf, inf, inf)
+    next = FreeCAD.Vector(inf, inf, inf)
+    out = []
+    for i in range(len(points)):
+        c = FreeCAD.Vector(*points[i])
+        if i < len(points) - 1:
+            next = FreeCAD.Vector(*points[i + 1])
+        else:
+            optimize = False
+        if not optimize or not op.isPointOnLine(prev, next, c):
+            out.append(points[i])
+        prev = c
+    return out
+
+def optimized(points, optimize):
+    skip = PathSurface.pointsToSkip(points, optimize)
+    return [p for i, p in enumerate(points) if not skip[i]]
+
+
+class TestPathSurface(PathTestBase):
+    '''Unit tests for the optimization of the Surface op paths.'''
+
+    def setUp(self):
+        rnd = random.Random(4711)
+        self.paths = [[], [(1, 2, 3)], [(1, 2, 3), (4, 5, 6)], [(0, 0, 0), (1, 0, 0), (2, 0, 0)]]
+        # straight runs with repeated points, turns and random steps, like cutter location points
+        points = []
+        x, y, z = 0.0, 0.0, 0.0
+        for i in range(300):
+            step = rnd.choice([(1.0, 0.0, 0.0), (0.0, 0.5, 0.0), (0.0, 0.0, 0.0), (1.0, 0.0, 0.25),
+                               (rnd.uniform(-1, 1), rnd.uniform(-1, 1), rnd.uniform(-1, 1))])
+            for j in range(rnd.randint(1, 6)):
+                x, y, z = x + step[0], y + step[1], z + step[2]
+                points.append((x, y, z))
+        self.paths.append(points)
+
+    def test00(self):
+        '''Verify the optimized paths feed to the same points as the point by point loops.'''
+        for points in self.paths:
+            for optimize in [False, True]:
+                self.assertEqual(pointByPoint(points, optimize), optimized(points, optimize))
@@ -28,12 +28,15 @@ from PathTests.TestPathLog   import TestPathLog
 from PathTests.TestPathCore  import TestPathCore
 #from PathTests.TestPathPost  import PathPostTestCases
 from PathTests.TestPathGeom  import TestPathGeom
+from PathTests.TestPathHoleSort import TestPathHoleSort
 from PathTests.TestPathOpTools  import TestPathOpTools
+from PathTests.TestPathPostEmitter import TestPathPostEmitter
 from PathTests.TestPathUtil  import TestPathUtil
 from PathTests.TestPathDepthParams        import depthTestCases
 from PathTests.TestPathDressupHoldingTags import TestHoldingTags
 from PathTests.TestPathDressupDogbone import TestDressupDogbone
 from PathTests.TestPathStock import TestPathStock
+from PathTests.TestPathSurface import TestPathSurface
 from PathTests.TestPathTool import TestPathTool
 from PathTests.TestPathTooltable import TestPathTooltable
 from PathTests.TestPathToolController import TestPathToolController
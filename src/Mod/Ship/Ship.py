@@ -32,6 +32,7 @@ __doc__="The Ships module provide a set of tools to make some specific Naval" \
 from shipCreateShip.Tools import createShip
 from shipHydrostatics.Tools import areas, displacement, wettedArea, moment
 from shipHydrostatics.Tools import floatingArea, BMT, mainFrameCoeff
+from shipHydrostatics.Tools import buildSections
 from shipCreateWeight.Tools import createWeight
 from shipCreateTank.Tools import createTank
 from shipCapacityCurve.Tools import tankCapacityCurve
@@ -22,20 +22,64 @@
 #***************************************************************************
 
 import time
+import random
 from math import *
 from PySide import QtGui, QtCore
 import FreeCAD as App
 import FreeCADGui as Gui
-from FreeCAD import Base, Vector, Matrix, Placement, Rotation
+from FreeCAD import Base, Vector, Matrix, Placement
 import Part
 import Units
 from shipUtils import Paths, Math
-import shipUtils.Units as USys
 
 
 COMMON_BOOLEAN_ITERATIONS = 10
 
 
+def getFluidShape(shape, level):
+    """Return the fluid shape inside a tank, i.e. the tank shape cropped by
+    the free surface. The boolean operation is directly carried out on the
+    shapes, without adding objects to the active document.
+
+    Keyword arguments:
+    shape -- Tank shape.
+    level -- Percentage of filling level (interval [0, 1]).
+    """
+    # Build up the cutting box
+    bbox = shape.BoundBox
+    dx = bbox.XMax - bbox.XMin
+    dy = bbox.YMax - bbox.YMin
+    dz = bbox.ZMax - bbox.ZMin
+
+    def common(height):
+        if height <= 0.0:
+            return Part.Shape()
+        try:
+            box = Part.makeBox(3.0 * dx, 3.0 * dy, height,
+                               Vector(bbox.XMin - dx, bbox.YMin - dy, bbox.ZMin - dz))
+            return shape.common(box)
+        except Part.OCCError:
+            return Part.Shape()
+
+    out = common((1.0 + level) * dz)
+    if len(out.Solids) == 0:
+        # The common operation is failing, let's try moving a bit the free
+        # surface
+        msg = QtGui.QApplication.translate(
+            "ship_console",
+            "Tank volume operation failed. The tool is retrying that"
+            " slightly moving the free surface position",
+            None)
+        App.Console.PrintWarning(msg + '\n')
+        random_bounds = 0.01 * dz
+        i = 0
+        while len(out.Solids) == 0 and i < COMMON_BOOLEAN_ITERATIONS:
+            i += 1
+            out = common((1.0 + level) * dz + random.uniform(-random_bounds,
+                                                            random_bounds))
+    return out
+
+
 class Tank:
     def __init__(self, obj, shapes, ship):
         """ Transform a generic object to a ship instance.
@@ -96,61 +140,10 @@ class Tank:
                 return fp.Shape.copy()
             return Units.Quantity(fp.Shape.Volume, Units.Volume)
 
-        # Build up the cutting box
-        bbox = fp.Shape.BoundBox
-        dx = bbox.XMax - bbox.XMin
-        dy = bbox.YMax - bbox.YMin
-        dz = bbox.ZMax - bbox.ZMin
-
-        box = App.ActiveDocument.addObject("Part::Box","Box")
-        length_format = USys.getLengthFormat()
-        box.Placement = Placement(Vector(bbox.XMin - dx,
-                                         bbox.YMin - dy,
-                                         bbox.ZMin - dz),
-                                  Rotation(App.Vector(0,0,1),0))
-        box.Length = length_format.format(3.0 * dx)
-        box.Width = length_format.format(3.0 * dy)
-        box.Height = length_format.format((1.0 + level) * dz)
-
-        # Create a new object on top of a copy of the tank shape
-        Part.show(fp.Shape.copy())
-        tank = App.ActiveDocument.Objects[-1]
-
-        # Compute the common boolean operation
-        App.ActiveDocument.recompute()
-        common = App.activeDocument().addObject("Part::MultiCommon",
-                                                "TankVolHelper")
-        common.Shapes = [tank, box]
-        App.ActiveDocument.recompute()
-        if len(common.Shape.Solids) == 0:
-            # The common operation is failing, let's try moving a bit the free
-            # surface
-            msg = QtGui.QApplication.translate(
-                "ship_console",
-                "Tank volume operation failed. The tool is retrying that"
-                " slightly moving the free surface position",
-                None)
-            App.Console.PrintWarning(msg + '\n')
-            rand_bounds = 0.01 * dz
-            i = 0
-            while len(common.Shape.Solids) == 0 and i < COMMON_BOOLEAN_ITERATIONS:
-                i += 1
-                box.Height = length_format.format(
-                    (1.0 + level) * dz + random.uniform(-random_bounds,
-                                                        random_bounds))
-                App.ActiveDocument.recompute()
-
+        shape = getFluidShape(fp.Shape, level)
         if return_shape:
-            ret_value = common.Shape.copy()
-        else:
-            ret_value = Units.Quantity(common.Shape.Volume, Units.Volume)
-
-        App.ActiveDocument.removeObject(common.Name)
-        App.ActiveDocument.removeObject(tank.Name)
-        App.ActiveDocument.removeObject(box.Name)
-        App.ActiveDocument.recompute()
-
-        return ret_value
+            return shape
+        return Units.Quantity(shape.Volume, Units.Volume)
 
     def getCoG(self, fp, vol, roll=Units.parseQuantity("0 deg"),
                               trim=Units.parseQuantity("0 deg")):
@@ -173,6 +166,7 @@ class Tank:
             return Vector()
         if vol >= fp.Shape.Volume:
             vol = 0.0
+            cog = Vector()
             for solid in fp.Shape.Solids:
                 vol += solid.Volume
                 sCoG = solid.CenterOfMass
@@ -185,19 +179,20 @@ class Tank:
             return cog
 
         # Get a first estimation of the level
-        level = vol.Value / fp.Shape.Volume
+        tank_vol = fp.Shape.Volume
+        level = vol.Value / tank_vol
 
-        # Transform the tank shape
-        current_placement = fp.Placement
-        m = current_placement.toMatrix()
+        # Transform a copy of the tank shape, the tank itself is not modified
+        m = Matrix()
         m.rotateX(roll.getValueAs("rad"))
         m.rotateY(-trim.getValueAs("rad"))
-        fp.Placement = Placement(m)
+        tank = fp.Shape.copy()
+        tank.transformShape(m)
 
         # Iterate to find the fluid shape
         for i in range(COMMON_BOOLEAN_ITERATIONS):
-            shape = self.getVolume(fp, level, return_shape=True)
-            error = (vol.Value - shape.Volume) / fp.Shape.Volume
+            shape = getFluidShape(tank, level)
+            error = (vol.Value - shape.Volume) / tank_vol
             if abs(error) < 0.01:
                 break
             level += error
@@ -216,8 +211,7 @@ class Tank:
             cog.y = cog.y / vol
             cog.z = cog.z / vol
 
-        # Untransform the object to retrieve the original position
-        fp.Placement = current_placement
+        # Untransform the center of gravity to the original position
         p = Part.Point(cog)
         m = Matrix()
         m.rotateY(trim.getValueAs("rad"))
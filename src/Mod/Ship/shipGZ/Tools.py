@@ -26,7 +26,9 @@ import FreeCAD as App
 import FreeCADGui as Gui
 from FreeCAD import Vector, Matrix, Placement
 import Part
+import ForkProcesses
 from FreeCAD import Units
+from PySide import QtGui
 import Instance as ShipInstance
 import WeightInstance
 import TankInstance
@@ -34,12 +36,60 @@ from shipHydrostatics import Tools as Hydrostatics
 
 
 G = Units.parseQuantity("9.81 m/s^2")
-MAX_EQUILIBRIUM_ITERS = 10
-DENS = Units.parseQuantity("1025 kg/m^3")
-TRIM_RELAX_FACTOR = 10.0
+MAX_EQUILIBRIUM_ITERS = Hydrostatics.MAX_EQUILIBRIUM_ITERS
+DENS = Hydrostatics.DENS
+TRIM_RELAX_FACTOR = Hydrostatics.TRIM_RELAX_FACTOR
 
 
-def solve(ship, weights, tanks, rolls, var_trim=True):
+class Loads:
+    """Loads of the ship, with plain float values, the masses in kg and the
+    lengths in mm.
+
+    mass -- Total mass, i.e. the weights and the tanks
+    tanks -- List of tanks, each one a tuple with the tank instance, the fluid
+    volume, and the fluid mass
+    """
+    def __init__(self, weights, tanks):
+        """Get the weights and the tanks.
+
+        Position arguments:
+        weights -- List of weights to consider
+        tanks -- List of tanks to consider (each one should be a tuple with the
+        tank instance, the density of the fluid inside, and the filling level
+        ratio)
+        """
+        # Get the unloaded weight (ignoring the tanks for the moment).
+        self.mass = 0.0
+        self.moment = Vector()
+        for w in weights:
+            self.mass += w.Proxy.getMass(w).Value
+            m = w.Proxy.getMoment(w)
+            self.moment += Vector(m[0].Value, m[1].Value, m[2].Value)
+
+        # Get the tanks weight
+        self.tanks = []
+        for t in tanks:
+            # t[0] = tank object
+            # t[1] = load density
+            # t[2] = filling level
+            vol = t[0].Proxy.getVolume(t[0], t[2])
+            tank_mass = (vol * t[1]).Value
+            self.tanks.append((t[0], vol, tank_mass))
+            self.mass += tank_mass
+
+    def cog(self, roll, trim):
+        """Get the center of gravity, which depends on the roll and trim angles
+        (in degrees) due to the tanks.
+        """
+        mom = Vector(self.moment)
+        roll = Units.Quantity(roll, Units.Angle)
+        trim = Units.Quantity(trim, Units.Angle)
+        for tank, vol, tank_mass in self.tanks:
+            mom += tank.Proxy.getCoG(tank, vol, roll, trim) * tank_mass
+        return mom * (1.0 / self.mass)
+
+
+def solve(ship, weights, tanks, rolls, var_trim=True, processes=0):
     """Compute the ship GZ stability curve
 
     Position arguments:
@@ -52,123 +102,122 @@ def solve(ship, weights, tanks, rolls, var_trim=True):
     Keyword arguments:
     var_trim -- True if the equilibrium trim should be computed for each roll
     angle, False if null trim angle can be used instead.
+    processes -- Number of forked processes computing the roll angles, each
+    one a contiguous range of them. The points are computed here if it is
+    lower than 2 (the default), or processes cannot be forked.
 
     Returned value:
     List of GZ curve points. Each point contains the GZ stability length, the
     equilibrium draft, and the equilibrium trim angle (0 deg if var_trim is
     False)
     """
-    # Get the unloaded weight (ignoring the tanks for the moment).
-    W = Units.parseQuantity("0 kg")
-    mom_x = Units.parseQuantity("0 kg*m")
-    mom_y = Units.parseQuantity("0 kg*m")
-    mom_z = Units.parseQuantity("0 kg*m")
-    for w in weights:
-        W += w.Proxy.getMass(w)
-        m = w.Proxy.getMoment(w)
-        mom_x += m[0]
-        mom_y += m[1]
-        mom_z += m[2]
-    COG = Vector(mom_x / W, mom_y / W, mom_z / W)
-    W = W * G
-
-    # Get the tanks weight
-    TW = Units.parseQuantity("0 kg")
-    VOLS = []
-    for t in tanks:
-        # t[0] = tank object
-        # t[1] = load density
-        # t[2] = filling level
-        vol = t[0].Proxy.getVolume(t[0], t[2])
-        VOLS.append(vol)
-        TW += vol * t[1]
-    TW = TW * G
-
-    points = []
-    for i,roll in enumerate(rolls):
-        App.Console.PrintMessage("{0} / {1}\n".format(i + 1, len(rolls)))
-        point = solve_point(W, COG, TW, VOLS,
-                            ship, tanks, roll, var_trim)
-        if point is None:
-            return []
-        points.append(point)
-
-    return points
-
-
-def solve_point(W, COG, TW, VOLS, ship, tanks, roll, var_trim=True):
-    """ Compute the ship GZ value.
-    @param W Empty ship weight.
-    @param COG Empty ship Center of mass.
-    @param TW Tanks weights.
-    @param VOLS List of tank volumes.
-    @param tanks Considered tanks.
-    @param roll Roll angle.
-    @param var_trim True if the trim angle should be recomputed at each roll
-    angle, False otherwise.
-    @return GZ value, equilibrium draft, and equilibrium trim angle (0 if
-    variable trim has not been requested)
-    """    
-    # Look for the equilibrium draft (and eventually the trim angle too)
-    max_draft = Units.Quantity(ship.Shape.BoundBox.ZMax, Units.Length)
-    draft = ship.Draft
-    max_disp = Units.Quantity(ship.Shape.Volume, Units.Volume) * DENS * G
-    if max_disp < W + TW:
+    loads = Loads(weights, tanks)
+    max_mass = ship.Shape.Volume * DENS.Value
+    if max_mass < loads.mass:
         msg = QtGui.QApplication.translate(
             "ship_console",
             "Too much weight! The ship will never displace water enough",
             None)
         App.Console.PrintError(msg + ' ({} vs. {})\n'.format(
-            (max_disp / G).UserString, ((W + TW) / G).UserString))
-        return None
+            Units.Quantity(max_mass, Units.Mass).UserString,
+            Units.Quantity(loads.mass, Units.Mass).UserString))
+        return []
 
-    trim = Units.parseQuantity("0 deg")
-    for i in range(MAX_EQUILIBRIUM_ITERS):
-        # Get the displacement, and the bouyance application point
-        disp, B, _ = Hydrostatics.displacement(ship,
-                                               draft,
-                                               roll,
-                                               trim)
-        disp *= G
+    rolls = [Units.Quantity(roll).Value for roll in rolls]
+    points = [None] * len(rolls)
+    processes = min(processes, len(rolls))
+    if processes > 1:
+        _solve_parallel(ship, loads, rolls, var_trim, processes, points)
 
-        # Add the tanks effect on the center of gravity
-        mom_x = Units.Quantity(COG.x, Units.Length) * W
-        mom_y = Units.Quantity(COG.y, Units.Length) * W
-        mom_z = Units.Quantity(COG.z, Units.Length) * W
-        for i,t in enumerate(tanks):
-            tank_weight = VOLS[i] * t[1] * G
-            tank_cog = t[0].Proxy.getCoG(t[0], VOLS[i], roll, trim)
-            mom_x += Units.Quantity(tank_cog.x, Units.Length) * tank_weight
-            mom_y += Units.Quantity(tank_cog.y, Units.Length) * tank_weight
-            mom_z += Units.Quantity(tank_cog.z, Units.Length) * tank_weight
-        cog_x = mom_x / (W + TW)
-        cog_y = mom_y / (W + TW)
-        cog_z = mom_z / (W + TW)
-        # Compute the errors
-        draft_error = -((disp - W - TW) / max_disp).Value
-        R_x = cog_x - Units.Quantity(B.x, Units.Length)
-        R_y = cog_y - Units.Quantity(B.y, Units.Length)
-        R_z = cog_z - Units.Quantity(B.z, Units.Length)
-        if not var_trim:
-            trim_error = 0.0
-        else:
-            trim_error = -TRIM_RELAX_FACTOR * R_x / ship.Length
+    # Each point starts from the equilibrium of the previous roll angle. The
+    # points the processes have not computed are computed here
+    draft = None
+    trim = 0.0
+    for i, roll in enumerate(rolls):
+        if points[i] is None:
+            App.Console.PrintMessage("{0} / {1}\n".format(i + 1, len(rolls)))
+            points[i] = solve_point(ship, loads, roll, var_trim, draft, trim)
+        _, draft, trim = points[i]
+
+    return [(Units.Quantity(gz, Units.Length),
+             Units.Quantity(draft, Units.Length),
+             Units.Quantity(trim, Units.Angle)) for gz, draft, trim in points]
+
+
+def _solve_worker(tasks, results, ship, loads, rolls, var_trim):
+    """Compute the points of contiguous ranges of roll angles in a forked
+    process, each one starting from the equilibrium of the previous one"""
+    for indices in iter(tasks.get, None):
+        draft = None
+        trim = 0.0
+        for i in indices:
+            try:
+                point = solve_point(ship, loads, rolls[i], var_trim, draft,
+                                    trim)
+            except Exception:
+                # computed again by the parent
+                results.put((i, None))
+                draft = None
+                trim = 0.0
+                continue
+            _, draft, trim = point
+            results.put((i, point))
+
+
+def _solve_parallel(ship, loads, rolls, var_trim, processes, points):
+    """Compute the GZ curve points in forked processes, each one taking a
+    contiguous range of roll angles. The points are stored in points, the ones
+    not computed are left as None."""
+    pool = ForkProcesses.Pool(_solve_worker, processes,
+                              (ship, loads, rolls, var_trim))
+    if not pool.workers:
+        return
+    n = len(rolls)
+    try:
+        for k in range(processes):
+            pool.put(list(range(n * k // processes, n * (k + 1) // processes)))
+        pool.finish()
+        for received in range(1, n + 1):
+            i, point = pool.get()
+            points[i] = point
+            App.Console.PrintMessage("{0} / {1}\n".format(received, n))
+    except ForkProcesses.WorkerError:
+        # the workers died, the remaining points are computed here
+        pass
+    finally:
+        pool.close()
 
-        # Check if we can tolerate the errors
-        if abs(draft_error) < 0.01 and abs(trim_error) < 0.1:
-            break
 
-        # Get the new draft and trim
-        draft += draft_error * max_draft
-        trim += trim_error * Units.Degree
+def solve_point(ship, loads, roll, var_trim=True, draft=None, trim=0.0):
+    """ Compute the ship GZ value.
+    @param ship Ship object.
+    @param loads Ship loads (see Loads).
+    @param roll Roll angle (degrees).
+    @param var_trim True if the trim angle should be recomputed at each roll
+    angle, False otherwise.
+    @param draft Initial draft (mm), e.g. the equilibrium draft of a close roll
+    angle. The ship draft if None.
+    @param trim Initial trim angle (degrees).
+    @return GZ value (mm), equilibrium draft (mm), and equilibrium trim angle
+    (degrees, the initial one if variable trim has not been requested)
+    """
+    # Look for the equilibrium draft (and eventually the trim angle too)
+    cog = loads.cog if loads.tanks else loads.cog(roll, trim)
+    draft, trim, B, cog = Hydrostatics.solveEquilibrium(ship,
+                                                        loads.mass,
+                                                        cog,
+                                                        roll,
+                                                        draft,
+                                                        trim,
+                                                        var_trim)
 
     # GZ should be provided in the Free surface oriented frame of reference
-    c = math.cos(roll.getValueAs('rad'))
-    s = math.sin(roll.getValueAs('rad'))
-    return c * R_y - s * R_z, draft, trim
+    c = math.cos(math.radians(roll))
+    s = math.sin(math.radians(roll))
+    return c * (cog.y - B.y) - s * (cog.z - B.z), draft, trim
 
 
-def gz(lc, rolls, var_trim=True):
+def gz(lc, rolls, var_trim=True, processes=0):
     """Compute the ship GZ stability curve
 
     Position arguments:
@@ -178,6 +227,7 @@ def gz(lc, rolls, var_trim=True):
     Keyword arguments:
     var_trim -- True if the equilibrium trim should be computed for each roll
     angle, False if null trim angle can be used instead.
+    processes -- Number of processes computing the roll angles (see solve)
 
     Returned value:
     List of GZ curve points. Each point contains the GZ stability length, the
@@ -304,4 +354,4 @@ def gz(lc, rolls, var_trim=True):
             continue
         tanks.append((t, dens, level))
 
-    return solve(ship, weights, tanks, rolls, var_trim)
+    return solve(ship, weights, tanks, rolls, var_trim, processes)
@@ -23,7 +23,8 @@
 
 import math
 import random
-from FreeCAD import Vector, Rotation, Matrix, Placement
+from collections import OrderedDict
+from FreeCAD import Vector, Matrix
 import Part
 from FreeCAD import Units
 import FreeCAD as App
@@ -31,11 +32,27 @@ import FreeCADGui as Gui
 from PySide import QtGui, QtCore
 import Instance
 from shipUtils import Math
-import shipUtils.Units as USys
 
 
 DENS = Units.parseQuantity("1025 kg/m^3")  # Salt water
 COMMON_BOOLEAN_ITERATIONS = 10
+# Number of underwater sides memoised per ship shape
+MAX_CACHED_SIDES = 64
+# Number of displacements memoised per ship shape
+MAX_CACHED_DISPLACEMENTS = 4096
+# Number of ship shapes with an underwater cache
+MAX_CACHED_SHAPES = 8
+# Default number of sections of the sections table
+SECTIONS_NUMBER = 100
+# Deflection of the sections discretization, relative to the breadth + height
+SECTIONS_DEFLECTION = 1.0E-4
+# Maximum number of iterations of the equilibrium solver
+MAX_EQUILIBRIUM_ITERS = 10
+# Trim angle correction (in degrees) per relative longitudinal misalignment
+TRIM_RELAX_FACTOR = 10.0
+
+# Underwater caches, by shape hash code
+_caches = OrderedDict()
 
 
 def placeShipShape(shape, draft, roll, trim):
@@ -75,6 +92,9 @@ def getUnderwaterSide(shape, force=True):
     """Get the underwater shape, simply cropping the provided shape by the z=0
     free surface plane.
 
+    The boolean operation is directly carried out on the shapes, so no objects
+    are added to the active document.
+
     Position arguments:
     shape -- Solid shape to be cropped
 
@@ -86,10 +106,6 @@ def getUnderwaterSide(shape, force=True):
     Returned value:
     Cropped shape. It is not modifying the input shape
     """
-    # Convert the shape into an active object
-    Part.show(shape)
-    orig = App.ActiveDocument.Objects[-1]
-
     bbox = shape.BoundBox
     xmin = bbox.XMin
     xmax = bbox.XMax
@@ -103,20 +119,18 @@ def getUnderwaterSide(shape, force=True):
     B = ymax - ymin
     H = zmax - zmin
 
-    box = App.ActiveDocument.addObject("Part::Box","Box")
-    length_format = USys.getLengthFormat()
-    box.Placement = Placement(Vector(xmin - L, ymin - B, zmin - H),
-                              Rotation(App.Vector(0,0,1),0))
-    box.Length = length_format.format(3.0 * L)
-    box.Width = length_format.format(3.0 * B)
-    box.Height = length_format.format(- zmin + H)
-
-    App.ActiveDocument.recompute()
-    common = App.activeDocument().addObject("Part::MultiCommon",
-                                            "UnderwaterSideHelper")
-    common.Shapes = [orig, box]
-    App.ActiveDocument.recompute()
-    if force and len(common.Shape.Solids) == 0:
+    def common(height):
+        if height <= 0.0:
+            return Part.Shape()
+        box = Part.makeBox(3.0 * L, 3.0 * B, height,
+                           Vector(xmin - L, ymin - B, zmin - H))
+        try:
+            return shape.common(box)
+        except Part.OCCError:
+            return Part.Shape()
+
+    out = common(- zmin + H)
+    if force and len(out.Solids) == 0:
         # The common operation is failing, let's try moving a bit the free
         # surface
         msg = QtGui.QApplication.translate(
@@ -128,20 +142,333 @@ def getUnderwaterSide(shape, force=True):
         App.Console.PrintWarning(msg + '\n')
         random_bounds = 0.01 * H
         i = 0
-        while len(common.Shape.Solids) == 0 and i < COMMON_BOOLEAN_ITERATIONS:
+        while len(out.Solids) == 0 and i < COMMON_BOOLEAN_ITERATIONS:
             i += 1
-            box.Height = length_format.format(
-                - zmin + H + random.uniform(-random_bounds, random_bounds))
-            App.ActiveDocument.recompute()
-
-    out = common.Shape
-    App.ActiveDocument.removeObject(common.Name)
-    App.ActiveDocument.removeObject(orig.Name)
-    App.ActiveDocument.removeObject(box.Name)
-    App.ActiveDocument.recompute()
+            out = common(- zmin + H + random.uniform(-random_bounds,
+                                                     random_bounds))
     return out
 
 
+def _value(q):
+    """Plain float value of a quantity, in mm for lengths and degrees for
+    angles, floats are returned as they are"""
+    try:
+        return float(q.Value)
+    except AttributeError:
+        return float(q)
+
+
+class UnderwaterCache:
+    """Document free hydrostatics of a ship shape. The underwater sides and the
+    displacements are memoised by (draft, roll, trim), so repeated evaluations,
+    like the ones of the GZ equilibrium solver, are not repeating the boolean
+    operations. The shapes returned are shared, do not modify them.
+
+    Optionally a table of transversal sections can be built (see
+    buildSections), such that the displacement and the bouyance center of the
+    unrolled ship are integrated from the sections instead of computed by
+    boolean operations.
+
+    Do not create it directly, use getUnderwaterCache instead.
+    """
+    def __init__(self, shape):
+        self.shape = shape
+        self.base_z = shape.BoundBox.ZMin
+        self.sides = {}
+        self.disps = {}
+        self.sections = None
+        self.dx = 0.0
+
+    def key(self, draft, roll, trim):
+        return (round(_value(draft), 6),
+                round(_value(roll), 6),
+                round(_value(trim), 6))
+
+    def underwaterSide(self, draft, roll, trim, force=True):
+        """Get the underwater side of the ship placed with placeShipShape.
+
+        Position arguments:
+        draft -- Ship draft
+        roll -- Roll angle
+        trim -- Trim angle
+
+        Keyword arguments:
+        force -- See getUnderwaterSide (True by default)
+
+        Returned values:
+        shape -- The underwater side, shared by all the callers asking for the
+        same position. Copy it before modifying it
+        base_z -- See placeShipShape
+        """
+        key = self.key(draft, roll, trim) + (force,)
+        try:
+            return self.sides[key]
+        except KeyError:
+            pass
+        draft, roll, trim = key[:3]
+        shape, base_z = placeShipShape(self.shape.copy(), draft, roll, trim)
+        shape = getUnderwaterSide(shape, force)
+        if len(self.sides) >= MAX_CACHED_SIDES:
+            self.sides.clear()
+        self.sides[key] = (shape, base_z)
+        return shape, base_z
+
+    def displacement(self, draft, roll, trim):
+        """Compute the underwater volume.
+
+        Position arguments:
+        draft -- Ship draft
+        roll -- Roll angle
+        trim -- Trim angle
+
+        Returned values:
+        vol -- The underwater volume (mm^3)
+        B -- Bouyance application point, referred to the original ship position.
+        It is shared by all the callers asking for the same position, copy it
+        before modifying it
+        Cb -- Block coefficient, None if the underwater side is null
+        """
+        key = self.key(draft, roll, trim)
+        try:
+            return self.disps[key]
+        except KeyError:
+            pass
+        draft, roll, trim = key
+        if self.sections is not None and roll == 0.0:
+            result = self.integrateSections(draft, trim)
+        else:
+            result = self.computeDisplacement(draft, roll, trim)
+        if len(self.disps) >= MAX_CACHED_DISPLACEMENTS:
+            self.disps.clear()
+        self.disps[key] = result
+        return result
+
+    def computeDisplacement(self, draft, roll, trim):
+        """Compute the underwater volume by means of a boolean operation. The
+        arguments are plain floats (mm and degrees). See displacement."""
+        shape, base_z = self.underwaterSide(draft, roll, trim)
+
+        vol = 0.0
+        cog = Vector()
+        if len(shape.Solids) > 0:
+            for solid in shape.Solids:
+                vol += solid.Volume
+                sCoG = solid.CenterOfMass
+                cog.x = cog.x + sCoG.x * solid.Volume
+                cog.y = cog.y + sCoG.y * solid.Volume
+                cog.z = cog.z + sCoG.z * solid.Volume
+            cog.x = cog.x / vol
+            cog.y = cog.y / vol
+            cog.z = cog.z / vol
+        else:
+            return 0.0, Vector(), None
+
+        bbox = shape.BoundBox
+        Vol = (bbox.XMax - bbox.XMin) * (bbox.YMax - bbox.YMin) * abs(bbox.ZMin)
+
+        # Undo the transformations on the bouyance point
+        B = Part.Point(Vector(cog.x, cog.y, cog.z))
+        m = Matrix()
+        m.move(Vector(0.0, 0.0, draft))
+        m.move(Vector(-draft * math.sin(math.radians(trim)), 0.0, 0.0))
+        m.rotateY(math.radians(trim))
+        m.move(Vector(0.0,
+                      -draft * math.sin(math.radians(roll)),
+                      base_z))
+        m.rotateX(-math.radians(roll))
+        B.transform(m)
+
+        try:
+            cb = vol / Vol
+        except ZeroDivisionError:
+            cb = None
+        return vol, Vector(B.X, B.Y, B.Z), cb
+
+    def buildSections(self, n=SECTIONS_NUMBER):
+        """Build the table of transversal sections used to integrate the
+        displacement of the unrolled ship. Each section is stored as a list of
+        polygons discretizing the sliced wires.
+
+        Keyword arguments:
+        n -- Number of sections (see SECTIONS_NUMBER)
+        """
+        bbox = self.shape.BoundBox
+        self.dx = (bbox.XMax - bbox.XMin) / n
+        deflection = SECTIONS_DEFLECTION * (bbox.YLength + bbox.ZLength)
+        sections = []
+        for i in range(n):
+            x = bbox.XMin + (i + 0.5) * self.dx
+            try:
+                wires = self.shape.slice(Vector(1,0,0), x)
+            except Part.OCCError:
+                msg = QtGui.QApplication.translate(
+                    "ship_console",
+                    "Part.OCCError: Transversal area computation failed",
+                    None)
+                App.Console.PrintError(msg + '\n')
+                wires = []
+            polygons = []
+            for w in wires:
+                points = w.discretize(Deflection=deflection)
+                polygons.append(([p.y for p in points], [p.z for p in points]))
+            section = []
+            for j, (ys, zs) in enumerate(polygons):
+                # The holes are inside of an odd number of other polygons
+                sign = 1.0
+                for k, (ys2, zs2) in enumerate(polygons):
+                    if j != k and Math.isInside(ys[0], zs[0], ys2, zs2):
+                        sign = -sign
+                # Orientate the polygons, such that the holes are subtracted
+                area, _, _, _ = Math.clipPolygon(ys, zs, bbox.ZMax + 1.0)
+                if area < 0.0:
+                    sign = -sign
+                section.append((sign, ys, zs))
+            sections.append((x, section))
+        self.sections = sections
+        self.disps.clear()
+
+    def integrateSections(self, draft, trim):
+        """Compute the underwater volume of the unrolled ship integrating the
+        sections table. The arguments are plain floats (mm and degrees). See
+        displacement."""
+        st = math.sin(math.radians(trim))
+        ct = math.cos(math.radians(trim))
+        base_z = self.base_z
+        dx = self.dx
+        vol = 0.0
+        mom_x = 0.0
+        mom_y = 0.0
+        mom_z = 0.0
+        xmin = ymin = zmin = float('inf')
+        xmax = ymax = float('-inf')
+        for x, section in self.sections:
+            # Free surface height at the section
+            z_fs = base_z + (draft - x * st) / ct
+            for sign, ys, zs in section:
+                area, area_y, area_z, points = Math.clipPolygon(ys, zs, z_fs)
+                if not points:
+                    continue
+                vol += sign * area * dx
+                mom_x += sign * area * x * dx
+                mom_y += sign * area_y * dx
+                mom_z += sign * area_z * dx
+                # Bounding box in the free surface oriented frame of reference
+                for y, z in points:
+                    xx = x * ct - (z - base_z) * st + draft * st
+                    zz = x * st + (z - base_z) * ct - draft
+                    xmin = min(xmin, xx)
+                    xmax = max(xmax, xx)
+                    ymin = min(ymin, y)
+                    ymax = max(ymax, y)
+                    zmin = min(zmin, zz)
+        if vol <= 0.0:
+            return 0.0, Vector(), None
+        Vol = (xmax - xmin + dx * ct) * (ymax - ymin) * abs(zmin)
+        try:
+            cb = vol / Vol
+        except ZeroDivisionError:
+            cb = None
+        return vol, Vector(mom_x / vol, mom_y / vol, mom_z / vol), cb
+
+
+def getUnderwaterCache(shape):
+    """Get the underwater cache of a shape, creating it if it does not exist
+    yet. A cache is kept for the last MAX_CACHED_SHAPES shapes.
+
+    Position arguments:
+    shape -- Ship shape
+
+    Returned value:
+    The UnderwaterCache instance. The shapes and points it returns are shared,
+    the hydrostatics functions of this module are only reading them
+    """
+    key = shape.hashCode()
+    cache = _caches.pop(key, None)
+    if cache is None or not cache.shape.isSame(shape):
+        cache = UnderwaterCache(shape)
+    _caches[key] = cache
+    while len(_caches) > MAX_CACHED_SHAPES:
+        _caches.popitem(last=False)
+    return cache
+
+
+def buildSections(ship, n=SECTIONS_NUMBER):
+    """Build the transversal sections table of a ship, such that the
+    displacement and the bouyance center of the unrolled ship are integrated
+    from the sections instead of computed by boolean operations. The table is
+    kept until the ship shape changes.
+
+    Position arguments:
+    ship -- Ship object (see createShip)
+
+    Keyword arguments:
+    n -- Number of sections (see SECTIONS_NUMBER)
+    """
+    getUnderwaterCache(ship.Shape).buildSections(n)
+
+
+def solveEquilibrium(ship, mass, cog, roll=0.0, draft=None, trim=0.0,
+                     var_trim=True, max_iters=MAX_EQUILIBRIUM_ITERS):
+    """Look for the floating equilibrium draft and trim angle of the ship at a
+    given roll angle. All the values are plain floats, the masses in kg, the
+    lengths in mm and the angles in degrees.
+
+    Position arguments:
+    ship -- Ship object (see createShip)
+    mass -- Total mass, i.e. the ship and its loads
+    cog -- Center of gravity (a Vector), or a function of the roll and trim
+    angles returning it, for loads depending on the ship attitude, like tanks
+
+    Keyword arguments:
+    roll -- Roll angle (0 degrees by default)
+    draft -- Initial draft, e.g. the one of a close solution (Design ship draft
+    by default)
+    trim -- Initial trim angle (0 degrees by default)
+    var_trim -- True if the equilibrium trim angle should be computed, False if
+    the initial trim angle should be kept
+    max_iters -- Maximum number of iterations (see MAX_EQUILIBRIUM_ITERS)
+
+    Returned values:
+    draft -- Equilibrium draft
+    trim -- Equilibrium trim angle
+    B -- Bouyance application point
+    cog -- Center of gravity
+
+    The points are referred to the original ship position.
+    """
+    if draft is None:
+        draft = ship.Draft
+    draft = _value(draft)
+    roll = _value(roll)
+    trim = _value(trim)
+    cache = getUnderwaterCache(ship.Shape)
+    max_draft = ship.Shape.BoundBox.ZMax
+    max_vol = ship.Shape.Volume
+    length = _value(ship.Length)
+    vol_target = mass / DENS.Value
+
+    for i in range(max_iters):
+        # Get the displacement, and the bouyance application point
+        vol, B, _ = cache.displacement(draft, roll, trim)
+        G = cog(roll, trim) if callable(cog) else cog
+        # Compute the errors
+        draft_error = -(vol - vol_target) / max_vol
+        if not var_trim:
+            trim_error = 0.0
+        else:
+            trim_error = -TRIM_RELAX_FACTOR * (G.x - B.x) / length
+
+        # Check if we can tolerate the errors
+        if abs(draft_error) < 0.01 and abs(trim_error) < 0.1:
+            break
+
+        # Get the new draft and trim
+        draft += draft_error * max_draft
+        trim += trim_error
+
+    return draft, trim, Vector(B.x, B.y, B.z), G
+
+
 def areas(ship, n, draft=None,
                    roll=Units.parseQuantity("0 deg"),
                    trim=Units.parseQuantity("0 deg")):
@@ -167,8 +494,7 @@ def areas(ship, n, draft=None,
     if draft is None:
         draft = ship.Draft
 
-    shape, _ = placeShipShape(ship.Shape.copy(), draft, roll, trim)
-    shape = getUnderwaterSide(shape)
+    shape, _ = getUnderwaterCache(ship.Shape).underwaterSide(draft, roll, trim)
 
     # Sections distance computation
     bbox = shape.BoundBox
@@ -236,40 +562,10 @@ def displacement(ship, draft=None,
     if draft is None:
         draft = ship.Draft
 
-    shape, base_z = placeShipShape(ship.Shape.copy(), draft, roll, trim)
-    shape = getUnderwaterSide(shape)
-
-    vol = 0.0
-    cog = Vector()
-    if len(shape.Solids) > 0:
-        for solid in shape.Solids:
-            vol += solid.Volume
-            sCoG = solid.CenterOfMass
-            cog.x = cog.x + sCoG.x * solid.Volume
-            cog.y = cog.y + sCoG.y * solid.Volume
-            cog.z = cog.z + sCoG.z * solid.Volume
-        cog.x = cog.x / vol
-        cog.y = cog.y / vol
-        cog.z = cog.z / vol
-
-    bbox = shape.BoundBox
-    Vol = (bbox.XMax - bbox.XMin) * (bbox.YMax - bbox.YMin) * abs(bbox.ZMin)
-
-    # Undo the transformations on the bouyance point
-    B = Part.Point(Vector(cog.x, cog.y, cog.z))
-    m = Matrix()
-    m.move(Vector(0.0, 0.0, draft))
-    m.move(Vector(-draft * math.sin(trim.getValueAs("rad")), 0.0, 0.0))
-    m.rotateY(trim.getValueAs("rad"))
-    m.move(Vector(0.0,
-                  -draft * math.sin(roll.getValueAs("rad")),
-                  base_z))
-    m.rotateX(-roll.getValueAs("rad"))
-    B.transform(m)
-
-    try:
-        cb = vol / Vol
-    except ZeroDivisionError:
+    vol, B, cb = getUnderwaterCache(ship.Shape).displacement(draft,
+                                                             roll,
+                                                             trim)
+    if cb is None:
         msg = QtGui.QApplication.translate(
             "ship_console",
             "ZeroDivisionError: Null volume found during the displacement"
@@ -278,10 +574,9 @@ def displacement(ship, draft=None,
         App.Console.PrintError(msg + '\n')
         cb = 0.0
 
-
     # Return the computed data
     return (DENS * Units.Quantity(vol, Units.Volume),
-            Vector(B.X, B.Y, B.Z),
+            Vector(B.x, B.y, B.z),
             cb)
 
 
@@ -300,8 +595,8 @@ def wettedArea(shape, draft, roll=Units.parseQuantity("0 deg"),
     Returned value:
     The wetted area, i.e. The underwater side area
     """
-    shape, _ = placeShipShape(shape.copy(), draft, roll, trim)
-    shape = getUnderwaterSide(shape, force=False)
+    shape, _ = getUnderwaterCache(shape).underwaterSide(draft, roll, trim,
+                                                        force=False)
 
     area = 0.0
     for f in shape.Faces:
@@ -449,10 +744,7 @@ def mainFrameCoeff(ship, draft=None):
     if draft is None:
         draft = ship.Draft
 
-    shape, _ = placeShipShape(ship.Shape.copy(), draft,
-                              Units.parseQuantity("0 deg"),
-                              Units.parseQuantity("0 deg"))
-    shape = getUnderwaterSide(shape)
+    shape, _ = getUnderwaterCache(ship.Shape).underwaterSide(draft, 0.0, 0.0)
 
     try:
         f = Part.Face(shape.slice(Vector(1,0,0), 0.0))
@@ -55,3 +55,56 @@ def isSameVertex(a,b,tol=0.0001):
     if isAprox(a.X,b.X,tol) and isAprox(a.Y,b.Y,tol) and isAprox(a.Z,b.Z,tol):
         return True
     return False
+
+def isInside(y, z, ys, zs):
+    """returns if a point is inside a polygon (even-odd rule)
+    @param y Y coordinate of the point.
+    @param z Z coordinate of the point.
+    @param ys Y coordinates of the polygon vertices.
+    @param zs Z coordinates of the polygon vertices.
+    @return True if the point is inside the polygon, False otherwise
+    """
+    inside = False
+    n = len(ys)
+    for i in range(n):
+        y0, z0 = ys[i - 1], zs[i - 1]
+        y1, z1 = ys[i], zs[i]
+        if (z0 > z) != (z1 > z):
+            if y < y0 + (z - z0) * (y1 - y0) / (z1 - z0):
+                inside = not inside
+    return inside
+
+def clipPolygon(ys, zs, z_max):
+    """returns the part of a polygon below an horizontal line
+    @param ys Y coordinates of the polygon vertices.
+    @param zs Z coordinates of the polygon vertices.
+    @param z_max Height of the line.
+    @return Signed area of the clipped polygon, its first moments (the area
+    multiplied by the centroid y and z coordinates), and the list of (y, z)
+    vertices of the clipped polygon
+    @note The area is positive for counterclockwise polygons
+    """
+    n = len(ys)
+    if max(zs) <= z_max:
+        points = list(zip(ys, zs))
+    else:
+        points = []
+        for i in range(n):
+            y0, z0 = ys[i - 1], zs[i - 1]
+            y1, z1 = ys[i], zs[i]
+            if (z0 <= z_max) != (z1 <= z_max):
+                f = (z_max - z0) / (z1 - z0)
+                points.append((y0 + f * (y1 - y0), z_max))
+            if z1 <= z_max:
+                points.append((y1, z1))
+    area = 0.0
+    area_y = 0.0
+    area_z = 0.0
+    for i in range(len(points)):
+        y0, z0 = points[i - 1]
+        y1, z1 = points[i]
+        cross = y0 * z1 - y1 * z0
+        area += cross
+        area_y += (y0 + y1) * cross
+        area_z += (z0 + z1) * cross
+    return 0.5 * area, area_y / 6.0, area_z / 6.0, points
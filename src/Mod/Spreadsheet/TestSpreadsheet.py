@@ -861,6 +861,21 @@ class SpreadsheetCases(unittest.TestCase):
         self.assertEqual(sheet.get('C1'), Units.Quantity('3 mm'))
 
 
+    def testImportXLSX(self):
+        """ Import of a workbook with shared formulas, references to other sheets and aliases"""
+        import importXLSX
+        fileName = self.TempPath + os.sep + 'benchmark.xlsx'
+        importXLSX.writeBenchmarkWorkbook(fileName, rows=20, sheets=2)
+        importXLSX.insert(fileName, self.doc.Name)
+        sheet1 = self.doc.getObject('Sheet1')
+        sheet2 = self.doc.getObject('Sheet2')
+        self.assertEqual(sheet2.C5, 10)
+        self.assertEqual(sheet1.E5, 11)
+        self.assertEqual(sheet1.B3, 'item 3')
+        self.assertEqual(sheet2.total2, 420)
+        self.assertAlmostEqual(sheet1.D7, 1 + math.pi)
+        os.remove(fileName)
+
     def tearDown(self):
         #closing doc
         FreeCAD.closeDocument(self.doc.Name)
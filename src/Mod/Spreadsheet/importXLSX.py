@@ -30,6 +30,12 @@ __url__ = ["http://www.freecadweb.org"]
 '''
 This library imports an Excel-XLSX-file into FreeCAD.
 
+Version 1.2:
+The worksheets are read as a stream instead of a full DOM and the cells
+of a sheet are set at once. Repeated formulas are translated only once,
+shared formulas are supported. The sheets are filled in the order of
+their references, so a single recompute is enough.
+
 Version 1.1, Nov. 2016:
 Changed parser, adds rad-unit to trigonometric functions in order
 to give the same result in FreeCAD.
@@ -54,8 +60,15 @@ known issues:
 '''
 
 
+import os
+import re
+import sys
+import tempfile
 import zipfile
-import xml.dom.minidom
+try:
+  import xml.etree.cElementTree as ElementTree
+except ImportError:
+  import xml.etree.ElementTree as ElementTree
 import FreeCAD as App
 
 try: import FreeCADGui
@@ -315,140 +328,321 @@ class FormulaTranslator(object):
 
 
 
-def getText(nodelist):
-  rc = []
-  for node in nodelist:
-    if node.nodeType == node.TEXT_NODE:
-      rc.append(node.data)
-  return ''.join(rc)
+# namespace of the elements of the workbook, the worksheets and the shared strings
+mainNS = '{http://schemas.openxmlformats.org/spreadsheetml/2006/main}'
 
+# A cell reference in a translated formula. The relative parts are shifted
+# for the cells using a shared formula.
+cellRefPattern = re.compile(r'(?<![A-Za-z0-9_$])(\$?)([A-Z]{1,3})(\$?)([0-9]+)(?![A-Za-z0-9_(!.])')
 
-def handleWorkSheet(theDom, actSheet, strList):
-  rows = theDom.getElementsByTagName("row")
-  for row in rows:
-    handleCells(row.getElementsByTagName("c"), actSheet, strList)
-  
+# The name of another sheet in an excel formula: Sheet2!A1
+sheetRefPattern = re.compile(r'''([^\s()=<>,!+\-*/^;:&"']+)!''')
 
-def handleCells(cellList, actCellSheet, sList):
-  for cell in cellList:
-    cellAtts = cell.attributes
-    refRef = cellAtts.getNamedItem("r")
-    ref = getText(refRef.childNodes)
+# A cell address like B12
+cellAddrPattern = re.compile(r'([A-Z]+)([0-9]+)')
 
-    refType = cellAtts.getNamedItem("t")
-    if refType:
-      cellType = getText(refType.childNodes)
-    else:
-      cellType = 'n'   # FIXME: some cells don't have t and s attributes
+# A defined name referring to a single cell: Sheet1!$B$2
+aliasRefPattern = re.compile(r'''^'?(.+?)'?!\$?([A-Z]+)\$?([0-9]+)$''')
 
-    #print("reference: ", ref, ' Cell type: ', cellType)
-    
-    if cellType == 'inlineStr':
-      iStringList = cell.getElementsByTagName("is")
-      #print('iString: ', iStringList)
-      for stringEle in iStringList:
-        tElement = stringEle.getElementsByTagName('t')[0]
-        theString = getText(tElement.childNodes)
-        
-        #print('theString: ', theString)
-        actCellSheet.set(ref, theString.encode('utf8'))
 
-    formulaRef = cell.getElementsByTagName("f")
-    if len(formulaRef)==1:
-      theFormula = getText(formulaRef[0].childNodes)
-      #print("theFormula: ", theFormula)
-      fTrans = FormulaTranslator()
-      actCellSheet.set(ref, fTrans.translateForm(theFormula))
+def columnNumber(letters):
+  ''' Column number of the column letters, A is 1.'''
+  col = 0
+  for c in letters:
+    col = col * 26 + ord(c) - 64
+  return col
 
-    else:
-      valueRef = cell.getElementsByTagName("v")
-      #print('valueRef: ', valueRef)
-      if len(valueRef)==1:
-        valueRef = cell.getElementsByTagName("v")[0]
-        if valueRef:
-          theValue = getText(valueRef.childNodes)
-          #print("theValue: ", theValue)
-          if cellType == 'n':
-            actCellSheet.set(ref, theValue)
-          if cellType == 's':
-            actCellSheet.set(ref, (sList[int(theValue)]).encode('utf8'))
+
+def columnLetters(col):
+  ''' Column letters of the column number, 1 is A.'''
+  letters = ''
+  while col > 0:
+    col, rest = divmod(col - 1, 26)
+    letters = chr(65 + rest) + letters
+  return letters
+
+
+def toStr(theString):
+  ''' The string as expected by the Sheet methods, utf8 in python 2.'''
+  if sys.version_info.major < 3 and not isinstance(theString, str):
+    return theString.encode('utf8')
+  return theString
+
+
+class FormulaCache(object):
+  ''' The translations of the formulas of a workbook. A formula used more
+  than once is translated only once. A shared formula is translated for
+  the cell defining it, the other cells using it get a copy with shifted
+  relative references.'''
+  def __init__(self):
+    self.translations = dict()
+    self.sharedFormulas = dict()
+
+  def translate(self, theFormula):
+    result = self.translations.get(theFormula)
+    if result is None:
+      result = FormulaTranslator().translateForm(theFormula)
+      self.translations[theFormula] = result
+    return result
+
+  def defineShared(self, key, theFormula, row, col):
+    ''' Stores the translation of the shared formula key as a list of
+    strings and (colAbs, col, rowAbs, row) tuples of the references.'''
+    parts = []
+    for i, text in enumerate(self.translate(theFormula).split('"')):
+      if i > 0:
+        parts.append('"')
+      if i % 2:
+        # inside of a string
+        parts.append(text)
+        continue
+      pos = 0
+      for m in cellRefPattern.finditer(text):
+        parts.append(text[pos:m.start()])
+        parts.append((m.group(1), columnNumber(m.group(2)), m.group(3), int(m.group(4))))
+        pos = m.end()
+      parts.append(text[pos:])
+    self.sharedFormulas[key] = (parts, row, col)
+
+  def shared(self, key, row, col):
+    ''' Translation of the shared formula key for the cell at row, col.
+    None if the formula is unknown or a reference leaves the sheet.'''
+    entry = self.sharedFormulas.get(key)
+    if entry is None:
+      return None
+    parts, masterRow, masterCol = entry
+    dRow = row - masterRow
+    dCol = col - masterCol
+    result = []
+    for part in parts:
+      if isinstance(part, tuple):
+        colAbs, refCol, rowAbs, refRow = part
+        if not colAbs:
+          refCol += dCol
+        if not rowAbs:
+          refRow += dRow
+        if refCol < 1 or refRow < 1:
+          return None
+        result.append(colAbs + columnLetters(refCol) + rowAbs + str(refRow))
+      else:
+        result.append(part)
+    return ''.join(result)
+
+
+def getText(element):
+  ''' The text of a string element, rich text is joined, phonetic runs are skipped.'''
+  if element is None:
+    return ''
+  rc = []
+  for child in element:
+    if child.tag == mainNS + 't':
+      rc.append(child.text or '')
+    elif child.tag == mainNS + 'r':
+      for runChild in child:
+        if runChild.tag == mainNS + 't':
+          rc.append(runChild.text or '')
+  return ''.join(rc)
+
+
+def handleWorkSheet(theFile, sheetName, strList, formulas):
+  ''' Reads the cells of a worksheet without building the whole tree.
+  Returns the list of (row, column, content) of the cells in the order
+  of the file and the set of names of other sheets the formulas refer to.'''
+  cells = []
+  sheetRefs = set()
+  rowTag = mainNS + 'row'
+  cellTag = mainNS + 'c'
+  lastRow = 0
+  for event, elem in ElementTree.iterparse(theFile):
+    if elem.tag != rowTag:
+      continue
+    rowAttr = elem.get('r')
+    row = int(rowAttr) if rowAttr else lastRow + 1
+    lastRow = row
+    col = 0
+    for cell in elem:
+      if cell.tag != cellTag:
+        continue
+      ref = cell.get('r')
+      if ref:
+        col = columnNumber(cellAddrPattern.match(ref).group(1))
+      else:
+        col += 1
+      content = handleCell(cell, sheetName, row, col, strList, formulas, sheetRefs)
+      if content:
+        cells.append((row, col, content))
+    # the cells already read are not needed anymore
+    elem.clear()
+  return cells, sheetRefs
+
+
+def handleCell(cell, sheetName, row, col, sList, formulas, sheetRefs):
+  ''' The content of a cell for Sheet.set, None for cells which are not imported.'''
+  cellType = cell.get('t', 'n')   # FIXME: some cells don't have t and s attributes
+  content = None
+
+  if cellType == 'inlineStr':
+    content = getText(cell.find(mainNS + 'is'))
+
+  formulaRef = cell.find(mainNS + 'f')
+  if formulaRef is not None:
+    theFormula = formulaRef.text
+    index = formulaRef.get('si')
+    if formulaRef.get('t') == 'shared' and index is not None:
+      key = (sheetName, index)
+      if theFormula:
+        formulas.defineShared(key, theFormula, row, col)
+      content = formulas.shared(key, row, col)
+    elif theFormula:
+      content = formulas.translate(theFormula)
+    if theFormula and '!' in theFormula:
+      sheetRefs.update(sheetRefPattern.findall(theFormula))
+    if content is not None:
+      return content
+
+  valueRef = cell.find(mainNS + 'v')
+  if valueRef is not None and valueRef.text:
+    theValue = valueRef.text
+    if cellType == 'n':
+      content = theValue
+    elif cellType == 's':
+      content = sList[int(theValue)]
+  return content
 
 
 def handleWorkBook(theBook, sheetDict, Doc):
-  theSheets = theBook.getElementsByTagName("sheet")
-  #print("theSheets: ", theSheets)
-  for sheet in theSheets:
-    sheetAtts = sheet.attributes
-    nameRef = sheetAtts.getNamedItem("name")
-    sheetName = getText(nameRef.childNodes)
-    #print("table name: ", sheetName)
-    idRef = sheetAtts.getNamedItem("sheetId")
-    sheetFile = "sheet" + getText(idRef.childNodes) + '.xml'
-    #print("sheetFile: ", sheetFile)
+  ''' Adds a FreeCAD-spreadsheet for every sheet of the workbook. Returns
+  the sheet names in the order of the workbook and a dict of sheet name
+  to the list of (address, alias) of the defined names.'''
+  theBookTree = ElementTree.parse(theBook)
+  sheetNames = []
+  for sheet in theBookTree.iter(mainNS + 'sheet'):
+    sheetName = sheet.get('name')
+    sheetFile = "sheet" + sheet.get('sheetId') + '.xml'
     # add FreeCAD-spreadsheet
-    sheetDict[sheetName] = (Doc.addObject('Spreadsheet::Sheet', sheetName), sheetFile)
-    
-  theAliases = theBook.getElementsByTagName("definedName")
-  for theAlias in theAliases:
-    aliAtts = theAlias.attributes
-    nameRef = aliAtts.getNamedItem("name")
-    aliasName = getText(nameRef.childNodes)
-    #print("aliasName: ", aliasName)
-
-    aliasRef = getText(theAlias.childNodes)
-    if '$' in aliasRef:
-      refList = aliasRef.split('!$')
-      adressList = refList[1].split('$')
-      #print("aliasRef: ", aliasRef)
-      #print('Sheet Name: ', refList[0])
-      #print('Adress: ', adressList[0] + adressList[1])
-      actSheet, sheetFile = sheetDict[refList[0]]
-      actSheet.setAlias(adressList[0]+adressList[1], aliasName.encode('utf8'))
+    sheetDict[sheetName] = (Doc.addObject('Spreadsheet::Sheet', toStr(sheetName)), sheetFile)
+    sheetNames.append(sheetName)
+
+  aliases = dict()
+  for theAlias in theBookTree.iter(mainNS + 'definedName'):
+    aliasName = theAlias.get('name')
+    m = aliasRefPattern.match(theAlias.text or '')
+    if m and m.group(1) in sheetDict:
+      aliases.setdefault(m.group(1), []).append((m.group(2) + m.group(3), aliasName))
+  return sheetNames, aliases
+
 
 def handleStrings(theStr, sList):
-  print('process Strings: ')
-  stringElements = theStr.getElementsByTagName('t')
-  for sElem in stringElements:
-    print('string: ', getText(sElem.childNodes))
-    sList.append(getText(sElem.childNodes))
+  ''' Appends the shared strings to sList.'''
+  for event, elem in ElementTree.iterparse(theStr):
+    if elem.tag == mainNS + 'si':
+      sList.append(getText(elem))
+      elem.clear()
+
+
+def sheetOrder(sheetNames, sheetRefs):
+  ''' The sheet names ordered such that every sheet comes after the sheets
+  its formulas refer to. Cycles are broken by the order of the workbook.'''
+  order = []
+  visited = set()
+  for name in sheetNames:
+    if name in visited:
+      continue
+    visited.add(name)
+    stack = [(name, iter(sorted(sheetRefs.get(name, ()))))]
+    while stack:
+      actName, refs = stack[-1]
+      for ref in refs:
+        if ref in sheetRefs and ref not in visited:
+          visited.add(ref)
+          stack.append((ref, iter(sorted(sheetRefs[ref]))))
+          break
+      else:
+        stack.pop()
+        order.append(actName)
+  return order
+
+
+def escapeField(content):
+  ''' The content as a field of the tab separated file read by Sheet.importFile.'''
+  for c in '\t"\\\n':
+    if c in content:
+      return '"' + content.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') + '"'
+  return content
+
+
+def fillSheet(actSheet, cells):
+  ''' Sets the contents of all cells at once. The cells are written to a tab
+  separated file read by Sheet.importFile, which changes the sheet only once.
+  cells is a list of (row, column, content) ordered by row and column.'''
+  if not cells:
+    return
+  fd, tmpName = tempfile.mkstemp(suffix='.csv')
+  try:
+    with os.fdopen(fd, 'wb') as f:
+      lastRow = 1
+      fields = []
+      for row, col, content in cells:
+        if row != lastRow:
+          f.write(('\t'.join(fields) + '\n' * (row - lastRow)).encode('utf8'))
+          lastRow = row
+          fields = []
+        if col > len(fields) + 1:
+          fields.extend([''] * (col - len(fields) - 1))
+        fields.append(escapeField(content))
+      f.write(('\t'.join(fields) + '\n').encode('utf8'))
+    imported = actSheet.importFile(tmpName, '\t', '"', '\\')
+  finally:
+    os.remove(tmpName)
+  if not imported:
+    App.Console.PrintWarning("XLSX import: setting the cells of " + actSheet.Name + " one by one\n")
+    for row, col, content in cells:
+      actSheet.set(columnLetters(col) + str(row), toStr(content))
+
+
+def importWorkBook(z, theDoc):
+  ''' Imports all sheets of the opened XLSX-file z into theDoc.'''
+  sheetDict = dict()
+  stringList = []
+  formulas = FormulaCache()
+
+  theBookFile = z.open('xl/workbook.xml')
+  sheetNames, aliases = handleWorkBook(theBookFile, sheetDict, theDoc)
+  theBookFile.close()
+
+  if 'xl/sharedStrings.xml' in z.namelist():
+    theStringFile = z.open('xl/sharedStrings.xml')
+    handleStrings(theStringFile, stringList)
+    theStringFile.close()
+
+  sheetCells = dict()
+  sheetRefs = dict()
+  for sheetName in sheetNames:
+    theSheet, sheetFile = sheetDict[sheetName]
+    f = z.open('xl/worksheets/' + sheetFile)
+    sheetCells[sheetName], sheetRefs[sheetName] = handleWorkSheet(f, sheetName, stringList, formulas)
+    f.close()
+
+  # The sheets referred to by other sheets are filled first, so a single
+  # recompute calculates all references.
+  for sheetName in sheetOrder(sheetNames, sheetRefs):
+    theSheet, sheetFile = sheetDict[sheetName]
+    fillSheet(theSheet, sheetCells.pop(sheetName))
+    for address, aliasName in aliases.get(sheetName, []):
+      theSheet.setAlias(address, toStr(aliasName))
+
+  theDoc.recompute()
+
 
 def open(nameXLSX):
 
   if len(nameXLSX) > 0:
     z=zipfile.ZipFile(nameXLSX)
-    
     theDoc = App.newDocument()
-    
-    sheetDict = dict()
-    stringList = []
-    
-    theBookFile=z.open('xl/workbook.xml')
-    theBook = xml.dom.minidom.parse(theBookFile)
-    handleWorkBook(theBook, sheetDict, theDoc)
-    theBook.unlink()
-    
-    if 'xl/sharedStrings.xml' in z.namelist():
-      theStringFile=z.open('xl/sharedStrings.xml')
-      theStrings = xml.dom.minidom.parse(theStringFile)
-      handleStrings(theStrings, stringList)
-      theStrings.unlink()
-    
-    for sheetSpec in sheetDict:
-      #print("sheetSpec: ", sheetSpec)
-      theSheet, sheetFile = sheetDict[sheetSpec]
-      f=z.open('xl/worksheets/' + sheetFile)
-      myDom = xml.dom.minidom.parse(f)
-      
-      handleWorkSheet(myDom, theSheet, stringList)
-      myDom.unlink()
-    
+    importWorkBook(z, theDoc)
     z.close()
-    # This is needed more than once, otherwise some references are not calculated!
-    theDoc.recompute()
-    theDoc.recompute()
-    theDoc.recompute()
     return theDoc
-    
+
 def insert(nameXLSX,docname):
   try:
           theDoc=App.getDocument(docname)
@@ -456,34 +650,89 @@ def insert(nameXLSX,docname):
           theDoc=App.newDocument(docname)
   App.ActiveDocument = theDoc
 
-  sheetDict = dict()
-  stringList = []
-
   z=zipfile.ZipFile(nameXLSX)
-  theBookFile=z.open('xl/workbook.xml')
-  theBook = xml.dom.minidom.parse(theBookFile)
-  handleWorkBook(theBook, sheetDict, theDoc)
-  theBook.unlink()
-  
-  if 'xl/sharedStrings.xml' in z.namelist():
-    theStringFile=z.open('xl/sharedStrings.xml')
-    theStrings = xml.dom.minidom.parse(theStringFile)
-    handleStrings(theStrings, stringList)
-    theStrings.unlink()
-  
-  for sheetSpec in sheetDict:
-    #print("sheetSpec: ", sheetSpec)
-    theSheet, sheetFile = sheetDict[sheetSpec]
-    f=z.open('xl/worksheets/' + sheetFile)
-    myDom = xml.dom.minidom.parse(f)
-    
-    handleWorkSheet(myDom, theSheet, stringList)
-    myDom.unlink()
-  
+  importWorkBook(z, theDoc)
+  z.close()
+
+
+def writeBenchmarkWorkbook(nameXLSX, rows=10000, sheets=3):
+  ''' Writes a workbook for timing the importer. Every sheet has numbers,
+  shared strings, a shared formula, a repeated formula and a sum with an
+  alias. Each sheet but the last refers to the following one, so the sheets
+  are in the wrong order for a single recompute.'''
+  from xml.sax.saxutils import escape
+  header = '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+  mainAttr = 'xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"'
+  relsNS = 'http://schemas.openxmlformats.org/officeDocument/2006/relationships'
+  docType = 'application/vnd.openxmlformats-officedocument.spreadsheetml.'
+  strings = ['item %d' % i for i in range(100)]
+
+  z = zipfile.ZipFile(nameXLSX, 'w', zipfile.ZIP_DEFLATED)
+  types = [header, '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">',
+           '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>',
+           '<Default Extension="xml" ContentType="application/xml"/>',
+           '<Override PartName="/xl/workbook.xml" ContentType="' + docType + 'sheet.main+xml"/>',
+           '<Override PartName="/xl/sharedStrings.xml" ContentType="' + docType + 'sharedStrings+xml"/>']
+  for s in range(1, sheets + 1):
+    types.append('<Override PartName="/xl/worksheets/sheet%d.xml" ContentType="%sworksheet+xml"/>' % (s, docType))
+  types.append('</Types>')
+  z.writestr('[Content_Types].xml', ''.join(types))
+  z.writestr('_rels/.rels', header + '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+             '<Relationship Id="rId1" Type="' + relsNS + '/officeDocument" Target="xl/workbook.xml"/></Relationships>')
+
+  book = [header, '<workbook ' + mainAttr + ' xmlns:r="' + relsNS + '"><sheets>']
+  bookRels = [header, '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">']
+  names = ['<definedNames>']
+  for s in range(1, sheets + 1):
+    book.append('<sheet name="Sheet%d" sheetId="%d" r:id="rId%d"/>' % (s, s, s))
+    bookRels.append('<Relationship Id="rId%d" Type="%s/worksheet" Target="worksheets/sheet%d.xml"/>' % (s, relsNS, s))
+    names.append('<definedName name="total%d">Sheet%d!$F$1</definedName>' % (s, s))
+  bookRels.append('<Relationship Id="rId%d" Type="%s/sharedStrings" Target="sharedStrings.xml"/>' % (sheets + 1, relsNS))
+  book.append('</sheets>' + ''.join(names) + '</definedNames></workbook>')
+  bookRels.append('</Relationships>')
+  z.writestr('xl/workbook.xml', ''.join(book))
+  z.writestr('xl/_rels/workbook.xml.rels', ''.join(bookRels))
+
+  sst = [header, '<sst %s count="%d" uniqueCount="%d">' % (mainAttr, sheets * rows, len(strings))]
+  for theString in strings:
+    sst.append('<si><t>' + escape(theString) + '</t></si>')
+  sst.append('</sst>')
+  z.writestr('xl/sharedStrings.xml', ''.join(sst))
+
+  for s in range(1, sheets + 1):
+    data = [header, '<worksheet ' + mainAttr + '><sheetData>']
+    for r in range(1, rows + 1):
+      data.append('<row r="%d"><c r="A%d"><v>%d</v></c><c r="B%d" t="s"><v>%d</v></c>' % (r, r, r, r, r % len(strings)))
+      if r == 1:
+        data.append('<c r="C1"><f t="shared" ref="C1:C%d" si="0">A1*2</f></c>' % rows)
+      else:
+        data.append('<c r="C%d"><f t="shared" si="0"/></c>' % r)
+      data.append('<c r="D%d"><f>$A$1+PI()</f></c>' % r)
+      if s < sheets:
+        if r == 1:
+          data.append('<c r="E1"><f t="shared" ref="E1:E%d" si="1">Sheet%d!C1+1</f></c>' % (rows, s + 1))
+        else:
+          data.append('<c r="E%d"><f t="shared" si="1"/></c>' % r)
+      if r == 1:
+        data.append('<c r="F1"><f>SUM(C1:C%d)</f></c>' % rows)
+      data.append('</row>')
+    data.append('</sheetData></worksheet>')
+    z.writestr('xl/worksheets/sheet%d.xml' % s, ''.join(data))
   z.close()
-  # This is needed more than once, otherwise some references are not calculated!
-  theDoc.recompute()
-  theDoc.recompute()
-  theDoc.recompute()
 
 
+def benchmark(rows=10000, sheets=3):
+  ''' Times the import of a workbook written by writeBenchmarkWorkbook.'''
+  import time
+  fd, nameXLSX = tempfile.mkstemp(suffix='.xlsx')
+  os.close(fd)
+  try:
+    writeBenchmarkWorkbook(nameXLSX, rows, sheets)
+    start = time.time()
+    theDoc = open(nameXLSX)
+    duration = time.time() - start
+    App.closeDocument(theDoc.Name)
+  finally:
+    os.remove(nameXLSX)
+  print("XLSX import of %d sheets with %d rows: %.3f s" % (sheets, rows, duration))
+  return duration